@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allows the streaming read replicas of the replica profile to connect to the primary database for replication.
+set -e
+echo "host replication ${POSTGRES_USER} all md5" >> "${PGDATA}/pg_hba.conf"
@@ -0,0 +1,13 @@
+#!/bin/bash
+# Clones the primary database into an empty data directory on the first start, and runs it as a hot standby that
+# streams the changes of the primary database and serves the read-only queries.
+set -e
+if [ ! -s "${PGDATA}/PG_VERSION" ]; then
+  until pg_basebackup --host="${PRIMARY_HOST}" --username="${POSTGRES_USER}" --pgdata="${PGDATA}" \
+      --wal-method=stream --write-recovery-conf; do
+    echo "Waiting for the primary database ${PRIMARY_HOST}."
+    sleep 1
+  done
+  chmod 0700 "${PGDATA}"
+fi
+exec postgres -c hot_standby=on
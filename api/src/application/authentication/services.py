@@ -9,6 +9,8 @@ from application.infrastructure.error.errors import NoneArgumentError
 
 
 class GetJWTService:
+    # The time that the encoded JWTs are valid for.
+    TOKEN_LIFETIME_SECONDS: int = 30000
 
     def __init__(
             self,
@@ -46,7 +48,7 @@ class GetJWTService:
         payload = {
             "user_id": jwt_body.user_id,
             "group": jwt_body.group,
-            "expires": time.time() + 30000
+            "expires": time.time() + self.TOKEN_LIFETIME_SECONDS
         }
         token: bytes = jwt.encode(payload, self.config.secret, algorithm=self.config.algorithm)
 
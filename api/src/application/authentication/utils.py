@@ -1,14 +1,20 @@
+import hashlib
 import time
 
 import jwt
 
 from application.authentication.models import JwtBody
+from application.infrastructure.cache.caches import TTLCache
 from application.infrastructure.configurations.models import Configuration
 from application.users.enums import Group
-from typing import List
+from typing import List, Optional
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+# The verified JWT bodies of the worker, keyed by the digest of their tokens and expiring with the tokens, shared by
+# the authorization services of all the endpoints. The tokens that fail the verification are never cached.
+VERIFIED_JWTS_CACHE: TTLCache = TTLCache(max_size=10000, ttl_seconds=None)
+
 
 class BearerJWTAuthorizationService(HTTPBearer):
 
@@ -17,29 +23,57 @@ class BearerJWTAuthorizationService(HTTPBearer):
         self.config: Configuration = Configuration.get()
         self.permission_groups: List[str] = [group.value for group in permission_groups]
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> JwtBody:
+        """
+        Authorizes the request by its bearer JWT, returning the verified JWT body, so that the endpoints depending
+        on the service receive the JWT body without decoding the token again.
+
+        :param request: The request.
+
+        :return: The verified JWT body of the request.
+
+        :raises HTTPException: When the JWT is not valid, or its group is not permitted.
+        """
         credentials: HTTPAuthorizationCredentials = await super(BearerJWTAuthorizationService, self).__call__(request)
 
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Invalid authentication scheme.")
 
-            self.verify_jwt(jwt_token=credentials.credentials)
-
-            return credentials.credentials
+            return self.verify_jwt(jwt_token=credentials.credentials)
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
 
-    def verify_jwt(self, jwt_token: str) -> dict:
-        try:
-            decoded_jwt_token: JwtBody = self.decode_jwt(jwt_token)
+    def verify_jwt(self, jwt_token: str) -> JwtBody:
+        """
+        Verifies the JWT through the cache of the verified JWT bodies, decoding the token only when it is not cached.
+        The group permissions are checked on every call, as they are specific to the endpoint.
 
-        except Exception:
-            raise HTTPException(status_code=403, detail="Invalid token.")
+        :param jwt_token: The encoded JWT.
+
+        :return: The verified JWT body.
+
+        :raises HTTPException: When the JWT is not valid, or its group is not permitted.
+        """
+        token_digest: bytes = hashlib.sha256(jwt_token.encode()).digest()
+        decoded_jwt_token: Optional[JwtBody] = VERIFIED_JWTS_CACHE.get(token_digest)
+
+        if decoded_jwt_token is None:
+            try:
+                decoded_jwt_token = self.decode_jwt(jwt_token)
+            except Exception:
+                raise HTTPException(status_code=403, detail="Invalid token.")
+
+            # The token is evicted when it expires, and is decoded again to be rejected from then on.
+            VERIFIED_JWTS_CACHE.set(
+                token_digest, decoded_jwt_token, ttl_seconds=decoded_jwt_token.expires - time.time()
+            )
 
         if decoded_jwt_token.group not in self.permission_groups:
             raise HTTPException(status_code=403, detail="You can't access this resource.")
 
+        return decoded_jwt_token
+
     def decode_jwt(self, token: str) -> JwtBody:
         decoded_token = jwt.decode(token, self.config.secret, algorithms=[self.config.algorithm])
         if decoded_token["expires"] < time.time():
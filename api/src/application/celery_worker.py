@@ -8,6 +8,6 @@ Configuration.initialize()
 celery = Celery(__name__)
 celery.conf.broker_url = Configuration.get().celery_broker_url
 celery.conf.result_backend = Configuration.get().celery_result_backend
-celery.autodiscover_tasks(packages=['application.socrata'])
+celery.autodiscover_tasks(packages=['application.socrata', 'application.housing_units'])
 
 DatabaseEngineWrapper.initialize()
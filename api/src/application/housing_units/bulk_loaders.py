@@ -0,0 +1,345 @@
+import csv
+import io
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Iterator
+from uuid import uuid4
+
+from psycopg2.errors import LockNotAvailable
+from sqlalchemy import insert, or_, func, MetaData, Table, literal_column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.future import select
+
+from application.housing_units.caches import invalidate_housing_units_caches, refresh_housing_units_dictionaries
+from application.housing_units.models import HousingUnit, MISSING_BUILDING_ID
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class HousingUnitsBulkLoader:
+
+    # The columns of the unique index that the bulk upserts are conflicting on, and its expressions, which key the
+    # missing building ids as the MISSING_BUILDING_ID. The literal is not bound, so that the conflict target matches
+    # the expression of the index.
+    UPSERT_KEY_COLUMNS: List[str] = ['project_id', 'building_id']
+    UPSERT_KEY_ELEMENTS: List[Any] = [
+        HousingUnit.__table__.c.project_id,
+        func.coalesce(HousingUnit.__table__.c.building_id, literal_column(str(MISSING_BUILDING_ID))),
+    ]
+    # The shadow table that the full reloads are loaded into, before being swapped with the HousingUnit table.
+    STAGING_TABLE: Table = HousingUnit.__table__.to_metadata(MetaData(), name='housingunits_staging')
+    # The prefix of the replaced HousingUnit tables, that are dropped after the swap.
+    REPLACED_TABLE_PREFIX: str = 'housingunits_old_'
+    # The swap waits at most the lock timeout for the running queries, so that the queries arriving after it are not
+    # queued behind the swap for long, and it is retried for a limited number of attempts.
+    SWAP_LOCK_TIMEOUT: str = '2s'
+    SWAP_MAX_ATTEMPTS: int = 5
+    SWAP_RETRY_BACKOFF_SECONDS: float = 1.0
+
+    def __init__(self, db_engine: DatabaseEngineWrapper = None):
+        self.db_engine = db_engine
+
+    def bulk_insert(
+            self,
+            housing_unit_mappings: List[Dict[str, Any]],
+            staging: bool = False,
+    ) -> None:
+        """
+        HousingUnit table bulk insert operation using the sync session, with a single Core insert statement executed
+        with all the provided mappings, skipping the ORM unit of work.
+
+        :param housing_unit_mappings: The HousingUnit fields to bulk insert, keyed by the HousingUnit attribute names.
+        :param staging: Flag for inserting the rows into the staging table instead of the HousingUnit table.
+        """
+        if not housing_unit_mappings:
+            return
+
+        table: Table = self.STAGING_TABLE if staging else HousingUnit.__table__
+        rows: List[Dict[str, Any]] = self._bulk_load_rows(housing_unit_mappings)
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute(insert(table), rows)
+                # The canonical values of the staging table are refreshed once it is swapped in.
+                if staging:
+                    return
+                collected_values: bool = HousingUnitsRepository.collect_canonical_values(session, rows)
+        invalidate_housing_units_caches()
+        if collected_values:
+            refresh_housing_units_dictionaries()
+
+    def bulk_upsert(
+            self,
+            housing_unit_mappings: List[Dict[str, Any]],
+    ) -> None:
+        """
+        HousingUnit table bulk upsert operation using the sync session, with a single Core INSERT ... ON CONFLICT
+        statement. The rows conflicting on their project_id and building_id are updated in place, and their version is
+        incremented when any of their columns is changed.
+
+        :param housing_unit_mappings: The HousingUnit fields to bulk upsert, keyed by the HousingUnit attribute names.
+        """
+        if not housing_unit_mappings:
+            return
+
+        updated_column_names: List[str] = [
+            column_name for column_name in HousingUnitsRepository.BULK_LOAD_COLUMNS.values()
+            if column_name != 'uuid' and column_name not in self.UPSERT_KEY_COLUMNS
+        ]
+        statement: postgresql.Insert = postgresql.insert(HousingUnit.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=self.UPSERT_KEY_ELEMENTS,
+            set_={
+                **{column_name: statement.excluded[column_name] for column_name in updated_column_names},
+                'version': HousingUnit.__table__.c.version + 1,
+                'updated_at': HousingUnitsRepository.UTC_NOW,
+            },
+            # The unchanged rows are not updated, keeping their version.
+            where=or_(*[
+                HousingUnit.__table__.c[column_name].is_distinct_from(statement.excluded[column_name])
+                for column_name in updated_column_names
+            ])
+        )
+
+        # A row can be upserted once per statement, so only the last of the rows with the same key is upserted.
+        rows: List[Dict[str, Any]] = list({
+            (row['project_id'], MISSING_BUILDING_ID if row.get('building_id') is None else row['building_id']): row
+            for row in self._bulk_load_rows(housing_unit_mappings)
+        }.values())
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute(statement, rows)
+                collected_values: bool = HousingUnitsRepository.collect_canonical_values(session, rows)
+        invalidate_housing_units_caches()
+        if collected_values:
+            refresh_housing_units_dictionaries()
+
+    def bulk_copy(
+            self,
+            housing_unit_mappings: List[Dict[str, Any]],
+            staging: bool = False,
+    ) -> None:
+        """
+        HousingUnit table bulk load operation using the PostgreSQL COPY FROM STDIN in CSV format, through the raw
+        connection of the sync session. Note that in CSV format the empty strings are loaded as NULL values.
+
+        :param housing_unit_mappings: The HousingUnit fields to bulk load, keyed by the HousingUnit attribute names.
+        :param staging: Flag for loading the rows into the staging table instead of the HousingUnit table.
+        """
+        if not housing_unit_mappings:
+            return
+
+        csv_buffer: io.StringIO = io.StringIO()
+        csv_writer = csv.writer(csv_buffer)
+        for housing_unit_mapping in housing_unit_mappings:
+            # The uuid column default is not applied by COPY.
+            if housing_unit_mapping.get('uuid') is None:
+                housing_unit_mapping = dict(housing_unit_mapping, uuid=uuid4())
+
+            csv_writer.writerow([
+                housing_unit_mapping.get(attribute_name) for attribute_name in HousingUnitsRepository.BULK_LOAD_COLUMNS
+            ])
+        csv_buffer.seek(0)
+
+        copy_statement: str = "COPY {0} ({1}) FROM STDIN WITH (FORMAT csv)".format(
+            self.STAGING_TABLE.name if staging else HousingUnit.__tablename__,
+            ', '.join(HousingUnitsRepository.BULK_LOAD_COLUMNS.values())
+        )
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                cursor = session.connection().connection.cursor()
+                cursor.copy_expert(copy_statement, csv_buffer)
+                # The canonical values of the staging table are refreshed once it is swapped in.
+                if staging:
+                    return
+                collected_values: bool = HousingUnitsRepository.collect_canonical_values(
+                    session, self._bulk_load_rows(housing_unit_mappings)
+                )
+        invalidate_housing_units_caches()
+        if collected_values:
+            refresh_housing_units_dictionaries()
+
+    @contextmanager
+    def staging_load_lock(self) -> Iterator[None]:
+        """
+        Holds the advisory lock of the staging table loads for the duration of the context, on its own autocommit
+        connection of the sync engine, so that the API writes are rejected meanwhile.
+        """
+        with self.db_engine.get_engine().engine.connect() as connection:
+            connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+            connection.execute(select(func.pg_advisory_lock(HousingUnitsRepository.STAGING_LOAD_LOCK_KEY)))
+            try:
+                yield
+            finally:
+                connection.execute(select(func.pg_advisory_unlock(HousingUnitsRepository.STAGING_LOAD_LOCK_KEY)))
+
+    def create_staging_table(self) -> None:
+        """
+        Creates the staging table of the full reloads using the sync session, like the HousingUnit table but without
+        its indexes, replacing the one left over from a failed reload.
+        """
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute("DROP TABLE IF EXISTS {0}".format(self.STAGING_TABLE.name))
+                session.execute(
+                    "CREATE TABLE {0} (LIKE {1} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)".format(
+                        self.STAGING_TABLE.name, HousingUnit.__tablename__
+                    )
+                )
+
+    def drop_staging_table(self) -> None:
+        """
+        Drops the staging table of the full reloads using the sync session, when its load has failed.
+        """
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute("DROP TABLE IF EXISTS {0}".format(self.STAGING_TABLE.name))
+
+    def build_staging_table_indexes(self) -> None:
+        """
+        Builds the indexes and the constraints of the HousingUnit table on the loaded staging table using the sync
+        session, under the names that the swap renames them back from, and analyzes it.
+        """
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                indexes = session.execute(
+                    "SELECT i.indexname, i.indexdef, pg_get_constraintdef(c.oid) "
+                    "FROM pg_indexes i "
+                    "LEFT JOIN pg_constraint c "
+                    "ON c.conname = i.indexname AND c.conrelid = CAST(:table_name AS regclass) "
+                    "WHERE i.schemaname = current_schema() AND i.tablename = :table_name",
+                    {'table_name': HousingUnit.__tablename__}
+                ).all()
+
+                for index_name, index_definition, constraint_definition in indexes:
+                    staging_index_name: str = self._renamed_index_name(index_name, self.STAGING_TABLE.name)
+                    if constraint_definition:
+                        session.execute(
+                            "ALTER TABLE {0} ADD CONSTRAINT {1} {2}".format(
+                                self.STAGING_TABLE.name, staging_index_name, constraint_definition
+                            )
+                        )
+                    else:
+                        session.execute(
+                            index_definition.replace(
+                                ' INDEX {0} ON '.format(index_name), ' INDEX {0} ON '.format(staging_index_name), 1
+                            ).replace(
+                                '.{0} USING '.format(HousingUnit.__tablename__),
+                                '.{0} USING '.format(self.STAGING_TABLE.name),
+                                1
+                            )
+                        )
+
+                session.execute("ANALYZE {0}".format(self.STAGING_TABLE.name))
+
+    def swap_staging_table(self) -> str:
+        """
+        Swaps the staging table in place of the HousingUnit table using the sync session, by renaming the tables and
+        their indexes in a single transaction, which is retried when its locks are not acquired within the
+        SWAP_LOCK_TIMEOUT.
+
+        :return: The name that the replaced HousingUnit table is renamed to, for being dropped afterwards.
+
+        :raises OperationalError: When the locks of the swap are not acquired after the SWAP_MAX_ATTEMPTS.
+        """
+        replaced_table_name: str = '{0}{1}'.format(self.REPLACED_TABLE_PREFIX, uuid4().hex[:8])
+
+        attempt: int = 1
+        while True:
+            try:
+                with self.db_engine.get_session() as session:
+                    with session.begin():
+                        session.execute("SET LOCAL lock_timeout = '{0}'".format(self.SWAP_LOCK_TIMEOUT))
+                        index_names: List[str] = session.execute(
+                            "SELECT indexname FROM pg_indexes "
+                            "WHERE schemaname = current_schema() AND tablename = :table_name",
+                            {'table_name': HousingUnit.__tablename__}
+                        ).scalars().all()
+                        id_sequence_name: Optional[str] = session.execute(
+                            "SELECT pg_get_serial_sequence(:table_name, 'id')",
+                            {'table_name': HousingUnit.__tablename__}
+                        ).scalar()
+
+                        session.execute(
+                            "ALTER TABLE {0} RENAME TO {1}".format(HousingUnit.__tablename__, replaced_table_name)
+                        )
+                        for index_name in index_names:
+                            session.execute(
+                                "ALTER INDEX {0} RENAME TO {1}".format(
+                                    index_name, self._renamed_index_name(index_name, replaced_table_name)
+                                )
+                            )
+
+                        session.execute(
+                            "ALTER TABLE {0} RENAME TO {1}".format(self.STAGING_TABLE.name, HousingUnit.__tablename__)
+                        )
+                        for index_name in index_names:
+                            session.execute(
+                                "ALTER INDEX {0} RENAME TO {1}".format(
+                                    self._renamed_index_name(index_name, self.STAGING_TABLE.name), index_name
+                                )
+                            )
+
+                        # The id sequence is shared by the two tables, and it is dropped along with its owner table.
+                        if id_sequence_name:
+                            session.execute(
+                                "ALTER SEQUENCE {0} OWNED BY {1}.id".format(id_sequence_name, HousingUnit.__tablename__)
+                            )
+
+                invalidate_housing_units_caches()
+                return replaced_table_name
+            except OperationalError as ex:
+                if not isinstance(ex.orig, LockNotAvailable) or attempt >= self.SWAP_MAX_ATTEMPTS:
+                    raise
+
+            time.sleep(self.SWAP_RETRY_BACKOFF_SECONDS * attempt)
+            attempt += 1
+
+    def drop_replaced_table(self, table_name: str) -> None:
+        """
+        Drops a HousingUnit table replaced by the swap_staging_table using the sync session.
+
+        :param table_name: The replaced HousingUnit table name.
+
+        :raises InvalidArgumentError: If the table name is not a replaced HousingUnit table name.
+        """
+        if not table_name or not table_name.startswith(self.REPLACED_TABLE_PREFIX) or not table_name.isidentifier():
+            raise InvalidArgumentError("The table {0} is not a replaced HousingUnit table.".format(table_name))
+
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute("DROP TABLE IF EXISTS {0}".format(table_name))
+
+    @staticmethod
+    def _renamed_index_name(index_name: str, table_name: str) -> str:
+        """
+        Names a HousingUnit table index after another table, by replacing the table name that the index name includes.
+
+        :param index_name: The HousingUnit table index name.
+        :param table_name: The table name that the index is named after.
+
+        :return: The index name of the table.
+        """
+        if HousingUnit.__tablename__ in index_name:
+            return index_name.replace(HousingUnit.__tablename__, table_name, 1)
+
+        return '{0}_{1}'.format(table_name, index_name)
+
+    @staticmethod
+    def _bulk_load_rows(housing_unit_mappings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Re-keys the HousingUnit mappings by the table column names, for being executed with the Core statements.
+
+        :param housing_unit_mappings: The HousingUnit fields, keyed by the HousingUnit attribute names.
+
+        :return: The HousingUnit fields, keyed by the HousingUnit table column names.
+        """
+        return [
+            {
+                column_name: housing_unit_mapping[attribute_name]
+                for attribute_name, column_name in HousingUnitsRepository.BULK_LOAD_COLUMNS.items()
+                if attribute_name in housing_unit_mapping
+            }
+            for housing_unit_mapping in housing_unit_mappings
+        ]
@@ -0,0 +1,52 @@
+from typing import Optional
+from uuid import UUID
+
+from application.housing_units.models import HousingUnit
+from application.infrastructure.cache.generations import CacheGeneration
+from application.infrastructure.cache.invalidations import CacheInvalidations
+
+# The generation of the HousingUnit table, bumped after every committed write of the HousingUnits, and
+# included in the keys of the HousingUnit caches.
+HOUSING_UNITS_CACHE_GENERATION: CacheGeneration = CacheGeneration(name=HousingUnit.__tablename__)
+# The invalidations of the in-memory HousingUnit caches of the API workers, keyed by the HousingUnit uuid.
+HOUSING_UNITS_CACHE_INVALIDATIONS: CacheInvalidations = CacheInvalidations(name=HousingUnit.__tablename__)
+# The invalidations of the in-memory dictionaries of the HousingUnit values, e.g. the distinct street names, which are
+# published once an ingestion is completed, and after the writes collecting new values, instead of after every write.
+HOUSING_UNITS_DICTIONARIES_INVALIDATIONS: CacheInvalidations = CacheInvalidations(
+    name='{0}_dictionaries'.format(HousingUnit.__tablename__)
+)
+
+
+def housing_unit_cache_key(uuid: str) -> Optional[str]:
+    """
+    Normalises the HousingUnit uuid to the key of the in-memory HousingUnit caches, so that the different spellings
+    of the same uuid are cached and invalidated under the same key.
+
+    :param uuid: The HousingUnit uuid.
+
+    :return: The cache key, or None when the uuid is not a valid one.
+    """
+    try:
+        return str(UUID(str(uuid)))
+    except ValueError:
+        return None
+
+
+def invalidate_housing_units_caches(uuid: Optional[str] = None) -> None:
+    """
+    Invalidates the HousingUnit caches after a committed write to the HousingUnit table, by bumping the generation
+    of the shared caches and publishing the invalidation of the in-memory ones.
+
+    :param uuid: The uuid of the written HousingUnit, or None when any HousingUnit may have been written.
+        All the HousingUnits are invalidated when the uuid is not a valid one.
+    """
+    HOUSING_UNITS_CACHE_GENERATION.bump()
+    HOUSING_UNITS_CACHE_INVALIDATIONS.publish(housing_unit_cache_key(uuid) if uuid else None)
+
+
+def refresh_housing_units_dictionaries() -> None:
+    """
+    Invalidates the in-memory dictionaries of the HousingUnit values of every worker after their values are collected,
+    so that they are loaded again with the values of the written HousingUnits.
+    """
+    HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.publish()
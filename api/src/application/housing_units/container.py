@@ -1,11 +1,15 @@
 from dependency_injector import containers, providers
 from dependency_injector.providers import Singleton
 
+from application.housing_units.exporters import HousingUnitsExporter
 from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.cache.caches import TTLCache, RedisCache
 from application.infrastructure.database.database import DatabaseEngineWrapper
 from application.housing_units.services import HousingUnitsDataIngestionService, FilterHousingUnitsService, \
     RetrieveHousingUnitService, CreateHousingUnitService, UpdateHousingUnitService, HousingUnitFieldsSanityCheckService, \
-    DeleteHousingUnitService
+    DeleteHousingUnitService, StreamHousingUnitsService, ExportHousingUnitsService, RetrieveHousingUnitsExportService, \
+    CachedFilterHousingUnitsService, GetHousingUnitsCacheStatsService, SearchHousingUnitsService, \
+    AutocompleteStreetNamesService, NearHousingUnitsService, TileHousingUnitsService
 from application.task_status.services import GetTaskStatusReportService
 
 
@@ -25,19 +29,100 @@ class HousingUnitsContainer(containers.DeclarativeContainer):
         db_engine=DatabaseEngineWrapper
     )
 
+    housing_units_exporter: Singleton = providers.Singleton(
+        HousingUnitsExporter,
+        db_engine=DatabaseEngineWrapper
+    )
+
     housing_units_data_ingestion_service: Singleton = providers.Singleton(
         HousingUnitsDataIngestionService,
         get_task_status_report_service=GetTaskStatusReportService()
     )
 
+    housing_units_totals_cache: Singleton = providers.Singleton(
+        TTLCache,
+        max_size=1024,
+        ttl_seconds=60.0,
+    )
+
     filter_housing_units_service: Singleton = providers.Singleton(
         FilterHousingUnitsService,
         housing_units_repository=housing_units_repository,
+        housing_units_totals_cache=housing_units_totals_cache,
+    )
+
+    housing_units_filter_cache: Singleton = providers.Singleton(
+        RedisCache,
+        name='housing_units_filter',
+        ttl_seconds=30,
+        max_value_bytes=1024 * 1024,
+    )
+
+    cached_filter_housing_units_service: Singleton = providers.Singleton(
+        CachedFilterHousingUnitsService,
+        filter_housing_units_service=filter_housing_units_service,
+        housing_units_filter_cache=housing_units_filter_cache,
+    )
+
+    stream_housing_units_service: Singleton = providers.Singleton(
+        StreamHousingUnitsService,
+        housing_units_repository=housing_units_repository,
+    )
+
+    search_housing_units_service: Singleton = providers.Singleton(
+        SearchHousingUnitsService,
+        housing_units_repository=housing_units_repository,
+    )
+
+    autocomplete_street_names_service: Singleton = providers.Singleton(
+        AutocompleteStreetNamesService,
+        housing_units_repository=housing_units_repository,
+    )
+
+    near_housing_units_service: Singleton = providers.Singleton(
+        NearHousingUnitsService,
+        housing_units_repository=housing_units_repository,
+    )
+
+    housing_units_tiles_cache: Singleton = providers.Singleton(
+        RedisCache,
+        name='housing_units_tiles',
+        ttl_seconds=300,
+        max_value_bytes=64 * 1024,
+    )
+
+    tile_housing_units_service: Singleton = providers.Singleton(
+        TileHousingUnitsService,
+        housing_units_repository=housing_units_repository,
+        housing_units_tiles_cache=housing_units_tiles_cache,
+    )
+
+    export_housing_units_service: Singleton = providers.Singleton(
+        ExportHousingUnitsService,
+        housing_units_repository=housing_units_repository,
+        housing_units_exporter=housing_units_exporter,
+        get_task_status_report_service=GetTaskStatusReportService()
+    )
+
+    retrieve_housing_units_export_service: Singleton = providers.Singleton(
+        RetrieveHousingUnitsExportService,
+    )
+
+    housing_units_cache: Singleton = providers.Singleton(
+        TTLCache,
+        max_size=10000,
+        ttl_seconds=300.0,
     )
 
     retrieve_housing_unit_service: Singleton = providers.Singleton(
         RetrieveHousingUnitService,
         housing_units_repository=housing_units_repository,
+        housing_units_cache=housing_units_cache,
+    )
+
+    get_housing_units_cache_stats_service: Singleton = providers.Singleton(
+        GetHousingUnitsCacheStatsService,
+        housing_units_cache=housing_units_cache,
     )
 
     create_housing_unit_service: Singleton = providers.Singleton(
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from typing import Any, Tuple, Dict
+
+from application.housing_units.enums import HousingUnitSortKey
+from application.housing_units.errors import InvalidCursorError
+
+# The type of the sort key values that the cursors hold, for validating the decoded cursors.
+SORT_KEY_VALUE_TYPES: Dict[HousingUnitSortKey, type] = {
+    HousingUnitSortKey.id: int,
+    HousingUnitSortKey.project_id: str,
+    HousingUnitSortKey.street_name: str,
+    HousingUnitSortKey.borough: str,
+    HousingUnitSortKey.total_units: int,
+}
+
+
+def encode_cursor(sort_key: HousingUnitSortKey, sort_value: Any, housing_unit_id: int) -> str:
+    """
+    Encodes the position of a HousingUnit in the sorted HousingUnits to an opaque url-safe cursor.
+
+    :param sort_key: The sort key of the HousingUnits.
+    :param sort_value: The sort key value of the HousingUnit.
+    :param housing_unit_id: The HousingUnit id, breaking the ties of the sort key values.
+
+    :return: The cursor of the HousingUnit position.
+    """
+    payload: bytes = json.dumps([sort_key.value, sort_value, housing_unit_id], separators=(',', ':')).encode('utf-8')
+
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_key: HousingUnitSortKey) -> Tuple[Any, int]:
+    """
+    Decodes a cursor created by the encode_cursor, for continuing the HousingUnits sorted by the same sort key.
+
+    :param cursor: The cursor of the HousingUnit position.
+    :param sort_key: The sort key of the HousingUnits.
+
+    :return: The sort key value and the id of the HousingUnit that the cursor points to.
+
+    :raises InvalidCursorError: If the cursor is malformed, or it was created for another sort key.
+    """
+    try:
+        payload: bytes = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort_key, sort_value, housing_unit_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError("The provided cursor is not valid.")
+
+    if cursor_sort_key != sort_key.value:
+        raise InvalidCursorError("The provided cursor is not valid for sorting by {0}.".format(sort_key.value))
+    if not isinstance(sort_value, SORT_KEY_VALUE_TYPES[sort_key]) or not isinstance(housing_unit_id, int):
+        raise InvalidCursorError("The provided cursor is not valid.")
+
+    return sort_value, housing_unit_id
@@ -0,0 +1,123 @@
+import heapq
+from bisect import bisect_left
+from typing import List, Tuple, Iterable, Dict, Any, Optional
+
+from attr import attrs, attrib
+
+from application.housing_units.models import CANONICAL_VALUE_COLUMNS
+
+
+@attrs
+class StreetNameSuggestion:
+    street_name = attrib(type=str)
+    # The number of HousingUnits on the street, which the suggestions are ranked by.
+    housing_units = attrib(type=int)
+
+
+def normalise_value(value: Any) -> str:
+    """
+    Normalises the value of a categorical HousingUnit column to the key that the values are looked up by, so that
+    the spellings differing only by the case or by the whitespace are the same value.
+
+    :param value: The column value, e.g. a street name or a prefix of it.
+
+    :return: The case folded value, with its whitespace collapsed to single spaces.
+    """
+    return ' '.join(str(value).split()).casefold()
+
+
+class StreetNamesDictionary:
+    """
+    The distinct street names of the HousingUnits, held in memory by every worker for autocompleting the street
+    names without querying the HousingUnit table. The names are sorted by their normalised keys, so the names
+    starting with a prefix are a contiguous range, found by binary search, and only that range is ranked.
+    """
+
+    def __init__(self, street_name_counts: Iterable[Tuple[str, int]]) -> None:
+        """
+        :param street_name_counts: The distinct street names of the HousingUnit table, with their HousingUnit counts.
+            The spellings of the same street are merged, under the spelling of the most HousingUnits.
+        """
+        streets: Dict[str, List[Tuple[int, str]]] = {}
+        for street_name, housing_units in street_name_counts:
+            if street_name and street_name.strip():
+                streets.setdefault(normalise_value(street_name), []).append((housing_units, street_name))
+
+        self._keys: List[str] = sorted(streets)
+        self._suggestions: List[StreetNameSuggestion] = [
+            StreetNameSuggestion(
+                street_name=max(streets[key])[1],
+                housing_units=sum(housing_units for housing_units, _ in streets[key]),
+            )
+            for key in self._keys
+        ]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def complete(self, prefix: str, limit: int) -> List[StreetNameSuggestion]:
+        """
+        Returns the street names starting with the prefix, ranked by their HousingUnit counts, and then by name.
+
+        :param prefix: The prefix of the street names, matched regardless of the case and of the whitespace.
+        :param limit: The maximum number of returned street names.
+
+        :return: The ranked street names starting with the prefix.
+        """
+        key: str = normalise_value(prefix)
+        if not key:
+            return []
+
+        start: int = bisect_left(self._keys, key)
+        # The keys starting with the prefix sort before the prefix with its last character incremented.
+        end: int = bisect_left(self._keys, key[:-1] + chr(ord(key[-1]) + 1), lo=start)
+
+        positions: List[int] = heapq.nsmallest(
+            limit, range(start, end), key=lambda position: (-self._suggestions[position].housing_units, position)
+        )
+        return [self._suggestions[position] for position in positions]
+
+
+class HousingUnitDictionaries:
+    """
+    The dictionaries of the HousingUnit values, held in memory by every worker: the canonical values of the
+    categorical HousingUnit columns, keyed by their normalised values, so that the filtering values are normalised
+    with a single lookup, and the distinct street names of the autocomplete.
+    """
+
+    def __init__(self, canonical_values: Iterable[Tuple[str, str, int]]) -> None:
+        """
+        :param canonical_values: The collected values of the CANONICAL_VALUE_COLUMNS, as the column name, the value
+            and its HousingUnit count. Every stored spelling of the same value is kept, as the HousingUnits are
+            stored with their own spellings.
+        """
+        spellings: Dict[str, Dict[str, List[str]]] = {column_name: {} for column_name in CANONICAL_VALUE_COLUMNS}
+        street_name_counts: List[Tuple[str, int]] = []
+        for column_name, value, housing_units in canonical_values:
+            spellings.setdefault(column_name, {}).setdefault(normalise_value(value), []).append(value)
+            if column_name == 'street_name':
+                street_name_counts.append((value, housing_units))
+
+        self._canonical_values: Dict[str, Dict[str, Tuple[str, ...]]] = {
+            column_name: {key: tuple(sorted(set(values))) for key, values in column_spellings.items()}
+            for column_name, column_spellings in spellings.items()
+        }
+        self.street_names: StreetNamesDictionary = StreetNamesDictionary(street_name_counts)
+
+    def canonical_values(self, column_name: str, value: Any) -> Optional[Tuple[str, ...]]:
+        """
+        Normalises the filtering value of a categorical HousingUnit column to its canonical values, which are all the
+        spellings of the value stored in the HousingUnit table. The values of the columns without any collected values
+        are not normalised, as the HousingUnits may have been written before their values were collected.
+
+        :param column_name: The name of the categorical HousingUnit column.
+        :param value: The filtering value.
+
+        :return: The sorted canonical values, the value itself when no values of the column are collected, or None
+            when no HousingUnit has the value.
+        """
+        column_values: Optional[Dict[str, Tuple[str, ...]]] = self._canonical_values.get(column_name)
+        if not column_values:
+            return (value,)
+
+        return column_values.get(normalise_value(value))
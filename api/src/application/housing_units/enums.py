@@ -0,0 +1,89 @@
+from enum import Enum
+from typing import List
+
+
+class LoadStrategy(Enum):
+    """
+    The strategies that the data ingestion can use for loading the rows into the HousingUnit table.
+    """
+    core = 'core'
+    copy = 'copy'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class IngestionMode(Enum):
+    """
+    The modes that the data ingestion can run with. The full mode downloads the whole dataset, while the incremental
+    mode downloads only the rows updated since the last ingestion of the dataset, and upserts them into the
+    HousingUnit table. The full mode loads the whole dataset into a staging table, which replaces the HousingUnit
+    table once completely loaded, so that the table is never empty or partially loaded during the reload.
+    """
+    full = 'full'
+    incremental = 'incremental'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class HousingUnitSortKey(Enum):
+    """
+    The HousingUnit columns that the filtered HousingUnits can be sorted by. The columns are not nullable, so that
+    the pages are continued by comparing the sort key and id of the last HousingUnit of the previous page.
+    """
+    id = 'id'
+    project_id = 'project_id'
+    street_name = 'street_name'
+    borough = 'borough'
+    total_units = 'total_units'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class HousingUnitField(Enum):
+    """
+    The HousingUnit fields of the filtered HousingUnits, that the sparse fieldsets can select.
+    """
+    uuid = 'uuid'
+    project_id = 'project_id'
+    street_name = 'street_name'
+    borough = 'borough'
+    postcode = 'postcode'
+    reporting_construction_type = 'reporting_construction_type'
+    total_units = 'total_units'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class TotalMode(Enum):
+    """
+    The ways that the total number of the filtered HousingUnits is computed. The exact mode counts the matching rows,
+    while the estimated mode returns the PostgreSQL planner estimate, which doesn't scan the rows.
+    """
+    exact = 'exact'
+    estimated = 'estimated'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class ExportFormat(Enum):
+    """
+    The file formats that the HousingUnits can be exported to. The csv format is exported by the PostgreSQL COPY,
+    while the parquet and arrow ones are written from columnar batches of the exported rows.
+    """
+    csv = 'csv'
+    parquet = 'parquet'
+    arrow = 'arrow'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
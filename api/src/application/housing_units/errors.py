@@ -1,5 +1,31 @@
-from application.infrastructure.error.errors import ValidationError
+from application.infrastructure.error.errors import ValidationError, HousingUnitBaseError
 
 
 class InvalidNumUnitsError(ValidationError):
     pass
+
+
+class InvalidCursorError(ValidationError):
+    pass
+
+
+class InvalidFieldsError(ValidationError):
+    pass
+
+
+class InvalidSearchQueryError(ValidationError):
+    pass
+
+
+class InvalidLocationError(ValidationError):
+    pass
+
+
+class InvalidTileError(ValidationError):
+    pass
+
+
+class HousingUnitConflictError(HousingUnitBaseError):
+    message = "Housing Unit conflict error."
+    error_type = "ConflictError"
+    status_code = 409
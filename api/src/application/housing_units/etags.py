@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from attr import attrs, attrib
+
+from application.housing_units.models import HousingUnit
+
+# The If-None-Match value matching any current representation.
+ANY_ETAG: str = '*'
+
+
+@attrs
+class HousingUnitsPage:
+    """
+    The serialised page of the filtered HousingUnits, or the serialised map tile of the clustered HousingUnits, and
+    its ETag. The content is not provided when the page matches the If-None-Match of the request, and the 304 Not
+    Modified response is returned instead.
+    """
+    content = attrib(type=Optional[bytes], default=None)
+    etag = attrib(type=Optional[str], default=None)
+
+
+def housing_unit_etag(housing_unit: HousingUnit) -> str:
+    """
+    Returns the weak ETag of the HousingUnit, which is changed by every write that changes the HousingUnit row.
+    The updated_at is part of the ETag, so that a HousingUnit deleted and created again with the same uuid doesn't
+    reuse the ETag of the deleted one.
+
+    :param housing_unit: The HousingUnit.
+
+    :return: The ETag of the HousingUnit.
+    """
+    return 'W/"{0}-{1}"'.format(housing_unit.version, _utc(housing_unit.updated_at).strftime('%Y%m%d%H%M%S%f'))
+
+
+def housing_unit_last_modified(housing_unit: HousingUnit) -> str:
+    """
+    Returns the Last-Modified HTTP date of the HousingUnit.
+
+    :param housing_unit: The HousingUnit.
+
+    :return: The HTTP date of the latest write that changed the HousingUnit row.
+    """
+    return format_datetime(_utc(housing_unit.updated_at), usegmt=True)
+
+
+def housing_units_page_etag(cache_key: Any) -> str:
+    """
+    Returns the weak ETag of the page of the filtered HousingUnits cached under the cache key. The cache key holds the
+    HousingUnit table generation, which is changed by every write to the HousingUnit table, so the ETags of the pages
+    are changed by every write too, and the page doesn't have to be filtered for checking whether it is changed.
+
+    :param cache_key: The cache key of the page, holding the table generation and the normalised request parameters.
+
+    :return: The ETag of the page.
+    """
+    return 'W/"{0}"'.format(hashlib.sha256(repr(cache_key).encode()).hexdigest()[:32])
+
+
+def is_not_modified(
+        etag: str,
+        if_none_match: Optional[str] = None,
+        last_modified: Optional[datetime] = None,
+        if_modified_since: Optional[str] = None,
+) -> bool:
+    """
+    Evaluates the conditional GET headers, against the current validators of the requested representation.
+    The If-Modified-Since is evaluated only when If-None-Match is not provided, and the ETags are compared weakly.
+
+    :param etag: The current ETag.
+    :param if_none_match: The If-None-Match header of the request.
+    :param last_modified: The current modification time, or None when it is not known.
+    :param if_modified_since: The If-Modified-Since header of the request.
+
+    :return: Whether the representation is not modified, and the 304 Not Modified response is returned.
+    """
+    if if_none_match is not None:
+        if if_none_match.strip() == ANY_ETAG:
+            return True
+
+        return _opaque_tag(etag) in [_opaque_tag(tag) for tag in if_none_match.split(',') if tag.strip()]
+
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            modified_since: datetime = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError, IndexError):
+            # An invalid HTTP date is ignored.
+            return False
+
+        # The HTTP dates have a precision of one second.
+        return _utc(last_modified).replace(microsecond=0) <= modified_since
+
+    return False
+
+
+def _opaque_tag(etag: str) -> str:
+    """
+    :param etag: The weak or strong ETag.
+
+    :return: The opaque tag of the ETag, which is compared by the weak comparison.
+    """
+    etag = etag.strip()
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def _utc(value: datetime) -> datetime:
+    """
+    :param value: The naive UTC datetime, as stored in the HousingUnit table, or the aware datetime.
+
+    :return: The aware UTC datetime.
+    """
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
@@ -0,0 +1,314 @@
+import asyncio
+from typing import Dict, List, Any, BinaryIO, Optional, AsyncIterator, Iterator, IO, Tuple
+
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+from attr import attrs, attrib
+from sqlalchemy import Integer, Float, DateTime, Column
+from sqlalchemy.engine import Result, Row
+from sqlalchemy.ext.asyncio import AsyncResult
+
+from application.housing_units.enums import ExportFormat
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.rest_api.task_status.schemas import TaskStatus
+
+EXPORT_MEDIA_TYPES: Dict[ExportFormat, str] = {
+    ExportFormat.csv: 'text/csv',
+    ExportFormat.parquet: 'application/vnd.apache.parquet',
+    ExportFormat.arrow: 'application/vnd.apache.arrow.file',
+}
+
+
+def _arrow_type(column: Column) -> pyarrow.DataType:
+    """
+    Maps the HousingUnit column type to the arrow type of its exported values.
+
+    :param column: The HousingUnit column.
+
+    :return: The arrow type.
+    """
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Float):
+        return pyarrow.float64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp('us')
+
+    # The strings and the uuid, which is exported as text.
+    return pyarrow.string()
+
+
+# The arrow schema of the exported HousingUnits, in the order of the export columns.
+EXPORT_SCHEMA: pyarrow.Schema = pyarrow.schema([
+    pyarrow.field(
+        attribute_name,
+        _arrow_type(HousingUnit.__table__.columns[HousingUnitsRepository.BULK_LOAD_COLUMNS[attribute_name]])
+    )
+    for attribute_name in HousingUnitsRepository.EXPORT_COLUMNS
+])
+
+
+@attrs
+class HousingUnitsExport:
+    """
+    The export of the HousingUnits, which is either streamed with the response, when content is provided, or is
+    written to the exports directory by the task of the task_status.
+    """
+    export_format = attrib(type=ExportFormat)
+    content = attrib(type=Optional[AsyncIterator[bytes]], default=None)
+    task_status = attrib(type=Optional[TaskStatus], default=None)
+
+
+def housing_units_record_batch(rows: List[Any]) -> pyarrow.RecordBatch:
+    """
+    Builds the columnar batch of the exported HousingUnits rows, one arrow array per export column.
+
+    :param rows: The rows of the export columns.
+
+    :return: The record batch of the rows.
+    """
+    columns: List[Any] = list(zip(*rows)) if rows else [[] for _ in EXPORT_SCHEMA]
+
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(values, type=field.type) for values, field in zip(columns, EXPORT_SCHEMA)],
+        schema=EXPORT_SCHEMA,
+    )
+
+
+class HousingUnitsExportWriter:
+    """
+    Writes the batches of the exported HousingUnits rows to a parquet or arrow IPC file, one row group or record
+    batch per batch of rows.
+    """
+
+    def __init__(self, sink: BinaryIO, export_format: ExportFormat) -> None:
+        self._export_format: ExportFormat = export_format
+        if export_format == ExportFormat.parquet:
+            self._writer: Any = pyarrow.parquet.ParquetWriter(sink, EXPORT_SCHEMA)
+        elif export_format == ExportFormat.arrow:
+            self._writer = pyarrow.ipc.new_file(sink, EXPORT_SCHEMA)
+        else:
+            raise InvalidArgumentError('The {0} export format is not a columnar one.'.format(export_format.value))
+
+    def write(self, rows: List[Any]) -> None:
+        """
+        Writes the batch of the exported HousingUnits rows.
+
+        :param rows: The rows of the export columns.
+        """
+        record_batch: pyarrow.RecordBatch = housing_units_record_batch(rows)
+        if self._export_format == ExportFormat.parquet:
+            self._writer.write_table(pyarrow.Table.from_batches([record_batch]))
+        else:
+            self._writer.write_batch(record_batch)
+
+    def close(self) -> None:
+        """
+        Writes the file footer, after the last batch of rows.
+        """
+        self._writer.close()
+
+    def __enter__(self) -> "HousingUnitsExportWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class HousingUnitsExporter:
+    """
+    Exports the HousingUnits found from the filtering, either streamed with the PostgreSQL COPY or in batches of rows
+    read through a server-side cursor.
+    """
+
+    # The maximum number of CSV chunks of the COPY that are buffered until they are consumed.
+    EXPORT_QUEUE_SIZE: int = 16
+
+    def __init__(self, db_engine: DatabaseEngineWrapper = None):
+        self.db_engine = db_engine
+        # The filtering values are normalised against the dictionaries of the HousingUnit values.
+        self._housing_units_repository: HousingUnitsRepository = HousingUnitsRepository(db_engine=db_engine)
+
+    async def stream_export_csv(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Async generator using the raw asyncpg connection of the async read session for exporting the HousingUnits
+        found from the filtering in CSV format, with the PostgreSQL COPY TO STDOUT, buffering at most
+        EXPORT_QUEUE_SIZE chunks.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+
+        :return: The yielded CSV chunks, starting with the header of the export columns.
+        """
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self._housing_units_repository.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        export_query: str = HousingUnitsRepository.literal_sql(HousingUnitsRepository.export_statement(filter_key))
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=self.EXPORT_QUEUE_SIZE)
+
+        async with self.db_engine.get_async_read_session() as session:
+            raw_connection: Any = await (await session.connection()).get_raw_connection()
+
+            async def copy_to_chunks() -> None:
+                try:
+                    await raw_connection.driver_connection.copy_from_query(
+                        export_query, output=chunks.put, format='csv', header=True
+                    )
+                finally:
+                    await chunks.put(None)
+
+            copy_task: asyncio.Task = asyncio.ensure_future(copy_to_chunks())
+            try:
+                while True:
+                    chunk: Optional[bytearray] = await chunks.get()
+                    if chunk is None:
+                        break
+                    # The chunks are copied to bytes, which are sent by the StreamingResponse as they are.
+                    yield bytes(chunk)
+                # Raises the error of the COPY, if it is not completed.
+                await copy_task
+            finally:
+                copy_task.cancel()
+
+    async def stream_export_rows(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Async generator using the async session for exporting the HousingUnits found from the filtering, yielding
+        batches of rows of the export columns, read through a server-side cursor.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param batch_size: The number of rows of each batch, or None for the STREAM_BATCH_SIZE.
+
+        :return: The yielded batches of the rows of the export columns.
+        """
+        batch_size = batch_size or HousingUnitsRepository.STREAM_BATCH_SIZE
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self._housing_units_repository.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+
+        async with self.db_engine.get_async_read_session() as session:
+            results: AsyncResult = await session.stream(
+                HousingUnitsRepository.export_statement(filter_key).execution_options(yield_per=batch_size)
+            )
+            async for rows in results.partitions(batch_size):
+                yield rows
+
+    def export_csv(
+            self,
+            csv_file: IO[bytes],
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> None:
+        """
+        Sync call using the raw connection of the sync session for exporting the HousingUnits found from the
+        filtering in CSV format into the file, with the PostgreSQL COPY TO STDOUT.
+
+        :param csv_file: The binary file that the CSV is written to.
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        """
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = HousingUnitsRepository.filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+            dictionaries=self._housing_units_repository.sync_dictionaries(),
+        )
+        copy_statement: str = "COPY ({0}) TO STDOUT WITH (FORMAT csv, HEADER)".format(
+            HousingUnitsRepository.literal_sql(HousingUnitsRepository.export_statement(filter_key))
+        )
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                cursor = session.connection().connection.cursor()
+                cursor.copy_expert(copy_statement, csv_file)
+
+    def export_rows(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            batch_size: Optional[int] = None,
+    ) -> Iterator[List[Row]]:
+        """
+        Generator using the sync session for exporting the HousingUnits found from the filtering, yielding batches
+        of rows of the export columns, read through a server-side cursor.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param batch_size: The number of rows of each batch, or None for the STREAM_BATCH_SIZE.
+
+        :return: The yielded batches of the rows of the export columns.
+        """
+        batch_size = batch_size or HousingUnitsRepository.STREAM_BATCH_SIZE
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = HousingUnitsRepository.filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+            dictionaries=self._housing_units_repository.sync_dictionaries(),
+        )
+
+        with self.db_engine.get_session() as session:
+            results: Result = session.execute(
+                HousingUnitsRepository.export_statement(filter_key).execution_options(yield_per=batch_size)
+            )
+            for rows in results.partitions(batch_size):
+                yield rows
@@ -0,0 +1,69 @@
+from typing import Dict, Any, List
+
+import numpy
+import pandas as pd
+from pandas import DataFrame, Series
+from sqlalchemy import Integer, Float, DateTime, Column
+
+from application.housing_units.models import HousingUnit, HOUSING_UNIT_VERSION_COLUMNS
+
+# The HousingUnit table columns that are converted from the Socrata dataset, keyed by their HousingUnit attribute
+# names. This also renames the _1_br_units, _2_br_units ... columns to the one_br_units, two_br_units ... attributes.
+CONVERTED_COLUMNS: Dict[str, Column] = {
+    HousingUnit.__mapper__.get_property_by_column(column).key: column
+    for column in HousingUnit.__table__.columns
+    if column.name not in ('id', 'uuid', *HOUSING_UNIT_VERSION_COLUMNS)
+}
+
+
+def housing_unit_columns_from_dataframe(dataframe: DataFrame) -> Dict[str, List[Any]]:
+    """
+    Vectorized version of the HousingUnit.mapping_from_dict, which maps the Socrata dataset columns to their correct
+    types over the whole dataframe, instead of row by row. The following maps are performed:
+    1. Socrata's dates are mapped to datetime objects, truncated to seconds.
+    2. Integer columns are coerced to integers, and float columns to floats.
+    3. NaN and NaT values to None.
+
+    :param dataframe: The dataframe coming from the SocrataClient, with the Socrata dataset column names.
+
+    :return: The converted column arrays, keyed by the HousingUnit attribute names and holding python objects that
+        are ready to be bulk inserted.
+    """
+    columns: Dict[str, List[Any]] = {}
+    for attribute_name, column in CONVERTED_COLUMNS.items():
+        values: Series = dataframe[column.name]
+
+        if isinstance(column.type, (Integer, Float)):
+            numbers: numpy.ndarray = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+            is_missing: numpy.ndarray = numpy.isnan(numbers)
+            if isinstance(column.type, Integer):
+                numbers = numpy.where(is_missing, 0, numbers).astype('int64')
+            array: numpy.ndarray = numbers.astype(object)
+        elif isinstance(column.type, DateTime):
+            # The datetime64[s] arrays are converted to datetime objects and the NaT values to None by numpy.
+            timestamps: numpy.ndarray = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[s]')
+            is_missing = numpy.isnat(timestamps)
+            array = timestamps.astype(object)
+        else:
+            array = values.to_numpy(dtype=object, copy=True)
+            is_missing = pd.isna(array)
+
+        array[is_missing] = None
+        columns[attribute_name] = array.tolist()
+
+    return columns
+
+
+def housing_unit_mappings_from_dataframe(dataframe: DataFrame) -> List[Dict[str, Any]]:
+    """
+    Converts the dataframe coming from the SocrataClient to the HousingUnit mappings used by the bulk loaders,
+    using the column arrays of the housing_unit_columns_from_dataframe.
+
+    :param dataframe: The dataframe coming from the SocrataClient, with the Socrata dataset column names.
+
+    :return: The HousingUnit fields of every dataframe row, keyed by the HousingUnit attribute names.
+    """
+    columns: Dict[str, List[Any]] = housing_unit_columns_from_dataframe(dataframe)
+    attribute_names: List[str] = list(columns)
+
+    return [dict(zip(attribute_names, row)) for row in zip(*columns.values())]
@@ -1,18 +1,71 @@
 import math
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 import numpy
-from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Float
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Float, Index, text, event, DDL
 
 from application.infrastructure.database.mappers import dataframe_timestamp_to_datetime
 from application.infrastructure.database.models import HousingUnitsDBBaseModel
 
 
+# The HousingUnit columns that are maintained by the writes to the HousingUnit table, instead of being loaded from the
+# Socrata dataset.
+HOUSING_UNIT_VERSION_COLUMNS: Tuple[str, ...] = ('version', 'updated_at')
+# The building id that the HousingUnits without one are keyed by, in the natural key of the dataset rows.
+MISSING_BUILDING_ID: int = -1
+# The categorical HousingUnit columns, whose distinct values are collected into the HousingUnitCanonicalValue table.
+CANONICAL_VALUE_COLUMNS: Tuple[str, ...] = (
+    'borough', 'community_board', 'postcode', 'reporting_construction_type', 'street_name'
+)
+
+
 class HousingUnit(HousingUnitsDBBaseModel):
+    __table_args__ = (
+        # The natural key of the dataset rows, used for upserting the rows of the incremental ingestions. The missing
+        # building ids are indexed as -1, so that the rows of a project without a building id conflict too, instead of
+        # being inserted again by every incremental ingestion, as the NULL values are distinct.
+        Index(
+            'ix_housingunits_project_id_building_id',
+            'project_id',
+            text('COALESCE(building_id, {0})'.format(MISSING_BUILDING_ID)),
+            unique=True,
+        ),
+        # The indexes of the filtering and of the keyset pagination, matched to their access patterns: the sort keys
+        # are indexed along with the id for continuing the pages, and the filters by equality are indexed along with
+        # the total_units, for the ranges of the num_units_min and num_units_max. The borough index covers the rest
+        # of the filters by equality, so that their combinations, and their counts, don't merge bitmaps of indexes.
+        # The unit count columns are not indexed, as none of the queries filters or sorts by them.
+        Index('ix_housingunits_project_id_id', 'project_id', 'id'),
+        Index('ix_housingunits_street_name_id', 'street_name', 'id'),
+        Index('ix_housingunits_borough_id', 'borough', 'id'),
+        Index(
+            'ix_housingunits_borough_total_units',
+            'borough',
+            'total_units',
+            'id',
+            postgresql_include=['postcode', 'reporting_construction_type'],
+        ),
+        Index('ix_housingunits_postcode_total_units', 'postcode', 'total_units'),
+        Index('ix_housingunits_construction_type_total_units', 'reporting_construction_type', 'total_units'),
+        Index('ix_housingunits_total_units_id', 'total_units', 'id'),
+        # The trigram index of the street name search, matching the street names containing words similar to the
+        # searched ones, regardless of their case. It is a GiST index, instead of a GIN one, as it returns the street
+        # names ordered by their distance, so that the ranked searches stop at their limit instead of ranking every
+        # matching HousingUnit.
+        Index(
+            'ix_housingunits_street_name_trgm',
+            'street_name',
+            postgresql_using='gist',
+            postgresql_ops={'street_name': 'gist_trgm_ops'},
+        ),
+        # The GiST index of the locations, as the points on the earth of the earthdistance extension, matching the
+        # HousingUnits within a distance of a point, and returning them ordered by their distance from it.
+        Index('ix_housingunits_location', text('ll_to_earth(latitude, longitude)'), postgresql_using='gist'),
+    )
+
     project_id = Column(
         String,
         doc='The Project ID is a unique numeric identifier assigned to each project by HPD.',
-        index=True,
         nullable=False
     )
     project_name = Column(
@@ -44,18 +97,15 @@ class HousingUnit(HousingUnitsDBBaseModel):
         doc='The Street Name is the name of the street in the building’s address. E.g., '
             'the street name is ‘Gold Street’ in ‘100 Gold Street.’',
         nullable=False,
-        index=True,
     )
     borough = Column(
         String,
         doc='The Borough is the borough where the building is located.',
         nullable=False,
-        index=True,
     )
     postcode = Column(
         Integer,
         doc='Zip code',
-        index=True,
     )
     bbl = Column(
         BigInteger,
@@ -114,7 +164,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
             '‘new construction’ or ‘preservation’ in Housing New York statistics. Note that some preservation projects '
             'included here may not actually involve construction, because they extend the project’s regulatory '
             'restrictions but do not require rehabilitation.',
-        index=True,
         nullable=False
     )
     extended_affordability_status = Column(
@@ -136,7 +185,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='Extremely Low Income Units are units with rents that are affordable to households earning 0 to 30% '
             'of the area median income (AMI).',
-        index=True,
         nullable=False,
         default=0
     )
@@ -144,7 +192,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='Very Low Income Units are units with rents that are affordable to households earning 31 to 50% '
             'of the area median income (AMI).',
-        index=True,
         nullable=False,
         default=0
     )
@@ -152,7 +199,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='Low Income Units are units with rents that are affordable to households earning 51 to 80% of '
             'the area median income (AMI).',
-        index=True,
         nullable=False,
         default=0
     )
@@ -160,7 +206,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='Moderate Income Units are units with rents that are affordable to households earning 81 to 120% of the '
             'area median income (AMI).',
-        index=True,
         nullable=False,
         default=0
     )
@@ -168,21 +213,18 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='Middle Income Units are units with rents that are affordable to households earning 121 to 165% '
             'of the area median income (AMI).',
-        index=True,
         nullable=False,
         default=0
     )
     other_income_units = Column(
         Integer,
         doc='Other Units are units reserved for building superintendents.',
-        index=True,
         nullable=False,
         default=0
     )
     studio_units = Column(
         Integer,
         doc='Studio Units are units with 0-bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -190,7 +232,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_1_br_units',
         Integer,
         doc='1-BR Units are units with 1-bedroom.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -198,7 +239,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_2_br_units',
         Integer,
         doc='2-BR Units are units with 2-bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -206,7 +246,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_3_br_units',
         Integer,
         doc='3-BR Units are units with 3-bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -214,7 +253,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_4_br_units',
         Integer,
         doc='4-BR Units are units with 4-bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -222,7 +260,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_5_br_units',
         Integer,
         doc='5-BR Units are units with 5-bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -230,14 +267,12 @@ class HousingUnit(HousingUnitsDBBaseModel):
         '_6_br_units',
         Integer,
         doc='6-BR+ Units are units with 6-bedrooms or more.',
-        index=True,
         nullable=False,
         default=0
     )
     unknown_br_units = Column(
         Integer,
         doc='Unknown-BR Units are units with an unknown number of bedrooms.',
-        index=True,
         nullable=False,
         default=0
     )
@@ -259,32 +294,54 @@ class HousingUnit(HousingUnitsDBBaseModel):
         Integer,
         doc='The Counted Units field indicates the total number of affordable units, counted towards the Housing New '
             'York plan, that are in the building.',
-        index=True,
         nullable=False,
         default=0
     )
     total_units = Column(
         Integer,
         doc='The Total Units field indicates the total number of units, affordable and market rate, in each building.',
-        index=True,
         nullable=False,
         default=0
     )
+    version = Column(
+        Integer,
+        doc='The Version is incremented by every write that changes the HousingUnit row.',
+        nullable=False,
+        server_default=text('1'),
+    )
+    updated_at = Column(
+        DateTime,
+        doc='The Updated At is the UTC time of the latest write that changed the HousingUnit row.',
+        nullable=False,
+        server_default=text("timezone('utc', now())"),
+    )
 
     @staticmethod
     def from_dict(dictionary: Dict[str, Any]) -> 'HousingUnit':
         """
         Maps the fields to their correct types, for being inserted correctly to the DB.
-        The following maps are performed:
+        The mapping is performed by the HousingUnit.mapping_from_dict.
+
+        :param dictionary: Dictionary coming from the SocrataClient, which representing a single HousingUnit entry.
+
+        :return: The HousingUnit with the field types corrected.
+        """
+        return HousingUnit(**HousingUnit.mapping_from_dict(dictionary))
+
+    @staticmethod
+    def mapping_from_dict(dictionary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Maps the fields to their correct types, for being inserted correctly to the DB, without creating
+        a HousingUnit instance. The following maps are performed:
         1. Socrata's dates are mapped to datetime objects.
         2. String to integers, and strings to floats when the field is integer or float.
         3. NaN values to None.
 
         :param dictionary: Dictionary coming from the SocrataClient, which representing a single HousingUnit entry.
 
-        :return: The HousingUnit with the field types corrected.
+        :return: The HousingUnit fields, keyed by the HousingUnit attribute names.
         """
-        test = HousingUnit(
+        return dict(
             project_id=dictionary['project_id'],
             project_name=dictionary['project_name'],
             project_start_date=dataframe_timestamp_to_datetime(dictionary['project_start_date']) if dictionary[
@@ -299,7 +356,8 @@ class HousingUnit(HousingUnitsDBBaseModel):
             bbl=int(dictionary['bbl']) if not math.isnan(dictionary['bbl']) else None,
             bin=int(dictionary['bin']) if not math.isnan(dictionary['bin']) else None,
             community_board=dictionary['community_board'],
-            council_district=int(dictionary['building_id']) if not math.isnan(dictionary['building_id']) else None,
+            council_district=int(dictionary['council_district']) if not math.isnan(
+                dictionary['council_district']) else None,
             census_tract=dictionary['census_tract'] if isinstance(dictionary['census_tract'], str) else None,
             neighborhood_tabulation_area=dictionary['neighborhood_tabulation_area'] if isinstance(
                 dictionary['neighborhood_tabulation_area'], str) else None,
@@ -343,7 +401,6 @@ class HousingUnit(HousingUnitsDBBaseModel):
                 dictionary['all_counted_units']) else None,
             total_units=int(dictionary['total_units']) if not math.isnan(dictionary['total_units']) else None
         )
-        return test
 
     def __eq__(self, other) -> bool:
         """
@@ -397,3 +454,34 @@ class HousingUnit(HousingUnitsDBBaseModel):
                    and self.total_units == other.total_units
 
         return False
+
+
+class HousingUnitCanonicalValue(HousingUnitsDBBaseModel):
+    __table_args__ = (
+        Index('ix_housingunitcanonicalvalues_column_name_value', 'column_name', 'value', unique=True),
+    )
+
+    column_name = Column(
+        String,
+        doc='The name of the categorical HousingUnit column that the value is collected from.',
+        nullable=False,
+    )
+    value = Column(
+        String,
+        doc='The distinct value of the column, as it is stored in the HousingUnit table.',
+        nullable=False,
+    )
+    housing_units = Column(
+        Integer,
+        doc='The number of HousingUnits with the value, as counted by the latest ingestion.',
+        nullable=False,
+        default=0,
+    )
+
+
+# The trigram operator class of the street name search index is provided by the pg_trgm extension, and the earth
+# points of the location index by the earthdistance extension, which is built on the cube extension. They are created
+# along with the HousingUnit table when the tables are created from the models instead of the migrations.
+event.listen(HousingUnit.__table__, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+event.listen(HousingUnit.__table__, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS cube'))
+event.listen(HousingUnit.__table__, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS earthdistance'))
@@ -1,19 +1,186 @@
-from typing import List, Optional
+import json
+import math
+from collections import Counter
+from typing import List, Optional, Dict, Any, Tuple, Callable, AsyncIterator, Iterable
+from uuid import uuid4
 
-from sqlalchemy import delete, and_
-from sqlalchemy.engine import ChunkedIteratorResult
+from sqlalchemy import (
+    delete, and_, insert, inspect, Column, tuple_, func, text, cast, String, bindparam, Integer, Float, false, literal,
+    union_all
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncResult
+from sqlalchemy.engine import ChunkedIteratorResult, Result, Row
 from sqlalchemy.future import select
 from sqlalchemy.orm import FromStatement
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import BinaryExpression
 
-from application.housing_units.column_mappings import UNIQUE_BOROUGH_MAPS
-from application.housing_units.models import HousingUnit
+from application.housing_units.caches import (
+    invalidate_housing_units_caches, refresh_housing_units_dictionaries, HOUSING_UNITS_DICTIONARIES_INVALIDATIONS
+)
+from application.housing_units.dictionaries import HousingUnitDictionaries, normalise_value
+from application.housing_units.enums import HousingUnitSortKey, HousingUnitField
+from application.housing_units.errors import HousingUnitConflictError
+from application.housing_units.models import (
+    HousingUnit, HousingUnitCanonicalValue, HOUSING_UNIT_VERSION_COLUMNS, CANONICAL_VALUE_COLUMNS
+)
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.configurations.models import Configuration
 from application.infrastructure.database.database import DatabaseEngineWrapper
 
 
 class HousingUnitsRepository:
 
+    # The HousingUnit attribute names mapped to their table column names, for the columns loaded by the bulk loaders.
+    # The version columns are set by their server defaults, and by the bulk upserts of the changed rows.
+    BULK_LOAD_COLUMNS: Dict[str, str] = {
+        HousingUnit.__mapper__.get_property_by_column(column).key: column.name
+        for column in HousingUnit.__table__.columns
+        if column.name not in ('id', *HOUSING_UNIT_VERSION_COLUMNS)
+    }
+    # The UTC time that the updated HousingUnit rows are stamped with, the same as the updated_at server default.
+    UTC_NOW: Any = func.timezone('utc', func.now())
+    # The unique index of the project_id and building_id, that the conflicting writes are violating.
+    UPSERT_KEY_INDEX: str = 'ix_housingunits_project_id_building_id'
+    # The key of the advisory lock that the ingestions hold for the whole load of the staging table and its swap. The
+    # API writes take it shared, and are rejected while it is held, instead of being lost by the swap.
+    STAGING_LOAD_LOCK_KEY: int = 734720001
+    STAGING_LOAD_WRITE_LOCK_STATEMENT: Select = select(func.pg_try_advisory_xact_lock_shared(STAGING_LOAD_LOCK_KEY))
+    # The number of rows fetched from the server-side cursor at a time, by the streamed filtering and exports.
+    STREAM_BATCH_SIZE: int = 1000
+    # The exported HousingUnit attribute names, which are the bulk loaded ones.
+    EXPORT_COLUMNS: List[str] = list(BULK_LOAD_COLUMNS)
+    # The filtering fields, in the order of their bits in the bitmasks of the applied filters.
+    FILTER_NAMES: Tuple[str, ...] = (
+        'street_name', 'borough', 'postcode', 'construction_type', 'num_units_min', 'num_units_max'
+    )
+    # The filtering expressions of the prepared statements, with the filtering values bound by the filter names. The
+    # categorical columns are matched against all the stored spellings of their values, bound as expanding parameters.
+    PREPARED_FILTERS: Dict[str, BinaryExpression] = {
+        'street_name': HousingUnit.street_name.in_(bindparam('street_name', expanding=True)),
+        'borough': HousingUnit.borough.in_(bindparam('borough', expanding=True)),
+        'postcode': HousingUnit.postcode == bindparam('postcode'),
+        'construction_type': HousingUnit.reporting_construction_type.in_(
+            bindparam('construction_type', expanding=True)
+        ),
+        'num_units_min': HousingUnit.total_units >= bindparam('num_units_min'),
+        'num_units_max': HousingUnit.total_units <= bindparam('num_units_max'),
+    }
+    # The prepared statements of the filtering, keyed by the bitmasks of their applied filters and by their shape.
+    # The statements are built once per worker and their cache keys are memoized, so that they are not built and
+    # compiled on every request, and the asyncpg connections reuse their server-side prepared statements, as the SQL
+    # of every combination of filters is the same for all the filtering values.
+    PREPARED_STATEMENTS: TTLCache = TTLCache(max_size=4096, ttl_seconds=None)
+    # The statement retrieving a HousingUnit by its uuid.
+    GET_BY_UUID_STATEMENT: Select = select(HousingUnit).where(HousingUnit.uuid == bindparam('uuid'))
+    # The street name search, matching the HousingUnits whose street names contain words similar to the searched ones.
+    # They are ordered by the word similarity distance, which the trigram index returns them ordered by, so that only
+    # the returned HousingUnits are ranked. The rank is the word similarity, from 0 to 1.
+    SEARCH_STATEMENT: Select = select(
+        HousingUnit.id,
+        *[getattr(HousingUnit, field.value) for field in HousingUnitField],
+        func.word_similarity(bindparam('query', type_=String), HousingUnit.street_name).label('rank'),
+    ).where(
+        bindparam('query', type_=String).op('<%')(HousingUnit.street_name)
+    ).order_by(
+        bindparam('query', type_=String).op('<<->', return_type=Float)(HousingUnit.street_name)
+    ).limit(bindparam('limit', type_=Integer))
+    # The HousingUnit locations, as the points on the earth of the earthdistance extension, which the location index is
+    # built on, and the searched point. The points are in metres from the centre of the earth, whose radius is the
+    # EARTH_RADIUS_M of the earth function of the extension.
+    LOCATION: Any = func.ll_to_earth(HousingUnit.latitude, HousingUnit.longitude)
+    CENTER: Any = func.ll_to_earth(bindparam('lat', type_=Float), bindparam('lon', type_=Float))
+    EARTH_RADIUS_M: float = 6378168.0
+    # The columns of the HousingUnits found by their locations, along with their great circle distance from the point.
+    LOCATION_COLUMNS: List[Any] = [
+        HousingUnit.id,
+        *[getattr(HousingUnit, field.value) for field in HousingUnitField],
+        HousingUnit.latitude,
+        HousingUnit.longitude,
+        func.earth_distance(LOCATION, CENTER).label('distance_m'),
+    ]
+    # The HousingUnits within the radius of the point. The location index matches the HousingUnits within the cube
+    # enclosing the radius, which are filtered by their distance, and returns them ordered by their straight line
+    # distance from the point, which orders them the same as their great circle distance, so that only the returned
+    # HousingUnits are read.
+    NEAR_STATEMENT: Select = select(*LOCATION_COLUMNS).where(
+        func.earth_box(CENTER, bindparam('radius_m', type_=Float)).op('@>')(LOCATION),
+        func.earth_distance(LOCATION, CENTER) <= bindparam('radius_m', type_=Float),
+    ).order_by(
+        LOCATION.op('<->', return_type=Float)(CENTER)
+    ).limit(bindparam('limit', type_=Integer))
+    # The HousingUnits within the bounding box, matched by the location index within the cube enclosing the circle
+    # around the centre of the box, and filtered by their coordinates, from the nearest one to the centre of the box.
+    WITHIN_STATEMENT: Select = select(*LOCATION_COLUMNS).where(
+        func.earth_box(CENTER, bindparam('radius_m', type_=Float)).op('@>')(LOCATION),
+        HousingUnit.latitude.between(bindparam('min_lat', type_=Float), bindparam('max_lat', type_=Float)),
+        HousingUnit.longitude.between(bindparam('min_lon', type_=Float), bindparam('max_lon', type_=Float)),
+    ).order_by(
+        LOCATION.op('<->', return_type=Float)(CENTER)
+    ).limit(bindparam('limit', type_=Integer))
+    # The number of the cells per side of the grid that the HousingUnits of a map tile are clustered into, so that the
+    # clustered tiles have at most TILE_GRID_SIZE squared cells, regardless of the number of their HousingUnits.
+    TILE_GRID_SIZE: int = 8
+    # The column and the row of the grid cell of the HousingUnits, within the grid of the whole map at the zoom of the
+    # tile, which has the cells bound per side, offset by the first cell of the tile. The row is the Web Mercator y of
+    # the latitude, from the north.
+    TILE_CELL_X: Any = cast(func.floor(
+        (HousingUnit.longitude + 180) / 360 * bindparam('cells', type_=Integer)
+    ) - bindparam('first_cell_x', type_=Integer), Integer).label('cell_x')
+    TILE_CELL_Y: Any = cast(func.floor(
+        (1 - func.ln(
+            func.tan(func.radians(HousingUnit.latitude)) + 1 / func.cos(func.radians(HousingUnit.latitude))
+        ) / func.pi()) / 2 * bindparam('cells', type_=Integer)
+    ) - bindparam('first_cell_y', type_=Integer), Integer).label('cell_y')
+    # The HousingUnits of the tile, matched by the location index within the cube enclosing the tile, clustered by
+    # their grid cells. The tiles are half open, so that every HousingUnit is in a single tile of each zoom. The cells
+    # are grouped by their output column names, as the parameters of the cell expressions are bound separately in
+    # the GROUP BY, which wouldn't match the expressions of the SELECT.
+    TILE_STATEMENT: Select = select(
+        TILE_CELL_X,
+        TILE_CELL_Y,
+        func.count().label('count'),
+        func.coalesce(func.sum(HousingUnit.total_units), 0).label('total_units'),
+        func.avg(HousingUnit.latitude).label('latitude'),
+        func.avg(HousingUnit.longitude).label('longitude'),
+    ).where(
+        func.earth_box(CENTER, bindparam('radius_m', type_=Float)).op('@>')(LOCATION),
+        HousingUnit.longitude >= bindparam('west', type_=Float),
+        HousingUnit.longitude < bindparam('east', type_=Float),
+        HousingUnit.latitude > bindparam('south', type_=Float),
+        HousingUnit.latitude <= bindparam('north', type_=Float),
+    ).group_by(text('cell_x'), text('cell_y')).order_by(TILE_CELL_Y, TILE_CELL_X)
+    # The filtering fields of the categorical HousingUnit columns, mapped to the names of their columns.
+    CANONICAL_FILTERS: Dict[str, str] = {
+        'street_name': 'street_name', 'borough': 'borough', 'postcode': 'postcode',
+        'construction_type': 'reporting_construction_type',
+    }
+    # The in-memory dictionaries of the HousingUnit values of the worker, loaded from the HousingUnitCanonicalValue
+    # table on their first use, and again after they are invalidated, or when they expire.
+    DICTIONARIES: TTLCache = TTLCache(max_size=1, ttl_seconds=600.0)
+    DICTIONARIES_KEY: str = 'dictionaries'
+    # The dictionaries are kept only for a few seconds while the worker is not subscribed to their invalidations,
+    # instead of being loaded again by every filtering, so the values written by the other workers are missed only
+    # for that long.
+    UNSUBSCRIBED_DICTIONARIES_TTL_SECONDS: float = 10.0
+    # The statement of the collected values of the CANONICAL_VALUE_COLUMNS, that the dictionaries are built from.
+    DICTIONARIES_STATEMENT: Select = select(
+        HousingUnitCanonicalValue.column_name, HousingUnitCanonicalValue.value, HousingUnitCanonicalValue.housing_units
+    )
+    # The statement counting the HousingUnits of every distinct value of the CANONICAL_VALUE_COLUMNS.
+    CANONICAL_VALUE_COUNTS_STATEMENT: Any = union_all(*[
+        select(
+            literal(column_name).label('column_name'),
+            cast(HousingUnit.__table__.c[column_name], String).label('value'),
+            func.count().label('housing_units'),
+        ).where(
+            HousingUnit.__table__.c[column_name].isnot(None)
+        ).group_by(HousingUnit.__table__.c[column_name])
+        for column_name in CANONICAL_VALUE_COLUMNS
+    ])
+
     def __init__(self, db_engine: DatabaseEngineWrapper = None):
         self.db_engine = db_engine
 
@@ -25,9 +192,14 @@ class HousingUnitsRepository:
             construction_type: Optional[str] = None,
             num_units_min: Optional[int] = None,
             num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            after: Optional[Tuple[Any, int]] = None,
+            limit: Optional[int] = None,
     ) -> Optional[List[HousingUnit]]:
         """
-        Async call using the async session for filtering the HousingUnits based on the provided filtering fields.
+        Async call using the async read session for filtering the HousingUnits based on the provided filtering fields.
+        The HousingUnits are sorted by the sort key and their id, and are paginated with keyset comparisons on them,
+        so that every page is read from the sort key index, regardless of how deep the page is.
 
         :param street_name: The Housing Unit street name.
         :param borough: The Housing Unit borough.
@@ -35,43 +207,418 @@ class HousingUnitsRepository:
         :param construction_type: The Housing Unit construction type.
         :param num_units_min: The Housing Unit num_units_min.
         :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+        :param after: The sort key value and id of the HousingUnit that the returned HousingUnits are following.
+        :param limit: The maximum number of HousingUnits to return.
 
         :return: The HousingUnits found from the filtering.
         """
-        async with self.db_engine.get_async_session() as session:
-            filters: List[BinaryExpression] = []
-            if street_name:
-                filters.append(HousingUnit.street_name == street_name)
-            if borough:
-                filters.append(HousingUnit.borough == UNIQUE_BOROUGH_MAPS.get(borough.lower()))
-            if postcode:
-                filters.append(HousingUnit.postcode == postcode)
-            if construction_type:
-                filters.append(HousingUnit.reporting_construction_type == construction_type)
-            if num_units_min is not None:
-                filters.append(HousingUnit.total_units >= num_units_min)
-            if num_units_max is not None:
-                filters.append(HousingUnit.total_units <= num_units_max)
-
-            query: Select = select(HousingUnit).where(
-                and_(*filters)
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if filter_key is None:
+            return []
+
+        async with self.db_engine.get_async_read_session() as session:
+            query, parameters = self.prepared_page_statement(
+                filter_key,
+                sort_key=sort_key,
+                after=after,
+                limit=limit,
             )
-            results: ChunkedIteratorResult = await session.execute(query)
+            results: ChunkedIteratorResult = await session.execute(query, parameters)
             return results.scalars().all()
 
+    async def filter_rows(
+            self,
+            fields: Optional[List[HousingUnitField]] = None,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            after: Optional[Tuple[Any, int]] = None,
+            limit: Optional[int] = None,
+    ) -> List[Row]:
+        """
+        Async call using the async read session for filtering the HousingUnits the same way as the filter, but selecting
+        only the columns of the provided fields, instead of the whole HousingUnit rows. The rows are returned as they
+        are read, without being loaded into HousingUnit instances and the session identity map.
+
+        :param fields: The HousingUnit fields that are selected, or None for selecting all the HousingUnitField ones.
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+        :param after: The sort key value and id of the HousingUnit that the returned HousingUnits are following.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the HousingUnits found from the filtering, holding the selected fields, along with the
+            id and the sort_value of each HousingUnit for continuing the pages.
+        """
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if filter_key is None:
+            return []
+
+        async with self.db_engine.get_async_read_session() as session:
+            query, parameters = self.prepared_page_statement(
+                filter_key,
+                rows=True,
+                fields=fields,
+                sort_key=sort_key,
+                after=after,
+                limit=limit,
+            )
+            results: Result = await session.execute(query, parameters)
+            return results.all()
+
+    async def stream_rows(
+            self,
+            fields: Optional[List[HousingUnitField]] = None,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            after: Optional[Tuple[Any, int]] = None,
+            batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Async generator using the async session for streaming all the HousingUnits rows found from the filtering,
+        selected the same way as the filter_rows. The rows are read through a server-side cursor and are yielded in
+        batches, so that only one batch of rows is held in memory at a time, regardless of the number of rows found.
+
+        :param fields: The HousingUnit fields that are selected, or None for selecting all the HousingUnitField ones.
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+        :param after: The sort key value and id of the HousingUnit that the streamed HousingUnits are following.
+        :param batch_size: The number of rows of each batch, or None for the STREAM_BATCH_SIZE.
+
+        :return: The yielded batches of the rows of the HousingUnits found from the filtering.
+        """
+        batch_size = batch_size or self.STREAM_BATCH_SIZE
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if filter_key is None:
+            return
+
+        async with self.db_engine.get_async_read_session() as session:
+            query, parameters = self.prepared_page_statement(
+                filter_key,
+                rows=True,
+                fields=fields,
+                sort_key=sort_key,
+                after=after,
+            )
+            # The batch size is passed as an execution option, so that the prepared statement is not copied.
+            results: AsyncResult = await session.stream(
+                query, parameters, execution_options={'yield_per': batch_size}
+            )
+            async for rows in results.partitions(batch_size):
+                yield rows
+
+    async def count(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> int:
+        """
+        Async call using the async read session for counting the HousingUnits based on the provided filtering fields.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+
+        :return: The number of HousingUnits found from the filtering.
+        """
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if filter_key is None:
+            return 0
+
+        async with self.db_engine.get_async_read_session() as session:
+            query, parameters = self.prepared_count_statement(filter_key)
+            results: ChunkedIteratorResult = await session.execute(query, parameters)
+            return results.scalar()
+
+    async def estimate_count(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> int:
+        """
+        Async call using the async read session for estimating the number of HousingUnits based on the provided
+        filtering fields, from the PostgreSQL planner statistics, or for counting them when there are no statistics.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+
+        :return: The estimated number of HousingUnits found from the filtering.
+        """
+        filter_key: Optional[Tuple[Tuple[str, Any], ...]] = await self.canonical_filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if filter_key is None:
+            return 0
+
+        filters: List[BinaryExpression] = self._filters(filter_key)
+
+        async with self.db_engine.get_async_read_session() as session:
+            table_rows: Optional[float] = (
+                await session.execute(
+                    text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+                    {'table_name': HousingUnit.__tablename__}
+                )
+            ).scalar()
+
+            estimated_rows: Optional[float] = table_rows
+            if filters and table_rows and table_rows > 0:
+                # The statement is explained with its values rendered inline, as the parameters are not available
+                # to the EXPLAIN. The colons are escaped from the text bind parameters.
+                explained_statement: str = self.literal_sql(select(HousingUnit.id).where(and_(*filters)))
+                plan: Any = (
+                    await session.execute(
+                        text('EXPLAIN (FORMAT JSON) {0}'.format(explained_statement.replace(':', '\\:')))
+                    )
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimated_rows = plan[0]['Plan']['Plan Rows']
+
+        if not table_rows or table_rows <= 0:
+            return await self.count(
+                street_name=street_name,
+                borough=borough,
+                postcode=postcode,
+                construction_type=construction_type,
+                num_units_min=num_units_min,
+                num_units_max=num_units_max,
+            )
+
+        return int(estimated_rows)
+
     async def get_by_uuid(self, uuid: str) -> HousingUnit:
         """
-        Async call using the async session for retrieving a HousingUnit entry by uuid.
+        Async call using the async read session for retrieving a HousingUnit entry by uuid.
 
         :param uuid: The HousingUnit's uuid to retrieve.
 
         :return: The HousingUnit retrieved.
         """
-        async with self.db_engine.get_async_session() as session:
-            query: Select = select(HousingUnit).where(HousingUnit.uuid == uuid)
-            results: ChunkedIteratorResult = await session.execute(query)
+        async with self.db_engine.get_async_read_session() as session:
+            results: ChunkedIteratorResult = await session.execute(self.GET_BY_UUID_STATEMENT, {'uuid': uuid})
             return results.scalars().first()
 
+    async def search(self, query: str, limit: int) -> List[Row]:
+        """
+        Async call using the async read session for searching the HousingUnits by their street names.
+
+        :param query: The searched words of the street names.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the HousingUnits whose street names contain words similar to the searched ones, holding
+            all the HousingUnitField fields and the rank of each HousingUnit, from the highest rank to the lowest.
+        """
+        async with self.db_engine.get_async_read_session() as session:
+            results: Result = await session.execute(self.SEARCH_STATEMENT, {'query': query, 'limit': limit})
+            return results.all()
+
+    async def near(self, lat: float, lon: float, radius_m: float, limit: int) -> List[Row]:
+        """
+        Async call using the async read session for finding the HousingUnits within a distance of a point.
+
+        :param lat: The latitude of the point.
+        :param lon: The longitude of the point.
+        :param radius_m: The maximum great circle distance of the HousingUnits from the point, in metres.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the HousingUnits within the radius, holding all the HousingUnitField fields, the
+            coordinates and the distance_m of each HousingUnit, from the nearest one to the farthest.
+        """
+        async with self.db_engine.get_async_read_session() as session:
+            results: Result = await session.execute(
+                self.NEAR_STATEMENT, {'lat': lat, 'lon': lon, 'radius_m': radius_m, 'limit': limit}
+            )
+            return results.all()
+
+    async def within(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float, limit: int) -> List[Row]:
+        """
+        Async call using the async read session for finding the HousingUnits within a bounding box.
+
+        :param min_lon: The western longitude of the bounding box.
+        :param min_lat: The southern latitude of the bounding box.
+        :param max_lon: The eastern longitude of the bounding box.
+        :param max_lat: The northern latitude of the bounding box.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the HousingUnits within the bounding box, the same as the near ones, with the distance_m
+            of each HousingUnit from the centre of the box, from the nearest one to the farthest.
+        """
+        lat, lon, radius_m = self.enclosing_circle(min_lon, min_lat, max_lon, max_lat)
+
+        async with self.db_engine.get_async_read_session() as session:
+            results: Result = await session.execute(
+                self.WITHIN_STATEMENT,
+                {
+                    'lat': lat, 'lon': lon, 'radius_m': radius_m, 'limit': limit,
+                    'min_lat': min_lat, 'max_lat': max_lat, 'min_lon': min_lon, 'max_lon': max_lon,
+                },
+            )
+            return results.all()
+
+    async def tile_cells(self, z: int, x: int, y: int) -> List[Row]:
+        """
+        Async call using the async read session for clustering the HousingUnits of a map tile into the cells of its
+        TILE_GRID_SIZE by TILE_GRID_SIZE grid, with a single GROUP BY of the HousingUnits snapped to the grid.
+
+        :param z: The zoom of the tile.
+        :param x: The column of the tile, from the west.
+        :param y: The row of the tile, from the north.
+
+        :return: The rows of the non empty cells, holding the cell_x and cell_y of each cell within the tile, the
+            count of its HousingUnits, their summed total_units, and their mean latitude and longitude.
+        """
+        west, south, east, north = self.tile_bounds(z=z, x=x, y=y)
+        lat, lon, radius_m = self.enclosing_circle(west, south, east, north)
+
+        async with self.db_engine.get_async_read_session() as session:
+            results: Result = await session.execute(
+                self.TILE_STATEMENT,
+                {
+                    'lat': lat, 'lon': lon, 'radius_m': radius_m,
+                    'west': west, 'south': south, 'east': east, 'north': north,
+                    'cells': (2 ** z) * self.TILE_GRID_SIZE,
+                    'first_cell_x': x * self.TILE_GRID_SIZE,
+                    'first_cell_y': y * self.TILE_GRID_SIZE,
+                },
+            )
+            return results.all()
+
+    async def dictionaries(self) -> HousingUnitDictionaries:
+        """
+        Async call using the async read session for loading the dictionaries of the HousingUnit values from the
+        HousingUnitCanonicalValue table, through the in-memory DICTIONARIES of the worker.
+
+        :return: The dictionaries of the HousingUnit values.
+        """
+        HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.subscribe(self.DICTIONARIES)
+        dictionaries: Optional[HousingUnitDictionaries] = self.DICTIONARIES.get(self.DICTIONARIES_KEY)
+        if dictionaries is None:
+            invalidations_sequence: int = HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.sequence
+            async with self.db_engine.get_async_read_session() as session:
+                results: Result = await session.execute(self.DICTIONARIES_STATEMENT)
+                dictionaries = HousingUnitDictionaries(results.all())
+            self._cache_dictionaries(dictionaries, invalidations_sequence)
+
+        return dictionaries
+
+    def sync_dictionaries(self) -> HousingUnitDictionaries:
+        """
+        Sync call using the sync session for loading the dictionaries of the HousingUnit values the same way as the
+        dictionaries, for the filtering of the sync exports.
+
+        :return: The dictionaries of the HousingUnit values.
+        """
+        HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.subscribe(self.DICTIONARIES)
+        dictionaries: Optional[HousingUnitDictionaries] = self.DICTIONARIES.get(self.DICTIONARIES_KEY)
+        if dictionaries is None:
+            invalidations_sequence: int = HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.sequence
+            with self.db_engine.get_session() as session:
+                dictionaries = HousingUnitDictionaries(session.execute(self.DICTIONARIES_STATEMENT).all())
+            self._cache_dictionaries(dictionaries, invalidations_sequence)
+
+        return dictionaries
+
+    async def canonical_filter_key(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> Optional[Tuple[Tuple[str, Any], ...]]:
+        """
+        Normalises the provided filtering fields to the canonical HousingUnit column values, against the dictionaries
+        of the HousingUnit values of the worker.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+
+        :return: The applied filters as pairs of the filter name and the canonical values, or None when any of the
+            values is not a value of any HousingUnit, so the filtering is answered without querying the database.
+        """
+        filter_key: Tuple[Tuple[str, Any], ...] = self.filter_key(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+            dictionaries=await self.dictionaries(),
+        )
+        return filter_key if self.is_satisfiable(filter_key) else None
+
     def truncate_table(self) -> None:
         """
         HousingUnit table truncate using the sync session.
@@ -79,6 +626,24 @@ class HousingUnitsRepository:
         with self.db_engine.get_session() as session:
             session.execute("TRUNCATE TABLE housingunits")
             session.commit()
+        invalidate_housing_units_caches()
+
+    def refresh_canonical_values(self) -> None:
+        """
+        Collects the distinct values of the CANONICAL_VALUE_COLUMNS of the HousingUnit table into the
+        HousingUnitCanonicalValue table using the sync session, replacing the values collected before along with
+        their counts, e.g. the values of the deleted HousingUnits, and refreshes the dictionaries of every worker.
+        """
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                canonical_values: List[Row] = session.execute(self.CANONICAL_VALUE_COUNTS_STATEMENT).all()
+                session.execute(delete(HousingUnitCanonicalValue))
+                if canonical_values:
+                    session.execute(insert(HousingUnitCanonicalValue.__table__), [
+                        {'uuid': uuid4(), 'column_name': column_name, 'value': value, 'housing_units': housing_units}
+                        for column_name, value, housing_units in canonical_values
+                    ])
+        refresh_housing_units_dictionaries()
 
     async def delete(
             self,
@@ -90,9 +655,12 @@ class HousingUnitsRepository:
         :param uuid: The HousingUnit's uuid to delete.
 
         :return: The HousingUnit deleted.
+
+        :raises HousingUnitConflictError: When the HousingUnits are being reloaded by an ingestion.
         """
         async with self.db_engine.get_async_session() as session:
             async with session.begin():
+                await self._lock_against_staging_loads(session)
                 stmt = (
                     delete(HousingUnit).where(HousingUnit.uuid == uuid)
                 ).returning(HousingUnit)
@@ -104,6 +672,8 @@ class HousingUnitsRepository:
                 deleted_housing_unit_result: ChunkedIteratorResult = await session.execute(
                     orm_stmt,
                 )
+            DatabaseEngineWrapper.read_from_primary()
+            invalidate_housing_units_caches(uuid=str(uuid))
             return deleted_housing_unit_result.scalars().all()
 
     async def save(
@@ -111,17 +681,45 @@ class HousingUnitsRepository:
             housing_unit: HousingUnit,
     ) -> HousingUnit:
         """
-        Async call using the async session for saving a HousingUnit entry.
+        Async call using the async session for saving a HousingUnit entry. The version of an existing HousingUnit is
+        incremented by the update, and the saved HousingUnit is refreshed with the version columns set by the database.
 
         :param housing_unit: The HousingUnit to save.
 
         :return: The saved HousingUnit.
+
+        :raises HousingUnitConflictError: When another HousingUnit has the same project_id and building_id, or when
+            the HousingUnits are being reloaded by an ingestion.
         """
 
+        canonical_values_statement: Optional[postgresql.Insert] = self._canonical_values_statement(
+            [self._canonical_value_row(housing_unit)]
+        )
         async with self.db_engine.get_async_session() as session:
-            async with session.begin():
-                session.add(housing_unit)
-                return housing_unit
+            try:
+                async with session.begin():
+                    await self._lock_against_staging_loads(session)
+                    if inspect(housing_unit).has_identity:
+                        housing_unit.version = HousingUnit.version + 1
+                        housing_unit.updated_at = self.UTC_NOW
+                    session.add(housing_unit)
+                    collected_values: bool = canonical_values_statement is not None and (
+                        await session.execute(canonical_values_statement)
+                    ).first() is not None
+            except IntegrityError as ex:
+                if self.UPSERT_KEY_INDEX in str(ex.orig):
+                    raise HousingUnitConflictError(
+                        "A Housing Unit with the project_id {0} and the building_id {1} already exists.".format(
+                            housing_unit.project_id, housing_unit.building_id
+                        )
+                    )
+                raise
+            await session.refresh(housing_unit)
+            DatabaseEngineWrapper.read_from_primary()
+            invalidate_housing_units_caches(uuid=str(housing_unit.uuid))
+            if collected_values:
+                refresh_housing_units_dictionaries()
+            return housing_unit
 
     def bulk_save(
             self,
@@ -135,3 +733,452 @@ class HousingUnitsRepository:
         with self.db_engine.get_session() as session:
             with session.begin():
                 session.add_all(housing_units)
+                collected_values: bool = self.collect_canonical_values(
+                    session, [self._canonical_value_row(housing_unit) for housing_unit in housing_units]
+                )
+        invalidate_housing_units_caches()
+        if collected_values:
+            refresh_housing_units_dictionaries()
+
+    @classmethod
+    def great_circle_distance(cls, lat: float, lon: float, other_lat: float, other_lon: float) -> float:
+        """
+        Calculates the great circle distance of two points with the haversine formula, on the sphere of the
+        earthdistance extension, so that it is the same as the earth_distance of the points.
+
+        :param lat: The latitude of the first point.
+        :param lon: The longitude of the first point.
+        :param other_lat: The latitude of the second point.
+        :param other_lon: The longitude of the second point.
+
+        :return: The great circle distance of the points, in metres.
+        """
+        lat, lon, other_lat, other_lon = map(math.radians, (lat, lon, other_lat, other_lon))
+        haversine: float = (
+            math.sin((other_lat - lat) / 2) ** 2
+            + math.cos(lat) * math.cos(other_lat) * math.sin((other_lon - lon) / 2) ** 2
+        )
+        return 2 * cls.EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(haversine)))
+
+    @classmethod
+    def enclosing_circle(
+            cls, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> Tuple[float, float, float]:
+        """
+        Calculates the circle around the centre of a bounding box which encloses the bounding box, so that the location
+        index matches the HousingUnits within it.
+
+        :param min_lon: The western longitude of the bounding box.
+        :param min_lat: The southern latitude of the bounding box.
+        :param max_lon: The eastern longitude of the bounding box.
+        :param max_lat: The northern latitude of the bounding box.
+
+        :return: The latitude and longitude of the centre, and the radius of the circle in metres.
+        """
+        lat: float = (min_lat + max_lat) / 2
+        lon: float = (min_lon + max_lon) / 2
+        # The circle encloses the corners and the middles of the edges of the bounding box, which are its farthest
+        # points from the centre.
+        radius_m: float = max(
+            cls.great_circle_distance(lat, lon, point_lat, point_lon)
+            for point_lat in (min_lat, lat, max_lat)
+            for point_lon in (min_lon, lon, max_lon)
+        )
+        return lat, lon, radius_m
+
+    @staticmethod
+    def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+        """
+        Calculates the bounds of a Web Mercator map tile.
+
+        :param z: The zoom of the tile.
+        :param x: The column of the tile, from the west.
+        :param y: The row of the tile, from the north.
+
+        :return: The west, south, east and north bounds of the tile.
+        """
+        tiles: int = 2 ** z
+
+        def latitude(row: int) -> float:
+            return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+
+        return x / tiles * 360 - 180, latitude(y + 1), (x + 1) / tiles * 360 - 180, latitude(y)
+
+    @classmethod
+    def filter_key(
+            cls,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[int] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            dictionaries: Optional[HousingUnitDictionaries] = None,
+    ) -> Tuple[Tuple[str, Any], ...]:
+        """
+        Normalises the provided filtering fields, so that the filtering fields matching the same HousingUnits have the
+        same key. E.g. the borough 'bronx' and 'BRONX'. The values of the categorical columns are normalised to all
+        their canonical values by the dictionaries, or are only case folded without them, for the cache keys.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param dictionaries: The dictionaries of the HousingUnit values, or None for only case folding the values.
+
+        :return: The applied filters as pairs of the filter name and the normalised value. The value is None when the
+            dictionaries have no HousingUnit with it.
+        """
+        filter_key: List[Tuple[str, Any]] = []
+        for filter_name, value in (
+                ('street_name', street_name),
+                ('borough', borough),
+                ('postcode', postcode),
+                ('construction_type', construction_type),
+        ):
+            if not value:
+                continue
+            if dictionaries is not None:
+                canonical_values: Optional[Tuple[str, ...]] = dictionaries.canonical_values(
+                    cls.CANONICAL_FILTERS[filter_name], value
+                )
+                # The postcodes are filtered by their integer values.
+                value = value if filter_name == 'postcode' and canonical_values is not None else canonical_values
+            elif filter_name != 'postcode':
+                value = normalise_value(value)
+            filter_key.append((filter_name, value))
+        if num_units_min is not None:
+            filter_key.append(('num_units_min', num_units_min))
+        if num_units_max is not None:
+            filter_key.append(('num_units_max', num_units_max))
+
+        return tuple(filter_key)
+
+    @staticmethod
+    def is_satisfiable(filter_key: Tuple[Tuple[str, Any], ...]) -> bool:
+        """
+        :param filter_key: The applied filters, as returned by the filter_key.
+
+        :return: Whether any HousingUnit can be matched by the filters, which is not the case when any of their values
+            is not a value of any HousingUnit.
+        """
+        return all(value is not None for _, value in filter_key)
+
+    @staticmethod
+    def row_columns(
+            fields: Optional[List[HousingUnitField]] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+    ) -> List[Any]:
+        """
+        Returns the columns selected by the filter_rows, for the provided fields and sort key.
+
+        :param fields: The HousingUnit fields that are selected, or None for selecting all the HousingUnitField ones.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+
+        :return: The id column, the sort key column labeled as sort_value, and the columns of the fields.
+        """
+        return [
+            HousingUnit.id,
+            getattr(HousingUnit, sort_key.value).label('sort_value'),
+            *[getattr(HousingUnit, field.value) for field in fields or HousingUnitField],
+        ]
+
+    @classmethod
+    def export_statement(cls, filter_key: Optional[Tuple[Tuple[str, Any], ...]]) -> Select:
+        """
+        Returns the statement selecting the export columns of the HousingUnits found from the filtering, sorted by
+        their id. The columns are labeled by the HousingUnit attribute names, and the uuid is selected as text.
+
+        :param filter_key: The applied filters with the canonical values, or None when they can't match any HousingUnit.
+
+        :return: The export statement.
+        """
+        return select(*[
+            (cast(HousingUnit.uuid, String) if attribute_name == 'uuid' else getattr(HousingUnit, attribute_name))
+            .label(attribute_name)
+            for attribute_name in cls.EXPORT_COLUMNS
+        ]).where(
+            and_(*cls._filters(filter_key)) if filter_key is not None else false()
+        ).order_by(HousingUnit.id)
+
+    @staticmethod
+    def literal_sql(statement: Select) -> str:
+        """
+        Compiles the statement to PostgreSQL SQL with its values rendered inline, for the statements that can't
+        have bind parameters, like the ones of the EXPLAIN and COPY.
+
+        :param statement: The statement.
+
+        :return: The compiled SQL of the statement.
+        """
+        return str(statement.compile(
+            dialect=postgresql.dialect(paramstyle='named'), compile_kwargs={'literal_binds': True}
+        ))
+
+    @classmethod
+    def collect_canonical_values(cls, session: Any, rows: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Collects the values of the written HousingUnit rows that are not collected yet, in the transaction of the
+        write, so that the filtering by them is not answered as matching no HousingUnit once the write is committed.
+
+        :param session: The sync session of the write.
+        :param rows: The written HousingUnit rows, keyed by the HousingUnit table column names.
+
+        :return: Whether any value was collected, for refreshing the dictionaries once the write is committed.
+        """
+        statement: Optional[postgresql.Insert] = cls._canonical_values_statement(rows)
+        return statement is not None and session.execute(statement).first() is not None
+
+    @classmethod
+    def prepared_page_statement(
+            cls,
+            filter_key: Tuple[Tuple[str, Any], ...],
+            rows: bool = False,
+            fields: Optional[List[HousingUnitField]] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            after: Optional[Tuple[Any, int]] = None,
+            limit: Optional[int] = None,
+    ) -> Tuple[Select, Dict[str, Any]]:
+        """
+        Returns the prepared statement selecting the page of the HousingUnits found from the filtering, along with
+        the parameters that it is executed with. The statement is built on the first page of every combination of the
+        applied filters, selected fields, sort key, pagination and limit, and is reused by the rest of them.
+
+        :param filter_key: The applied filters, as returned by the filter_key.
+        :param rows: Whether the columns of the fields are selected into rows, instead of the HousingUnit instances.
+        :param fields: The HousingUnit fields that are selected into rows, or None for all the HousingUnitField ones.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+        :param after: The sort key value and id of the HousingUnit that the selected HousingUnits are following.
+        :param limit: The maximum number of HousingUnits to select.
+
+        :return: The prepared statement and its parameters.
+        """
+        filters_bitmask, null_filters_bitmask = cls.filters_bitmasks(filter_key)
+        statement_key: Tuple[Any, ...] = (
+            'page',
+            filters_bitmask,
+            null_filters_bitmask,
+            tuple(fields or HousingUnitField) if rows else None,
+            sort_key,
+            after is not None,
+            limit is not None,
+        )
+        statement: Optional[Select] = cls.PREPARED_STATEMENTS.get(statement_key)
+        if statement is None:
+            statement = cls.page_statement(
+                select(*cls.row_columns(fields=fields, sort_key=sort_key)) if rows else select(HousingUnit),
+                filters=cls._prepared_filters(filters_bitmask, null_filters_bitmask),
+                sort_key=sort_key,
+                after=(
+                    bindparam('after_sort_value', type_=getattr(HousingUnit, sort_key.value).type),
+                    bindparam('after_id', type_=HousingUnit.id.type),
+                ) if after is not None else None,
+                limit=bindparam('limit', type_=Integer) if limit is not None else None,
+            )
+            cls.PREPARED_STATEMENTS.set(statement_key, statement)
+
+        parameters: Dict[str, Any] = cls._prepared_parameters(filter_key)
+        if after is not None:
+            parameters['after_sort_value'], parameters['after_id'] = after
+        if limit is not None:
+            parameters['limit'] = limit
+
+        return statement, parameters
+
+    @classmethod
+    def prepared_count_statement(cls, filter_key: Tuple[Tuple[str, Any], ...]) -> Tuple[Select, Dict[str, Any]]:
+        """
+        Returns the prepared statement counting the HousingUnits found from the filtering, along with the parameters
+        that it is executed with.
+
+        :param filter_key: The applied filters, as returned by the filter_key.
+
+        :return: The prepared statement and its parameters.
+        """
+        filters_bitmask, null_filters_bitmask = cls.filters_bitmasks(filter_key)
+        statement_key: Tuple[Any, ...] = ('count', filters_bitmask, null_filters_bitmask)
+        statement: Optional[Select] = cls.PREPARED_STATEMENTS.get(statement_key)
+        if statement is None:
+            statement = select(func.count()).select_from(HousingUnit).where(
+                and_(*cls._prepared_filters(filters_bitmask, null_filters_bitmask))
+            )
+            cls.PREPARED_STATEMENTS.set(statement_key, statement)
+
+        return statement, cls._prepared_parameters(filter_key)
+
+    @classmethod
+    def filters_bitmasks(cls, filter_key: Tuple[Tuple[str, Any], ...]) -> Tuple[int, int]:
+        """
+        Returns the bitmasks of the applied filters, with the bits of the FILTER_NAMES. The filters without a value,
+        e.g. of a borough that no HousingUnit has, are matching no HousingUnit, and have their own bitmask.
+
+        :param filter_key: The applied filters, as returned by the filter_key.
+
+        :return: The bitmask of the applied filters with values, and the bitmask of the ones without.
+        """
+        filters_bitmask: int = 0
+        null_filters_bitmask: int = 0
+        for filter_name, value in filter_key:
+            if value is None:
+                null_filters_bitmask |= 1 << cls.FILTER_NAMES.index(filter_name)
+            else:
+                filters_bitmask |= 1 << cls.FILTER_NAMES.index(filter_name)
+
+        return filters_bitmask, null_filters_bitmask
+
+    @staticmethod
+    def page_statement(
+            statement: Select,
+            filters: List[BinaryExpression],
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            after: Optional[Tuple[Any, int]] = None,
+            limit: Optional[int] = None,
+    ) -> Select:
+        """
+        Applies the filtering expressions, the sorting and the keyset pagination of the HousingUnits to the statement.
+
+        :param statement: The select statement of the HousingUnits.
+        :param filters: The HousingUnit filtering expressions.
+        :param sort_key: The HousingUnit column that the HousingUnits are sorted by.
+        :param after: The sort key value and id of the HousingUnit that the selected HousingUnits are following.
+        :param limit: The maximum number of HousingUnits to select.
+
+        :return: The statement selecting the page of the HousingUnits.
+        """
+        sort_column: Column = getattr(HousingUnit, sort_key.value)
+        filters = list(filters)
+        if after is not None:
+            sort_value, housing_unit_id = after
+            if sort_key == HousingUnitSortKey.id:
+                filters.append(HousingUnit.id > housing_unit_id)
+            else:
+                filters.append(tuple_(sort_column, HousingUnit.id) > tuple_(sort_value, housing_unit_id))
+
+        return statement.where(and_(*filters)).order_by(sort_column, HousingUnit.id).limit(limit)
+
+    @classmethod
+    def _filters(cls, filter_key: Tuple[Tuple[str, Any], ...]) -> List[BinaryExpression]:
+        """
+        Builds the HousingUnit filtering expressions of the applied filters, from their canonical values. The filters
+        without a value match no HousingUnit.
+
+        :param filter_key: The applied filters, as returned by the filter_key with the dictionaries.
+
+        :return: The filtering expressions.
+        """
+        filter_expressions: Dict[str, Callable[[Any], BinaryExpression]] = {
+            'street_name': lambda values: HousingUnit.street_name.in_(values),
+            'borough': lambda values: HousingUnit.borough.in_(values),
+            'postcode': lambda value: HousingUnit.postcode == value,
+            'construction_type': lambda values: HousingUnit.reporting_construction_type.in_(values),
+            'num_units_min': lambda value: HousingUnit.total_units >= value,
+            'num_units_max': lambda value: HousingUnit.total_units <= value,
+        }
+
+        return [
+            filter_expressions[filter_name](value) if value is not None else false()
+            for filter_name, value in filter_key
+        ]
+
+    @classmethod
+    def _prepared_filters(cls, filters_bitmask: int, null_filters_bitmask: int) -> List[BinaryExpression]:
+        """
+        :param filters_bitmask: The bitmask of the applied filters with values.
+        :param null_filters_bitmask: The bitmask of the applied filters without values.
+
+        :return: The filtering expressions of the prepared statements, in the order of the FILTER_NAMES.
+        """
+        filters: List[BinaryExpression] = []
+        for bit, filter_name in enumerate(cls.FILTER_NAMES):
+            if filters_bitmask & 1 << bit:
+                filters.append(cls.PREPARED_FILTERS[filter_name])
+            elif null_filters_bitmask & 1 << bit:
+                filters.append(false())
+
+        return filters
+
+    @staticmethod
+    def _prepared_parameters(filter_key: Tuple[Tuple[str, Any], ...]) -> Dict[str, Any]:
+        """
+        :param filter_key: The applied filters, as returned by the filter_key.
+
+        :return: The parameters of the prepared statements, bound by the filter names.
+        """
+        return {filter_name: value for filter_name, value in filter_key if value is not None}
+
+    @staticmethod
+    def _canonical_value_row(housing_unit: HousingUnit) -> Dict[str, Any]:
+        """
+        :param housing_unit: The written HousingUnit.
+
+        :return: The values of the CANONICAL_VALUE_COLUMNS of the HousingUnit, keyed by the column names.
+        """
+        return {
+            column_name: getattr(housing_unit, HousingUnit.__mapper__.get_property_by_column(
+                HousingUnit.__table__.c[column_name]
+            ).key)
+            for column_name in CANONICAL_VALUE_COLUMNS
+        }
+
+    @staticmethod
+    def _canonical_values_statement(rows: Iterable[Dict[str, Any]]) -> Optional[postgresql.Insert]:
+        """
+        Builds the statement collecting the values of the CANONICAL_VALUE_COLUMNS of the written HousingUnit rows that
+        are not collected yet, counted by the written rows. The values are inserted in their sorted order, so that the
+        concurrent writes of the same values don't deadlock.
+
+        :param rows: The written HousingUnit rows, keyed by the HousingUnit table column names.
+
+        :return: The statement returning the ids of the collected values, or None when the rows have no values.
+        """
+        value_counts: Counter = Counter(
+            (column_name, str(row[column_name]))
+            for row in rows
+            for column_name in CANONICAL_VALUE_COLUMNS
+            if row.get(column_name) is not None and str(row[column_name]).strip()
+        )
+        if not value_counts:
+            return None
+
+        return postgresql.insert(HousingUnitCanonicalValue.__table__).values([
+            {'uuid': uuid4(), 'column_name': column_name, 'value': value, 'housing_units': housing_units}
+            for (column_name, value), housing_units in sorted(value_counts.items())
+        ]).on_conflict_do_nothing(
+            index_elements=['column_name', 'value']
+        ).returning(HousingUnitCanonicalValue.__table__.c.id)
+
+    async def _lock_against_staging_loads(self, session: Any) -> None:
+        """
+        Takes the advisory lock of the staging table loads shared, until the end of the transaction of the session.
+
+        :param session: The async session of the write.
+
+        :raises HousingUnitConflictError: When the lock is held by an ingestion loading the staging table.
+        """
+        if not (await session.execute(self.STAGING_LOAD_WRITE_LOCK_STATEMENT)).scalar():
+            raise HousingUnitConflictError(
+                "The Housing Units are being reloaded by a data ingestion, retry once it is completed."
+            )
+
+    def _cache_dictionaries(self, dictionaries: HousingUnitDictionaries, invalidations_sequence: int) -> None:
+        """
+        Caches the loaded dictionaries, unless they were invalidated while being loaded, or within the replica lag
+        before, as they may have been loaded before the values of the invalidating write were collected, or from a
+        read replica that has not replayed them yet.
+
+        :param dictionaries: The loaded dictionaries of the HousingUnit values.
+        :param invalidations_sequence: The sequence of the invalidations before the dictionaries were loaded.
+        """
+        if not HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.is_settled(
+                invalidations_sequence, Configuration.get().db_replica_max_lag_seconds
+        ):
+            return
+
+        if HOUSING_UNITS_DICTIONARIES_INVALIDATIONS.subscribed:
+            self.DICTIONARIES.set(self.DICTIONARIES_KEY, dictionaries)
+        else:
+            self.DICTIONARIES.set(
+                self.DICTIONARIES_KEY, dictionaries, ttl_seconds=self.UNSUBSCRIBED_DICTIONARIES_TTL_SECONDS
+            )
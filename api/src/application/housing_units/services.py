@@ -1,11 +1,29 @@
-from typing import Optional, List
+import io
+import os
+import re
+from typing import Optional, List, Tuple, Any, AsyncIterator, Pattern, Callable
 
 from fastapi import HTTPException
-
+from sqlalchemy.engine import Row
+
+from application.housing_units.cursors import decode_cursor, encode_cursor
+from application.housing_units.caches import HOUSING_UNITS_CACHE_GENERATION, HOUSING_UNITS_CACHE_INVALIDATIONS, \
+    housing_unit_cache_key
+from application.housing_units.dictionaries import HousingUnitDictionaries, StreetNameSuggestion
+from application.housing_units.enums import LoadStrategy, IngestionMode, HousingUnitSortKey, TotalMode, \
+    HousingUnitField, ExportFormat
+from application.housing_units.etags import HousingUnitsPage, housing_units_page_etag, is_not_modified
+from application.housing_units.exporters import HousingUnitsExport, HousingUnitsExportWriter, HousingUnitsExporter
 from application.housing_units.models import HousingUnit
 from application.housing_units.repositories import HousingUnitsRepository
+from application.housing_units.tasks import housing_units_export_task
+from application.infrastructure.cache.caches import TTLCache, RedisCache, CacheStats
+from application.infrastructure.configurations.models import Configuration
 from application.infrastructure.error.errors import InvalidArgumentError
-from application.housing_units.errors import InvalidNumUnitsError
+from application.housing_units.errors import InvalidNumUnitsError, InvalidFieldsError, InvalidSearchQueryError, \
+    InvalidLocationError, InvalidTileError
+from application.rest_api.housing_units.responses import filter_housing_units_content, housing_units_tile_content, \
+    validated_filter_housing_units_content
 from application.rest_api.housing_units.schemas import FilterHousingUnits, HousingUnitPostRequestBody
 from application.rest_api.task_status.schemas import TaskStatus
 from application.socrata.tasks import housing_unit_raw_data_ingestion_task
@@ -20,22 +38,38 @@ class HousingUnitsDataIngestionService:
     ) -> None:
         self._get_task_status_report_service: GetTaskStatusReportService = get_task_status_report_service
 
-    async def apply(self, hbd_dataset_id: str = 'hg8x-zxpr', reset_table: bool = True) -> TaskStatus:
+    async def apply(
+            self,
+            hbd_dataset_id: str = 'hg8x-zxpr',
+            reset_table: bool = True,
+            load_strategy: LoadStrategy = LoadStrategy.core,
+            mode: IngestionMode = IngestionMode.full,
+    ) -> TaskStatus:
         """
         Data ingestion of the raw Housing Preservation and Development (HBD) data into the into the HousingUnit table.
         The actual operation is executed in a celery task housing_unit_raw_data_ingestion_task.
 
         :param hbd_dataset_id: The HBD dataset id to download and ingest into HousingUnit table.
-        :param reset_table: Flag for resetting the saved table data.
+        :param reset_table: Flag for replacing the saved table data on the full mode, instead of upserting the whole
+            dataset into it.
+        :param load_strategy: The strategy used for loading the rows into the HousingUnit table.
+        :param mode: The ingestion mode, either downloading the whole dataset, or only the rows updated since the
+            last ingestion of the dataset.
 
         :return: The celery task status that the data ingestion is executed under.
 
-        :raises InvalidArgumentError: If the HBD dataset id is not provided.
+        :raises InvalidArgumentError: If the HBD dataset id, the load strategy or the ingestion mode is not provided.
         """
         if not hbd_dataset_id:
             raise InvalidArgumentError("The HBD dataset id is not provided.")
+        if not load_strategy:
+            raise InvalidArgumentError("The load strategy is not provided.")
+        if not mode:
+            raise InvalidArgumentError("The ingestion mode is not provided.")
 
-        task = housing_unit_raw_data_ingestion_task.delay(hbd_dataset_id, reset_table)
+        task = housing_unit_raw_data_ingestion_task.delay(
+            hbd_dataset_id, reset_table, load_strategy.value, mode.value
+        )
 
         return self._get_task_status_report_service.apply(task_id=task.id)
 
@@ -45,8 +79,10 @@ class FilterHousingUnitsService:
     def __init__(
             self,
             housing_units_repository: HousingUnitsRepository,
+            housing_units_totals_cache: TTLCache,
     ) -> None:
         self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+        self._housing_units_totals_cache: TTLCache = housing_units_totals_cache
 
     async def apply(
             self,
@@ -56,9 +92,16 @@ class FilterHousingUnitsService:
             construction_type: Optional[str] = None,
             num_units_min: Optional[int] = None,
             num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            total_mode: TotalMode = TotalMode.exact,
+            fields: Optional[str] = None,
     ) -> FilterHousingUnits:
         """
-        Service that filters the HousingUnits based on the provided filtering fields.
+        Service that filters the HousingUnits based on the provided filtering fields, and returns a single page of
+        them. One more HousingUnit than the limit is retrieved, for knowing whether there is a next page.
+        Only the columns of the returned fields are retrieved, and the HousingUnits hold only these fields.
 
         :param street_name: The Housing Unit street name.
         :param borough: The Housing Unit borough.
@@ -66,10 +109,18 @@ class FilterHousingUnitsService:
         :param construction_type: The Housing Unit construction type.
         :param num_units_min: The Housing Unit num_units_min.
         :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The field that the HousingUnits are sorted by.
+        :param limit: The maximum number of HousingUnits of the page.
+        :param cursor: The next cursor of the previous page, or None for the first page.
+        :param total_mode: The way that the total number of the filtered HousingUnits is computed.
+        :param fields: The comma separated HousingUnit fields that are returned, or None for returning all of them.
 
-        :return: The Housing Units retrieved from the filtering, and a number indicating the total number of results.
+        :return: The page of Housing Units retrieved from the filtering, a number indicating the total number of
+            results, and the cursor of the next page.
 
         :raises InvalidNumUnitsErrors: When the num_units_max is smaller than num_units_min.
+        :raises InvalidCursorError: When the cursor is not valid for the sort key.
+        :raises InvalidFieldsError: When the fields are not HousingUnitField values.
         """
         if num_units_max is not None and num_units_min is not None:
             if num_units_max < num_units_min:
@@ -77,19 +128,616 @@ class FilterHousingUnitsService:
                     "The provided number of maximum units can't be smaller than the number of minimum units"
                 )
 
-        housing_units: List[HousingUnit] = await self._housing_units_repository.filter(
+        housing_units: List[Row] = await self._housing_units_repository.filter_rows(
+            fields=self.parse_fields(fields) if fields else None,
             street_name=street_name,
             borough=borough,
             postcode=postcode,
             construction_type=construction_type,
             num_units_min=num_units_min,
             num_units_max=num_units_max,
+            sort_key=sort_key,
+            after=decode_cursor(cursor, sort_key) if cursor else None,
+            limit=limit + 1,
+        )
+        total: int = await self._total(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+            total_mode=total_mode,
         )
 
-        return FilterHousingUnits(
+        next_cursor: Optional[str] = None
+        if len(housing_units) > limit:
+            housing_units = housing_units[:limit]
+            last_housing_unit: Row = housing_units[-1]
+            next_cursor = encode_cursor(sort_key, last_housing_unit.sort_value, last_housing_unit.id)
+
+        # The rows are validated once, by the response model of the response that they are returned with.
+        return FilterHousingUnits.construct(
             housing_units=housing_units,
-            total=len(housing_units)
+            total=total,
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    def parse_fields(fields: str) -> List[HousingUnitField]:
+        """
+        Parses the comma separated HousingUnit fields of the sparse fieldsets, dropping the repeated ones.
+
+        :param fields: The comma separated HousingUnit fields.
+
+        :return: The HousingUnitFields, in the provided order.
+
+        :raises InvalidFieldsError: When the fields are not HousingUnitField values.
+        """
+        field_names: List[str] = list(dict.fromkeys(
+            field_name.strip() for field_name in fields.split(',') if field_name.strip()
+        ))
+        invalid_field_names: List[str] = [
+            field_name for field_name in field_names if field_name not in HousingUnitField.values()
+        ]
+        if not field_names:
+            raise InvalidFieldsError(
+                "The provided fields are empty, the available fields are: {0}.".format(
+                    ', '.join(HousingUnitField.values())
+                )
+            )
+        if invalid_field_names:
+            raise InvalidFieldsError(
+                "The provided fields {0} are not valid, the available fields are: {1}.".format(
+                    ', '.join(invalid_field_names), ', '.join(HousingUnitField.values())
+                )
+            )
+
+        return [HousingUnitField(field_name) for field_name in field_names]
+
+    async def _total(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[str] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            total_mode: TotalMode = TotalMode.exact,
+    ) -> int:
+        """
+        Computes the total number of the filtered HousingUnits, through the totals cache. The totals are cached per
+        normalised filtering fields and HousingUnit table generation, so the pages of the same filtering are counted
+        once, and the totals cached before a write to the HousingUnit table are not returned after it.
+        The cache is not used when the generation is not available.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param total_mode: The way that the total number of the filtered HousingUnits is computed.
+
+        :return: The total number of the filtered HousingUnits.
+        """
+        # The generation is read before counting, so that a total counted during a write is cached under the
+        # generation preceding the write.
+        generation: Optional[int] = HOUSING_UNITS_CACHE_GENERATION.get()
+        cache_key: Tuple[Any, ...] = (
+            total_mode.value,
+            generation,
+            HousingUnitsRepository.filter_key(
+                street_name=street_name,
+                borough=borough,
+                postcode=postcode,
+                construction_type=construction_type,
+                num_units_min=num_units_min,
+                num_units_max=num_units_max,
+            ),
+        )
+        if generation is not None:
+            cached_total: Optional[int] = self._housing_units_totals_cache.get(cache_key)
+            if cached_total is not None:
+                return cached_total
+
+        count = (
+            self._housing_units_repository.estimate_count
+            if total_mode == TotalMode.estimated else self._housing_units_repository.count
+        )
+        total: int = await count(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+
+        if generation is not None:
+            self._housing_units_totals_cache.set(cache_key, total)
+
+        return total
+
+
+class CachedFilterHousingUnitsService:
+
+    def __init__(
+            self,
+            filter_housing_units_service: FilterHousingUnitsService,
+            housing_units_filter_cache: RedisCache,
+    ) -> None:
+        self._filter_housing_units_service: FilterHousingUnitsService = filter_housing_units_service
+        self._housing_units_filter_cache: RedisCache = housing_units_filter_cache
+
+    async def apply(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[str] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            total_mode: TotalMode = TotalMode.exact,
+            fields: Optional[str] = None,
+            if_none_match: Optional[str] = None,
+    ) -> HousingUnitsPage:
+        """
+        Service that returns the serialised page of the filtered HousingUnits through the filter cache, which is
+        shared by all the API workers and keyed by the normalised request parameters and the HousingUnit table
+        generation. The ETag of the page is derived from its cache key, so a page matching the If-None-Match of the
+        request is neither read from the cache nor filtered again.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The field that the HousingUnits are sorted by.
+        :param limit: The maximum number of HousingUnits of the page.
+        :param cursor: The next cursor of the previous page, or None for the first page.
+        :param total_mode: The way that the total number of the filtered HousingUnits is computed.
+        :param fields: The comma separated HousingUnit fields that are returned, or None for returning all of them.
+        :param if_none_match: The If-None-Match header of the request.
+
+        :return: The JSON content of the page of Housing Units retrieved from the filtering, and its ETag when the
+            generation is available, or only the ETag when the page is not modified.
+
+        :raises InvalidNumUnitsErrors: When the num_units_max is smaller than num_units_min.
+        :raises InvalidCursorError: When the cursor is not valid for the sort key.
+        :raises InvalidFieldsError: When the fields are not HousingUnitField values.
+        """
+        # The generation is read before filtering, so that a page filtered during a write is cached under the
+        # generation preceding the write.
+        generation: Optional[int] = HOUSING_UNITS_CACHE_GENERATION.get()
+        cache_key: Tuple[Any, ...] = (
+            generation,
+            HousingUnitsRepository.filter_key(
+                street_name=street_name,
+                borough=borough,
+                postcode=postcode,
+                construction_type=construction_type,
+                num_units_min=num_units_min,
+                num_units_max=num_units_max,
+            ),
+            sort_key.value,
+            limit,
+            cursor,
+            total_mode.value,
+            tuple(field.value for field in FilterHousingUnitsService.parse_fields(fields)) if fields else None,
         )
+        etag: Optional[str] = None
+        if generation is not None:
+            etag = housing_units_page_etag(cache_key)
+            if is_not_modified(etag=etag, if_none_match=if_none_match):
+                return HousingUnitsPage(etag=etag)
+
+            cached_content: Optional[bytes] = self._housing_units_filter_cache.get(cache_key)
+            if cached_content is not None:
+                return HousingUnitsPage(content=cached_content, etag=etag)
+
+        serialise: Callable[[FilterHousingUnits], bytes] = (
+            filter_housing_units_content if Configuration.get().fast_json_responses
+            else validated_filter_housing_units_content
+        )
+        content: bytes = serialise(
+            await self._filter_housing_units_service.apply(
+                street_name=street_name,
+                borough=borough,
+                postcode=postcode,
+                construction_type=construction_type,
+                num_units_min=num_units_min,
+                num_units_max=num_units_max,
+                sort_key=sort_key,
+                limit=limit,
+                cursor=cursor,
+                total_mode=total_mode,
+                fields=fields,
+            )
+        )
+
+        if generation is not None:
+            self._housing_units_filter_cache.set(cache_key, content)
+
+        return HousingUnitsPage(content=content, etag=etag)
+
+
+class StreamHousingUnitsService:
+
+    def __init__(self, housing_units_repository: HousingUnitsRepository) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+
+    async def apply(
+            self,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[str] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+            sort_key: HousingUnitSortKey = HousingUnitSortKey.id,
+            cursor: Optional[str] = None,
+            fields: Optional[str] = None,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Service that filters the HousingUnits based on the provided filtering fields, and streams all of them in
+        batches of rows, instead of returning a single page of them. The provided fields are validated before the
+        streaming starts, and the rows are read from the HousingUnit table while the batches are consumed.
+
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+        :param sort_key: The field that the HousingUnits are sorted by.
+        :param cursor: The next cursor of a page, for streaming the HousingUnits following it, or None.
+        :param fields: The comma separated HousingUnit fields that are returned, or None for returning all of them.
+
+        :return: The batches of the rows of the HousingUnits retrieved from the filtering.
+
+        :raises InvalidNumUnitsErrors: When the num_units_max is smaller than num_units_min.
+        :raises InvalidCursorError: When the cursor is not valid for the sort key.
+        :raises InvalidFieldsError: When the fields are not HousingUnitField values.
+        """
+        if num_units_max is not None and num_units_min is not None:
+            if num_units_max < num_units_min:
+                raise InvalidNumUnitsError(
+                    "The provided number of maximum units can't be smaller than the number of minimum units"
+                )
+
+        return self._housing_units_repository.stream_rows(
+            fields=FilterHousingUnitsService.parse_fields(fields) if fields else None,
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+            sort_key=sort_key,
+            after=decode_cursor(cursor, sort_key) if cursor else None,
+        )
+
+
+class SearchHousingUnitsService:
+    # The shortest searched query, as the shorter ones have too few trigrams for being similar to any street name.
+    MIN_QUERY_LENGTH: int = 3
+
+    def __init__(self, housing_units_repository: HousingUnitsRepository) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+
+    async def apply(self, query: str, limit: int = 20) -> List[Row]:
+        """
+        Service that searches the HousingUnits by their street names, regardless of the case and of the whitespace of
+        the query, and returns the best ranked ones.
+
+        :param query: The searched words of the street names.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the found HousingUnits, from the highest ranked to the lowest.
+
+        :raises InvalidSearchQueryError: When the query is shorter than the MIN_QUERY_LENGTH.
+        """
+        query = ' '.join((query or '').split())
+        if len(query) < self.MIN_QUERY_LENGTH:
+            raise InvalidSearchQueryError(
+                "The search query must have at least {0} characters.".format(self.MIN_QUERY_LENGTH)
+            )
+
+        return await self._housing_units_repository.search(query=query, limit=limit)
+
+
+class AutocompleteStreetNamesService:
+
+    def __init__(self, housing_units_repository: HousingUnitsRepository) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+
+    async def apply(self, prefix: str, limit: int = 10) -> List[StreetNameSuggestion]:
+        """
+        Service that autocompletes the street names starting with the prefix, from the in-memory dictionary of the
+        distinct street names of the worker, which is one of the dictionaries of the HousingUnit values.
+
+        :param prefix: The prefix of the street names.
+        :param limit: The maximum number of street names to return.
+
+        :return: The street names starting with the prefix, ranked by their number of HousingUnits.
+        """
+        dictionaries: HousingUnitDictionaries = await self._housing_units_repository.dictionaries()
+        return dictionaries.street_names.complete(prefix=prefix, limit=limit)
+
+
+class NearHousingUnitsService:
+
+    def __init__(self, housing_units_repository: HousingUnitsRepository) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+
+    async def apply(
+            self,
+            lat: Optional[float] = None,
+            lon: Optional[float] = None,
+            radius_m: Optional[float] = None,
+            bbox: Optional[str] = None,
+            limit: int = 100,
+    ) -> List[Row]:
+        """
+        Service that finds the HousingUnits either within a distance of a point or within a bounding box, through the
+        location index, and returns the nearest ones.
+
+        :param lat: The latitude of the point.
+        :param lon: The longitude of the point.
+        :param radius_m: The maximum distance of the HousingUnits from the point, in metres.
+        :param bbox: The comma separated min_lon,min_lat,max_lon,max_lat of the bounding box.
+        :param limit: The maximum number of HousingUnits to return.
+
+        :return: The rows of the found HousingUnits, from the nearest one to the point, or to the centre of the
+            bounding box, to the farthest.
+
+        :raises InvalidLocationError: When neither or both of the point with its radius and the bounding box are
+            provided, or when the bounding box is not a valid one.
+        """
+        point: List[Optional[float]] = [lat, lon, radius_m]
+        if bbox is not None:
+            if any(value is not None for value in point):
+                raise InvalidLocationError("Either the lat, lon and radius_m or the bbox must be provided, not both.")
+
+            min_lon, min_lat, max_lon, max_lat = self._bounding_box(bbox)
+            return await self._housing_units_repository.within(
+                min_lon=min_lon, min_lat=min_lat, max_lon=max_lon, max_lat=max_lat, limit=limit
+            )
+
+        if any(value is None for value in point):
+            raise InvalidLocationError("Either the lat, lon and radius_m or the bbox must be provided.")
+
+        return await self._housing_units_repository.near(lat=lat, lon=lon, radius_m=radius_m, limit=limit)
+
+    @staticmethod
+    def _bounding_box(bbox: str) -> Tuple[float, float, float, float]:
+        """
+        Parses the bounding box, which must not cross the antimeridian.
+
+        :param bbox: The comma separated min_lon,min_lat,max_lon,max_lat of the bounding box.
+
+        :return: The min_lon, min_lat, max_lon and max_lat of the bounding box.
+
+        :raises InvalidLocationError: When the bounding box is not four coordinates, or they are out of range, or the
+            minimum coordinates are not less than the maximum ones.
+        """
+        try:
+            min_lon, min_lat, max_lon, max_lat = [float(coordinate) for coordinate in bbox.split(',')]
+        except ValueError:
+            raise InvalidLocationError("The bbox must be the comma separated min_lon,min_lat,max_lon,max_lat.")
+
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise InvalidLocationError(
+                "The bbox longitudes must be from -180 to 180 and its latitudes from -90 to 90, with every minimum "
+                "less than its maximum."
+            )
+
+        return min_lon, min_lat, max_lon, max_lat
+
+
+class TileHousingUnitsService:
+    # The deepest zoom of the tiles, at which the grid cells are a few metres wide.
+    MAX_ZOOM: int = 22
+
+    def __init__(self, housing_units_repository: HousingUnitsRepository, housing_units_tiles_cache: RedisCache) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+        self._housing_units_tiles_cache: RedisCache = housing_units_tiles_cache
+
+    async def apply(self, z: int, x: int, y: int, if_none_match: Optional[str] = None) -> HousingUnitsPage:
+        """
+        Service that returns the serialised map tile of the HousingUnits clustered into the cells of its grid, through
+        the tiles cache, which is shared by all the API workers. The tiles are cached per HousingUnit table
+        generation, the same way as the pages of the CachedFilterHousingUnitsService, so the tiles cached before a
+        write to the HousingUnit table are not returned after it, and their ETags are derived from their cache keys.
+
+        :param z: The zoom of the tile.
+        :param x: The column of the tile, from the west.
+        :param y: The row of the tile, from the north.
+        :param if_none_match: The If-None-Match header of the request.
+
+        :return: The JSON content of the tile and its ETag when the generation is available, or only the ETag when the
+            tile is not modified.
+
+        :raises InvalidTileError: When the zoom is greater than the MAX_ZOOM, or the tile is not one of the zoom.
+        """
+        if not 0 <= z <= self.MAX_ZOOM:
+            raise InvalidTileError("The tile zoom must be from 0 to {0}.".format(self.MAX_ZOOM))
+        if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise InvalidTileError("The tile x and y must be from 0 to {0} at zoom {1}.".format(2 ** z - 1, z))
+
+        # The generation is read before clustering, so that a tile clustered during a write is cached under the
+        # generation preceding the write.
+        generation: Optional[int] = HOUSING_UNITS_CACHE_GENERATION.get()
+        cache_key: Tuple[Any, ...] = (generation, 'tile', z, x, y)
+        etag: Optional[str] = None
+        if generation is not None:
+            etag = housing_units_page_etag(cache_key)
+            if is_not_modified(etag=etag, if_none_match=if_none_match):
+                return HousingUnitsPage(etag=etag)
+
+            cached_content: Optional[bytes] = self._housing_units_tiles_cache.get(cache_key)
+            if cached_content is not None:
+                return HousingUnitsPage(content=cached_content, etag=etag)
+
+        content: bytes = housing_units_tile_content(
+            z=z, x=x, y=y, rows=await self._housing_units_repository.tile_cells(z=z, x=x, y=y)
+        )
+
+        if generation is not None:
+            self._housing_units_tiles_cache.set(cache_key, content)
+
+        return HousingUnitsPage(content=content, etag=etag)
+
+
+class ExportHousingUnitsService:
+
+    # The exports estimated to have more rows are written by the housing_units_export_task, instead of being streamed.
+    EXPORT_MAX_STREAMED_ROWS: int = 100000
+
+    def __init__(
+            self,
+            housing_units_repository: HousingUnitsRepository,
+            housing_units_exporter: HousingUnitsExporter,
+            get_task_status_report_service: GetTaskStatusReportService,
+    ) -> None:
+        self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+        self._housing_units_exporter: HousingUnitsExporter = housing_units_exporter
+        self._get_task_status_report_service: GetTaskStatusReportService = get_task_status_report_service
+
+    async def apply(
+            self,
+            export_format: ExportFormat = ExportFormat.csv,
+            street_name: Optional[str] = None,
+            borough: Optional[str] = None,
+            postcode: Optional[str] = None,
+            construction_type: Optional[str] = None,
+            num_units_min: Optional[int] = None,
+            num_units_max: Optional[int] = None,
+    ) -> HousingUnitsExport:
+        """
+        Service that exports the HousingUnits found from the filtering, with the same filtering fields as the
+        FilterHousingUnitsService. The exports estimated to have up to EXPORT_MAX_STREAMED_ROWS rows are streamed
+        with the response, while the larger ones are written to the exports directory by the housing_units_export_task,
+        which reports the download url of the exported file through its task status.
+
+        :param export_format: The file format of the export.
+        :param street_name: The Housing Unit street name.
+        :param borough: The Housing Unit borough.
+        :param postcode: The Housing Unit postcode.
+        :param construction_type: The Housing Unit construction type.
+        :param num_units_min: The Housing Unit num_units_min.
+        :param num_units_max: The Housing Unit num_units_max.
+
+        :return: The HousingUnitsExport, holding either the streamed content or the export task status.
+
+        :raises InvalidArgumentError: When the export format is not provided.
+        :raises InvalidNumUnitsErrors: When the num_units_max is smaller than num_units_min.
+        """
+        if not export_format:
+            raise InvalidArgumentError("The export format is not provided.")
+        if num_units_max is not None and num_units_min is not None:
+            if num_units_max < num_units_min:
+                raise InvalidNumUnitsError(
+                    "The provided number of maximum units can't be smaller than the number of minimum units"
+                )
+
+        estimated_rows: int = await self._housing_units_repository.estimate_count(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
+        )
+        if estimated_rows > self.EXPORT_MAX_STREAMED_ROWS:
+            task = housing_units_export_task.delay(
+                export_format.value, street_name, borough, postcode, construction_type, num_units_min, num_units_max
+            )
+
+            return HousingUnitsExport(
+                export_format=export_format,
+                task_status=self._get_task_status_report_service.apply(task_id=task.id),
+            )
+
+        if export_format == ExportFormat.csv:
+            content: AsyncIterator[bytes] = self._housing_units_exporter.stream_export_csv(
+                street_name=street_name,
+                borough=borough,
+                postcode=postcode,
+                construction_type=construction_type,
+                num_units_min=num_units_min,
+                num_units_max=num_units_max,
+            )
+        else:
+            content = self._columnar_content(
+                export_format=export_format,
+                batches=self._housing_units_exporter.stream_export_rows(
+                    street_name=street_name,
+                    borough=borough,
+                    postcode=postcode,
+                    construction_type=construction_type,
+                    num_units_min=num_units_min,
+                    num_units_max=num_units_max,
+                ),
+            )
+
+        return HousingUnitsExport(export_format=export_format, content=content)
+
+    @staticmethod
+    async def _columnar_content(
+            export_format: ExportFormat,
+            batches: AsyncIterator[List[Row]],
+    ) -> AsyncIterator[bytes]:
+        """
+        Writes the batches of the exported rows to a parquet or arrow file in memory, which is yielded once the file
+        footer is written, as the footer holds the offsets of the written batches.
+
+        :param export_format: The columnar file format of the export.
+        :param batches: The batches of the rows of the export columns.
+
+        :return: The yielded file content.
+        """
+        export_file: io.BytesIO = io.BytesIO()
+        with HousingUnitsExportWriter(export_file, export_format) as export_writer:
+            async for rows in batches:
+                export_writer.write(rows)
+
+        yield export_file.getvalue()
+
+
+class RetrieveHousingUnitsExportService:
+
+    # The file names of the exported files, which are named by a uuid and the export format.
+    EXPORT_FILE_NAME_PATTERN: Pattern = re.compile(
+        r'^[0-9a-f]{{8}}-[0-9a-f]{{4}}-[0-9a-f]{{4}}-[0-9a-f]{{4}}-[0-9a-f]{{12}}\.({0})$'.format(
+            '|'.join(ExportFormat.values())
+        )
+    )
+
+    def apply(self, file_name: str) -> str:
+        """
+        Service that returns the path of the file exported by the housing_units_export_task, in the exports directory.
+
+        :param file_name: The exported file name, as reported by the export task status.
+
+        :return: The path of the exported file.
+
+        :raises InvalidArgumentError: When the file name is not provided.
+        :raises HTTPException: When the file name is not one of an exported file, or the file doesn't exist.
+        """
+        if not file_name:
+            raise InvalidArgumentError("The file name is not provided.")
+
+        file_path: str = os.path.join(Configuration.get().export_directory, file_name)
+        if not self.EXPORT_FILE_NAME_PATTERN.match(file_name) or not os.path.isfile(file_path):
+            raise HTTPException(status_code=404, detail="Housing Units export not found.")
+
+        return file_path
 
 
 class RetrieveHousingUnitService:
@@ -97,15 +745,20 @@ class RetrieveHousingUnitService:
     def __init__(
             self,
             housing_units_repository: HousingUnitsRepository,
+            housing_units_cache: TTLCache,
     ) -> None:
         self._housing_units_repository: HousingUnitsRepository = housing_units_repository
+        self._housing_units_cache: TTLCache = housing_units_cache
 
     async def apply(
             self,
             uuid: str = None,
     ) -> HousingUnit:
         """
-        Service that retrieves the HousingUnit based on the provided id.
+        Service that retrieves the HousingUnit based on the provided id, through the in-memory HousingUnits cache of
+        the worker. The cached HousingUnits are invalidated by the writes of every worker, and the cache is used only
+        while the worker is subscribed to their invalidations. A HousingUnit is not cached when an invalidation is
+        applied while it is read, as it may have been read before the invalidated write.
 
         :param uuid: The Housing Unit uuid.
 
@@ -116,14 +769,42 @@ class RetrieveHousingUnitService:
         if not uuid:
             raise InvalidArgumentError("The uuid is not provided.")
 
+        HOUSING_UNITS_CACHE_INVALIDATIONS.subscribe(self._housing_units_cache)
+        cache_key: Optional[str] = housing_unit_cache_key(uuid)
+        use_cache: bool = cache_key is not None and HOUSING_UNITS_CACHE_INVALIDATIONS.subscribed
+        if use_cache:
+            cached_housing_unit: Optional[HousingUnit] = self._housing_units_cache.get(cache_key)
+            if cached_housing_unit is not None:
+                return cached_housing_unit
+
+        invalidations_sequence: int = HOUSING_UNITS_CACHE_INVALIDATIONS.sequence
         housing_unit: HousingUnit = await self._housing_units_repository.get_by_uuid(uuid=uuid)
 
         if not housing_unit:
             raise HTTPException(status_code=404, detail="Housing Unit not found.")
 
+        if use_cache and HOUSING_UNITS_CACHE_INVALIDATIONS.is_settled(
+                invalidations_sequence, Configuration.get().db_replica_max_lag_seconds
+        ):
+            self._housing_units_cache.set(cache_key, housing_unit)
+
         return housing_unit
 
 
+class GetHousingUnitsCacheStatsService:
+
+    def __init__(self, housing_units_cache: TTLCache) -> None:
+        self._housing_units_cache: TTLCache = housing_units_cache
+
+    def apply(self) -> CacheStats:
+        """
+        Service that returns the counters of the in-memory HousingUnits cache, of the worker that serves the request.
+
+        :return: The hit, miss, eviction and expiration counters, and the number of the cached HousingUnits.
+        """
+        return self._housing_units_cache.stats
+
+
 class HousingUnitFieldsSanityCheckService:
 
     def apply(
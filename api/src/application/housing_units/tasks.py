@@ -0,0 +1,76 @@
+import os
+from typing import Optional, Dict, Any
+from uuid import uuid4
+
+from celery import Task
+
+from application.celery_worker import celery
+from application.housing_units.enums import ExportFormat
+from application.housing_units.exporters import HousingUnitsExportWriter, HousingUnitsExporter
+from application.infrastructure.configurations.models import Configuration
+from application.infrastructure.database.database import DatabaseEngineWrapper
+
+
+@celery.task(name="housing_units_export", bind=True)
+def housing_units_export_task(
+        self: Task,
+        export_format: str = ExportFormat.csv.value,
+        street_name: Optional[str] = None,
+        borough: Optional[str] = None,
+        postcode: Optional[int] = None,
+        construction_type: Optional[str] = None,
+        num_units_min: Optional[int] = None,
+        num_units_max: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Celery Task for exporting the HousingUnits found from the filtering into a file of the exports directory, from
+    where it is downloaded through its download url. The file is renamed once completed, so it is never downloaded
+    partly.
+
+    :param export_format: The ExportFormat value of the exported file.
+    :param street_name: The Housing Unit street name.
+    :param borough: The Housing Unit borough.
+    :param postcode: The Housing Unit postcode.
+    :param construction_type: The Housing Unit construction type.
+    :param num_units_min: The Housing Unit num_units_min.
+    :param num_units_max: The Housing Unit num_units_max.
+
+    :return: The exported file name and its download url.
+    """
+    file_format: ExportFormat = ExportFormat(export_format)
+    housing_units_exporter: HousingUnitsExporter = HousingUnitsExporter(db_engine=DatabaseEngineWrapper())
+    filters: Dict[str, Any] = dict(
+        street_name=street_name,
+        borough=borough,
+        postcode=postcode,
+        construction_type=construction_type,
+        num_units_min=num_units_min,
+        num_units_max=num_units_max,
+    )
+
+    export_directory: str = Configuration.get().export_directory
+    os.makedirs(export_directory, exist_ok=True)
+    file_name: str = '{0}.{1}'.format(uuid4(), file_format.value)
+    file_path: str = os.path.join(export_directory, file_name)
+    partial_file_path: str = '{0}.part'.format(file_path)
+
+    try:
+        with open(partial_file_path, 'wb') as export_file:
+            if file_format == ExportFormat.csv:
+                housing_units_exporter.export_csv(export_file, **filters)
+            else:
+                total_exported: int = 0
+                with HousingUnitsExportWriter(export_file, file_format) as export_writer:
+                    for rows in housing_units_exporter.export_rows(**filters):
+                        export_writer.write(rows)
+                        total_exported += len(rows)
+                        self.update_state(state='PROGRESS', meta={'exported': total_exported})
+        os.replace(partial_file_path, file_path)
+    finally:
+        if os.path.exists(partial_file_path):
+            os.remove(partial_file_path)
+
+    return {
+        'file_name': file_name,
+        'download_url': '/housing-units/exports/{0}'.format(file_name),
+    }
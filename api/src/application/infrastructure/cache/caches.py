@@ -0,0 +1,191 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Callable, Hashable, Tuple
+
+from attr import attrs, attrib
+from redis import RedisError
+
+from application.infrastructure.cache.clients import RedisClientWrapper
+from application.infrastructure.loggers.loggers import HousingUnitsAppLoggerFactory
+
+logger = HousingUnitsAppLoggerFactory.get()
+
+# The sentinel of the missing cache entries, since None is a valid cached value.
+_MISSING: Any = object()
+
+
+@attrs
+class CacheStats:
+    hits = attrib(type=int, default=0)
+    misses = attrib(type=int, default=0)
+    evictions = attrib(type=int, default=0)
+    expirations = attrib(type=int, default=0)
+    size = attrib(type=int, default=0)
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache of a single worker process, that evicts the least recently used entry when it is full,
+    and expires the entries that are older than their time to live. The cache is thread safe, as the API workers
+    serve the requests with multiple threads.
+    """
+
+    def __init__(
+            self,
+            max_size: int = 1024,
+            ttl_seconds: Optional[float] = 60.0,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param max_size: The maximum number of entries held by the cache.
+        :param ttl_seconds: The default time to live of the entries, or None for entries that never expire.
+        :param clock: The monotonic clock that the entry expirations are computed with.
+        """
+        self._max_size: int = max_size
+        self._ttl_seconds: Optional[float] = ttl_seconds
+        self._clock: Callable[[], float] = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[Optional[float], Any]]' = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._stats: CacheStats = CacheStats()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value cached under the key, marking it as the most recently used.
+
+        :param key: The cache key.
+        :param default: The value returned when the key is not cached, or its entry expired.
+
+        :return: The cached value, or the default one.
+        """
+        with self._lock:
+            entry: Optional[Tuple[Optional[float], Any]] = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = _MISSING) -> None:
+        """
+        Caches the value under the key, evicting the least recently used entry when the cache is full.
+
+        :param key: The cache key.
+        :param value: The value to cache.
+        :param ttl_seconds: The time to live of the entry, overriding the default one of the cache.
+        """
+        if ttl_seconds is _MISSING:
+            ttl_seconds = self._ttl_seconds
+        expires_at: Optional[float] = self._clock() + ttl_seconds if ttl_seconds is not None else None
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes the key from the cache, if it is cached.
+
+        :param key: The cache key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all the cached entries, keeping the cache statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        :return: A snapshot of the hit, miss, eviction and expiration counters, and the number of cached entries.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                size=len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """
+    Cache of serialised values, stored in Redis and shared by all the API workers. The entries expire after their
+    time to live, and the values larger than the maximum value size are not cached at all, so that a few large
+    values don't evict the rest of the entries. The cache calls never raise, and the callers compute the values
+    themselves when Redis is unreachable.
+    """
+    KEY_PREFIX: str = 'housing_units_api:cache:'
+
+    def __init__(self, name: str, ttl_seconds: int = 30, max_value_bytes: int = 1024 * 1024) -> None:
+        """
+        :param name: The name of the cache, prefixing the keys of its entries.
+        :param ttl_seconds: The time to live of the entries.
+        :param max_value_bytes: The maximum size of the cached values.
+        """
+        self._key_prefix: str = '{0}{1}:'.format(self.KEY_PREFIX, name)
+        self._ttl_seconds: int = ttl_seconds
+        self._max_value_bytes: int = max_value_bytes
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Returns the value cached under the key.
+
+        :param key: The cache key, which is hashed into the Redis key of the entry.
+
+        :return: The cached value, or None when the key is not cached or Redis is unreachable.
+        """
+        try:
+            return RedisClientWrapper.get_client().get(self._redis_key(key))
+        except RedisError as ex:
+            logger.warning("Failed to get the cache entry of {0}: {1}".format(self._key_prefix, ex))
+            return None
+
+    def set(self, key: Hashable, value: bytes) -> bool:
+        """
+        Caches the value under the key, unless it is larger than the maximum value size.
+
+        :param key: The cache key, which is hashed into the Redis key of the entry.
+        :param value: The serialised value to cache.
+
+        :return: Whether the value is cached.
+        """
+        if len(value) > self._max_value_bytes:
+            return False
+
+        try:
+            RedisClientWrapper.get_client().set(self._redis_key(key), value, ex=self._ttl_seconds)
+        except RedisError as ex:
+            logger.warning("Failed to set the cache entry of {0}: {1}".format(self._key_prefix, ex))
+            return False
+
+        return True
+
+    def _redis_key(self, key: Hashable) -> str:
+        """
+        :param key: The cache key, made of the str, int and None values that its repr is stable for.
+
+        :return: The Redis key of the entry, holding the digest of the cache key.
+        """
+        return '{0}{1}'.format(self._key_prefix, hashlib.sha256(repr(key).encode()).hexdigest())
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from redis import Redis
+
+from application.infrastructure.configurations.models import Configuration
+
+
+class RedisClientWrapper:
+    """
+    The Singleton Redis client wrapper, used by the caches that are shared between the API and Celery workers.
+    The client is created lazily, so that every forked worker process creates its own connection pool.
+    """
+    REDIS_CLIENT: Optional[Redis] = None
+    # The cache calls are given up quickly when Redis is unreachable, as the callers fall back to the database.
+    SOCKET_TIMEOUT_SECONDS: float = 0.25
+
+    @classmethod
+    def get_client(cls) -> Redis:
+        if not cls.REDIS_CLIENT:
+            cls.REDIS_CLIENT = Redis.from_url(
+                Configuration.get().redis_url,
+                socket_timeout=cls.SOCKET_TIMEOUT_SECONDS,
+                socket_connect_timeout=cls.SOCKET_TIMEOUT_SECONDS,
+            )
+
+        return cls.REDIS_CLIENT
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.REDIS_CLIENT = None
@@ -0,0 +1,66 @@
+import time
+from typing import Optional
+
+from redis import Redis, RedisError
+
+from application.infrastructure.cache.clients import RedisClientWrapper
+from application.infrastructure.loggers.loggers import HousingUnitsAppLoggerFactory
+
+logger = HousingUnitsAppLoggerFactory.get()
+
+
+class CacheGeneration:
+    """
+    The generation counter of a cached table, stored in Redis and shared by all the API and Celery workers.
+    The writers bump the generation after every committed write, and the caches include the current generation in
+    their keys, so that the entries cached before a write are never returned after it, whichever worker wrote.
+    A missing generation is seeded with the current time in milliseconds, so that a generation lost with the Redis
+    data is never restarted from a value that it already had, e.g. in the ETags of the responses sent before.
+    """
+    KEY_PREFIX: str = 'housing_units_api:cache_generation:'
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: The name of the cached table.
+        """
+        self._key: str = '{0}{1}'.format(self.KEY_PREFIX, name)
+
+    def get(self) -> Optional[int]:
+        """
+        Retrieves the current generation.
+
+        :return: The current generation, or None when Redis is unreachable and the caches must not be used.
+        """
+        try:
+            redis_client: Redis = RedisClientWrapper.get_client()
+            generation: Optional[bytes] = redis_client.get(self._key)
+            if generation is None:
+                self._seed(redis_client)
+                generation = redis_client.get(self._key)
+        except RedisError as ex:
+            logger.warning("Failed to get the cache generation {0}: {1}".format(self._key, ex))
+            return None
+
+        return int(generation)
+
+    def bump(self) -> Optional[int]:
+        """
+        Increments the generation, invalidating the entries cached under the previous ones.
+
+        :return: The new generation, or None when Redis is unreachable.
+        """
+        try:
+            redis_client: Redis = RedisClientWrapper.get_client()
+            self._seed(redis_client)
+            return redis_client.incr(self._key)
+        except RedisError as ex:
+            logger.warning("Failed to bump the cache generation {0}: {1}".format(self._key, ex))
+            return None
+
+    def _seed(self, redis_client: Redis) -> None:
+        """
+        Seeds the generation with the current time in milliseconds, unless it is already set.
+
+        :param redis_client: The Redis client.
+        """
+        redis_client.set(self._key, int(time.time() * 1000), nx=True)
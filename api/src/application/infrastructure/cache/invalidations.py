@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from typing import List, Optional, Dict, Any
+
+from redis import Redis, RedisError
+
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.cache.clients import RedisClientWrapper
+from application.infrastructure.configurations.models import Configuration
+from application.infrastructure.loggers.loggers import HousingUnitsAppLoggerFactory
+
+logger = HousingUnitsAppLoggerFactory.get()
+
+
+class CacheInvalidations:
+    """
+    The invalidations of the in-memory caches of a table, broadcast over a Redis pub/sub channel to the workers of
+    every host. The writers publish the keys of the written rows, and every worker deletes them from its subscribed
+    caches, or clears them when the whole table is invalidated. The invalidations published while a worker is not
+    subscribed are lost, so its caches are cleared and must not be used until it is subscribed again.
+    """
+    CHANNEL_PREFIX: str = 'housing_units_api:cache_invalidations:'
+    # The message invalidating all the keys, e.g. after truncating or ingesting the table.
+    ALL_KEYS: str = '*'
+    # The subscription connection is health checked while idle, and re-established after it is lost.
+    HEALTH_CHECK_SECONDS: int = 30
+    RECONNECT_SECONDS: float = 1.0
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: The name of the cached table.
+        """
+        self._channel: str = '{0}{1}'.format(self.CHANNEL_PREFIX, name)
+        self._caches: List[TTLCache] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._subscribed: threading.Event = threading.Event()
+        self._sequence: int = 0
+        # The monotonic time of the latest invalidation applied by the worker.
+        self._invalidated_at: float = 0.0
+        self._listener_pid: Optional[int] = None
+
+    def subscribe(self, cache: TTLCache) -> None:
+        """
+        Subscribes the cache to the invalidations, starting the listener thread of the worker process on its first
+        subscription. The listener is started again in the forked worker processes, as the threads are not forked.
+
+        :param cache: The in-memory cache of the table rows.
+        """
+        with self._lock:
+            if cache not in self._caches:
+                self._caches.append(cache)
+            if self._listener_pid != os.getpid():
+                self._listener_pid = os.getpid()
+                self._subscribed.clear()
+                threading.Thread(target=self._listen, name=self._channel, daemon=True).start()
+
+    @property
+    def subscribed(self) -> bool:
+        """
+        :return: Whether the worker receives the invalidations, and its caches can be used.
+        """
+        return self._subscribed.is_set()
+
+    @property
+    def sequence(self) -> int:
+        """
+        :return: The number of invalidations applied by the worker, for detecting the invalidations applied while a
+            row is read, which may have been read before it was written.
+        """
+        return self._sequence
+
+    def is_settled(self, sequence: int, lag_seconds: float) -> bool:
+        """
+        Whether the rows read since the sequence can be cached: no invalidation was applied while they were read, and
+        the latest invalidation was applied more than the lag ago, so that the rows were not read from a read replica
+        that had not replayed the invalidated write yet.
+
+        :param sequence: The sequence of the invalidations before the rows were read.
+        :param lag_seconds: The maximum replication lag of the read replicas.
+
+        :return: Whether the rows can be cached.
+        """
+        return self._sequence == sequence and time.monotonic() - self._invalidated_at >= lag_seconds
+
+    def publish(self, key: Optional[str] = None) -> None:
+        """
+        Invalidates the key in the caches of every worker, starting with the caches of the publishing one so that it
+        doesn't return the invalidated row until its own invalidation is received.
+
+        :param key: The invalidated key, or None for invalidating all of them.
+        """
+        self.invalidate(key)
+        try:
+            RedisClientWrapper.get_client().publish(self._channel, key or self.ALL_KEYS)
+        except RedisError as ex:
+            logger.warning("Failed to publish the cache invalidation of {0}: {1}".format(self._channel, ex))
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Invalidates the key in the caches of the worker.
+
+        :param key: The invalidated key, or None for invalidating all of them.
+        """
+        with self._lock:
+            self._sequence += 1
+            self._invalidated_at = time.monotonic()
+            for cache in self._caches:
+                if key is None:
+                    cache.clear()
+                else:
+                    cache.delete(key)
+
+    def _listen(self) -> None:
+        """
+        Applies the published invalidations in the worker, for as long as the worker process runs.
+        """
+        while True:
+            try:
+                pubsub: Any = Redis.from_url(
+                    Configuration.get().redis_url,
+                    socket_connect_timeout=RedisClientWrapper.SOCKET_TIMEOUT_SECONDS,
+                    health_check_interval=self.HEALTH_CHECK_SECONDS,
+                ).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                # The invalidations published before the subscription are unknown.
+                self.invalidate()
+                self._subscribed.set()
+
+                while True:
+                    message: Optional[Dict[str, Any]] = pubsub.get_message(timeout=self.HEALTH_CHECK_SECONDS)
+                    if message and message['type'] == 'message':
+                        key: str = message['data'].decode()
+                        self.invalidate(None if key == self.ALL_KEYS else key)
+            except (RedisError, OSError) as ex:
+                logger.warning("Lost the cache invalidations subscription of {0}: {1}".format(self._channel, ex))
+
+            self._subscribed.clear()
+            self.invalidate()
+            time.sleep(self.RECONNECT_SECONDS)
@@ -1,4 +1,5 @@
 import os
+from typing import Optional, List
 
 from application.infrastructure.configurations.enums import APIEnvironment
 from application.infrastructure.error.errors import InvalidArgumentError
@@ -27,6 +28,18 @@ class Configuration:
             algorithm: str = "HS256",
             debug: bool = False,
             create_db_tables: bool = False,
+            redis_url: Optional[str] = None,
+            fast_json_responses: bool = False,
+            export_directory: str = '/mnt/data/exports',
+            db_pool_size: int = 8,
+            db_max_overflow: int = 4,
+            db_pool_timeout: float = 10.0,
+            db_pool_recycle: int = 1800,
+            db_pool_pre_ping: bool = True,
+            db_statement_log_level: str = 'WARNING',
+            asyncpg_statement_cache_size: int = 100,
+            async_postgresql_replica_connection_uris: Optional[List[str]] = None,
+            db_replica_max_lag_seconds: float = 1.0,
     ):
         if not postgresql_connection_uri:
             raise InvalidArgumentError("The PostGreSQL connection uri is required.")
@@ -42,6 +55,14 @@ class Configuration:
             raise InvalidArgumentError("The socrata app token is required.")
         if not algorithm:
             raise InvalidArgumentError("The algorithm is required.")
+        if db_pool_size < 1:
+            raise InvalidArgumentError("The database pool size must be positive.")
+        if db_max_overflow < 0:
+            raise InvalidArgumentError("The database pool max overflow can't be negative.")
+        if db_statement_log_level not in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'):
+            raise InvalidArgumentError(
+                "The database statement log level {0} is not a logging level.".format(db_statement_log_level)
+            )
 
         self.postgresql_connection_uri = postgresql_connection_uri
         self.async_postgresql_connection_uri = async_postgresql_connection_uri
@@ -52,6 +73,28 @@ class Configuration:
         self.algorithm = algorithm
         self.debug = debug
         self.create_db_tables = create_db_tables
+        # The caches use the Celery broker Redis, unless a separate Redis is provided.
+        self.redis_url = redis_url or celery_broker_url
+        # The HousingUnit responses are serialised straight from the rows, without the response models validation.
+        self.fast_json_responses = fast_json_responses
+        # The directory of the shared volume that the HousingUnits export tasks write the exported files to.
+        self.export_directory = export_directory
+        # The connection pools of each engine of every worker process. The pools are sized after the 8 threads of
+        # each of the 3 gunicorn API workers, overflowing for the bursts, so that the API workers hold at most 36
+        # connections per engine, leaving the rest of the PostgreSQL max_connections to the Celery workers.
+        self.db_pool_size = db_pool_size
+        self.db_max_overflow = db_max_overflow
+        self.db_pool_timeout = db_pool_timeout
+        self.db_pool_recycle = db_pool_recycle
+        self.db_pool_pre_ping = db_pool_pre_ping
+        # The SQL statements are logged on INFO, and their result rows as well on DEBUG.
+        self.db_statement_log_level = db_statement_log_level
+        # The prepared statements cached per asyncpg connection, or 0 behind a transaction pooling pgbouncer.
+        self.asyncpg_statement_cache_size = asyncpg_statement_cache_size
+        # The streaming read replicas of the primary database, that the read-only queries of the API are sent to,
+        # and the replication lag that the reads following a write are sent to the primary database for.
+        self.async_postgresql_replica_connection_uris = async_postgresql_replica_connection_uris or []
+        self.db_replica_max_lag_seconds = db_replica_max_lag_seconds
 
     @classmethod
     def initialize(cls) -> "Configuration":
@@ -113,6 +156,20 @@ class Configuration:
             algorithm=os.getenv("ALGORITHM", "HS256"),
             debug=bool(int(os.getenv("DEBUG", "0"))),
             create_db_tables=bool(int(os.getenv("CREATE_DB_TABLES", "0"))),
+            redis_url=os.getenv("REDIS_URL"),
+            fast_json_responses=bool(int(os.getenv("FAST_JSON_RESPONSES", "0"))),
+            export_directory=os.getenv("EXPORT_DIRECTORY", "/mnt/data/exports"),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "8")),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "4")),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            db_pool_pre_ping=bool(int(os.getenv("DB_POOL_PRE_PING", "1"))),
+            db_statement_log_level=os.getenv("DB_STATEMENT_LOG_LEVEL", "WARNING"),
+            asyncpg_statement_cache_size=int(os.getenv("ASYNCPG_STATEMENT_CACHE_SIZE", "100")),
+            async_postgresql_replica_connection_uris=[
+                uri for uri in os.getenv("ASYNC_POSTGRESQL_REPLICA_CONNECTION_URIS", "").split(",") if uri
+            ],
+            db_replica_max_lag_seconds=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "1")),
         )
 
     @staticmethod
@@ -134,4 +191,18 @@ class Configuration:
             algorithm=os.getenv("ALGORITHM", "HS256"),
             debug=True,
             create_db_tables=True,
+            redis_url=os.getenv("REDIS_URL"),
+            fast_json_responses=bool(int(os.getenv("FAST_JSON_RESPONSES", "0"))),
+            export_directory=os.getenv("EXPORT_DIRECTORY", "/mnt/data/exports"),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "8")),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "4")),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            db_pool_pre_ping=bool(int(os.getenv("DB_POOL_PRE_PING", "1"))),
+            db_statement_log_level=os.getenv("DB_STATEMENT_LOG_LEVEL", "WARNING"),
+            asyncpg_statement_cache_size=int(os.getenv("ASYNCPG_STATEMENT_CACHE_SIZE", "100")),
+            async_postgresql_replica_connection_uris=[
+                uri for uri in os.getenv("ASYNC_POSTGRESQL_REPLICA_CONNECTION_URIS", "").split(",") if uri
+            ],
+            db_replica_max_lag_seconds=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "1")),
         )
@@ -1,12 +1,17 @@
+import itertools
+import logging
+import time
 from asyncio import current_task
 from contextlib import asynccontextmanager, contextmanager
-from typing import Optional
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Iterator
 
 from attr import attrs, attrib
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 
 from application.infrastructure.configurations.models import Configuration
+from application.infrastructure.database.metrics import MeasuredQueuePool, MeasuredAsyncAdaptedQueuePool
 from application.infrastructure.database.models import HousingUnitsDBBaseModel
 from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, AsyncEngine, async_scoped_session
@@ -26,37 +31,44 @@ class DBEngine:
     scoped_session_factory = attrib(type=scoped_session)
 
 
+# Whether the current request wrote to the primary database, and reads its writes from the primary as well.
+_READ_YOUR_WRITES: ContextVar[bool] = ContextVar('read_your_writes', default=False)
+
+
 class DatabaseEngineWrapper:
     """
-    The Singleton DB Engine wrapper containing the applications async and sync engines and session makers.
+    The Singleton DB Engine wrapper containing the applications async and sync engines and session makers, and the
+    async engines of the read replicas of the primary database, if any.
     """
     ASYNC_DB_ENGINE: Optional[AsyncDBEngine] = None
+    ASYNC_REPLICA_DB_ENGINES: Optional[List[AsyncDBEngine]] = None
     DB_ENGINE: Optional[DBEngine] = None
+    # The read replicas that are tried first, rotated on every read, for balancing the replicas with equal loads.
+    _REPLICA_ROTATION: Iterator[int] = itertools.count()
+    # The monotonic time until which the worker reads from the primary database, after the latest write seen by it.
+    _PRIMARY_READS_UNTIL: float = 0.0
 
     @classmethod
     def initialize(cls) -> None:
         """
-        Initializes the async and sync db engines with their respective session makers.
+        Initializes the async and sync db engines with their respective session makers. The engines don't echo the
+        statements, which are logged by the sqlalchemy.engine logger on the configured statement log level instead.
         """
         config: Configuration = Configuration.initialize()
+        logging.getLogger('sqlalchemy.engine').setLevel(config.db_statement_log_level)
 
         if not cls.ASYNC_DB_ENGINE:
-            async_engine = create_async_engine(url=config.async_postgresql_connection_uri, echo=True)
-            async_session = sessionmaker(
-                async_engine, class_=AsyncSession, expire_on_commit=False
-            )
-            cls.ASYNC_DB_ENGINE = AsyncDBEngine(
-                async_engine=async_engine,
-                async_session=async_session,
-                async_scoped_session_factory=async_scoped_session(
-                    session_factory=async_session,
-                    scopefunc=current_task
-                )
-            )
+            cls.ASYNC_DB_ENGINE = cls._create_async_db_engine(url=config.async_postgresql_connection_uri, config=config)
+        if cls.ASYNC_REPLICA_DB_ENGINES is None:
+            cls.ASYNC_REPLICA_DB_ENGINES = [
+                cls._create_async_db_engine(url=replica_connection_uri, config=config)
+                for replica_connection_uri in config.async_postgresql_replica_connection_uris
+            ]
         if not cls.DB_ENGINE:
             engine = create_engine(
                 url=config.postgresql_connection_uri,
-                echo=False
+                poolclass=MeasuredQueuePool,
+                **cls._pool_arguments(config)
             )
             session = sessionmaker(engine, expire_on_commit=False)
             cls.DB_ENGINE = DBEngine(
@@ -67,6 +79,62 @@ class DatabaseEngineWrapper:
                 )
             )
 
+    @classmethod
+    def _create_async_db_engine(cls, url: str, config: Configuration) -> AsyncDBEngine:
+        """
+        :param url: The async connection uri of the primary database, or of a read replica.
+        :param config: The application configuration.
+
+        :return: The async engine of the database, with its session makers.
+        """
+        async_engine = create_async_engine(
+            url=url,
+            poolclass=MeasuredAsyncAdaptedQueuePool,
+            connect_args={'statement_cache_size': config.asyncpg_statement_cache_size},
+            **cls._pool_arguments(config)
+        )
+        async_session = sessionmaker(
+            async_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        return AsyncDBEngine(
+            async_engine=async_engine,
+            async_session=async_session,
+            async_scoped_session_factory=async_scoped_session(
+                session_factory=async_session,
+                scopefunc=current_task
+            )
+        )
+
+    @staticmethod
+    def _pool_arguments(config: Configuration) -> Dict[str, Any]:
+        """
+        :param config: The application configuration.
+
+        :return: The connection pool arguments of the engines.
+        """
+        return dict(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+            pool_pre_ping=config.db_pool_pre_ping,
+        )
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """
+        Returns the connection checkout counters and the saturation of the connection pools of the worker.
+
+        :return: The stats of the async and sync engine pools, and of the async engine pools of the read replicas.
+        """
+        return {
+            'async_engine': cls.get_async_engine().async_engine.sync_engine.pool.stats,
+            'engine': cls.get_engine().engine.pool.stats,
+            'replicas': [
+                replica.async_engine.sync_engine.pool.stats for replica in cls.ASYNC_REPLICA_DB_ENGINES or []
+            ],
+        }
+
     @classmethod
     def get_async_engine(cls) -> AsyncDBEngine:
         if not cls.ASYNC_DB_ENGINE:
@@ -74,6 +142,39 @@ class DatabaseEngineWrapper:
 
         return cls.ASYNC_DB_ENGINE
 
+    @classmethod
+    def get_async_read_engine(cls) -> AsyncDBEngine:
+        """
+        Returns the async engine that the reads are sent to. The reads are sent to the read replica with the fewest
+        connections checked out, unless there are no replicas, or the reads have to see the latest writes, which the
+        replicas may not have replayed yet.
+
+        :return: The async engine of a read replica, or of the primary database.
+        """
+        if not cls.ASYNC_DB_ENGINE:
+            cls.initialize()
+
+        if not cls.ASYNC_REPLICA_DB_ENGINES or _READ_YOUR_WRITES.get() or time.monotonic() < cls._PRIMARY_READS_UNTIL:
+            return cls.ASYNC_DB_ENGINE
+
+        rotation: int = next(cls._REPLICA_ROTATION)
+        replicas: List[AsyncDBEngine] = [
+            cls.ASYNC_REPLICA_DB_ENGINES[(rotation + offset) % len(cls.ASYNC_REPLICA_DB_ENGINES)]
+            for offset in range(len(cls.ASYNC_REPLICA_DB_ENGINES))
+        ]
+
+        return min(replicas, key=lambda replica: replica.async_engine.sync_engine.pool.checkedout())
+
+    @classmethod
+    def read_from_primary(cls) -> None:
+        """
+        Sends the rest of the reads of the current request to the primary database, so that they see its writes, and
+        the reads of the whole worker for the configured replica lag, so that the rows read after a write, e.g. by
+        the caches that the write invalidated, are not read from a replica that has not replayed it yet.
+        """
+        _READ_YOUR_WRITES.set(True)
+        cls._PRIMARY_READS_UNTIL = time.monotonic() + Configuration.get().db_replica_max_lag_seconds
+
     @classmethod
     def get_engine(cls) -> DBEngine:
         if not cls.DB_ENGINE:
@@ -98,6 +199,22 @@ class DatabaseEngineWrapper:
         finally:
             await _scoped_session.close()
 
+    @staticmethod
+    @asynccontextmanager
+    async def get_async_read_session() -> AsyncSession:
+        """
+        Returns the async session of the reads, which is bound to a read replica when there is one, and must not be
+        used for writing.
+        """
+        _scoped_session = DatabaseEngineWrapper.get_async_read_engine().async_scoped_session_factory()
+        try:
+            yield _scoped_session
+        except Exception as ex:
+            await _scoped_session.rollback()
+            raise ex
+        finally:
+            await _scoped_session.close()
+
     @staticmethod
     @contextmanager
     def get_session() -> Session:
@@ -114,3 +231,5 @@ class DatabaseEngineWrapper:
     def reset(cls):
         cls.DB_ENGINE = None
         cls.ASYNC_DB_ENGINE = None
+        cls.ASYNC_REPLICA_DB_ENGINES = None
+        cls._PRIMARY_READS_UNTIL = 0.0
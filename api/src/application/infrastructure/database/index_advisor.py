@@ -0,0 +1,468 @@
+"""
+The index advisor of the HousingUnit table. It replays the SELECT queries of a captured PostgreSQL query log with
+EXPLAIN (ANALYZE, BUFFERS), recommends the composite and covering indexes that the inefficient ones are missing, and
+the indexes that none of them uses for dropping. The recommendations are evaluated by building them, and dropping the
+unused indexes, inside a transaction that is rolled back, so the evaluation locks the table and must be run against
+a copy of the database. The query log is captured with the log_min_duration_statement=0 setting of PostgreSQL.
+
+Run from the api/src directory, with the environment of the API:
+
+    python -m application.infrastructure.database.index_advisor postgresql.log --evaluate
+"""
+import argparse
+import json
+import re
+from collections import OrderedDict
+from typing import List, Optional, Iterable, Dict, Any, Tuple
+
+from attr import attrs, attrib
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from application.infrastructure.database.database import DatabaseEngineWrapper
+
+# The log line prefixes of the statements, with their optional duration and the name of the prepared statements.
+_STATEMENT_LOG_PATTERN = re.compile(
+    r'LOG:\s+(?:duration: [\d.]+ ms\s+)?(?:statement|execute [^:]*): (?P<statement>.*)$'
+)
+_PARAMETERS_LOG_PATTERN = re.compile(r'DETAIL:\s+parameters: (?P<parameters>.*)$')
+_PARAMETER_PATTERN = re.compile(r"\$(?P<number>\d+) = (?P<value>'(?:[^']|'')*'|NULL)")
+# The log lines of another message, ending the statement of the previous lines.
+_LOG_MESSAGE_PATTERN = re.compile(r'\b(?:LOG|DETAIL|ERROR|STATEMENT|HINT|WARNING|FATAL|CONTEXT|NOTICE):\s')
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# The plan nodes that the missing indexes are recommended for.
+_INEFFICIENT_NODE_TYPES: Tuple[str, ...] = ('Seq Scan', 'BitmapAnd', 'BitmapOr', 'Sort')
+_INDEX_DEFINITION_PATTERN = re.compile(r'USING \w+ \((?P<columns>[^)]*)\)(?: INCLUDE \((?P<include>[^)]*)\))?')
+
+
+@attrs
+class QueryShape:
+    """
+    The normalised SQL of the replayed queries that differ only by their values, and the columns that they are
+    filtering by equality and by range, sorting by and selecting.
+    """
+    sql = attrib(type=str)
+    equality_columns = attrib(type=List[str])
+    range_columns = attrib(type=List[str])
+    sort_columns = attrib(type=List[str])
+    selected_columns = attrib(type=List[str])
+
+
+@attrs
+class QueryPlan:
+    execution_ms = attrib(type=float)
+    # The shared buffers hit in the cache and read from the disk.
+    buffers = attrib(type=int)
+    node_types = attrib(type=List[str])
+    index_names = attrib(type=List[str])
+    rows = attrib(type=int, default=0)
+    rows_removed_by_filter = attrib(type=int, default=0)
+
+    @property
+    def inefficient(self) -> bool:
+        """
+        :return: Whether the query scans the whole table, merges bitmaps of indexes, sorts the rows, or filters out
+            more rows than it returns.
+        """
+        return any(node_type in _INEFFICIENT_NODE_TYPES for node_type in self.node_types) \
+            or self.rows_removed_by_filter > 10 * max(self.rows, 1)
+
+
+@attrs
+class IndexDefinition:
+    name = attrib(type=str)
+    columns = attrib(type=List[str])
+    include = attrib(type=List[str], factory=list)
+    unique = attrib(type=bool, default=False)
+    size_bytes = attrib(type=int, default=0)
+
+    def create_sql(self, table_name: str) -> str:
+        return 'CREATE INDEX CONCURRENTLY {0} ON {1} ({2}){3}'.format(
+            self.name,
+            table_name,
+            ', '.join(self.columns),
+            ' INCLUDE ({0})'.format(', '.join(self.include)) if self.include else '',
+        )
+
+    def drop_sql(self) -> str:
+        return 'DROP INDEX CONCURRENTLY {0}'.format(self.name)
+
+
+@attrs
+class ReplayedQuery:
+    shape = attrib(type=QueryShape)
+    # The number of the logged queries of the shape, and the one that is replayed.
+    occurrences = attrib(type=int)
+    sql = attrib(type=str)
+    plan = attrib(type=QueryPlan)
+    evaluated_plan = attrib(type=Optional[QueryPlan], default=None)
+
+
+@attrs
+class IndexAdvice:
+    replayed_queries = attrib(type=List[ReplayedQuery])
+    recommended_indexes = attrib(type=List[IndexDefinition])
+    unused_indexes = attrib(type=List[IndexDefinition])
+
+
+def parse_query_log(lines: Iterable[str]) -> List[str]:
+    """
+    Parses the statements of a PostgreSQL query log, in the stderr log format, with the parameters of the prepared
+    statements inlined into them from the DETAIL lines that follow them.
+
+    :param lines: The lines of the query log.
+
+    :return: The logged statements, in the order that they are logged.
+    """
+    statements: List[List[str]] = []
+    parameters: List[Optional[str]] = []
+    continued: bool = False
+    for line in lines:
+        line = line.rstrip('\n')
+        statement_match: Optional[re.Match] = _STATEMENT_LOG_PATTERN.search(line)
+        if statement_match:
+            statements.append([statement_match.group('statement').strip()])
+            parameters.append(None)
+            continued = True
+        elif _LOG_MESSAGE_PATTERN.search(line):
+            # The parameters are logged right after their statement, while the ones of the parse and bind messages
+            # of the prepared statements are not.
+            parameters_match: Optional[re.Match] = _PARAMETERS_LOG_PATTERN.search(line)
+            if continued and parameters_match:
+                parameters[-1] = parameters_match.group('parameters')
+            continued = False
+        elif continued:
+            # The lines of a multi-line statement are continued without a log line prefix.
+            statements[-1].append(line.strip())
+
+    return [
+        _inline_parameters(' '.join(statement), statement_parameters) if statement_parameters else ' '.join(statement)
+        for statement, statement_parameters in zip(statements, parameters)
+    ]
+
+
+def query_shape(sql: str, table_name: str) -> QueryShape:
+    """
+    Normalises the SQL of a query, by replacing its values with placeholders, and extracts the columns of the table
+    that it is filtering by equality and by range, sorting by and selecting.
+
+    :param sql: The SQL of the query, as generated by the repositories.
+    :param table_name: The queried table name.
+
+    :return: The shape of the query.
+    """
+    normalised_sql: str = ' '.join(_LITERAL_PATTERN.sub('?', sql).split())
+    column_pattern: str = r'\b{0}\.(\w+)'.format(re.escape(table_name))
+    select_clause, _, rest = normalised_sql.partition(' FROM ')
+    where_clause, _, order_clause = rest.partition(' ORDER BY ')
+    order_clause = order_clause.partition(' LIMIT ')[0]
+
+    return QueryShape(
+        sql=normalised_sql,
+        equality_columns=_unique(re.findall(column_pattern + r'(?:::\w+)? (?:= |IS NULL)', where_clause)),
+        range_columns=_unique(re.findall(column_pattern + r'(?:::\w+)? (?:>=|<=|>|<) ', where_clause)),
+        sort_columns=_unique(re.findall(column_pattern, order_clause)),
+        selected_columns=_unique(re.findall(column_pattern, select_clause)),
+    )
+
+
+def recommended_index(shape: QueryShape, table_name: str, max_include_columns: int = 4) -> Optional[IndexDefinition]:
+    """
+    Recommends the index of a query shape, keyed by the columns filtered by equality, then the sort columns, and then
+    the columns filtered by range, so that the index returns the rows of the query in their order. The rest of the
+    selected columns are included in the index, when they are few, so that the query is answered by index only scans.
+
+    :param shape: The query shape.
+    :param table_name: The queried table name.
+    :param max_include_columns: The maximum number of columns included in the recommended indexes.
+
+    :return: The recommended index, or None when the query is not filtering or sorting by any column.
+    """
+    columns: List[str] = _unique(shape.equality_columns + shape.sort_columns + shape.range_columns)
+    if not columns:
+        return None
+
+    include: List[str] = [column for column in shape.selected_columns if column not in columns]
+    return IndexDefinition(
+        name=_index_name(table_name, columns),
+        columns=columns,
+        include=include if len(include) <= max_include_columns else [],
+    )
+
+
+def merge_indexes(indexes: List[IndexDefinition], max_include_columns: int = 4) -> List[IndexDefinition]:
+    """
+    Merges the recommended indexes whose key columns are a prefix of the key columns of another one, as the longer
+    index serves the queries of both.
+
+    :param indexes: The recommended indexes.
+    :param max_include_columns: The maximum number of columns included in the merged indexes.
+
+    :return: The merged indexes.
+    """
+    merged_indexes: List[IndexDefinition] = []
+    for index in sorted(indexes, key=lambda definition: len(definition.columns), reverse=True):
+        covering_index: Optional[IndexDefinition] = next(
+            (merged for merged in merged_indexes if merged.columns[:len(index.columns)] == index.columns), None
+        )
+        if covering_index is None:
+            merged_indexes.append(IndexDefinition(name=index.name, columns=index.columns, include=list(index.include)))
+            continue
+
+        include: List[str] = _unique(covering_index.include + [
+            column for column in index.include if column not in covering_index.columns
+        ])
+        covering_index.include = include if len(include) <= max_include_columns else covering_index.include
+
+    return merged_indexes
+
+
+def is_covered(index: IndexDefinition, existing_indexes: List[IndexDefinition]) -> bool:
+    """
+    :param index: The recommended index.
+    :param existing_indexes: The indexes of the table.
+
+    :return: Whether an existing index has the key columns of the recommended one as its prefix, and includes its
+        included columns.
+    """
+    return any(
+        existing.columns[:len(index.columns)] == index.columns
+        and set(index.include) <= set(existing.columns + existing.include)
+        for existing in existing_indexes
+    )
+
+
+class IndexAdvisor:
+    # The maximum number of columns included in the recommended indexes, beyond which the covering indexes become
+    # copies of the table rows.
+    MAX_INCLUDE_COLUMNS: int = 4
+
+    def __init__(self, db_engine: DatabaseEngineWrapper, table_name: str = 'housingunits') -> None:
+        self.db_engine: DatabaseEngineWrapper = db_engine
+        self._table_name: str = table_name
+
+    def advise(self, statements: List[str]) -> IndexAdvice:
+        """
+        Replays one query of every shape of the SELECT statements on the table, and recommends the indexes of the
+        inefficient ones that are not covered by the existing indexes, and the existing indexes that none of the
+        replayed queries uses, except for the unique ones that are enforcing constraints.
+
+        :param statements: The logged statements.
+
+        :return: The replayed queries and the index recommendations.
+        """
+        shapes: 'OrderedDict[str, Tuple[QueryShape, str, int]]' = OrderedDict()
+        for statement in statements:
+            if not statement.lstrip().upper().startswith('SELECT') or \
+                    not re.search(r'\bFROM {0}\b'.format(re.escape(self._table_name)), statement):
+                continue
+
+            shape: QueryShape = query_shape(statement, self._table_name)
+            _, sql, occurrences = shapes.get(shape.sql, (shape, statement, 0))
+            shapes[shape.sql] = (shape, sql, occurrences + 1)
+
+        with self.db_engine.get_session() as session:
+            existing_indexes: List[IndexDefinition] = self._existing_indexes(session)
+            replayed_queries: List[ReplayedQuery] = [
+                ReplayedQuery(shape=shape, occurrences=occurrences, sql=sql, plan=self._explain(session, sql))
+                for shape, sql, occurrences in shapes.values()
+            ]
+            session.rollback()
+
+        recommended_indexes: List[IndexDefinition] = [
+            index for index in merge_indexes(
+                [
+                    index for index in [
+                        recommended_index(replayed.shape, self._table_name, self.MAX_INCLUDE_COLUMNS)
+                        for replayed in replayed_queries if replayed.plan.inefficient
+                    ] if index is not None
+                ],
+                self.MAX_INCLUDE_COLUMNS,
+            )
+            if not is_covered(index, existing_indexes)
+        ]
+        used_index_names: List[str] = [
+            index_name for replayed in replayed_queries for index_name in replayed.plan.index_names
+        ]
+
+        return IndexAdvice(
+            replayed_queries=replayed_queries,
+            recommended_indexes=recommended_indexes,
+            unused_indexes=[
+                index for index in existing_indexes if not index.unique and index.name not in used_index_names
+            ],
+        )
+
+    def evaluate(self, advice: IndexAdvice) -> IndexAdvice:
+        """
+        Replays the queries again, after building the recommended indexes and dropping the unused ones inside a
+        transaction, which is rolled back afterwards.
+
+        :param advice: The index recommendations.
+
+        :return: The index recommendations, with the plans of the replayed queries on the recommended indexes.
+        """
+        with self.db_engine.get_session() as session:
+            # The indexes can't be built concurrently inside a transaction.
+            for index in advice.recommended_indexes:
+                session.execute(index.create_sql(self._table_name).replace(' CONCURRENTLY', '', 1))
+            for index in advice.unused_indexes:
+                session.execute(index.drop_sql().replace(' CONCURRENTLY', '', 1))
+            session.execute('ANALYZE {0}'.format(self._table_name))
+
+            for replayed in advice.replayed_queries:
+                replayed.evaluated_plan = self._explain(session, replayed.sql)
+
+            session.rollback()
+
+        return advice
+
+    def _existing_indexes(self, session: Session) -> List[IndexDefinition]:
+        """
+        :param session: The sync session.
+
+        :return: The indexes of the table, with their sizes.
+        """
+        indexes: List[IndexDefinition] = []
+        for index_name, unique, index_definition, size_bytes in session.execute(
+                text(
+                    "SELECT c.relname, i.indisunique, pg_get_indexdef(i.indexrelid), pg_relation_size(i.indexrelid) "
+                    "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE i.indrelid = CAST(:table_name AS regclass) ORDER BY c.relname"
+                ),
+                {'table_name': self._table_name}
+        ).all():
+            definition_match: Optional[re.Match] = _INDEX_DEFINITION_PATTERN.search(index_definition)
+            indexes.append(IndexDefinition(
+                name=index_name,
+                columns=_split_columns(definition_match.group('columns')) if definition_match else [],
+                include=_split_columns(definition_match.group('include')) if definition_match else [],
+                unique=unique,
+                size_bytes=size_bytes,
+            ))
+
+        return indexes
+
+    @staticmethod
+    def _explain(session: Session, sql: str) -> QueryPlan:
+        """
+        :param session: The sync session.
+        :param sql: The SQL of the query, with its values inlined.
+
+        :return: The plan of the executed query.
+        """
+        # The colons are escaped from the text bind parameters.
+        plan: Any = session.execute(
+            text('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {0}'.format(sql.replace(':', '\\:')))
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return query_plan(plan)
+
+
+def query_plan(plan: List[Dict[str, Any]]) -> QueryPlan:
+    """
+    :param plan: The JSON output of the EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+    :return: The execution time, the buffers, and the nodes of the plan.
+    """
+    nodes: List[Dict[str, Any]] = []
+    pending_nodes: List[Dict[str, Any]] = [plan[0]['Plan']]
+    while pending_nodes:
+        node: Dict[str, Any] = pending_nodes.pop()
+        nodes.append(node)
+        pending_nodes.extend(node.get('Plans', []))
+
+    root: Dict[str, Any] = plan[0]['Plan']
+    return QueryPlan(
+        execution_ms=plan[0].get('Execution Time', 0.0),
+        buffers=root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0),
+        node_types=[node['Node Type'] for node in nodes],
+        index_names=_unique([node['Index Name'] for node in nodes if 'Index Name' in node]),
+        rows=root.get('Actual Rows', 0),
+        rows_removed_by_filter=sum(node.get('Rows Removed by Filter', 0) for node in nodes),
+    )
+
+
+def format_advice(advice: IndexAdvice, table_name: str = 'housingunits') -> str:
+    """
+    :param advice: The index recommendations, evaluated or not.
+    :param table_name: The table of the recommended indexes.
+
+    :return: The report of the replayed queries and the index recommendations.
+    """
+    lines: List[str] = ['Replayed queries:']
+    for replayed in advice.replayed_queries:
+        lines.append('')
+        lines.append('  {0} (x{1})'.format(replayed.shape.sql, replayed.occurrences))
+        lines.append('    {0}'.format(_format_plan(replayed.plan)))
+        if replayed.evaluated_plan is not None:
+            lines.append('    {0} (recommended indexes)'.format(_format_plan(replayed.evaluated_plan)))
+
+    lines.extend(['', 'Recommended indexes:'])
+    lines.extend('  {0};'.format(index.create_sql(table_name)) for index in advice.recommended_indexes)
+    lines.extend(['', 'Unused indexes:'])
+    lines.extend(
+        '  {0}; -- {1:.1f} MB'.format(index.drop_sql(), index.size_bytes / 1024 ** 2) for index in advice.unused_indexes
+    )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='The index advisor of the HousingUnit table.')
+    parser.add_argument('query_log', help='The PostgreSQL query log, captured with log_min_duration_statement=0.')
+    parser.add_argument('--table', default='housingunits', help='The table that the indexes are recommended for.')
+    parser.add_argument(
+        '--evaluate',
+        action='store_true',
+        help='Replays the queries on the recommended indexes, in a transaction that is rolled back.',
+    )
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    with open(arguments.query_log) as query_log:
+        statements: List[str] = parse_query_log(query_log)
+
+    index_advisor: IndexAdvisor = IndexAdvisor(db_engine=DatabaseEngineWrapper(), table_name=arguments.table)
+    advice: IndexAdvice = index_advisor.advise(statements)
+    if arguments.evaluate:
+        advice = index_advisor.evaluate(advice)
+
+    print(format_advice(advice, arguments.table))
+
+
+def _format_plan(plan: QueryPlan) -> str:
+    return '{0:.3f}ms, {1} buffers, {2}'.format(
+        plan.execution_ms, plan.buffers, ', '.join(plan.index_names) or ', '.join(_unique(plan.node_types))
+    )
+
+
+def _inline_parameters(statement: str, parameters: str) -> str:
+    """
+    :param statement: The prepared statement, with the $1, $2... parameter placeholders.
+    :param parameters: The logged parameters of the statement, e.g. $1 = 'Bronx', $2 = '5'.
+
+    :return: The statement with its parameters inlined as literals.
+    """
+    values: Dict[str, str] = {
+        match.group('number'): match.group('value') for match in _PARAMETER_PATTERN.finditer(parameters)
+    }
+    return re.sub(r'\$(\d+)\b', lambda match: values.get(match.group(1), match.group(0)), statement)
+
+
+def _split_columns(columns: Optional[str]) -> List[str]:
+    # The operator classes of the indexed columns are not part of their names.
+    return [column.split()[0].strip('"') for column in columns.split(',')] if columns else []
+
+
+def _index_name(table_name: str, columns: List[str]) -> str:
+    # The index names are truncated to the maximum identifier length of PostgreSQL.
+    return 'ix_{0}_{1}'.format(table_name, '_'.join(column.strip('_') for column in columns))[:63]
+
+
+def _unique(values: List[str]) -> List[str]:
+    return list(OrderedDict.fromkeys(values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import threading
+import time
+from typing import Any
+
+from attr import attrs, attrib
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+@attrs
+class PoolStats:
+    # The connection checkouts of the pool, and the ones that timed out waiting for a free connection.
+    checkouts = attrib(type=int, default=0)
+    checkout_timeouts = attrib(type=int, default=0)
+    # The time spent checking out the connections, waiting for a free one, connecting and pinging it.
+    checkout_wait_seconds = attrib(type=float, default=0.0)
+    max_checkout_wait_seconds = attrib(type=float, default=0.0)
+    # The connections currently checked out, and their share of the pool_size and max_overflow connections.
+    checked_out = attrib(type=int, default=0)
+    capacity = attrib(type=int, default=0)
+    saturation = attrib(type=float, default=0.0)
+
+
+class MeasuredQueuePool(QueuePool):
+    """
+    The QueuePool of the sync engine, measuring the connection checkouts, so that the pool sizes can be tuned to the
+    load of the API workers.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock: threading.Lock = threading.Lock()
+        self._stats: PoolStats = PoolStats()
+
+    def connect(self) -> Any:
+        started_at: float = time.perf_counter()
+        try:
+            connection: Any = super().connect()
+        except exc.TimeoutError:
+            self._record_checkout(time.perf_counter() - started_at, timed_out=True)
+            raise
+
+        self._record_checkout(time.perf_counter() - started_at)
+        return connection
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        :return: A snapshot of the checkout counters, and the connections currently checked out of the pool.
+        """
+        capacity: int = self.size() + max(self._max_overflow, 0)
+        with self._stats_lock:
+            return PoolStats(
+                checkouts=self._stats.checkouts,
+                checkout_timeouts=self._stats.checkout_timeouts,
+                checkout_wait_seconds=self._stats.checkout_wait_seconds,
+                max_checkout_wait_seconds=self._stats.max_checkout_wait_seconds,
+                checked_out=self.checkedout(),
+                capacity=capacity,
+                saturation=self.checkedout() / capacity if capacity else 0.0,
+            )
+
+    def _record_checkout(self, wait_seconds: float, timed_out: bool = False) -> None:
+        """
+        :param wait_seconds: The time spent checking out the connection.
+        :param timed_out: Whether the checkout timed out.
+        """
+        with self._stats_lock:
+            if timed_out:
+                self._stats.checkout_timeouts += 1
+            else:
+                self._stats.checkouts += 1
+            self._stats.checkout_wait_seconds += wait_seconds
+            self._stats.max_checkout_wait_seconds = max(self._stats.max_checkout_wait_seconds, wait_seconds)
+
+
+class MeasuredAsyncAdaptedQueuePool(MeasuredQueuePool, AsyncAdaptedQueuePool):
+    """
+    The QueuePool of the async engine, measuring the connection checkouts the same way as the MeasuredQueuePool.
+    """
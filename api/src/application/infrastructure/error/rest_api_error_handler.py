@@ -7,7 +7,7 @@ def initialize_rest_api_error_handlers(rest_api: FastAPI) -> None:
     @rest_api.exception_handler(HousingUnitBaseError)
     async def unicorn_exception_handler(request: Request, exc: HousingUnitBaseError):
         return JSONResponse(
-            status_code=400,
+            status_code=exc.status_code,
             content={
                 "Detail": "{}".format(exc.args[0]),
                 "Type": "{}".format(exc.error_type)
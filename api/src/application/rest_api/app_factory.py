@@ -8,6 +8,7 @@ from application.infrastructure.error.rest_api_error_handler import initialize_r
 from application.infrastructure.loggers.loggers import HousingUnitsAppLoggerFactory
 from application.rest_api.users import controllers as user_route
 from application.rest_api.authentication import controllers as authenticate_route
+from application.rest_api.database import controllers as database_route
 from application.rest_api.housing_units import controllers as housing_units_route
 from application.rest_api.task_status import controllers as task_status_route
 from application.users.container import UserContainer
@@ -24,6 +25,7 @@ def init_application_routes(rest_api: FastAPI) -> None:
     rest_api.include_router(authenticate_route.router)
     rest_api.include_router(housing_units_route.router)
     rest_api.include_router(task_status_route.router)
+    rest_api.include_router(database_route.router)
 
 
 def create_housing_units_app(name: str) -> FastAPI:
@@ -0,0 +1,34 @@
+from typing import Dict, Any
+
+from fastapi import APIRouter, Depends
+
+from application.authentication.utils import BearerJWTAuthorizationService
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.rest_api.database.schemas import DatabasePoolsStats, DatabasePoolStats
+from application.users.enums import Group
+
+router = APIRouter()
+
+
+@router.get(
+    "/database/pool-stats",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.admin]))],
+    response_description="Database connection pools counters endpoint.",
+    response_model=DatabasePoolsStats,
+    status_code=200
+)
+def get_database_pool_stats() -> DatabasePoolsStats:
+    """
+    Entrypoint for monitoring the connection pools of the database engines. Every worker has its own pools, so the
+    counters are the ones of the worker that serves the request. A saturation close to 1 or a growing checkout wait
+    time per checkout shows that the requests are waiting for the connections, and the pools are to be enlarged.
+
+    :return The checkout counters and the saturation of the async and sync engine pools, and of the read replicas.
+    """
+    pool_stats: Dict[str, Any] = DatabaseEngineWrapper.get_pool_stats()
+
+    return DatabasePoolsStats(
+        async_engine=DatabasePoolStats.from_orm(pool_stats['async_engine']),
+        engine=DatabasePoolStats.from_orm(pool_stats['engine']),
+        replicas=[DatabasePoolStats.from_orm(replica_pool_stats) for replica_pool_stats in pool_stats['replicas']],
+    )
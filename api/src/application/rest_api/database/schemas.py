@@ -0,0 +1,33 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class DatabasePoolStats(BaseModel):
+    checkouts: int
+    checkout_timeouts: int
+    checkout_wait_seconds: float
+    max_checkout_wait_seconds: float
+    checked_out: int
+    capacity: int
+    saturation: float
+
+    class Config:
+        orm_mode = True
+        schema_extra = {
+            "example": {
+                "checkouts": 12000,
+                "checkout_timeouts": 0,
+                "checkout_wait_seconds": 3.6,
+                "max_checkout_wait_seconds": 0.05,
+                "checked_out": 3,
+                "capacity": 12,
+                "saturation": 0.25,
+            }
+        }
+
+
+class DatabasePoolsStats(BaseModel):
+    async_engine: DatabasePoolStats
+    engine: DatabasePoolStats
+    replicas: List[DatabasePoolStats]
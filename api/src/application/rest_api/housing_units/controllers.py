@@ -1,12 +1,31 @@
+from typing import Optional, Dict
+
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 
 from application.authentication.utils import BearerJWTAuthorizationService
 from application.housing_units.container import HousingUnitsContainer
+from application.housing_units.enums import ExportFormat
+from application.housing_units.etags import HousingUnitsPage, housing_unit_etag, housing_unit_last_modified, \
+    is_not_modified
+from application.housing_units.exporters import HousingUnitsExport, EXPORT_MEDIA_TYPES
+from application.housing_units.models import HousingUnit
+from application.infrastructure.configurations.models import Configuration
+from application.rest_api.housing_units.responses import housing_unit_response, housing_units_ndjson_response, \
+    serialised_json_response, not_modified_response, search_housing_units_response, \
+    street_name_suggestions_response, near_housing_units_response, NDJSON_MEDIA_TYPE
 from application.rest_api.housing_units.schemas import DataIngestionPostRequestBody, \
-    FilterHousingUnitsGetRequestParameters, FilterHousingUnits, FullHousingUnitResponse, HousingUnitPostRequestBody
-from application.housing_units.services import HousingUnitsDataIngestionService, FilterHousingUnitsService, \
-    RetrieveHousingUnitService, CreateHousingUnitService, UpdateHousingUnitService, DeleteHousingUnitService
+    FilterHousingUnitsGetRequestParameters, FilterHousingUnits, FullHousingUnitResponse, HousingUnitPostRequestBody, \
+    ExportHousingUnitsGetRequestParameters, HousingUnitsCacheStats, SearchHousingUnitsGetRequestParameters, \
+    SearchHousingUnits, AutocompleteStreetNamesGetRequestParameters, AutocompleteStreetNames, \
+    NearHousingUnitsGetRequestParameters, NearHousingUnits, HousingUnitsTile
+from application.housing_units.services import HousingUnitsDataIngestionService, CachedFilterHousingUnitsService, \
+    RetrieveHousingUnitService, CreateHousingUnitService, UpdateHousingUnitService, DeleteHousingUnitService, \
+    StreamHousingUnitsService, ExportHousingUnitsService, RetrieveHousingUnitsExportService, \
+    GetHousingUnitsCacheStatsService, SearchHousingUnitsService, AutocompleteStreetNamesService, \
+    NearHousingUnitsService, TileHousingUnitsService
 from application.rest_api.task_status.schemas import TaskStatus
 
 from application.users.enums import Group
@@ -29,7 +48,9 @@ async def housing_units_data_ingestion(
         )
 ):
     """
-    Controller for ingesting the housing units data to the database.
+    Controller for ingesting the housing units data to the database. The full mode replaces the HousingUnit table,
+    unless reset_table is false, in which case the whole dataset is upserted into it, while the incremental mode
+    always upserts the updated rows and ignores reset_table.
 
     :param data_ingestion_post_request_body: The data ingestion POST request body.
     :param housing_units_data_ingestion_service:  The service responsible for the HousingUnit dataset download and
@@ -39,7 +60,9 @@ async def housing_units_data_ingestion(
     """
     return await housing_units_data_ingestion_service.apply(
         hbd_dataset_id=data_ingestion_post_request_body.dataset_id,
-        reset_table=data_ingestion_post_request_body.reset_table
+        reset_table=data_ingestion_post_request_body.reset_table,
+        load_strategy=data_ingestion_post_request_body.load_strategy,
+        mode=data_ingestion_post_request_body.mode
     )
 
 
@@ -48,6 +71,8 @@ async def housing_units_data_ingestion(
     dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
     response_description="Retrieving Housing Units endpoint.",
     response_model=FilterHousingUnits,
+    response_model_exclude_unset=True,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}, 304: {"description": "Not Modified"}},
     status_code=200
 )
 @inject
@@ -55,53 +80,375 @@ async def filter_housing_units(
         filter_housing_units_get_request_parameters: FilterHousingUnitsGetRequestParameters = Depends(
             FilterHousingUnitsGetRequestParameters
         ),
-        filter_housing_units_service: FilterHousingUnitsService = Depends(
-            Provide[HousingUnitsContainer.filter_housing_units_service]
+        accept: Optional[str] = Header(default=None),
+        if_none_match: Optional[str] = Header(default=None),
+        cached_filter_housing_units_service: CachedFilterHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.cached_filter_housing_units_service]
+        ),
+        stream_housing_units_service: StreamHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.stream_housing_units_service]
         )
 ):
     """
-    Controller for filtering the housing units.
+    Controller for filtering the housing units. When the application/x-ndjson media type is accepted, all the
+    filtered housing units are streamed as newline delimited JSON, instead of returning a single page of them.
+    The pages are returned already serialised, as they are cached, with their ETag, and the 304 Not Modified
+    response is returned when the page matches the If-None-Match.
 
     :param filter_housing_units_get_request_parameters: The data ingestion POST request body.
-    :param filter_housing_units_service:  The service responsible for filtering and returning the HousingUnits
+    :param accept: The Accept header of the request.
+    :param if_none_match: The If-None-Match header of the request.
+    :param cached_filter_housing_units_service:  The service responsible for filtering and returning the serialised
+     HousingUnits from the filter cache, or the HousingUnit table.
+    :param stream_housing_units_service:  The service responsible for filtering and streaming the HousingUnits
      from the HousingUnit table.
 
     :return: The filtered HousingUnits.
     """
-    return await filter_housing_units_service.apply(
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return housing_units_ndjson_response(
+            await stream_housing_units_service.apply(
+                street_name=filter_housing_units_get_request_parameters.street_name,
+                borough=filter_housing_units_get_request_parameters.borough,
+                postcode=filter_housing_units_get_request_parameters.postcode,
+                construction_type=filter_housing_units_get_request_parameters.construction_type,
+                num_units_min=filter_housing_units_get_request_parameters.num_units_min,
+                num_units_max=filter_housing_units_get_request_parameters.num_units_max,
+                sort_key=filter_housing_units_get_request_parameters.sort_by,
+                cursor=filter_housing_units_get_request_parameters.cursor,
+                fields=filter_housing_units_get_request_parameters.fields
+            )
+        )
+
+    housing_units_page: HousingUnitsPage = await cached_filter_housing_units_service.apply(
         street_name=filter_housing_units_get_request_parameters.street_name,
         borough=filter_housing_units_get_request_parameters.borough,
         postcode=filter_housing_units_get_request_parameters.postcode,
         construction_type=filter_housing_units_get_request_parameters.construction_type,
         num_units_min=filter_housing_units_get_request_parameters.num_units_min,
-        num_units_max=filter_housing_units_get_request_parameters.num_units_max
+        num_units_max=filter_housing_units_get_request_parameters.num_units_max,
+        sort_key=filter_housing_units_get_request_parameters.sort_by,
+        limit=filter_housing_units_get_request_parameters.limit,
+        cursor=filter_housing_units_get_request_parameters.cursor,
+        total_mode=filter_housing_units_get_request_parameters.total_mode,
+        fields=filter_housing_units_get_request_parameters.fields,
+        if_none_match=if_none_match
+    )
+    if housing_units_page.content is None:
+        return not_modified_response(etag=housing_units_page.etag)
+
+    response: Response = serialised_json_response(housing_units_page.content)
+    if housing_units_page.etag is not None:
+        response.headers['ETag'] = housing_units_page.etag
+
+    return response
+
+
+@router.get(
+    "/housing-units/export",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Exporting Housing Units endpoint.",
+    response_model=TaskStatus,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+    status_code=200
+)
+@inject
+async def export_housing_units(
+        export_housing_units_get_request_parameters: ExportHousingUnitsGetRequestParameters = Depends(
+            ExportHousingUnitsGetRequestParameters
+        ),
+        export_housing_units_service: ExportHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.export_housing_units_service]
+        )
+):
+    """
+    Controller for exporting the filtered housing units to a csv, parquet or arrow file. The small exports are
+    returned as the response content, while the large ones are exported by a task, and a 202 response with the task
+    status is returned instead. The task status reports the download url of the file, once exported.
+
+    :param export_housing_units_get_request_parameters: The export GET request parameters.
+    :param export_housing_units_service:  The service responsible for exporting the HousingUnits from the HousingUnit
+     table.
+
+    :return: The exported file, or the TaskStatus that executes the export.
+    """
+    housing_units_export: HousingUnitsExport = await export_housing_units_service.apply(
+        export_format=export_housing_units_get_request_parameters.format,
+        street_name=export_housing_units_get_request_parameters.street_name,
+        borough=export_housing_units_get_request_parameters.borough,
+        postcode=export_housing_units_get_request_parameters.postcode,
+        construction_type=export_housing_units_get_request_parameters.construction_type,
+        num_units_min=export_housing_units_get_request_parameters.num_units_min,
+        num_units_max=export_housing_units_get_request_parameters.num_units_max
+    )
+    if housing_units_export.task_status:
+        return JSONResponse(status_code=202, content=jsonable_encoder(housing_units_export.task_status))
+
+    return StreamingResponse(
+        content=housing_units_export.content,
+        media_type=EXPORT_MEDIA_TYPES[housing_units_export.export_format],
+        headers={
+            "Content-Disposition": 'attachment; filename="housing_units.{0}"'.format(
+                housing_units_export.export_format.value
+            )
+        },
+    )
+
+
+@router.get(
+    "/housing-units/exports/{file_name}",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Downloading Housing Units export endpoint.",
+    response_class=FileResponse,
+    status_code=200
+)
+@inject
+async def download_housing_units_export(
+        file_name: str,
+        retrieve_housing_units_export_service: RetrieveHousingUnitsExportService = Depends(
+            Provide[HousingUnitsContainer.retrieve_housing_units_export_service]
+        )
+):
+    """
+    Controller for downloading the file exported by a housing units export task.
+
+    :param file_name: The exported file name, as reported by the export task status.
+    :param retrieve_housing_units_export_service:  The service responsible for retrieving the exported file.
+
+    :return: The exported file.
+    """
+    file_path: str = retrieve_housing_units_export_service.apply(file_name=file_name)
+
+    return FileResponse(
+        path=file_path,
+        media_type=EXPORT_MEDIA_TYPES[ExportFormat(file_name.rsplit('.', 1)[-1])],
+        filename=file_name,
+    )
+
+
+@router.get(
+    "/housing-units/cache-stats",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.admin]))],
+    response_description="Housing Units cache counters endpoint.",
+    response_model=HousingUnitsCacheStats,
+    status_code=200
+)
+@inject
+async def housing_units_cache_stats(
+        get_housing_units_cache_stats_service: GetHousingUnitsCacheStatsService = Depends(
+            Provide[HousingUnitsContainer.get_housing_units_cache_stats_service]
+        )
+):
+    """
+    Controller for returning the counters of the in-memory HousingUnits cache. Every worker has its own cache, so the
+    counters are the ones of the worker that serves the request.
+
+    :param get_housing_units_cache_stats_service:  The service responsible for returning the HousingUnits cache
+     counters.
+
+    :return: The HousingUnits cache counters.
+    """
+    return get_housing_units_cache_stats_service.apply()
+
+
+@router.get(
+    "/housing-units/search",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Searching Housing Units by street name endpoint.",
+    response_model=SearchHousingUnits,
+    status_code=200
+)
+@inject
+async def search_housing_units(
+        search_housing_units_get_request_parameters: SearchHousingUnitsGetRequestParameters = Depends(
+            SearchHousingUnitsGetRequestParameters
+        ),
+        search_housing_units_service: SearchHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.search_housing_units_service]
+        )
+):
+    """
+    Controller for searching the housing units by their street names, regardless of the case, ranked by the
+    similarity of the street names to the searched words.
+
+    :param search_housing_units_get_request_parameters: The search GET request parameters.
+    :param search_housing_units_service:  The service responsible for searching the HousingUnits in the HousingUnit
+     table.
+
+    :return: The best ranked HousingUnits found.
+    """
+    return search_housing_units_response(
+        await search_housing_units_service.apply(
+            query=search_housing_units_get_request_parameters.q,
+            limit=search_housing_units_get_request_parameters.limit,
+        )
+    )
+
+
+@router.get(
+    "/housing-units/autocomplete/street-names",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Autocompleting Housing Units street names endpoint.",
+    response_model=AutocompleteStreetNames,
+    status_code=200
+)
+@inject
+async def autocomplete_street_names(
+        autocomplete_street_names_get_request_parameters: AutocompleteStreetNamesGetRequestParameters = Depends(
+            AutocompleteStreetNamesGetRequestParameters
+        ),
+        autocomplete_street_names_service: AutocompleteStreetNamesService = Depends(
+            Provide[HousingUnitsContainer.autocomplete_street_names_service]
+        )
+):
+    """
+    Controller for autocompleting the street names of the housing units, from the in-memory dictionary of the distinct
+    street names of the worker that serves the request.
+
+    :param autocomplete_street_names_get_request_parameters: The autocomplete GET request parameters.
+    :param autocomplete_street_names_service:  The service responsible for autocompleting the street names.
+
+    :return: The street names starting with the prefix, ranked by their number of HousingUnits.
+    """
+    return street_name_suggestions_response(
+        await autocomplete_street_names_service.apply(
+            prefix=autocomplete_street_names_get_request_parameters.prefix,
+            limit=autocomplete_street_names_get_request_parameters.limit,
+        )
     )
 
 
+@router.get(
+    "/housing-units/near",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Finding Housing Units by location endpoint.",
+    response_model=NearHousingUnits,
+    status_code=200
+)
+@inject
+async def near_housing_units(
+        near_housing_units_get_request_parameters: NearHousingUnitsGetRequestParameters = Depends(
+            NearHousingUnitsGetRequestParameters
+        ),
+        near_housing_units_service: NearHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.near_housing_units_service]
+        )
+):
+    """
+    Controller for finding the housing units within a radius of a point, or within a bounding box, through the
+    location index, from the nearest one.
+
+    :param near_housing_units_get_request_parameters: The location GET request parameters.
+    :param near_housing_units_service:  The service responsible for finding the HousingUnits by their locations.
+
+    :return: The found HousingUnits, with their distances from the point or from the centre of the bounding box.
+    """
+    return near_housing_units_response(
+        await near_housing_units_service.apply(
+            lat=near_housing_units_get_request_parameters.lat,
+            lon=near_housing_units_get_request_parameters.lon,
+            radius_m=near_housing_units_get_request_parameters.radius_m,
+            bbox=near_housing_units_get_request_parameters.bbox,
+            limit=near_housing_units_get_request_parameters.limit,
+        )
+    )
+
+
+@router.get(
+    "/housing-units/tiles/{z}/{x}/{y}",
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
+    response_description="Clustered Housing Units map tile endpoint.",
+    response_model=HousingUnitsTile,
+    responses={304: {"description": "Not Modified"}},
+    status_code=200
+)
+@inject
+async def tile_housing_units(
+        z: int,
+        x: int,
+        y: int,
+        if_none_match: Optional[str] = Header(default=None),
+        tile_housing_units_service: TileHousingUnitsService = Depends(
+            Provide[HousingUnitsContainer.tile_housing_units_service]
+        )
+):
+    """
+    Controller for returning the map tile of the housing units, clustered into the cells of a grid, with the count
+    and the summed total units of the housing units of every cell. The tiles are returned already serialised, as
+    they are cached, with their ETag, and the 304 Not Modified response is returned when the tile matches the
+    If-None-Match.
+
+    :param z: The zoom of the tile.
+    :param x: The column of the tile, from the west.
+    :param y: The row of the tile, from the north.
+    :param if_none_match: The If-None-Match header of the request.
+    :param tile_housing_units_service:  The service responsible for clustering and returning the serialised tile
+     from the tiles cache, or the HousingUnit table.
+
+    :return: The clustered HousingUnits of the tile.
+    """
+    housing_units_tile: HousingUnitsPage = await tile_housing_units_service.apply(
+        z=z, x=x, y=y, if_none_match=if_none_match
+    )
+    if housing_units_tile.content is None:
+        return not_modified_response(etag=housing_units_tile.etag)
+
+    response: Response = serialised_json_response(housing_units_tile.content)
+    if housing_units_tile.etag is not None:
+        response.headers['ETag'] = housing_units_tile.etag
+
+    return response
+
+
 @router.get(
     "/housing-units/{housing_unit_id}",
     dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
     response_description="Retrieving Housing Unit endpoint.",
     response_model=FullHousingUnitResponse,
+    responses={304: {"description": "Not Modified"}},
     status_code=200
 )
 @inject
 async def retrieve_housing_unit(
         housing_unit_id: str,
+        response: Response,
+        if_none_match: Optional[str] = Header(default=None),
+        if_modified_since: Optional[str] = Header(default=None),
         retrieve_housing_unit_service: RetrieveHousingUnitService = Depends(
             Provide[HousingUnitsContainer.retrieve_housing_unit_service]
         )
 ):
     """
-    Controller for returning the housing unit by id.
+    Controller for returning the housing unit by id, with its ETag and Last-Modified validators. The 304 Not Modified
+    response is returned when the housing unit matches the If-None-Match, or the If-Modified-Since when the
+    If-None-Match is not provided.
 
     :param housing_unit_id: The provided housing unit id that is to be retrieved.
+    :param response: The response that the validators are set to.
+    :param if_none_match: The If-None-Match header of the request.
+    :param if_modified_since: The If-Modified-Since header of the request.
     :param retrieve_housing_unit_service:  The service responsible for retrieving and returning the HousingUnit
      by uuid from the HousingUnit table.
 
     :return: The found HousingUnit.
     """
-    return await retrieve_housing_unit_service.apply(uuid=housing_unit_id)
+    housing_unit: HousingUnit = await retrieve_housing_unit_service.apply(uuid=housing_unit_id)
+    etag: str = housing_unit_etag(housing_unit)
+    last_modified: str = housing_unit_last_modified(housing_unit)
+    if is_not_modified(
+        etag=etag,
+        if_none_match=if_none_match,
+        last_modified=housing_unit.updated_at,
+        if_modified_since=if_modified_since,
+    ):
+        return not_modified_response(etag=etag, last_modified=last_modified)
+
+    headers: Dict[str, str] = {'ETag': etag, 'Last-Modified': last_modified}
+    if Configuration.get().fast_json_responses:
+        return housing_unit_response(housing_unit, headers=headers)
+
+    response.headers.update(headers)
+    return housing_unit
 
 
 @router.post(
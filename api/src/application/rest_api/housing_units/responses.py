@@ -0,0 +1,221 @@
+from typing import List, Dict, Any, AsyncIterator, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse, StreamingResponse, JSONResponse, Response
+from sqlalchemy.engine import Row
+
+from application.housing_units.models import HousingUnit
+from application.housing_units.dictionaries import StreetNameSuggestion
+from application.rest_api.housing_units.schemas import HousingUnitResponse, FullHousingUnitResponse, \
+    FilterHousingUnits, HousingUnitSearchResult, HousingUnitNearResult
+
+# The response fields of the HousingUnits, which are named after the HousingUnit attributes that they are read from.
+HOUSING_UNIT_RESPONSE_FIELDS: List[str] = [field.alias for field in HousingUnitResponse.__fields__.values()]
+FULL_HOUSING_UNIT_RESPONSE_FIELDS: List[str] = [field.alias for field in FullHousingUnitResponse.__fields__.values()]
+HOUSING_UNIT_SEARCH_RESULT_FIELDS: List[str] = [field.alias for field in HousingUnitSearchResult.__fields__.values()]
+HOUSING_UNIT_NEAR_RESULT_FIELDS: List[str] = [field.alias for field in HousingUnitNearResult.__fields__.values()]
+NDJSON_MEDIA_TYPE: str = 'application/x-ndjson'
+
+
+def filter_housing_units_content(filter_housing_units: FilterHousingUnits) -> bytes:
+    """
+    Serialises the filtered HousingUnits straight from their rows with orjson, without validating them through the
+    FilterHousingUnits response model, as they are read from the HousingUnit table. Only the response fields that
+    are selected by the rows are returned, the same way as the response model excludes the unset fields.
+
+    :param filter_housing_units: The filtered HousingUnits, holding the rows of the filter_rows.
+
+    :return: The JSON content of the filtered HousingUnits.
+    """
+    return orjson.dumps({
+        'housing_units': _housing_unit_contents(filter_housing_units.housing_units),
+        'total': filter_housing_units.total,
+        'next_cursor': filter_housing_units.next_cursor,
+    })
+
+
+def validated_filter_housing_units_content(filter_housing_units: FilterHousingUnits) -> bytes:
+    """
+    Serialises the filtered HousingUnits through the FilterHousingUnits response model, the same way as the response
+    model of the endpoint does, for when the fast JSON responses are not enabled.
+
+    :param filter_housing_units: The filtered HousingUnits, holding the rows of the filter_rows.
+
+    :return: The JSON content of the filtered HousingUnits.
+    """
+    return FilterHousingUnits(**filter_housing_units.dict(by_alias=True)).json(
+        by_alias=True, exclude_unset=True
+    ).encode()
+
+
+def serialised_json_response(content: bytes) -> Response:
+    """
+    Returns the already serialised JSON content as it is, e.g. the cached content of the filtered HousingUnits.
+
+    :param content: The serialised JSON content.
+
+    :return: The JSON response of the content.
+    """
+    return Response(content=content, media_type=JSONResponse.media_type)
+
+
+def not_modified_response(etag: str, last_modified: Optional[str] = None) -> Response:
+    """
+    Returns the 304 Not Modified response, without content, with the current validators of the representation.
+
+    :param etag: The current ETag.
+    :param last_modified: The current Last-Modified HTTP date, when it is known.
+
+    :return: The Not Modified response.
+    """
+    headers: Dict[str, str] = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = last_modified
+
+    return Response(status_code=304, headers=headers)
+
+
+def housing_unit_response(housing_unit: HousingUnit, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Serialises the HousingUnit straight from its attributes with orjson, without validating it through the
+    FullHousingUnitResponse response model, as it is read from the HousingUnit table.
+
+    :param housing_unit: The HousingUnit.
+    :param headers: The headers of the response, e.g. the validators of the HousingUnit.
+
+    :return: The JSON response of the HousingUnit.
+    """
+    return ORJSONResponse(
+        content={field: getattr(housing_unit, field) for field in FULL_HOUSING_UNIT_RESPONSE_FIELDS},
+        headers=headers,
+    )
+
+
+def search_housing_units_response(rows: List[Row]) -> ORJSONResponse:
+    """
+    Serialises the found HousingUnits straight from their rows with orjson, the same way as the
+    filter_housing_units_content, along with their ranks.
+
+    :param rows: The rows of the found HousingUnits, from the best ranked one.
+
+    :return: The JSON response of the found HousingUnits.
+    """
+    return ORJSONResponse(
+        content={'housing_units': _housing_unit_contents(rows, response_fields=HOUSING_UNIT_SEARCH_RESULT_FIELDS)}
+    )
+
+
+def near_housing_units_response(rows: List[Row]) -> ORJSONResponse:
+    """
+    Serialises the HousingUnits found by their locations straight from their rows with orjson, the same way as the
+    filter_housing_units_content, along with their coordinates and distances.
+
+    :param rows: The rows of the found HousingUnits, from the nearest one.
+
+    :return: The JSON response of the found HousingUnits.
+    """
+    return ORJSONResponse(
+        content={'housing_units': _housing_unit_contents(rows, response_fields=HOUSING_UNIT_NEAR_RESULT_FIELDS)}
+    )
+
+
+def housing_units_tile_content(z: int, x: int, y: int, rows: List[Row]) -> bytes:
+    """
+    Serialises the clustered HousingUnits of a map tile straight from the rows of its grid cells with orjson, without
+    validating them through the HousingUnitsTile response model. The coordinates are rounded to 6 decimals, about
+    10cm, so that the tile is a few KB at most, as it has a bounded number of cells.
+
+    :param z: The zoom of the tile.
+    :param x: The column of the tile.
+    :param y: The row of the tile.
+    :param rows: The rows of the non empty grid cells of the tile.
+
+    :return: The JSON content of the tile.
+    """
+    return orjson.dumps({
+        'z': z,
+        'x': x,
+        'y': y,
+        'cells': [
+            {
+                'x': row.cell_x,
+                'y': row.cell_y,
+                'count': row.count,
+                'total_units': row.total_units,
+                'latitude': round(row.latitude, 6),
+                'longitude': round(row.longitude, 6),
+            }
+            for row in rows
+        ],
+    })
+
+
+def street_name_suggestions_response(suggestions: List[StreetNameSuggestion]) -> ORJSONResponse:
+    """
+    Serialises the autocompleted street names with orjson, without validating them through the
+    AutocompleteStreetNames response model.
+
+    :param suggestions: The autocompleted street names, from the one with the most HousingUnits.
+
+    :return: The JSON response of the autocompleted street names.
+    """
+    return ORJSONResponse(
+        content={
+            'street_names': [
+                {'street_name': suggestion.street_name, 'housing_units': suggestion.housing_units}
+                for suggestion in suggestions
+            ]
+        }
+    )
+
+
+def housing_units_ndjson_response(batches: AsyncIterator[List[Row]]) -> StreamingResponse:
+    """
+    Streams the batches of the filtered HousingUnits rows as newline delimited JSON, one HousingUnit per line,
+    serialised with orjson the same way as the filter_housing_units_content. Every batch is sent as soon as it is
+    read, so that the first HousingUnits are sent before the last ones are read.
+
+    :param batches: The batches of the rows of the stream_rows.
+
+    :return: The streaming response of the filtered HousingUnits.
+    """
+    async def housing_unit_lines() -> AsyncIterator[bytes]:
+        async for rows in batches:
+            yield b''.join(
+                orjson.dumps(content, option=orjson.OPT_APPEND_NEWLINE) for content in _housing_unit_contents(rows)
+            )
+
+    return StreamingResponse(content=housing_unit_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _housing_unit_contents(
+        rows: List[Row],
+        response_fields: List[str] = HOUSING_UNIT_RESPONSE_FIELDS,
+) -> List[Dict[str, Any]]:
+    """
+    Maps the HousingUnits rows to their response fields, leaving out the fields that are not response ones.
+    The uuids are returned as strings, as orjson serialises only the uuid.UUID instances, and not the asyncpg ones.
+
+    :param rows: The rows of the HousingUnits.
+    :param response_fields: The response fields of the HousingUnits.
+
+    :return: The response fields of every HousingUnit row.
+    """
+    if not rows:
+        return []
+
+    # The rows select the same fields, so the returned fields are resolved once for all of them.
+    row_fields: List[str] = list(rows[0]._fields)
+    returned_fields: List[str] = [field for field in row_fields if field in response_fields]
+    returned_positions: List[int] = [row_fields.index(field) for field in returned_fields]
+
+    uuid_position: Optional[int] = returned_fields.index('uuid') if 'uuid' in returned_fields else None
+
+    contents: List[Dict[str, Any]] = []
+    for row in rows:
+        values: List[Any] = [row[position] for position in returned_positions]
+        if uuid_position is not None and values[uuid_position] is not None:
+            values[uuid_position] = str(values[uuid_position])
+        contents.append(dict(zip(returned_fields, values)))
+
+    return contents
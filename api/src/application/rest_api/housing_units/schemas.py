@@ -6,11 +6,15 @@ from pydantic import BaseModel, Field
 from pydantic.dataclasses import dataclass
 from pydantic.json import UUID
 
+from application.housing_units.enums import LoadStrategy, IngestionMode, HousingUnitSortKey, TotalMode, ExportFormat
+
 
 @dataclass
 class DataIngestionPostRequestBody:
     dataset_id: Optional[str] = 'hg8x-zxpr'
     reset_table: Optional[bool] = True
+    load_strategy: Optional[LoadStrategy] = LoadStrategy.core
+    mode: Optional[IngestionMode] = IngestionMode.full
 
 
 @dataclass
@@ -133,6 +137,10 @@ class FullHousingUnitResponse(BaseModel):
 class FilterHousingUnits(BaseModel):
     housing_units: List[HousingUnitResponse] = Field(title='The filtered Housing Units.')
     total: int = Field(title='The total count of filtered Housing Units.')
+    next_cursor: Optional[str] = Field(
+        default=None,
+        title='The cursor of the next page of filtered Housing Units, or null when this is the last page.'
+    )
 
     class Config:
         schema_extra = {
@@ -158,6 +166,135 @@ class FilterHousingUnits(BaseModel):
                     }
                 ],
                 "total": 2,
+                "next_cursor": None,
+            }
+        }
+
+
+class HousingUnitSearchResult(HousingUnitResponse):
+    rank: float = Field(title='The similarity of the street name to the search query, from 0 to 1.')
+
+
+class SearchHousingUnits(BaseModel):
+    housing_units: List[HousingUnitSearchResult] = Field(title='The found Housing Units, from the best ranked one.')
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "housing_units": [
+                    {
+                        "id": "e3b3326c-617a-4836-8fe0-3c17390f0bd4",
+                        "project_id": "44218",
+                        "borough": "Brooklyn",
+                        "street_name": "RALPH AVENUE",
+                        "postcode": None,
+                        "construction_type": "New Construction",
+                        "total_units": 10,
+                        "rank": 1.0,
+                    }
+                ],
+            }
+        }
+
+
+class HousingUnitNearResult(HousingUnitResponse):
+    latitude: Optional[float]
+    longitude: Optional[float]
+    distance_m: float = Field(title='The distance from the point, or from the centre of the bounding box, in metres.')
+
+
+class NearHousingUnits(BaseModel):
+    housing_units: List[HousingUnitNearResult] = Field(title='The found Housing Units, from the nearest one.')
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "housing_units": [
+                    {
+                        "id": "e3b3326c-617a-4836-8fe0-3c17390f0bd4",
+                        "project_id": "44218",
+                        "borough": "Brooklyn",
+                        "street_name": "RALPH AVENUE",
+                        "postcode": None,
+                        "construction_type": "New Construction",
+                        "total_units": 10,
+                        "latitude": 40.680281,
+                        "longitude": -73.920563,
+                        "distance_m": 152.4,
+                    }
+                ],
+            }
+        }
+
+
+class HousingUnitsTileCell(BaseModel):
+    x: int = Field(title='The column of the grid cell within the tile, from the west.')
+    y: int = Field(title='The row of the grid cell within the tile, from the north.')
+    count: int = Field(title='The number of Housing Units in the grid cell.')
+    total_units: int = Field(title='The summed total units of the Housing Units in the grid cell.')
+    latitude: float = Field(title='The mean latitude of the Housing Units in the grid cell.')
+    longitude: float = Field(title='The mean longitude of the Housing Units in the grid cell.')
+
+
+class HousingUnitsTile(BaseModel):
+    z: int
+    x: int
+    y: int
+    cells: List[HousingUnitsTileCell] = Field(title='The non empty grid cells of the tile.')
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "z": 12,
+                "x": 1206,
+                "y": 1539,
+                "cells": [
+                    {"x": 3, "y": 5, "count": 42, "total_units": 1280, "latitude": 40.7241, "longitude": -73.9642},
+                ],
+            }
+        }
+
+
+class StreetNameSuggestionResponse(BaseModel):
+    street_name: str
+    housing_units: int = Field(title='The number of Housing Units on the street.')
+
+    class Config:
+        orm_mode = True
+
+
+class AutocompleteStreetNames(BaseModel):
+    street_names: List[StreetNameSuggestionResponse] = Field(
+        title='The street names starting with the prefix, from the one with the most Housing Units.'
+    )
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "street_names": [
+                    {"street_name": "RALPH AVENUE", "housing_units": 120},
+                    {"street_name": "RANDALL AVENUE", "housing_units": 45},
+                ],
+            }
+        }
+
+
+class HousingUnitsCacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+    class Config:
+        orm_mode = True
+        schema_extra = {
+            "example": {
+                "hits": 950,
+                "misses": 50,
+                "evictions": 0,
+                "expirations": 10,
+                "size": 40,
             }
         }
 
@@ -171,3 +308,54 @@ class FilterHousingUnitsGetRequestParameters:
     construction_type: Optional[str] = Query(default=None)
     num_units_min: Optional[int] = Query(default=0, ge=0, title='Minimum number of building units.')
     num_units_max: Optional[int] = Query(default=1000, ge=0, title='Maximum number of building units.')
+    sort_by: Optional[HousingUnitSortKey] = Query(
+        default=HousingUnitSortKey.id, title='The field that the Housing Units are sorted by.'
+    )
+    limit: Optional[int] = Query(default=100, ge=1, le=1000, title='Maximum number of Housing Units per page.')
+    cursor: Optional[str] = Query(
+        default=None, title='The next_cursor of the previous page, for retrieving the next page.'
+    )
+    total_mode: Optional[TotalMode] = Query(
+        default=TotalMode.exact, title='Whether the total is the exact or the estimated count of the Housing Units.'
+    )
+    fields: Optional[str] = Query(
+        default=None,
+        title='The comma separated Housing Unit fields that are returned, for example project_id,total_units.'
+    )
+
+
+@dataclass
+class SearchHousingUnitsGetRequestParameters:
+    q: str = Query(default=..., title='The searched words of the street names, of at least 3 characters.')
+    limit: Optional[int] = Query(default=20, ge=1, le=100, title='Maximum number of returned Housing Units.')
+
+
+@dataclass
+class AutocompleteStreetNamesGetRequestParameters:
+    prefix: str = Query(default=..., min_length=1, title='The prefix of the street names.')
+    limit: Optional[int] = Query(default=10, ge=1, le=50, title='Maximum number of returned street names.')
+
+
+@dataclass
+class NearHousingUnitsGetRequestParameters:
+    lat: Optional[float] = Query(default=None, ge=-90, le=90, title='The latitude of the point.')
+    lon: Optional[float] = Query(default=None, ge=-180, le=180, title='The longitude of the point.')
+    radius_m: Optional[float] = Query(
+        default=None, gt=0, le=100000, title='The maximum distance from the point, in metres.'
+    )
+    bbox: Optional[str] = Query(
+        default=None,
+        title='The comma separated min_lon,min_lat,max_lon,max_lat of the bounding box, instead of the point.'
+    )
+    limit: Optional[int] = Query(default=100, ge=1, le=1000, title='Maximum number of returned Housing Units.')
+
+
+@dataclass
+class ExportHousingUnitsGetRequestParameters:
+    format: Optional[ExportFormat] = Query(default=ExportFormat.csv, title='The file format of the export.')
+    street_name: Optional[str] = Query(default=None)
+    borough: Optional[str] = Query(default=None)
+    postcode: Optional[int] = Query(default=None)
+    construction_type: Optional[str] = Query(default=None)
+    num_units_min: Optional[int] = Query(default=0, ge=0, title='Minimum number of building units.')
+    num_units_max: Optional[int] = Query(default=1000, ge=0, title='Maximum number of building units.')
@@ -10,14 +10,15 @@ router = APIRouter()
 
 @router.get(
     "/task-status/{task_id}",
-    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.admin]))],
+    dependencies=[Depends(BearerJWTAuthorizationService(permission_groups=[Group.customer, Group.admin]))],
     response_description="Task status reporting endpoint.",
     response_model=TaskStatus,
     status_code=200
 )
 def get_task_status_details(task_id: str) -> TaskStatus:
     """
-    Entrypoint for celery task status monitoring.
+    Entrypoint for celery task status monitoring. The customers are allowed as well, for following the housing units
+    export tasks.
 
     :param task_id: The celery task id.
 
@@ -1,6 +1,11 @@
-from typing import Dict
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Iterator, List, Any, Optional, Deque
 
 from pandas import DataFrame
+from requests.exceptions import RequestException
 from sodapy import Socrata
 
 from application.infrastructure.configurations.models import Configuration
@@ -53,32 +58,153 @@ class SocrataClient:
         'all_counted_units': 'Int64',
         'total_units': 'Int64',
     }
+    # The Socrata system field holding the last update time of each row, used as the incremental ingestion
+    # high-water mark. Its values are ISO-8601 timestamps, so they are compared as strings.
+    UPDATED_AT_FIELD = ':updated_at'
     CHUNK_SIZE = 500
+    PAGE_SIZE = 10000
+    MAX_WORKERS = 4
+    MAX_RETRIES = 3
+    RETRY_BACKOFF_SECONDS = 0.5
 
-    def __init__(self, hbd_dataset_id: str = 'hg8x-zxpr'):
+    def __init__(
+            self,
+            hbd_dataset_id: str = 'hg8x-zxpr',
+            domain: str = 'data.cityofnewyork.us',
+            page_size: int = PAGE_SIZE,
+            max_workers: int = MAX_WORKERS,
+            max_retries: int = MAX_RETRIES,
+            retry_backoff_seconds: float = RETRY_BACKOFF_SECONDS,
+            session_adapter: Optional[Dict[str, Any]] = None,
+    ):
         if not hbd_dataset_id:
             raise NoneArgumentError("HBD Dataset ID is not provided.")
+        if not domain:
+            raise NoneArgumentError("Socrata domain is not provided.")
 
         self._dataset_id: str = hbd_dataset_id
-        self._client = Socrata("data.cityofnewyork.us", None)
-        self._client = Socrata(
-            "data.cityofnewyork.us",
-            app_token=Configuration.get().socrata_app_token
-        )
+        self._domain: str = domain
+        self._page_size: int = page_size
+        self._max_workers: int = max_workers
+        self._max_retries: int = max_retries
+        self._retry_backoff_seconds: float = retry_backoff_seconds
+        self._session_adapter: Optional[Dict[str, Any]] = session_adapter
 
-        self._dataset_size = 10000
+        # The Socrata client wraps a requests session, which is not safe to be shared between the page
+        # download threads, so every thread lazily creates its own client.
+        self._thread_local: threading.local = threading.local()
 
-    def download_housing_units_dataset(self) -> DataFrame:
+    @property
+    def _client(self) -> Socrata:
+        client: Optional[Socrata] = getattr(self._thread_local, 'client', None)
+        if client is None:
+            client = Socrata(
+                self._domain,
+                app_token=Configuration.get().socrata_app_token,
+                session_adapter=self._session_adapter,
+            )
+            self._thread_local.client = client
+
+        return client
+
+    def download_housing_units_dataset(self, updated_since: Optional[str] = None) -> DataFrame:
         """
-        Downloads the Housing Units dataset by providing the dataset id from the Socrata api.
+        Downloads the whole Housing Units dataset by providing the dataset id from the Socrata api.
+
+        :param updated_since: When provided, only the rows updated at or after this :updated_at value are downloaded.
 
         :return: The dataframe containing the downloaded results.
         """
-        results = self._client.get(self._dataset_id, limit=self._dataset_size)
+        pages: List[DataFrame] = list(self.housing_units_dataset_pages(updated_since=updated_since))
+        if not pages:
+            return self.records_to_dataframe([])
+
+        return pd.concat(pages, ignore_index=True)
+
+    def housing_units_dataset_pages(self, updated_since: Optional[str] = None) -> Iterator[DataFrame]:
+        """
+        Downloads the Housing Units dataset page by page, using the Socrata $limit/$offset paging ordered by the
+        :id system field. The pages are downloaded concurrently by a bounded pool of workers, and are yielded in
+        their dataset order, so that at most max_workers pages are held in memory at a time.
+
+        :param updated_since: When provided, only the rows updated at or after this :updated_at value are downloaded,
+            ordered by their :updated_at and :id system fields. The rows updated exactly at the provided value are
+            downloaded again, so that the rows updated at the same time as the last ingested ones are not missed.
+
+        :return: The yielded dataframe of each downloaded page.
+        """
+        where: Optional[str] = None
+        order: str = ':id'
+        if updated_since:
+            where = "{0} >= '{1}'".format(self.UPDATED_AT_FIELD, updated_since.replace("'", "''"))
+            order = '{0}, :id'.format(self.UPDATED_AT_FIELD)
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            in_flight: Deque[Future] = deque()
+            next_offset: int = 0
+            for _ in range(self._max_workers):
+                in_flight.append(executor.submit(self._download_page, next_offset, where, order))
+                next_offset += self._page_size
+
+            while in_flight:
+                results: List[Dict[str, Any]] = in_flight.popleft().result()
+                if results:
+                    yield self.records_to_dataframe(results)
+
+                if len(results) < self._page_size:
+                    # The last page is reached, so the pages requested after it are empty.
+                    for future in in_flight:
+                        future.cancel()
+                    return
+
+                in_flight.append(executor.submit(self._download_page, next_offset, where, order))
+                next_offset += self._page_size
+
+    def _download_page(self, offset: int, where: Optional[str] = None, order: str = ':id') -> List[Dict[str, Any]]:
+        """
+        Downloads a single page of the Housing Units dataset, retrying with an exponential backoff
+        on connection errors, rate limiting and server errors. The system fields are included in the records,
+        for tracking the :updated_at high-water mark of the ingested rows.
+
+        :param offset: The offset of the page in the dataset.
+        :param where: The SoQL $where clause that the rows are filtered with.
+        :param order: The SoQL $order clause that the rows are paged with.
+
+        :return: The records of the downloaded page.
+        """
+        attempt: int = 0
+        while True:
+            try:
+                return self._client.get(
+                    self._dataset_id,
+                    limit=self._page_size,
+                    offset=offset,
+                    where=where,
+                    order=order,
+                    exclude_system_fields='false',
+                )
+            except RequestException as ex:
+                status_code: Optional[int] = ex.response.status_code if ex.response is not None else None
+                is_retryable: bool = status_code is None or status_code == 429 or status_code >= 500
+                if not is_retryable or attempt >= self._max_retries:
+                    raise
 
-        # Convert to pandas DataFrame and change the column types.
-        dataframe: DataFrame = pd.DataFrame.from_records(results)
-        for col, col_type in self.DTYPES.items():
+            time.sleep(self._retry_backoff_seconds * 2 ** attempt)
+            attempt += 1
+
+    @classmethod
+    def records_to_dataframe(cls, records: List[Dict[str, Any]]) -> DataFrame:
+        """
+        Converts the Socrata records to a pandas DataFrame and changes the column types.
+        Socrata omits the empty fields from the records, so the columns are always aligned to the DTYPES ones,
+        followed by the UPDATED_AT_FIELD system field.
+
+        :param records: The records returned from the Socrata api.
+
+        :return: The dataframe containing the converted records.
+        """
+        dataframe: DataFrame = pd.DataFrame.from_records(records, columns=[*cls.DTYPES, cls.UPDATED_AT_FIELD])
+        for col, col_type in cls.DTYPES.items():
             if col_type == 'Int64':
                 dataframe[col] = pd.to_numeric(dataframe[col])
 
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+
+from application.infrastructure.database.models import HousingUnitsDBBaseModel
+
+
+class IngestionState(HousingUnitsDBBaseModel):
+    dataset_id = Column(
+        String,
+        doc='The Socrata dataset id that the ingestion state belongs to.',
+        unique=True,
+        nullable=False,
+    )
+    high_water_mark = Column(
+        String,
+        doc='The highest Socrata :updated_at system field value of the ingested dataset rows. '
+            'The incremental ingestions download only the rows updated at or after it.',
+    )
+    last_ingested_at = Column(
+        DateTime,
+        doc='The time that the last ingestion of the dataset was completed.',
+    )
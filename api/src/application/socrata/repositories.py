@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert, Insert
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.models import IngestionState
+
+
+class IngestionStateRepository:
+
+    def __init__(self, db_engine: DatabaseEngineWrapper = None):
+        self.db_engine = db_engine
+
+    def get_high_water_mark(self, dataset_id: str) -> Optional[str]:
+        """
+        Retrieves the high-water mark of the dataset ingestions using the sync session.
+
+        :param dataset_id: The Socrata dataset id.
+
+        :return: The highest :updated_at value ingested from the dataset, or None if the dataset was never ingested.
+        """
+        with self.db_engine.get_session() as session:
+            query: Select = select(IngestionState.high_water_mark).where(IngestionState.dataset_id == dataset_id)
+            return session.execute(query).scalar()
+
+    def save_high_water_mark(self, dataset_id: str, high_water_mark: Optional[str]) -> None:
+        """
+        Creates or updates the ingestion state of the dataset using the sync session. A missing high-water mark
+        doesn't replace the saved one, for not downloading the whole dataset again when no rows were ingested.
+
+        :param dataset_id: The Socrata dataset id.
+        :param high_water_mark: The highest :updated_at value ingested from the dataset.
+        """
+        statement: Insert = insert(IngestionState.__table__).values(
+            dataset_id=dataset_id,
+            high_water_mark=high_water_mark,
+            last_ingested_at=datetime.utcnow(),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[IngestionState.dataset_id],
+            set_={
+                'high_water_mark': (
+                    statement.excluded.high_water_mark
+                    if high_water_mark is not None else IngestionState.__table__.c.high_water_mark
+                ),
+                'last_ingested_at': statement.excluded.last_ingested_at,
+            }
+        )
+
+        with self.db_engine.get_session() as session:
+            with session.begin():
+                session.execute(statement)
@@ -1,47 +1,171 @@
-from typing import List
+from contextlib import nullcontext
+from itertools import chain
+from typing import List, Iterator, Optional, Dict, Any
 
-from pandas import DataFrame
+from celery import Task
+from pandas import DataFrame, Series
 
 from application.celery_worker import celery
-from application.housing_units.models import HousingUnit
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.enums import LoadStrategy, IngestionMode
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
 from application.housing_units.repositories import HousingUnitsRepository
 
 from application.infrastructure.database.database import DatabaseEngineWrapper
 from application.socrata.client import SocrataClient
 from application.socrata.errors import SocrataDatasetDownloadError
+from application.socrata.repositories import IngestionStateRepository
 
 
-@celery.task(name="housing_units_data_ingestion")
-def housing_unit_raw_data_ingestion_task(hbd_dataset_id: str = 'hg8x-zxpr', reset_table: bool = True) -> str:
+@celery.task(name="housing_units_data_ingestion", bind=True)
+def housing_unit_raw_data_ingestion_task(
+        self: Task,
+        hbd_dataset_id: str = 'hg8x-zxpr',
+        reset_table: bool = True,
+        load_strategy: str = LoadStrategy.core.value,
+        mode: str = IngestionMode.full.value,
+) -> str:
     """
     Celery Task for executing the Housing Unit table data ingestion process.
+    The dataset is streamed page by page from the Socrata api, and every chunk is flushed on its own, reporting the
+    progress through the task state. The dataset high-water mark is saved once all the pages are loaded.
 
     :param hbd_dataset_id: The HBD Dataset id, that we want to download using Socrata API.
-    :param reset_table: Flag for resetting the saved table data.
+    :param reset_table: Flag for replacing the saved table data on the full mode. When it is not set, the whole
+        dataset is upserted into the saved table instead.
+    :param load_strategy: The LoadStrategy value used for loading the rows into the staging table.
+    :param mode: The IngestionMode value of the ingestion. The incremental mode upserts only the rows updated since
+        the dataset high-water mark. The full mode loads the whole dataset into the staging table and swaps it in place
+        of the HousingUnit table, while the API writes of the HousingUnits are rejected with a conflict error.
 
     :return: A string representing the number of rows inserted.
 
     :raises SocrataDatasetDownloadError: When there is an error raised on dataset download from SocrataClient.
     """
+    strategy: LoadStrategy = LoadStrategy(load_strategy)
+    ingestion_mode: IngestionMode = IngestionMode(mode)
+
     housing_units_repository: HousingUnitsRepository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+    housing_units_bulk_loader: HousingUnitsBulkLoader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+    ingestion_state_repository: IngestionStateRepository = IngestionStateRepository(db_engine=DatabaseEngineWrapper())
     socrata_client: SocrataClient = SocrataClient(hbd_dataset_id=hbd_dataset_id)
 
-    try:
-        results_df: DataFrame = socrata_client.download_housing_units_dataset()
-    except Exception as ex:
-        raise SocrataDatasetDownloadError(
-            "Failed to download the dataset id {0} "
-            "from Socrata api with the following error: {1}".format(hbd_dataset_id, ex)
-        )
+    updated_since: Optional[str] = None
+    if ingestion_mode == IngestionMode.incremental:
+        updated_since = ingestion_state_repository.get_high_water_mark(dataset_id=hbd_dataset_id)
+
+    pages: Iterator[DataFrame] = _download_housing_units_dataset_pages(
+        socrata_client=socrata_client,
+        hbd_dataset_id=hbd_dataset_id,
+        updated_since=updated_since,
+    )
+
+    # The first page is downloaded before loading the staging table, for keeping the saved data
+    # when the dataset can't be downloaded at all.
+    first_page: Optional[DataFrame] = next(pages, None)
+
+    if first_page is None:
+        housing_units_repository.refresh_canonical_values()
+        return 'Number of HousingUnits inserted: 0.'
+
+    # The full ingestions that keep the saved table upsert the whole dataset into it, instead of loading it into the
+    # staging table.
+    staging: bool = ingestion_mode != IngestionMode.incremental and reset_table
+    total_inserted: int = 0
+    total_chunks: int = 0
+    high_water_mark: Optional[str] = None
+    replaced_table_name: Optional[str] = None
+    # The staging loads hold the staging load lock until the staging table is swapped in, so that the API writes are
+    # rejected meanwhile, instead of being lost by the swap.
+    with housing_units_bulk_loader.staging_load_lock() if staging else nullcontext():
+        if staging:
+            housing_units_bulk_loader.create_staging_table()
+
+        try:
+            for page in chain([first_page], pages):
+                updated_at_values: Series = page[socrata_client.UPDATED_AT_FIELD].dropna()
+                if not updated_at_values.empty:
+                    high_water_mark = max(high_water_mark or '', updated_at_values.max())
+
+                # The conversion is vectorized over the whole page, and the converted rows are flushed chunk by chunk.
+                page_mappings: List[Dict[str, Any]] = housing_unit_mappings_from_dataframe(page)
+
+                for pos in range(0, len(page_mappings), socrata_client.CHUNK_SIZE):
+                    housing_unit_mappings: List[Dict[str, Any]] = page_mappings[pos:pos + socrata_client.CHUNK_SIZE]
+
+                    if not staging:
+                        housing_units_bulk_loader.bulk_upsert(housing_unit_mappings)
+                    elif strategy == LoadStrategy.copy:
+                        housing_units_bulk_loader.bulk_copy(housing_unit_mappings, staging=True)
+                    else:
+                        housing_units_bulk_loader.bulk_insert(housing_unit_mappings, staging=True)
+
+                    total_inserted += len(housing_unit_mappings)
+                    total_chunks += 1
+                    self.update_state(state='PROGRESS', meta={'inserted': total_inserted, 'chunks': total_chunks})
+
+            if staging:
+                housing_units_bulk_loader.build_staging_table_indexes()
+                replaced_table_name = housing_units_bulk_loader.swap_staging_table()
+        except Exception:
+            # The partially loaded staging table is dropped, and the HousingUnit table is kept as it was.
+            if staging and replaced_table_name is None:
+                housing_units_bulk_loader.drop_staging_table()
+            raise
+
+    if replaced_table_name is not None:
+        drop_replaced_housing_units_table_task.delay(replaced_table_name)
+
+    ingestion_state_repository.save_high_water_mark(dataset_id=hbd_dataset_id, high_water_mark=high_water_mark)
+    # The values of the categorical columns are collected again once, from the ingested HousingUnits, along with their
+    # counts, as the writes of the ingestion collect only the values that are not collected yet.
+    housing_units_repository.refresh_canonical_values()
 
-    if reset_table:
-        housing_units_repository.truncate_table()
+    return 'Number of HousingUnits inserted: {0}.'.format(total_inserted)
 
-    housing_units: List[HousingUnit] = []
-    for _chunk in socrata_client.housing_unit_dataset_generator(results_df):
-        for index, row in _chunk.T.to_dict().items():
-            housing_units.append(HousingUnit.from_dict(row))
 
-        housing_units_repository.bulk_save(housing_units)
+@celery.task(name="housing_units_replaced_table_drop")
+def drop_replaced_housing_units_table_task(table_name: str) -> str:
+    """
+    Celery Task for dropping the HousingUnit table replaced by a swap ingestion, outside of the ingestion task,
+    so that the ingestion doesn't wait for the queries that are still reading the replaced table.
+
+    :param table_name: The replaced HousingUnit table name.
+
+    :return: A string representing the dropped table.
+    """
+    housing_units_bulk_loader: HousingUnitsBulkLoader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+    housing_units_bulk_loader.drop_replaced_table(table_name=table_name)
+
+    return 'Dropped the replaced HousingUnits table {0}.'.format(table_name)
+
+
+def _download_housing_units_dataset_pages(
+        socrata_client: SocrataClient,
+        hbd_dataset_id: str,
+        updated_since: Optional[str] = None,
+) -> Iterator[DataFrame]:
+    """
+    Yields the Housing Units dataset pages downloaded from the SocrataClient.
+
+    :param socrata_client: The SocrataClient used for downloading the dataset.
+    :param hbd_dataset_id: The HBD Dataset id that is downloaded.
+    :param updated_since: When provided, only the rows updated at or after this :updated_at value are downloaded.
+
+    :return: The yielded dataframe of each downloaded page.
+
+    :raises SocrataDatasetDownloadError: When there is an error raised on dataset download from SocrataClient.
+    """
+    pages: Iterator[DataFrame] = socrata_client.housing_units_dataset_pages(updated_since=updated_since)
+    while True:
+        try:
+            page: DataFrame = next(pages)
+        except StopIteration:
+            return
+        except Exception as ex:
+            raise SocrataDatasetDownloadError(
+                "Failed to download the dataset id {0} "
+                "from Socrata api with the following error: {1}".format(hbd_dataset_id, ex)
+            )
 
-    return 'Number of HousingUnits inserted: {0}.'.format(len(housing_units))
+        yield page
@@ -0,0 +1,18 @@
+from application.infrastructure.cache.invalidations import CacheInvalidations
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.users.models import User
+
+# The invalidations of the in-memory User caches of the API workers. The users are few and rarely written, so every
+# write invalidates all the cached users of every worker.
+USERS_CACHE_INVALIDATIONS: CacheInvalidations = CacheInvalidations(name=User.__tablename__)
+
+
+def invalidate_users_caches() -> None:
+    """
+    Invalidates the User caches of every API worker after a committed write to the User table, e.g. after a user is
+    deactivated, or its password or group is changed. The writes that are not followed by the invalidation are seen
+    once the cached users expire. The writing worker reads from the primary database for the replica lag, so that
+    it reads its own write.
+    """
+    DatabaseEngineWrapper.read_from_primary()
+    USERS_CACHE_INVALIDATIONS.publish()
@@ -2,6 +2,7 @@ from dependency_injector import containers, providers
 from dependency_injector.providers import Singleton
 
 from application.authentication.container import AuthenticationContainer
+from application.infrastructure.cache.caches import TTLCache
 from application.infrastructure.database.database import DatabaseEngineWrapper
 from application.users.repositories import UserRepository
 from application.users.services import LoginUserService, GetActiveUsersService
@@ -24,13 +25,35 @@ class UserContainer(containers.DeclarativeContainer):
         db_engine=DatabaseEngineWrapper
     )
 
+    users_cache: Singleton = providers.Singleton(
+        TTLCache,
+        max_size=10000,
+        ttl_seconds=60.0,
+    )
+
+    active_users_cache: Singleton = providers.Singleton(
+        TTLCache,
+        max_size=1,
+        ttl_seconds=60.0,
+    )
+
+    # The entries expire with the reused JWTs, which set their own time to live.
+    login_tokens_cache: Singleton = providers.Singleton(
+        TTLCache,
+        max_size=10000,
+        ttl_seconds=None,
+    )
+
     get_active_users_service: Singleton = providers.Singleton(
         GetActiveUsersService,
         user_repository=user_repository,
+        active_users_cache=active_users_cache,
     )
 
     login_user_service: Singleton = providers.Singleton(
         LoginUserService,
         user_repository=user_repository,
-        get_jwt_service=AuthenticationContainer.get_jwt_service.provided
+        get_jwt_service=AuthenticationContainer.get_jwt_service.provided,
+        users_cache=users_cache,
+        login_tokens_cache=login_tokens_cache,
     )
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from sqlalchemy import Column, String, Boolean, Enum
 
 from application.infrastructure.database.models import HousingUnitsDBBaseModel
@@ -10,3 +12,12 @@ class User(HousingUnitsDBBaseModel):
     password = Column(String)
     is_active = Column(Boolean, default=True)
     user_group = Column(Enum(Group, validate_strings=True), nullable=False)
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """
+    The projection of an active User that the users are authenticated as, without their password.
+    """
+    email: str
+    user_group: Group
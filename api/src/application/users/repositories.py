@@ -1,11 +1,11 @@
-from typing import Iterator
+from typing import Iterator, Optional
 
 from sqlalchemy.engine import ChunkedIteratorResult
 from sqlalchemy.future import select
 from sqlalchemy.sql import Select
 
 from application.infrastructure.database.database import DatabaseEngineWrapper
-from application.users.models import User
+from application.users.models import User, UserPrincipal
 
 
 class UserRepository:
@@ -15,11 +15,11 @@ class UserRepository:
 
     async def get_active_users(self) -> Iterator[User]:
         """
-        Async call using the async session for retrieving the active users.
+        Async call using the async read session for retrieving the active users.
 
         :return: The active Users.
         """
-        async with self.db_engine.get_async_session() as session:
+        async with self.db_engine.get_async_read_session() as session:
             query: Select = select(User).where(User.is_active == True)
             results: ChunkedIteratorResult = await session.execute(query)
             users = results.scalars().all()
@@ -27,12 +27,25 @@ class UserRepository:
 
     async def get_by_email(self, email: str) -> User:
         """
-        Async call using the async session for retrieving an active User by email.
+        Async call using the async read session for retrieving an active User by email.
 
         :return: The active User.
         """
-        async with self.db_engine.get_async_session() as session:
+        async with self.db_engine.get_async_read_session() as session:
             query: Select = select(User).where(User.email == email, User.is_active == True)
             results: ChunkedIteratorResult = await session.execute(query)
             user = results.scalars().first()
             return user
+
+    async def get_principal_by_email(self, email: str) -> Optional[UserPrincipal]:
+        """
+        Async call using the async read session for retrieving the principal of an active User by email, selecting only
+        the columns of the principal.
+
+        :return: The principal of the active User, or None when there is no active User with the email.
+        """
+        async with self.db_engine.get_async_read_session() as session:
+            query: Select = select(User.email, User.user_group).where(User.email == email, User.is_active.is_(True))
+            results: ChunkedIteratorResult = await session.execute(query)
+            row = results.first()
+            return UserPrincipal(email=row.email, user_group=row.user_group) if row else None
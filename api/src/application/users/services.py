@@ -1,28 +1,42 @@
-from typing import Iterator
+import hashlib
+import hmac
+from typing import Iterator, Optional, Tuple
 
 from application.authentication.errors import AuthenticationError
 from application.authentication.models import JwtBody
 from application.authentication.services import GetJWTService
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.configurations.models import Configuration
 from application.infrastructure.error.errors import InvalidArgumentError
 from application.rest_api.authentication.schemas import AuthenticateJwtResponse
-from application.users.models import User
+from application.users.caches import USERS_CACHE_INVALIDATIONS
+from application.users.models import User, UserPrincipal
 from application.users.repositories import UserRepository
 
 
 class LoginUserService:
+    # The issued JWTs are returned again to the repeated logins for half of their lifetime, so that the returned JWTs
+    # are always valid for at least half of their lifetime.
+    REUSED_TOKEN_SECONDS: float = GetJWTService.TOKEN_LIFETIME_SECONDS / 2
 
     def __init__(
             self,
             user_repository: UserRepository,
-            get_jwt_service: GetJWTService
+            get_jwt_service: GetJWTService,
+            users_cache: TTLCache,
+            login_tokens_cache: TTLCache,
     ) -> None:
         self._repository: UserRepository = user_repository
         self.get_jwt_service: GetJWTService = get_jwt_service
+        self._users_cache: TTLCache = users_cache
+        self._login_tokens_cache: TTLCache = login_tokens_cache
 
     async def apply(self, email: str = None, password: str = None) -> AuthenticateJwtResponse:
         """
         Authenticates the user and returns the jwt in case of success.
-        The user must exist and be active.
+        The user must exist and be active. The repeated logins with the same credentials are returned the JWT issued
+        to the first one, without reading the User table, and the principals of the active users are cached per
+        email. The caches are used only while the worker is subscribed to the invalidations of the User caches.
 
         :param email: The User email.
         :param password: The User password.
@@ -37,30 +51,73 @@ class LoginUserService:
         if password is None:
             raise InvalidArgumentError("The user password is not provided.")
 
-        user: User = await self._repository.get_by_email(email)
-
-        if user is None:
+        USERS_CACHE_INVALIDATIONS.subscribe(self._users_cache)
+        USERS_CACHE_INVALIDATIONS.subscribe(self._login_tokens_cache)
+        use_cache: bool = USERS_CACHE_INVALIDATIONS.subscribed
+        password_digest: bytes = hashlib.sha256(password.encode()).digest()
+        if use_cache:
+            login_token: Optional[Tuple[bytes, AuthenticateJwtResponse]] = self._login_tokens_cache.get(email)
+            if login_token is not None and hmac.compare_digest(login_token[0], password_digest):
+                return login_token[1]
+
+        invalidations_sequence: int = USERS_CACHE_INVALIDATIONS.sequence
+        user_principal: Optional[UserPrincipal] = self._users_cache.get(email) if use_cache else None
+        if user_principal is None:
+            user_principal = await self._repository.get_principal_by_email(email)
+
+        if user_principal is None:
             raise AuthenticationError("The user does not exist.")
 
-        return AuthenticateJwtResponse(
+        authenticate_jwt_response: AuthenticateJwtResponse = AuthenticateJwtResponse(
             access_token=self.get_jwt_service.apply(
                 jwt_body=JwtBody(
-                    user_id=user.email,
-                    group=user.user_group.value
+                    user_id=user_principal.email,
+                    group=user_principal.user_group.value
                 )
             )
         )
 
+        # The user is not cached when an invalidation is applied while it is read, or within the replica lag before,
+        # as it may have been read before the invalidated write, or from a read replica that has not replayed it.
+        if use_cache and USERS_CACHE_INVALIDATIONS.is_settled(
+                invalidations_sequence, Configuration.get().db_replica_max_lag_seconds
+        ):
+            self._users_cache.set(email, user_principal)
+            self._login_tokens_cache.set(
+                email, (password_digest, authenticate_jwt_response), ttl_seconds=self.REUSED_TOKEN_SECONDS
+            )
+
+        return authenticate_jwt_response
+
 
 class GetActiveUsersService:
+    # The key of the cached active users.
+    ACTIVE_USERS_KEY: str = 'active_users'
 
-    def __init__(self, user_repository: UserRepository) -> None:
+    def __init__(self, user_repository: UserRepository, active_users_cache: TTLCache) -> None:
         self._repository: UserRepository = user_repository
+        self._active_users_cache: TTLCache = active_users_cache
 
     async def apply(self) -> Iterator[User]:
         """
-        Service for returning all the active users.
+        Service for returning all the active users, through the in-memory cache of the worker, which is used only
+        while the worker is subscribed to the invalidations of the User caches.
 
         :return: The active users.
         """
-        return await self._repository.get_active_users()
+        USERS_CACHE_INVALIDATIONS.subscribe(self._active_users_cache)
+        use_cache: bool = USERS_CACHE_INVALIDATIONS.subscribed
+        if use_cache:
+            cached_active_users: Optional[Iterator[User]] = self._active_users_cache.get(self.ACTIVE_USERS_KEY)
+            if cached_active_users is not None:
+                return cached_active_users
+
+        invalidations_sequence: int = USERS_CACHE_INVALIDATIONS.sequence
+        active_users: Iterator[User] = await self._repository.get_active_users()
+
+        if use_cache and USERS_CACHE_INVALIDATIONS.is_settled(
+                invalidations_sequence, Configuration.get().db_replica_max_lag_seconds
+        ):
+            self._active_users_cache.set(self.ACTIVE_USERS_KEY, active_users)
+
+        return active_users
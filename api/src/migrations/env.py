@@ -9,6 +9,7 @@ from alembic import context
 from application.infrastructure.database.models import HousingUnitsDBBaseModel
 from application.users.models import User
 from application.housing_units.models import HousingUnit
+from application.socrata.models import IngestionState
 
 config = context.config
 
@@ -74,8 +75,11 @@ def run_migrations_online():
     with connectable.connect() as connection:
         print("connected")
 
+        # Every migration is committed along with its revision, as the migrations building their indexes
+        # concurrently commit the migration transaction, so that a failed migration doesn't roll back the revisions
+        # of the previous ones.
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, transaction_per_migration=True
         )
 
         with context.begin_transaction():
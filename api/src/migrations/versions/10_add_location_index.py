@@ -0,0 +1,37 @@
+"""empty message
+
+Revision ID: 10_add_location_index
+Revises: 9_add_canonical_values
+Create Date: 2022-01-31 10:22:51.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '10_add_location_index'
+down_revision = '9_add_canonical_values'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The earthdistance extension, which is built on the cube extension, provides the earth points of the locations.
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    # The location index is built concurrently, outside of the migration transaction, so that the HousingUnit table is
+    # not locked against the writes while it is built.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_housingunits_location',
+            'housingunits',
+            [sa.text('ll_to_earth(latitude, longitude)')],
+            unique=False,
+            postgresql_using='gist',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_housingunits_location', table_name='housingunits', postgresql_concurrently=True)
@@ -0,0 +1,63 @@
+"""empty message
+
+Revision ID: 11_make_upsert_key_null_safe
+Revises: 10_add_location_index
+Create Date: 2022-02-02 11:05:37.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '11_make_upsert_key_null_safe'
+down_revision = '10_add_location_index'
+branch_labels = None
+depends_on = None
+
+# The building_id that the HousingUnits without a building_id are keyed on, as the models MISSING_BUILDING_ID.
+MISSING_BUILDING_ID = -1
+# The number of the duplicated project_ids without a building_id listed by the failed migration.
+REPORTED_DUPLICATES = 20
+
+
+def upgrade():
+    # The rows without a building_id duplicating a project_id, which the previous unique index didn't catch, are not
+    # removed by the migration, which fails with a report of them instead, so that they are resolved first.
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT project_id, count(*) AS rows, count(*) OVER () AS project_ids FROM housingunits "
+            "WHERE building_id IS NULL GROUP BY project_id HAVING count(*) > 1 "
+            "ORDER BY count(*) DESC, project_id LIMIT :limit"
+        ),
+        {'limit': REPORTED_DUPLICATES},
+    ).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            "The housingunits table has {0} project_ids duplicated by the rows without a building_id, which have to "
+            "be resolved before making them unique: {1}.".format(
+                duplicates[0].project_ids,
+                ', '.join("{0} ({1} rows)".format(duplicate.project_id, duplicate.rows) for duplicate in duplicates),
+            )
+        )
+
+    # The null-safe index is built concurrently under a temporary name, so that the upserts keep their conflict target
+    # until the previous index is replaced by it.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_housingunits_project_id_building_id_null_safe',
+            'housingunits',
+            ['project_id', sa.text('COALESCE(building_id, {0})'.format(MISSING_BUILDING_ID))],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+    op.drop_index('ix_housingunits_project_id_building_id', table_name='housingunits')
+    op.execute(
+        "ALTER INDEX ix_housingunits_project_id_building_id_null_safe RENAME TO ix_housingunits_project_id_building_id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_housingunits_project_id_building_id', table_name='housingunits')
+    op.create_index(
+        'ix_housingunits_project_id_building_id', 'housingunits', ['project_id', 'building_id'], unique=True
+    )
@@ -0,0 +1,63 @@
+"""empty message
+
+Revision ID: 5_add_ingestion_states_table
+Revises: 4_modify_housing_unit_columns
+Create Date: 2022-01-15 12:41:08.312964
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5_add_ingestion_states_table'
+down_revision = '4_modify_housing_unit_columns'
+branch_labels = None
+depends_on = None
+
+# The number of the duplicated project_id and building_id pairs listed by the failed migration.
+REPORTED_DUPLICATES = 20
+
+
+def upgrade():
+    # The project_id and building_id pairs duplicated by the previous ingestions are not removed by the migration,
+    # which fails with a report of them instead, so that they are resolved before making the pairs unique.
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT project_id, building_id, count(*) AS rows, count(*) OVER () AS pairs FROM housingunits "
+            "WHERE building_id IS NOT NULL GROUP BY project_id, building_id HAVING count(*) > 1 "
+            "ORDER BY count(*) DESC, project_id, building_id LIMIT :limit"
+        ),
+        {'limit': REPORTED_DUPLICATES},
+    ).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            "The housingunits table has {0} duplicated project_id and building_id pairs, which have to be resolved "
+            "before making them unique: {1}.".format(
+                duplicates[0].pairs,
+                ', '.join(
+                    "{0} and {1} ({2} rows)".format(duplicate.project_id, duplicate.building_id, duplicate.rows)
+                    for duplicate in duplicates
+                ),
+            )
+        )
+
+    op.create_table(
+        'ingestionstates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('dataset_id', sa.String(), nullable=False),
+        sa.Column('high_water_mark', sa.String(), nullable=True),
+        sa.Column('last_ingested_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dataset_id'),
+        sa.UniqueConstraint('uuid')
+    )
+    op.create_index(
+        'ix_housingunits_project_id_building_id', 'housingunits', ['project_id', 'building_id'], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_housingunits_project_id_building_id', table_name='housingunits')
+    op.drop_table('ingestionstates')
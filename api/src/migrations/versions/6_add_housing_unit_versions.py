@@ -0,0 +1,31 @@
+"""empty message
+
+Revision ID: 6_add_housing_unit_versions
+Revises: 5_add_ingestion_states_table
+Create Date: 2022-01-22 10:14:37.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6_add_housing_unit_versions'
+down_revision = '5_add_ingestion_states_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The existing rows are set to their first version, updated at the time of the migration.
+    op.add_column(
+        'housingunits', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False)
+    )
+    op.add_column(
+        'housingunits',
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column('housingunits', 'updated_at')
+    op.drop_column('housingunits', 'version')
@@ -0,0 +1,88 @@
+"""empty message
+
+Revision ID: 7_replace_housing_unit_indexes
+Revises: 6_add_housing_unit_versions
+Create Date: 2022-01-24 18:32:05.114520
+
+"""
+from typing import List, Tuple, Dict, Any
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7_replace_housing_unit_indexes'
+down_revision = '6_add_housing_unit_versions'
+branch_labels = None
+depends_on = None
+
+# The composite indexes of the filtering and of the keyset pagination, by name, with their columns and index options.
+COMPOSITE_INDEXES: List[Tuple[str, List[str], Dict[str, Any]]] = [
+    ('ix_housingunits_project_id_id', ['project_id', 'id'], {}),
+    ('ix_housingunits_street_name_id', ['street_name', 'id'], {}),
+    ('ix_housingunits_borough_id', ['borough', 'id'], {}),
+    (
+        'ix_housingunits_borough_total_units',
+        ['borough', 'total_units', 'id'],
+        {'postgresql_include': ['postcode', 'reporting_construction_type']},
+    ),
+    ('ix_housingunits_postcode_total_units', ['postcode', 'total_units'], {}),
+    ('ix_housingunits_construction_type_total_units', ['reporting_construction_type', 'total_units'], {}),
+    ('ix_housingunits_total_units_id', ['total_units', 'id'], {}),
+]
+
+# The single column indexes created by the 3_add_housing_units_table, which are replaced by the composite indexes,
+# or are not used by any query.
+SINGLE_COLUMN_INDEXES: List[str] = [
+    '_1_br_units',
+    '_2_br_units',
+    '_3_br_units',
+    '_4_br_units',
+    '_5_br_units',
+    '_6_br_units',
+    'all_counted_units',
+    'borough',
+    'extremely_low_income_units',
+    'low_income_units',
+    'middle_income_units',
+    'moderate_income_units',
+    'other_income_units',
+    'postcode',
+    'project_id',
+    'reporting_construction_type',
+    'street_name',
+    'studio_units',
+    'total_units',
+    'unknown_br_units',
+    'very_low_income_units',
+]
+
+
+def upgrade():
+    # The indexes are built and dropped concurrently, outside of the migration transaction, so that the HousingUnit
+    # table is not locked against the writes while they are built. The composite indexes are built first, so that the
+    # filtering is never left without an index.
+    with op.get_context().autocommit_block():
+        for index_name, columns, options in COMPOSITE_INDEXES:
+            op.create_index(
+                index_name, 'housingunits', columns, unique=False, postgresql_concurrently=True, **options
+            )
+        for column in SINGLE_COLUMN_INDEXES:
+            op.drop_index(
+                'ix_housingunits_{0}'.format(column),
+                table_name='housingunits',
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for column in SINGLE_COLUMN_INDEXES:
+            op.create_index(
+                'ix_housingunits_{0}'.format(column),
+                'housingunits',
+                [column],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+        for index_name, _, _ in COMPOSITE_INDEXES:
+            op.drop_index(index_name, table_name='housingunits', postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""empty message
+
+Revision ID: 8_add_street_name_search
+Revises: 7_replace_housing_unit_indexes
+Create Date: 2022-01-26 11:04:37.482916
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8_add_street_name_search'
+down_revision = '7_replace_housing_unit_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # The trigram index is built concurrently, outside of the migration transaction, so that the HousingUnit table is
+    # not locked against the writes while it is built.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_housingunits_street_name_trgm',
+            'housingunits',
+            ['street_name'],
+            unique=False,
+            postgresql_using='gist',
+            postgresql_ops={'street_name': 'gist_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_housingunits_street_name_trgm', table_name='housingunits', postgresql_concurrently=True)
@@ -0,0 +1,51 @@
+"""empty message
+
+Revision ID: 9_add_canonical_values
+Revises: 8_add_street_name_search
+Create Date: 2022-01-28 09:47:12.306581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '9_add_canonical_values'
+down_revision = '8_add_street_name_search'
+branch_labels = None
+depends_on = None
+
+# The categorical HousingUnit columns, whose distinct values are collected.
+CANONICAL_VALUE_COLUMNS = ['borough', 'community_board', 'postcode', 'reporting_construction_type', 'street_name']
+
+
+def upgrade():
+    op.create_table(
+        'housingunitcanonicalvalues',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('uuid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('column_name', sa.String(), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('housing_units', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('uuid')
+    )
+    op.create_index(
+        'ix_housingunitcanonicalvalues_column_name_value',
+        'housingunitcanonicalvalues',
+        ['column_name', 'value'],
+        unique=True,
+    )
+    # The values of the existing HousingUnits are collected, with their uuids generated from random md5 hashes, as the
+    # gen_random_uuid function is not available before PostgreSQL 13 without the pgcrypto extension.
+    for column_name in CANONICAL_VALUE_COLUMNS:
+        op.execute(
+            "INSERT INTO housingunitcanonicalvalues (uuid, column_name, value, housing_units) "
+            "SELECT CAST(md5(random()::text || clock_timestamp()::text) AS uuid), '{0}', CAST({0} AS varchar), "
+            "count(*) FROM housingunits WHERE {0} IS NOT NULL GROUP BY {0}".format(column_name)
+        )
+
+
+def downgrade():
+    op.drop_index('ix_housingunitcanonicalvalues_column_name_value', table_name='housingunitcanonicalvalues')
+    op.drop_table('housingunitcanonicalvalues')
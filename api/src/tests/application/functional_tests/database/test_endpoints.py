@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from application.main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.asyncio
+async def test_database_pool_stats_get_request_called_by_admin(
+        populate_users, populate_housing_units, admin_jwt_token
+):
+    headers = {"Authorization": "Bearer {}".format(admin_jwt_token)}
+    assert client.get("/housing-units", headers=headers).status_code == 200
+
+    response = client.get("/database/pool-stats", headers=headers)
+
+    assert response.status_code == 200
+    assert set(response.json()) == {'async_engine', 'engine', 'replicas'}
+    assert response.json()['async_engine']['checkouts'] >= 1
+    assert response.json()['async_engine']['capacity'] == 12
+
+
+@pytest.mark.asyncio
+async def test_database_pool_stats_get_request_raise_authorization_error_when_jwt_not_provided():
+    response = client.get("/database/pool-stats")
+
+    assert response.status_code == 403
+    assert response.json() == {'detail': 'Not authenticated'}
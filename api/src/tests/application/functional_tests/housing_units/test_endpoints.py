@@ -1,12 +1,28 @@
+import json
+from typing import List, Optional, Dict, Any, Iterator
+from unittest import mock
+
 import pytest
 from fastapi.testclient import TestClient
 from tests.application.functional_tests.housing_units.utils import get_cleaned_housing_units_response
 
+from application.authentication.models import JwtBody
+from application.authentication.services import GetJWTService
+from application.authentication.validators import JwtValidator
+from application.infrastructure.configurations.models import Configuration
 from application.main import app
+from application.users.enums import Group
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def client_event_loop() -> Iterator[None]:
+    # The requests of a test run on the same event loop, which the pooled async connections are bound to.
+    with client:
+        yield
+
+
 @pytest.mark.asyncio
 async def test_filter_housing_units_get_request(
         populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
@@ -46,10 +62,6 @@ async def test_filter_housing_units_get_request(
             'project_id': 'project id 7', 'street_name': 'street name test 2', 'borough': 'Brooklyn', 'postcode': 2,
             'reporting_construction_type': 'construction type test 2', 'total_units': 14
         },
-        {
-            'project_id': 'project id 11', 'street_name': 'street name test 1', 'borough': 'Queens', 'postcode': 1,
-            'reporting_construction_type': 'construction type test 1', 'total_units': 16
-        },
         {
             'project_id': 'project id 8', 'street_name': 'street name test 3', 'borough': 'Staten Island',
             'postcode': 3, 'reporting_construction_type': 'construction type test 3', 'total_units': 16
@@ -62,17 +74,253 @@ async def test_filter_housing_units_get_request(
             'project_id': 'project id 10', 'street_name': 'street name test 5', 'borough': 'Bronx', 'postcode': 5,
             'reporting_construction_type': 'construction type test 5', 'total_units': 20
         },
+        {
+            'project_id': 'project id 11', 'street_name': 'street name test 1', 'borough': 'Queens', 'postcode': 1,
+            'reporting_construction_type': 'construction type test 1', 'total_units': 16
+        },
         {
             'project_id': 'project id 12', 'street_name': 'street name test 1', 'borough': 'Queens', 'postcode': 1,
             'reporting_construction_type': 'construction type test 1', 'total_units': 25
         },
         {
-            'project_id': 'project id 12', 'street_name': 'street name test 1', 'borough': 'Queens', 'postcode': 1,
+            'project_id': 'project id 13', 'street_name': 'street name test 1', 'borough': 'Queens', 'postcode': 1,
             'reporting_construction_type': 'construction type test 1', 'total_units': 25
         }
     ]
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('fast_json_responses', [False, True])
+async def test_filter_housing_units_get_request_returns_the_uuids(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token, fast_json_responses
+):
+    with mock.patch.object(Configuration.get(), 'fast_json_responses', fast_json_responses):
+        response = client.get(
+            "/housing-units?fields=uuid,project_id&limit=100",
+            headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+        )
+    assert response.status_code == 200
+    assert sorted(housing_unit['uuid'] for housing_unit in response.json().get('housing_units')) == sorted(
+        str(housing_unit.uuid) for housing_unit in stub_housing_units
+    )
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_paginates_with_cursor(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    project_ids: List[str] = []
+    next_cursor: Optional[str] = None
+    while True:
+        response = client.get(
+            "/housing-units",
+            params={'sort_by': 'total_units', 'limit': 5, **({'cursor': next_cursor} if next_cursor else {})},
+            headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+        )
+        assert response.status_code == 200
+        response_json = response.json()
+        assert response_json.get('total') == len(stub_housing_units)
+        assert len(response_json.get('housing_units')) <= 5
+        project_ids.extend(housing_unit['project_id'] for housing_unit in response_json.get('housing_units'))
+
+        next_cursor = response_json.get('next_cursor')
+        if next_cursor is None:
+            break
+
+    assert len(project_ids) == len(stub_housing_units)
+    assert sorted(project_ids) == sorted(housing_unit.project_id for housing_unit in stub_housing_units)
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_raise_error_when_cursor_is_not_valid(
+        populate_users, populate_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?cursor=not-a-cursor",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 400
+    assert response.json() == {'Detail': 'The provided cursor is not valid.', 'Type': 'ValidationError'}
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_returns_the_provided_fields(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?street_name=street name test 5&num_units_min=15&fields=project_id,total_units",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'housing_units': [{'project_id': 'project id 10', 'total_units': 20}],
+        'total': 1,
+        'next_cursor': None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_normalises_the_values_to_their_canonical_values(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?street_name=Street  Name TEST 5&borough=BRONX&num_units_min=15&fields=project_id",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 200
+    assert response.json() == {'housing_units': [{'project_id': 'project id 10'}], 'total': 1, 'next_cursor': None}
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_with_a_value_of_no_housing_unit(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?borough=Atlantis", headers={"Authorization": "Bearer {}".format(admin_jwt_token)}
+    )
+    assert response.status_code == 200
+    assert response.json() == {'housing_units': [], 'total': 0, 'next_cursor': None}
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_does_not_return_the_cached_page_after_a_write(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    headers: Dict[str, str] = {"Authorization": "Bearer {}".format(admin_jwt_token)}
+    first_response = client.get("/housing-units?street_name=street name test 5", headers=headers)
+    assert first_response.status_code == 200
+    assert first_response.headers['content-type'] == 'application/json'
+
+    # The repeated filtering returns the same page, either cached or filtered again.
+    assert client.get("/housing-units?street_name=street name test 5", headers=headers).content == (
+        first_response.content
+    )
+
+    deleted_uuid: str = first_response.json()['housing_units'][0]['uuid']
+    assert client.delete("/housing-units/{}".format(deleted_uuid), headers=headers).status_code == 200
+
+    response = client.get("/housing-units?street_name=street name test 5", headers=headers)
+    assert response.status_code == 200
+    assert response.json()['total'] == first_response.json()['total'] - 1
+    assert deleted_uuid not in [housing_unit['uuid'] for housing_unit in response.json()['housing_units']]
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_returns_not_modified_until_a_write(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    headers: Dict[str, str] = {"Authorization": "Bearer {}".format(admin_jwt_token)}
+    first_response = client.get("/housing-units?street_name=street name test 5", headers=headers)
+    etag: str = first_response.headers['etag']
+
+    response = client.get("/housing-units?street_name=street name test 5", headers=dict(headers, **{
+        "If-None-Match": etag
+    }))
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+    deleted_uuid: str = first_response.json()['housing_units'][0]['uuid']
+    assert client.delete("/housing-units/{}".format(deleted_uuid), headers=headers).status_code == 200
+
+    response = client.get("/housing-units?street_name=street name test 5", headers=dict(headers, **{
+        "If-None-Match": etag
+    }))
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert response.json()['total'] == first_response.json()['total'] - 1
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_streams_ndjson(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?sort_by=total_units&limit=1&fields=project_id,total_units",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token), "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    housing_units: List[Dict[str, Any]] = [json.loads(line) for line in response.text.splitlines()]
+
+    # All the filtered housing units are streamed, regardless of the limit.
+    assert len(housing_units) == len(stub_housing_units)
+    assert all(list(housing_unit) == ['project_id', 'total_units'] for housing_unit in housing_units)
+    assert [housing_unit['total_units'] for housing_unit in housing_units] == sorted(
+        housing_unit.total_units for housing_unit in stub_housing_units
+    )
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_raise_error_before_streaming_ndjson(
+        populate_users, populate_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?num_units_min=15&num_units_max=10",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token), "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "Detail": "The provided number of maximum units can't be smaller than the number of minimum units",
+        "Type": "ValidationError"
+    }
+
+
+@pytest.mark.asyncio
+async def test_filter_housing_units_get_request_raise_error_when_fields_are_not_valid(
+        populate_users, populate_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units?fields=project_id,bbl",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        'Detail': 'The provided fields bbl are not valid, the available fields are: uuid, project_id, street_name, '
+                  'borough, postcode, reporting_construction_type, total_units.',
+        'Type': 'ValidationError'
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_housing_units_get_request_streams_csv(
+        populate_users, populate_housing_units, stub_housing_units, customer_jwt_token
+):
+    response = client.get(
+        "/housing-units/export?format=csv&street_name=street name test 5&num_units_min=15",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)},
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'attachment; filename="housing_units.csv"'
+    lines: List[str] = response.text.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split(',')[1] == 'project id 10'
+
+
+@pytest.mark.asyncio
+async def test_export_housing_units_get_request_raise_error_when_format_is_not_valid(
+        populate_users, populate_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units/export?format=xlsx",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_retrieve_housing_units_export_get_request_raise_not_found_error(
+        populate_users, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units/exports/3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3.csv",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+    )
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Housing Units export not found.'}
+
+
 @pytest.mark.asyncio
 async def test_filter_housing_units_get_request_called_by_customer(
         populate_users, populate_housing_units, stub_housing_units, customer_jwt_token
@@ -195,6 +443,224 @@ async def test_retrieve_housing_unit_get_request_called_by_admin(
     }
 
 
+@pytest.mark.asyncio
+async def test_retrieve_housing_unit_get_request_does_not_return_the_cached_housing_unit_after_a_write(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    headers: Dict[str, str] = {"Authorization": "Bearer {}".format(admin_jwt_token)}
+    housing_unit_url: str = "/housing-units/{}".format(stub_housing_units[0].uuid)
+    housing_unit: Dict[str, Any] = client.get(housing_unit_url, headers=headers).json()
+    assert client.get(housing_unit_url, headers=headers).json() == housing_unit
+
+    housing_unit.pop('uuid')
+    response = client.put(housing_unit_url, headers=headers, json=dict(housing_unit, street_name='RALPH AVENUE'))
+    assert response.status_code == 200
+    assert client.get(housing_unit_url, headers=headers).json()['street_name'] == 'RALPH AVENUE'
+
+    assert client.delete(housing_unit_url, headers=headers).status_code == 200
+    assert client.get(housing_unit_url, headers=headers).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_retrieve_housing_unit_get_request_returns_not_modified_until_a_write(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    headers: Dict[str, str] = {"Authorization": "Bearer {}".format(admin_jwt_token)}
+    housing_unit_url: str = "/housing-units/{}".format(stub_housing_units[0].uuid)
+    first_response = client.get(housing_unit_url, headers=headers)
+    etag: str = first_response.headers['etag']
+    last_modified: str = first_response.headers['last-modified']
+
+    for conditional_headers in ({"If-None-Match": etag}, {"If-Modified-Since": last_modified}):
+        response = client.get(housing_unit_url, headers=dict(headers, **conditional_headers))
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['etag'] == etag
+        assert response.headers['last-modified'] == last_modified
+
+    housing_unit: Dict[str, Any] = first_response.json()
+    housing_unit.pop('uuid')
+    response = client.put(housing_unit_url, headers=headers, json=dict(housing_unit, street_name='RALPH AVENUE'))
+    assert response.status_code == 200
+
+    response = client.get(housing_unit_url, headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert response.json()['street_name'] == 'RALPH AVENUE'
+
+
+@pytest.mark.asyncio
+async def test_housing_units_cache_stats_get_request_called_by_admin(
+        populate_users, populate_housing_units, stub_housing_units, admin_jwt_token
+):
+    response = client.get(
+        "/housing-units/cache-stats",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)}
+    )
+    assert response.status_code == 200
+    assert list(response.json()) == ['hits', 'misses', 'evictions', 'expirations', 'size']
+
+
+@pytest.mark.asyncio
+async def test_housing_units_cache_stats_get_request_raise_authorization_error_when_called_by_customer(
+        populate_users
+):
+    # The customer_jwt_token fixture holds the admin group, so the token of the customer group is encoded here.
+    customer_group_jwt_token: str = GetJWTService(jwt_validator=JwtValidator(), config=Configuration.get()).apply(
+        jwt_body=JwtBody(user_id='customer_user@customer.com', group=Group.customer.value)
+    )
+    response = client.get(
+        "/housing-units/cache-stats",
+        headers={"Authorization": "Bearer {}".format(customer_group_jwt_token)}
+    )
+    assert response.status_code == 403
+    assert response.json() == {'detail': "You can't access this resource."}
+
+
+@pytest.mark.asyncio
+async def test_search_housing_units_get_request(
+        populate_users, populate_housing_units, stub_housing_units, customer_jwt_token
+):
+    response = client.get(
+        "/housing-units/search?q=STREET%20NAME%20TEST%203&limit=2",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert response.status_code == 200
+    housing_units = response.json()['housing_units']
+    assert [housing_unit['street_name'] for housing_unit in housing_units] == ['street name test 3'] * 2
+    assert [housing_unit['rank'] for housing_unit in housing_units] == [1.0, 1.0]
+    assert sorted(housing_unit['uuid'] for housing_unit in housing_units) == sorted(
+        str(housing_unit.uuid)
+        for housing_unit in stub_housing_units if housing_unit.street_name == 'street name test 3'
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_housing_units_get_request_raise_error_when_query_is_too_short(
+        populate_users, customer_jwt_token
+):
+    response = client.get(
+        "/housing-units/search?q=st",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        'Detail': 'The search query must have at least 3 characters.', 'Type': 'ValidationError'
+    }
+
+
+@pytest.mark.asyncio
+async def test_near_housing_units_get_request(
+        populate_users, populate_housing_units, admin_jwt_token, customer_jwt_token, full_housing_unit_request_body
+):
+    response = client.post(
+        "/housing-units/",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+        json=dict(full_housing_unit_request_body, latitude=40.6801, longitude=-73.91)
+    )
+    assert response.status_code == 200
+
+    near_response = client.get(
+        "/housing-units/near?lat=40.68&lon=-73.91&radius_m=50",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    bbox_response = client.get(
+        "/housing-units/near?bbox=-73.92,40.67,-73.90,40.69",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    outside_response = client.get(
+        "/housing-units/near?lat=40.68&lon=-73.91&radius_m=5",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+
+    assert near_response.status_code == 200
+    housing_units = near_response.json()['housing_units']
+    assert [housing_unit['uuid'] for housing_unit in housing_units] == [response.json()['uuid']]
+    assert housing_units[0]['latitude'] == 40.6801
+    assert housing_units[0]['distance_m'] == pytest.approx(11.1, abs=0.1)
+    assert [housing_unit['uuid'] for housing_unit in bbox_response.json()['housing_units']] == [
+        response.json()['uuid']
+    ]
+    assert outside_response.json() == {'housing_units': []}
+
+
+@pytest.mark.asyncio
+async def test_near_housing_units_get_request_raise_error_when_location_is_incomplete(
+        populate_users, customer_jwt_token
+):
+    response = client.get(
+        "/housing-units/near?lat=40.68&lon=-73.91",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        'Detail': 'Either the lat, lon and radius_m or the bbox must be provided.', 'Type': 'ValidationError'
+    }
+
+
+@pytest.mark.asyncio
+async def test_tile_housing_units_get_request(
+        populate_users, populate_housing_units, admin_jwt_token, customer_jwt_token, full_housing_unit_request_body
+):
+    response = client.post(
+        "/housing-units/",
+        headers={"Authorization": "Bearer {}".format(admin_jwt_token)},
+        json=dict(full_housing_unit_request_body, latitude=40.68, longitude=-73.91, total_units=12)
+    )
+    assert response.status_code == 200
+
+    tile_response = client.get(
+        "/housing-units/tiles/12/1207/1540",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert tile_response.status_code == 200
+    assert tile_response.json() == {
+        'z': 12,
+        'x': 1207,
+        'y': 1540,
+        'cells': [{'x': 0, 'y': 4, 'count': 1, 'total_units': 12, 'latitude': 40.68, 'longitude': -73.91}],
+    }
+
+    not_modified_response = client.get(
+        "/housing-units/tiles/12/1207/1540",
+        headers={
+            "Authorization": "Bearer {}".format(customer_jwt_token),
+            "If-None-Match": tile_response.headers['ETag'],
+        }
+    )
+    assert not_modified_response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_tile_housing_units_get_request_raise_error_when_tile_is_not_valid(
+        populate_users, customer_jwt_token
+):
+    response = client.get(
+        "/housing-units/tiles/2/4/0",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        'Detail': 'The tile x and y must be from 0 to 3 at zoom 2.', 'Type': 'ValidationError'
+    }
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_street_names_get_request(populate_users, populate_housing_units, customer_jwt_token):
+    response = client.get(
+        "/housing-units/autocomplete/street-names?prefix=Street%20Name&limit=3",
+        headers={"Authorization": "Bearer {}".format(customer_jwt_token)}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'street_names': [
+            {'street_name': 'street name test 1', 'housing_units': 5},
+            {'street_name': 'street name test 2', 'housing_units': 2},
+            {'street_name': 'street name test 3', 'housing_units': 2},
+        ]
+    }
+
+
 @pytest.mark.asyncio
 async def test_retrieve_housing_unit_get_request_raise_authorization_error_when_jwt_not_provided(
         populate_users, populate_housing_units, stub_housing_units
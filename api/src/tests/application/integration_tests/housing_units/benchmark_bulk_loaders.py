@@ -0,0 +1,63 @@
+"""
+Benchmark of the rows per second loaded into the HousingUnit table, by each one of the data ingestion load strategies.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from typing import List, Dict, Any
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.enums import LoadStrategy
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 50000
+
+
+class TestBulkLoadersBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique.
+        records: List[Dict[str, str]] = [
+            dict(record, project_id=str(100000 + index))
+            for index, record in enumerate(
+                (stub_socrata_records * (BENCHMARK_ROWS // len(stub_socrata_records) + 1))[:BENCHMARK_ROWS]
+            )
+        ]
+        self.housing_unit_mappings: List[Dict[str, Any]] = housing_unit_mappings_from_dataframe(
+            SocrataClient.records_to_dataframe(records)
+        )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.parametrize('load_strategy', LoadStrategy.values())
+    def test_rows_per_second(self, load_strategy: str) -> None:
+        started_at: float = time.perf_counter()
+        for pos in range(0, len(self.housing_unit_mappings), SocrataClient.CHUNK_SIZE):
+            chunk: List[Dict[str, Any]] = self.housing_unit_mappings[pos:pos + SocrataClient.CHUNK_SIZE]
+
+            if load_strategy == LoadStrategy.core.value:
+                self.housing_units_bulk_loader.bulk_insert(chunk)
+            else:
+                self.housing_units_bulk_loader.bulk_copy(chunk)
+        elapsed: float = time.perf_counter() - started_at
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            total_rows: int = session.execute(select(func.count(HousingUnit.id))).scalar()
+
+        print(
+            '\n{0:>5} load strategy: {1} rows in {2:.2f}s, {3:.0f} rows/sec'.format(
+                load_strategy, total_rows, elapsed, total_rows / elapsed
+            )
+        )
+        assert total_rows == BENCHMARK_ROWS
@@ -0,0 +1,105 @@
+"""
+Load test of the requests per second served by an API worker, when its async engine echoes every statement with the
+default pool sizes, compared to the engine that logs no statements with the pools tuned by the Configuration. Every
+request filters a page of the HousingUnits and retrieves one of them, with as many requests in flight as the threads
+of the gunicorn API workers. The benchmarks are not collected with the rest of the tests, and run with the Makefile
+command make run-benchmarks.
+"""
+import asyncio
+import time
+from asyncio import current_task
+from typing import List, Dict, Any
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_scoped_session
+from sqlalchemy.orm import sessionmaker
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.configurations.models import Configuration
+from application.infrastructure.database.database import DatabaseEngineWrapper, AsyncDBEngine
+from application.infrastructure.database.metrics import MeasuredAsyncAdaptedQueuePool, PoolStats
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 10000
+CONCURRENT_REQUESTS = 8
+REQUESTS = 2000
+
+
+class TestConnectionPoolsBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique.
+        records: List[Dict[str, str]] = [
+            dict(record, project_id=str(100000 + index))
+            for index, record in enumerate(
+                (stub_socrata_records * (BENCHMARK_ROWS // len(stub_socrata_records) + 1))[:BENCHMARK_ROWS]
+            )
+        ]
+        self.housing_units_bulk_loader.bulk_copy(
+            housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+        )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.parametrize('tuned', [False, True])
+    @pytest.mark.asyncio
+    async def test_requests_per_second(self, tuned: bool) -> None:
+        config: Configuration = Configuration.get()
+        if tuned:
+            async_engine: AsyncEngine = create_async_engine(
+                url=config.async_postgresql_connection_uri,
+                poolclass=MeasuredAsyncAdaptedQueuePool,
+                connect_args={'statement_cache_size': config.asyncpg_statement_cache_size},
+                pool_size=config.db_pool_size,
+                max_overflow=config.db_max_overflow,
+                pool_timeout=config.db_pool_timeout,
+                pool_recycle=config.db_pool_recycle,
+                pool_pre_ping=config.db_pool_pre_ping,
+            )
+        else:
+            async_engine = create_async_engine(url=config.async_postgresql_connection_uri, echo=True)
+        async_session: sessionmaker = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+        DatabaseEngineWrapper.ASYNC_DB_ENGINE = AsyncDBEngine(
+            async_engine=async_engine,
+            async_session=async_session,
+            async_scoped_session_factory=async_scoped_session(session_factory=async_session, scopefunc=current_task),
+        )
+        uuids: List[Any] = [
+            row.uuid for row in await self.housing_units_repository.filter_rows(limit=CONCURRENT_REQUESTS)
+        ]
+
+        async def serve_requests(worker: int) -> None:
+            for request in range(worker, REQUESTS, CONCURRENT_REQUESTS):
+                await self.housing_units_repository.filter_rows(borough='Brooklyn', limit=100)
+                await self.housing_units_repository.get_by_uuid(uuid=str(uuids[request % len(uuids)]))
+
+        started_at: float = time.perf_counter()
+        await asyncio.gather(*[serve_requests(worker) for worker in range(CONCURRENT_REQUESTS)])
+        elapsed: float = time.perf_counter() - started_at
+
+        print(
+            '\n{0:>20}: {1:.0f} requests per second'.format(
+                'tuned pools' if tuned else 'echo, default pools', REQUESTS / elapsed
+            )
+        )
+        if tuned:
+            pool_stats: PoolStats = async_engine.sync_engine.pool.stats
+            print(
+                '{0:>20}: {1:.3f}ms checkout wait per checkout, {2:.3f}ms max, {3} timeouts'.format(
+                    'tuned pools',
+                    pool_stats.checkout_wait_seconds / pool_stats.checkouts * 1000,
+                    pool_stats.max_checkout_wait_seconds * 1000,
+                    pool_stats.checkout_timeouts,
+                )
+            )
+            assert pool_stats.checkout_timeouts == 0
+
+        await async_engine.dispose()
@@ -0,0 +1,137 @@
+"""
+Benchmark of the HousingUnits filtering queries on a synthetic table of 1M rows, when the table has the single column
+indexes created by the 3_add_housing_units_table migration, compared to the composite indexes that replaced them, and
+of the rows per second of the bulk upserts on each set of indexes. The filtering queries are replayed through the index
+advisor, which reports its own recommendations for the single column indexes as well.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from typing import List, Dict, Any
+
+import pytest
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.infrastructure.database.index_advisor import IndexAdvisor, IndexAdvice, format_advice
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 1000000
+LOAD_BATCH_ROWS = 100000
+UPSERT_ROWS = 20000
+# The filters of the replayed requests, with the sort keys and the limits of the HousingUnits list endpoint.
+REQUEST_FILTERS: List[Dict[str, Any]] = [
+    dict(borough='Brooklyn'),
+    dict(borough='Bronx', num_units_min=100, num_units_max=120),
+    dict(postcode=10042, num_units_min=10),
+    dict(construction_type='Preservation', num_units_max=5),
+    dict(borough='Queens', postcode=10101, construction_type='New Construction', num_units_min=50),
+    dict(num_units_min=400, num_units_max=410),
+]
+# The single column indexes of the 3_add_housing_units_table migration, on the filtered and sorted columns, and on
+# the unit count columns.
+SINGLE_COLUMN_INDEXES: List[str] = [
+    'project_id', 'street_name', 'borough', 'postcode', 'reporting_construction_type', 'total_units',
+    'all_counted_units', 'studio_units', '_1_br_units', '_2_br_units', 'low_income_units', 'very_low_income_units',
+]
+
+
+class TestIndexesBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique, and the postcodes
+        # and total units are spread, for the selectivities of a table of that size.
+        for batch_start in range(0, BENCHMARK_ROWS, LOAD_BATCH_ROWS):
+            records: List[Dict[str, str]] = [
+                dict(
+                    stub_socrata_records[index % len(stub_socrata_records)],
+                    project_id=str(100000 + index),
+                    postcode=str(10000 + index % 400),
+                    total_units=str(index % 500),
+                )
+                for index in range(batch_start, min(batch_start + LOAD_BATCH_ROWS, BENCHMARK_ROWS))
+            ]
+            self.housing_units_bulk_loader.bulk_copy(
+                housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+            )
+        self._execute('VACUUM ANALYZE {0}'.format(HousingUnit.__tablename__))
+        self.upsert_records: List[Dict[str, str]] = records[:UPSERT_ROWS]
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    def test_filter_queries_and_upserts(self) -> None:
+        statements: List[str] = []
+        for filters in REQUEST_FILTERS:
+            filter_key: Any = HousingUnitsRepository.filter_key(
+                **filters, dictionaries=self.housing_units_repository.sync_dictionaries()
+            )
+            statement, parameters = HousingUnitsRepository.prepared_page_statement(filter_key, limit=20)
+            statements.append(HousingUnitsRepository.literal_sql(statement.params(parameters)))
+            statement, parameters = HousingUnitsRepository.prepared_count_statement(filter_key)
+            statements.append(HousingUnitsRepository.literal_sql(statement.params(parameters)))
+
+        index_advisor: IndexAdvisor = IndexAdvisor(db_engine=self.housing_units_repository.db_engine)
+        composite_advice: IndexAdvice = index_advisor.advise(statements)
+        composite_upsert_rate: float = self._upsert_rows_per_second(total_units=1)
+
+        # The composite indexes are replaced by the single column ones.
+        with self.housing_units_repository.db_engine.get_session() as session:
+            composite_index_names: List[str] = session.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = :table_name AND indexname LIKE 'ix_%'",
+                {'table_name': HousingUnit.__tablename__}
+            ).scalars().all()
+        for index_name in composite_index_names:
+            if index_name != 'ix_housingunits_project_id_building_id':
+                self._execute('DROP INDEX {0}'.format(index_name))
+        for column in SINGLE_COLUMN_INDEXES:
+            self._execute('CREATE INDEX ix_housingunits_{0} ON {1} ({0})'.format(column, HousingUnit.__tablename__))
+        self._execute('ANALYZE {0}'.format(HousingUnit.__tablename__))
+
+        single_column_advice: IndexAdvice = index_advisor.evaluate(index_advisor.advise(statements))
+        single_column_upsert_rate: float = self._upsert_rows_per_second(total_units=2)
+
+        print('\n{0:>12} {1:>20} {2:>20}  query'.format('', 'single column', 'composite'))
+        for single_column_query, composite_query in zip(
+                single_column_advice.replayed_queries, composite_advice.replayed_queries
+        ):
+            print('{0:>12} {1:>20} {2:>20}  {3}'.format(
+                '',
+                '{0:.2f}ms/{1}buf'.format(single_column_query.plan.execution_ms, single_column_query.plan.buffers),
+                '{0:.2f}ms/{1}buf'.format(composite_query.plan.execution_ms, composite_query.plan.buffers),
+                composite_query.shape.sql[:120],
+            ))
+        print('{0:>12} {1:>20.0f} {2:>20.0f}'.format('upserts/sec', single_column_upsert_rate, composite_upsert_rate))
+        print('\nThe index advisor on the single column indexes:\n')
+        print(format_advice(single_column_advice))
+
+        assert sum(query.plan.execution_ms for query in composite_advice.replayed_queries) < sum(
+            query.plan.execution_ms for query in single_column_advice.replayed_queries
+        )
+
+    def _upsert_rows_per_second(self, total_units: int) -> float:
+        """
+        :param total_units: The total units that the upserted rows are changed to, so that every row is updated.
+
+        :return: The rows per second of the bulk upsert.
+        """
+        housing_unit_mappings: List[Dict[str, Any]] = housing_unit_mappings_from_dataframe(
+            SocrataClient.records_to_dataframe(
+                [dict(record, total_units=str(total_units)) for record in self.upsert_records]
+            )
+        )
+        started_at: float = time.perf_counter()
+        self.housing_units_bulk_loader.bulk_upsert(housing_unit_mappings)
+        return len(housing_unit_mappings) / (time.perf_counter() - started_at)
+
+    def _execute(self, statement: str) -> None:
+        # The VACUUM can't run inside a transaction block.
+        with self.housing_units_repository.db_engine.get_engine().engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(statement)
@@ -0,0 +1,101 @@
+"""
+Benchmark of the bytes read from PostgreSQL and the CPU time per request of the HousingUnits list path, when selecting
+the whole HousingUnit rows into HousingUnit instances, compared to selecting only the returned fields into rows.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from typing import List, Dict, Any, Optional
+
+import pytest
+from sqlalchemy import func, literal_column
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.enums import HousingUnitField
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.rest_api.housing_units.schemas import FilterHousingUnits
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 50000
+PAGE_SIZE = 1000
+REQUESTS = 20
+
+
+class TestListProjectionBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique.
+        records: List[Dict[str, str]] = [
+            dict(record, project_id=str(100000 + index))
+            for index, record in enumerate(
+                (stub_socrata_records * (BENCHMARK_ROWS // len(stub_socrata_records) + 1))[:BENCHMARK_ROWS]
+            )
+        ]
+        self.housing_units_bulk_loader.bulk_copy(
+            housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+        )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.parametrize(
+        'fields',
+        [
+            # The whole HousingUnit rows, loaded into HousingUnit instances.
+            None,
+            # All the returned fields.
+            HousingUnitField.values(),
+            # A sparse fieldset.
+            [HousingUnitField.project_id.value, HousingUnitField.total_units.value],
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_bytes_and_cpu_per_request(self, fields: Optional[List[str]]) -> None:
+        housing_unit_fields: Optional[List[HousingUnitField]] = [
+            HousingUnitField(field) for field in fields
+        ] if fields is not None else None
+        statement: Select = HousingUnitsRepository.page_statement(
+            select(HousingUnit) if fields is None else select(
+                *HousingUnitsRepository.row_columns(fields=housing_unit_fields)
+            ),
+            filters=[],
+            limit=PAGE_SIZE,
+        )
+
+        # The size of the selected rows, as stored by PostgreSQL, is used as the bytes read per request.
+        with self.housing_units_repository.db_engine.get_session() as session:
+            page_bytes: int = session.execute(
+                select(func.sum(func.pg_column_size(literal_column('page.*')))).select_from(statement.subquery('page'))
+            ).scalar()
+
+        started_at: float = time.process_time()
+        for _ in range(REQUESTS):
+            if fields is None:
+                housing_units: List[Any] = await self.housing_units_repository.filter(limit=PAGE_SIZE)
+            else:
+                housing_units = await self.housing_units_repository.filter_rows(
+                    fields=housing_unit_fields, limit=PAGE_SIZE
+                )
+            FilterHousingUnits(housing_units=housing_units, total=BENCHMARK_ROWS).json(
+                by_alias=True, exclude_unset=True
+            )
+        cpu_per_request: float = (time.process_time() - started_at) / REQUESTS
+
+        print(
+            '\n{0:>24}: {1} bytes per page of {2} rows, {3:.2f}ms CPU per request'.format(
+                'entities' if fields is None else '{0} fields'.format(len(fields)),
+                page_bytes,
+                PAGE_SIZE,
+                cpu_per_request * 1000,
+            )
+        )
+        assert len(housing_units) == PAGE_SIZE
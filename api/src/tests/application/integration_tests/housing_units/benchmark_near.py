@@ -0,0 +1,134 @@
+"""
+Benchmark of the latencies of the HousingUnits found within a radius of a point and within a bounding box, on a
+synthetic table of 1M rows spread over New York City, when they are served by the location index, compared to the full
+scans of the table once the index is dropped.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import random
+import time
+from typing import List, Dict, Any, Tuple
+
+import pytest
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.housing_units.services import NearHousingUnitsService
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 1000000
+LOAD_BATCH_ROWS = 100000
+INDEXED_REQUESTS = 1000
+FULL_SCAN_REQUESTS = 20
+# The target latency of the 99th percentile of the requests served by the location index.
+TARGET_P99_SECONDS = 0.020
+# The south, west, north and east bounds of the synthetic locations, around New York City.
+BOUNDS: Tuple[float, float, float, float] = (40.50, -74.25, 40.91, -73.70)
+RADII_M: List[float] = [250, 1000, 5000]
+
+
+def random_point(randomness: random.Random) -> Tuple[float, float]:
+    """
+    :param randomness: The random number generator of the benchmark.
+
+    :return: The latitude and longitude of a random point within the BOUNDS.
+    """
+    return randomness.uniform(BOUNDS[0], BOUNDS[2]), randomness.uniform(BOUNDS[1], BOUNDS[3])
+
+
+def percentile(latencies: List[float], percent: int) -> float:
+    """
+    :param latencies: The latencies of the requests.
+    :param percent: The percentile.
+
+    :return: The latency that the percent of the requests are served within.
+    """
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, len(latencies) * percent // 100)]
+
+
+class TestNearBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+        self.near_housing_units_service = NearHousingUnitsService(
+            housing_units_repository=self.housing_units_repository
+        )
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique, and the locations
+        # are spread uniformly over the BOUNDS.
+        randomness: random.Random = random.Random(0)
+        for batch_start in range(0, BENCHMARK_ROWS, LOAD_BATCH_ROWS):
+            records: List[Dict[str, str]] = []
+            for index in range(batch_start, min(batch_start + LOAD_BATCH_ROWS, BENCHMARK_ROWS)):
+                lat, lon = random_point(randomness)
+                records.append(dict(
+                    stub_socrata_records[index % len(stub_socrata_records)],
+                    project_id=str(100000 + index),
+                    latitude='{0:.6f}'.format(lat),
+                    longitude='{0:.6f}'.format(lon),
+                ))
+            self.housing_units_bulk_loader.bulk_copy(
+                housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+            )
+        self._execute('VACUUM ANALYZE {0}'.format(HousingUnit.__tablename__))
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.asyncio
+    async def test_near_and_bbox_latencies(self) -> None:
+        indexed_latencies: Dict[str, List[float]] = await self._latencies(requests=INDEXED_REQUESTS)
+
+        self._execute('DROP INDEX ix_housingunits_location')
+        full_scan_latencies: Dict[str, List[float]] = await self._latencies(requests=FULL_SCAN_REQUESTS)
+
+        print('\n{0:>8} {1:>24} {2:>24}'.format('', 'location index p50/p99', 'full scan p50/p99'))
+        for kind in indexed_latencies:
+            print('{0:>8} {1:>24} {2:>24}'.format(
+                kind,
+                '{0:.2f}ms/{1:.2f}ms'.format(
+                    percentile(indexed_latencies[kind], 50) * 1000, percentile(indexed_latencies[kind], 99) * 1000
+                ),
+                '{0:.2f}ms/{1:.2f}ms'.format(
+                    percentile(full_scan_latencies[kind], 50) * 1000, percentile(full_scan_latencies[kind], 99) * 1000
+                ),
+            ))
+
+        for kind in indexed_latencies:
+            assert percentile(indexed_latencies[kind], 99) < TARGET_P99_SECONDS
+            assert percentile(indexed_latencies[kind], 50) < percentile(full_scan_latencies[kind], 50)
+
+    async def _latencies(self, requests: int) -> Dict[str, List[float]]:
+        """
+        :param requests: The number of requests of each kind, with the same points for every call.
+
+        :return: The latencies of the requests within a radius of a point, and within a bounding box.
+        """
+        randomness: random.Random = random.Random(1)
+        latencies: Dict[str, List[float]] = {'near': [], 'bbox': []}
+        for request in range(requests):
+            lat, lon = random_point(randomness)
+            started_at: float = time.perf_counter()
+            await self.near_housing_units_service.apply(
+                lat=lat, lon=lon, radius_m=RADII_M[request % len(RADII_M)], limit=100
+            )
+            latencies['near'].append(time.perf_counter() - started_at)
+
+            bbox: str = '{0},{1},{2},{3}'.format(lon, lat, lon + 0.01, lat + 0.01)
+            started_at = time.perf_counter()
+            rows: List[Any] = await self.near_housing_units_service.apply(bbox=bbox, limit=100)
+            latencies['bbox'].append(time.perf_counter() - started_at)
+            assert len(rows) <= 100
+
+        return latencies
+
+    def _execute(self, statement: str) -> None:
+        # The VACUUM can't run inside a transaction block.
+        with self.housing_units_repository.db_engine.get_engine().engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(statement)
@@ -0,0 +1,81 @@
+"""
+Load test of the CPU time per request of the HousingUnits filtering, when the filtering statements are built for every
+request, compared to the prepared statements that are built once per combination of the applied filters. Every request
+filters a page and counts the HousingUnits, with as many requests in flight as the threads of the gunicorn API workers.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Any
+from unittest.mock import patch
+
+import pytest
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 10000
+CONCURRENT_REQUESTS = 8
+REQUESTS = 4000
+# The filters of the requests, cycling through combinations of the filtering fields and values.
+REQUEST_FILTERS: List[Dict[str, Any]] = [
+    dict(borough='Brooklyn'),
+    dict(borough='Bronx', num_units_min=2),
+    dict(num_units_min=1, num_units_max=40),
+    dict(borough='Queens', construction_type='New Construction', num_units_max=100),
+]
+
+
+class TestPreparedStatementsBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique.
+        records: List[Dict[str, str]] = [
+            dict(record, project_id=str(100000 + index))
+            for index, record in enumerate(
+                (stub_socrata_records * (BENCHMARK_ROWS // len(stub_socrata_records) + 1))[:BENCHMARK_ROWS]
+            )
+        ]
+        self.housing_units_bulk_loader.bulk_copy(
+            housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+        )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.parametrize('prepared', [False, True])
+    @pytest.mark.asyncio
+    async def test_cpu_per_request(self, prepared: bool) -> None:
+        async def serve_requests(worker: int) -> None:
+            for request in range(worker, REQUESTS, CONCURRENT_REQUESTS):
+                filters: Dict[str, Any] = REQUEST_FILTERS[request % len(REQUEST_FILTERS)]
+                await self.housing_units_repository.filter_rows(limit=20, **filters)
+                await self.housing_units_repository.count(**filters)
+
+        # The statements are built for every request, when none of them is found prepared.
+        with nullcontext() if prepared else patch.object(
+                HousingUnitsRepository.PREPARED_STATEMENTS, 'get', return_value=None
+        ):
+            # The connections are established and the statements are prepared before the measurement.
+            await asyncio.gather(*[serve_requests(worker) for worker in range(CONCURRENT_REQUESTS)])
+
+            started_at: float = time.perf_counter()
+            started_at_cpu: float = time.process_time()
+            await asyncio.gather(*[serve_requests(worker) for worker in range(CONCURRENT_REQUESTS)])
+            cpu_per_request: float = (time.process_time() - started_at_cpu) / REQUESTS
+            elapsed: float = time.perf_counter() - started_at
+
+        print(
+            '\n{0:>20}: {1:.3f}ms CPU per request, {2:.0f} requests per second'.format(
+                'prepared statements' if prepared else 'built statements', cpu_per_request * 1000, REQUESTS / elapsed
+            )
+        )
@@ -0,0 +1,138 @@
+"""
+Benchmark of the latencies of the street name search and of the street name autocomplete, on a synthetic table of 1M
+rows with 10k distinct street names. The search is served by the trigram index of the street names, and the
+autocomplete by the in-memory dictionary of the distinct street names, which is loaded once before the measurement.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from typing import List, Dict, Any
+from unittest.mock import patch
+
+import pytest
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.housing_units.services import SearchHousingUnitsService, AutocompleteStreetNamesService
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 1000000
+LOAD_BATCH_ROWS = 100000
+REQUESTS = 2000
+# The target latency of the 99th percentile of the requests.
+TARGET_P99_SECONDS = 0.010
+# The words of the synthetic street names, combined to 10k distinct ones.
+NAMES: List[str] = [
+    'RALPH', 'RANDALL', 'GOLD', 'FULTON', 'ATLANTIC', 'MYRTLE', 'NOSTRAND', 'BEDFORD', 'FLATBUSH', 'LIVONIA',
+    'SUTTER', 'PITKIN', 'LINDEN', 'WILLIAMS', 'HUDSON', 'GRAND', 'CANAL', 'BROADWAY', 'AMSTERDAM', 'LENOX',
+]
+QUALIFIERS: List[str] = ['{0}'.format(number) for number in range(1, 101)]
+SUFFIXES: List[str] = ['AVENUE', 'STREET', 'PLACE', 'ROAD', 'BOULEVARD']
+SEARCH_QUERIES: List[str] = ['ralph avenue', 'gold st', 'atlantik avenue', '42 fulton', 'bedford', 'grand boulevard']
+AUTOCOMPLETE_PREFIXES: List[str] = ['r', 'ra', 'ral', 'go', 'gold 4', 'fult', 'b', 'zz']
+
+
+def synthetic_street_name(index: int) -> str:
+    """
+    :param index: The index of the row.
+
+    :return: One of the 10k distinct street names, spread over the rows.
+    """
+    street: int = index % (len(NAMES) * len(QUALIFIERS) * len(SUFFIXES))
+    return '{0} {1} {2}'.format(
+        NAMES[street % len(NAMES)],
+        QUALIFIERS[street // len(NAMES) % len(QUALIFIERS)],
+        SUFFIXES[street // (len(NAMES) * len(QUALIFIERS))],
+    )
+
+
+def percentile(latencies: List[float], percent: int) -> float:
+    """
+    :param latencies: The latencies of the requests.
+    :param percent: The percentile.
+
+    :return: The latency that the percent of the requests are served within.
+    """
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, len(latencies) * percent // 100)]
+
+
+class TestSearchBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique.
+        for batch_start in range(0, BENCHMARK_ROWS, LOAD_BATCH_ROWS):
+            records: List[Dict[str, str]] = [
+                dict(
+                    stub_socrata_records[index % len(stub_socrata_records)],
+                    project_id=str(100000 + index),
+                    street_name=synthetic_street_name(index),
+                )
+                for index in range(batch_start, min(batch_start + LOAD_BATCH_ROWS, BENCHMARK_ROWS))
+            ]
+            self.housing_units_bulk_loader.bulk_copy(
+                housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+            )
+        with self.housing_units_repository.db_engine.get_engine().engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(
+                'VACUUM ANALYZE {0}'.format(HousingUnit.__tablename__)
+            )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.asyncio
+    async def test_search_latency(self) -> None:
+        search_housing_units_service: SearchHousingUnitsService = SearchHousingUnitsService(
+            housing_units_repository=self.housing_units_repository
+        )
+
+        latencies: List[float] = []
+        for request in range(REQUESTS):
+            started_at: float = time.perf_counter()
+            rows: List[Any] = await search_housing_units_service.apply(
+                query=SEARCH_QUERIES[request % len(SEARCH_QUERIES)], limit=20
+            )
+            latencies.append(time.perf_counter() - started_at)
+            assert rows
+
+        print('\n{0:>14}: p50 {1:.2f}ms, p99 {2:.2f}ms'.format(
+            'search', percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+        ))
+        assert percentile(latencies, 99) < TARGET_P99_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_autocomplete_latency(self) -> None:
+        autocomplete_street_names_service: AutocompleteStreetNamesService = AutocompleteStreetNamesService(
+            housing_units_repository=self.housing_units_repository,
+        )
+
+        # The worker is considered subscribed to the invalidations of the dictionaries, so that the dictionaries loaded
+        # by the first request are used by the rest of them.
+        with patch('application.housing_units.repositories.HOUSING_UNITS_DICTIONARIES_INVALIDATIONS') as invalidations:
+            invalidations.subscribed = True
+            invalidations.sequence = 0
+
+            started_at: float = time.perf_counter()
+            await autocomplete_street_names_service.apply(prefix=AUTOCOMPLETE_PREFIXES[0])
+            build_seconds: float = time.perf_counter() - started_at
+
+            latencies: List[float] = []
+            for request in range(REQUESTS):
+                started_at = time.perf_counter()
+                await autocomplete_street_names_service.apply(
+                    prefix=AUTOCOMPLETE_PREFIXES[request % len(AUTOCOMPLETE_PREFIXES)], limit=10
+                )
+                latencies.append(time.perf_counter() - started_at)
+
+        print('\n{0:>14}: p50 {1:.3f}ms, p99 {2:.3f}ms, dictionaries loaded in {3:.0f}ms'.format(
+            'autocomplete', percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000, build_seconds * 1000
+        ))
+        assert percentile(latencies, 99) < TARGET_P99_SECONDS
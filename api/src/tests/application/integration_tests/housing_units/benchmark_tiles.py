@@ -0,0 +1,115 @@
+"""
+Benchmark of the latencies and of the payload sizes of the map tiles of the clustered HousingUnits, on a synthetic
+table of 1M rows spread over New York City, for the tiles of the zooms from the whole city to a few blocks. The tiles
+are clustered into a grid of bounded size, so that their payloads stay a few KB however many HousingUnits they hold.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import math
+import random
+import time
+from typing import List, Dict, Tuple
+
+import pytest
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.rest_api.housing_units.responses import housing_units_tile_content
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 1000000
+LOAD_BATCH_ROWS = 100000
+TILES_PER_ZOOM = 20
+ZOOMS: List[int] = [10, 12, 14, 16]
+# The maximum payload size of a tile.
+TARGET_TILE_BYTES = 8 * 1024
+# The south, west, north and east bounds of the synthetic locations, around New York City.
+BOUNDS: Tuple[float, float, float, float] = (40.50, -74.25, 40.91, -73.70)
+
+
+def tile_of(lat: float, lon: float, z: int) -> Tuple[int, int]:
+    """
+    :param lat: The latitude of the point.
+    :param lon: The longitude of the point.
+    :param z: The zoom of the tile.
+
+    :return: The x and y of the Web Mercator tile of the point at the zoom.
+    """
+    tiles: int = 2 ** z
+    mercator_y: float = math.log(math.tan(math.radians(lat)) + 1 / math.cos(math.radians(lat)))
+    return int((lon + 180) / 360 * tiles), int((1 - mercator_y / math.pi) / 2 * tiles)
+
+
+def percentile(latencies: List[float], percent: int) -> float:
+    """
+    :param latencies: The latencies of the requests.
+    :param percent: The percentile.
+
+    :return: The latency that the percent of the requests are served within.
+    """
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, len(latencies) * percent // 100)]
+
+
+class TestTilesBenchmark:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.housing_units_repository = HousingUnitsRepository(db_engine=DatabaseEngineWrapper())
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(db_engine=DatabaseEngineWrapper())
+
+        # The project ids are renumbered, for keeping the project_id and building_id pairs unique, and the locations
+        # are spread uniformly over the BOUNDS.
+        randomness: random.Random = random.Random(0)
+        for batch_start in range(0, BENCHMARK_ROWS, LOAD_BATCH_ROWS):
+            records: List[Dict[str, str]] = [
+                dict(
+                    stub_socrata_records[index % len(stub_socrata_records)],
+                    project_id=str(100000 + index),
+                    latitude='{0:.6f}'.format(randomness.uniform(BOUNDS[0], BOUNDS[2])),
+                    longitude='{0:.6f}'.format(randomness.uniform(BOUNDS[1], BOUNDS[3])),
+                )
+                for index in range(batch_start, min(batch_start + LOAD_BATCH_ROWS, BENCHMARK_ROWS))
+            ]
+            self.housing_units_bulk_loader.bulk_copy(
+                housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe(records))
+            )
+        with self.housing_units_repository.db_engine.get_engine().engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(
+                'VACUUM ANALYZE {0}'.format(HousingUnit.__tablename__)
+            )
+
+        yield
+
+        DatabaseEngineWrapper.reset()
+
+    @pytest.mark.asyncio
+    async def test_tile_latencies_and_sizes(self) -> None:
+        randomness: random.Random = random.Random(1)
+
+        print('\n{0:>6} {1:>24} {2:>16} {3:>16}'.format('zoom', 'uncached p50/p99', 'max cells', 'max bytes'))
+        for z in ZOOMS:
+            latencies: List[float] = []
+            cells: List[int] = []
+            sizes: List[int] = []
+            for _ in range(TILES_PER_ZOOM):
+                x, y = tile_of(
+                    randomness.uniform(BOUNDS[0], BOUNDS[2]), randomness.uniform(BOUNDS[1], BOUNDS[3]), z
+                )
+                started_at: float = time.perf_counter()
+                rows = await self.housing_units_repository.tile_cells(z=z, x=x, y=y)
+                content: bytes = housing_units_tile_content(z=z, x=x, y=y, rows=rows)
+                latencies.append(time.perf_counter() - started_at)
+                cells.append(len(rows))
+                sizes.append(len(content))
+
+            print('{0:>6} {1:>24} {2:>16} {3:>16}'.format(
+                z,
+                '{0:.2f}ms/{1:.2f}ms'.format(percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000),
+                max(cells),
+                max(sizes),
+            ))
+            assert max(cells) <= HousingUnitsRepository.TILE_GRID_SIZE ** 2
+            assert max(sizes) < TARGET_TILE_BYTES
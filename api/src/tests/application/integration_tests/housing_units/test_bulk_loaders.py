@@ -0,0 +1,262 @@
+from datetime import datetime
+from typing import List, Dict, Any
+
+import pytest
+from sqlalchemy.future import select
+
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.models import HousingUnit, HousingUnitCanonicalValue
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class TestHousingUnitsBulkLoader:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(
+            db_engine=DatabaseEngineWrapper()
+        )
+
+    @pytest.mark.parametrize('bulk_loader', ['bulk_insert', 'bulk_copy'])
+    def test_bulk_load(self, populate_housing_units, stub_housing_units, bulk_loader: str) -> None:
+        housing_unit_mappings: List[Dict[str, Any]] = [
+            dict(
+                project_id='project id 14',
+                street_name='street name, test "14"',
+                borough='Queens',
+                postcode=None,
+                reporting_construction_type='construction type test 1',
+                project_name='project name 14',
+                project_start_date=datetime.fromtimestamp(1545730073),
+                project_completion_date=None,
+                community_board='community board 14',
+                latitude=40.68116,
+                longitude=-73.91462,
+                extended_affordability_status='extended affordability status 14',
+                prevailing_wage_status='prevailing wage status 14',
+                extremely_low_income_units=10,
+                very_low_income_units=6,
+                low_income_units=9,
+                moderate_income_units=0,
+                middle_income_units=0,
+                other_income_units=0,
+                studio_units=13,
+                one_br_units=7,
+                two_br_units=5,
+                three_br_units=0,
+                four_br_units=0,
+                five_br_units=0,
+                six_br_units=0,
+                unknown_br_units=0,
+                counted_rental_units=25,
+                counted_homeownership_units=0,
+                all_counted_units=25,
+                total_units=25,
+            ),
+            dict(
+                project_id='project id 15',
+                street_name='street name test 15',
+                borough='Bronx',
+                postcode=5,
+                reporting_construction_type='construction type test 5',
+                project_name='project name 15',
+                project_start_date=datetime.fromtimestamp(1545730073),
+                project_completion_date=datetime.fromtimestamp(1545730073),
+                community_board='community board 15',
+                latitude=None,
+                longitude=None,
+                extended_affordability_status='extended affordability status 15',
+                prevailing_wage_status='prevailing wage status 15',
+                extremely_low_income_units=3,
+                very_low_income_units=17,
+                low_income_units=0,
+                moderate_income_units=0,
+                middle_income_units=0,
+                other_income_units=0,
+                studio_units=1,
+                one_br_units=9,
+                two_br_units=10,
+                three_br_units=0,
+                four_br_units=0,
+                five_br_units=0,
+                six_br_units=0,
+                unknown_br_units=0,
+                counted_rental_units=20,
+                counted_homeownership_units=0,
+                all_counted_units=20,
+                total_units=20,
+            ),
+        ]
+
+        getattr(self.housing_units_bulk_loader, bulk_loader)(housing_unit_mappings)
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            query = select(HousingUnit).where(HousingUnit.project_id.in_(['project id 14', 'project id 15']))
+            housing_units = session.execute(query)
+            loaded_housing_units = housing_units.scalars().all()
+            total_housing_units = session.execute(select(HousingUnit)).scalars().all()
+
+        assert len(total_housing_units) == len(stub_housing_units) + 2
+        assert sorted(loaded_housing_units, key=lambda housing_unit: housing_unit.project_id) == [
+            HousingUnit(**housing_unit_mapping) for housing_unit_mapping in housing_unit_mappings
+        ]
+        assert all(housing_unit.uuid is not None for housing_unit in loaded_housing_units)
+
+    def test_bulk_upsert(self, populate_housing_units, stub_housing_units) -> None:
+        housing_unit_mappings: List[Dict[str, Any]] = [
+            dict(
+                project_id='project id {0}'.format(index),
+                building_id=index,
+                street_name='street name test {0}'.format(index),
+                borough='Queens',
+                postcode=index,
+                reporting_construction_type='construction type test 1',
+                project_name='project name {0}'.format(index),
+                project_start_date=datetime.fromtimestamp(1545730073),
+                community_board='community board {0}'.format(index),
+                extended_affordability_status='extended affordability status {0}'.format(index),
+                prevailing_wage_status='prevailing wage status {0}'.format(index),
+                total_units=index,
+            )
+            for index in (14, 15)
+        ]
+        self.housing_units_bulk_loader.bulk_upsert(housing_unit_mappings)
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            query = select(HousingUnit).where(HousingUnit.project_id == 'project id 15')
+            upserted_housing_unit_uuid = session.execute(query).scalars().first().uuid
+
+        # The project id 15 row is updated, and the project id 16 row is inserted.
+        self.housing_units_bulk_loader.bulk_upsert(
+            [
+                dict(housing_unit_mappings[1], street_name='street name test 15 updated', total_units=150),
+                dict(housing_unit_mappings[1], project_id='project id 16', building_id=16),
+            ]
+        )
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            query = select(HousingUnit).where(HousingUnit.project_id.in_(['project id 15', 'project id 16']))
+            upserted_housing_units = session.execute(query.order_by(HousingUnit.project_id)).scalars().all()
+            total_housing_units = session.execute(select(HousingUnit)).scalars().all()
+
+        assert len(total_housing_units) == len(stub_housing_units) + 3
+        assert upserted_housing_units[0].uuid == upserted_housing_unit_uuid
+        assert upserted_housing_units[0].street_name == 'street name test 15 updated'
+        assert upserted_housing_units[0].total_units == 150
+        assert upserted_housing_units[1].building_id == 16
+        assert upserted_housing_units[1].total_units == 15
+        # The version is incremented only for the changed rows.
+        assert upserted_housing_units[0].version == 2
+        assert upserted_housing_units[1].version == 1
+
+        self.housing_units_bulk_loader.bulk_upsert(
+            [dict(housing_unit_mappings[1], street_name='street name test 15 updated', total_units=150)]
+        )
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            query = select(HousingUnit).where(HousingUnit.project_id == 'project id 15')
+            unchanged_housing_unit: HousingUnit = session.execute(query).scalars().first()
+
+        assert unchanged_housing_unit.version == 2
+        assert unchanged_housing_unit.updated_at == upserted_housing_units[0].updated_at
+
+    def test_swap_staging_table(self, populate_housing_units, stub_housing_units) -> None:
+        index_names_query: str = "SELECT indexname FROM pg_indexes WHERE tablename = 'housingunits' ORDER BY indexname"
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            index_names: List[str] = session.execute(index_names_query).scalars().all()
+
+        self.housing_units_bulk_loader.create_staging_table()
+        self.housing_units_bulk_loader.bulk_copy(
+            [
+                dict(
+                    project_id='project id {0}'.format(index),
+                    building_id=index,
+                    street_name='street name test {0}'.format(index),
+                    borough='Queens',
+                    project_name='project name {0}'.format(index),
+                    project_start_date=datetime.fromtimestamp(1545730073),
+                    community_board='community board {0}'.format(index),
+                    reporting_construction_type='construction type test 1',
+                    extended_affordability_status='extended affordability status {0}'.format(index),
+                    prevailing_wage_status='prevailing wage status {0}'.format(index),
+                    extremely_low_income_units=0,
+                    very_low_income_units=0,
+                    low_income_units=0,
+                    moderate_income_units=0,
+                    middle_income_units=0,
+                    other_income_units=0,
+                    studio_units=0,
+                    one_br_units=0,
+                    two_br_units=0,
+                    three_br_units=0,
+                    four_br_units=0,
+                    five_br_units=0,
+                    six_br_units=0,
+                    unknown_br_units=0,
+                    counted_rental_units=0,
+                    counted_homeownership_units=0,
+                    all_counted_units=0,
+                    total_units=index,
+                )
+                for index in (14, 15)
+            ],
+            staging=True,
+        )
+
+        # The HousingUnit table and its canonical values are kept until the staging table is swapped in.
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            assert len(session.execute(select(HousingUnit)).scalars().all()) == len(stub_housing_units)
+            assert session.execute(
+                select(HousingUnitCanonicalValue).where(HousingUnitCanonicalValue.value == 'street name test 14')
+            ).first() is None
+
+        self.housing_units_bulk_loader.build_staging_table_indexes()
+        replaced_table_name: str = self.housing_units_bulk_loader.swap_staging_table()
+
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            swapped_housing_units = session.execute(
+                select(HousingUnit).order_by(HousingUnit.project_id)
+            ).scalars().all()
+            swapped_index_names: List[str] = session.execute(index_names_query).scalars().all()
+            replaced_total_rows: int = session.execute(
+                "SELECT count(*) FROM {0}".format(replaced_table_name)
+            ).scalar()
+
+        assert [housing_unit.project_id for housing_unit in swapped_housing_units] == [
+            'project id 14', 'project id 15'
+        ]
+        assert swapped_index_names == index_names
+        assert replaced_total_rows == len(stub_housing_units)
+
+        self.housing_units_bulk_loader.drop_replaced_table(table_name=replaced_table_name)
+
+        # The id sequence is owned by the swapped in table, so it is kept after dropping the replaced table.
+        self.housing_units_bulk_loader.bulk_insert(
+            [
+                dict(
+                    {
+                        attribute_name: getattr(swapped_housing_units[0], attribute_name)
+                        for attribute_name in HousingUnitsRepository.BULK_LOAD_COLUMNS
+                        if attribute_name != 'uuid'
+                    },
+                    building_id=16,
+                )
+            ]
+        )
+        with self.housing_units_bulk_loader.db_engine.get_session() as session:
+            assert session.execute(
+                "SELECT to_regclass('{0}')".format(replaced_table_name)
+            ).scalar() is None
+            assert len(session.execute(select(HousingUnit)).scalars().all()) == 3
+
+    def test_drop_replaced_table_raise_error_when_table_is_not_replaced(self) -> None:
+        expected_error: InvalidArgumentError = InvalidArgumentError(
+            "The table housingunits is not a replaced HousingUnit table."
+        )
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            self.housing_units_bulk_loader.drop_replaced_table(table_name='housingunits')
+
+        assert ex.value.args == expected_error.args
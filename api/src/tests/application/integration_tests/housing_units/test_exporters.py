@@ -0,0 +1,59 @@
+import io
+from typing import List
+
+import pytest
+from sqlalchemy.engine import Row
+
+from application.housing_units.exporters import HousingUnitsExporter
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.database.database import DatabaseEngineWrapper
+
+
+class TestHousingUnitsExporter:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.housing_units_repository = HousingUnitsRepository(
+            db_engine=DatabaseEngineWrapper()
+        )
+        self.housing_units_exporter = HousingUnitsExporter(
+            db_engine=DatabaseEngineWrapper()
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_export_csv(self, populate_housing_units, stub_housing_units) -> None:
+        chunks: List[bytes] = [
+            chunk async for chunk in self.housing_units_exporter.stream_export_csv(borough='Queens')
+        ]
+
+        assert all(type(chunk) is bytes for chunk in chunks)
+        lines: List[str] = b''.join(chunks).decode().splitlines()
+        assert lines[0] == ','.join(HousingUnitsRepository.EXPORT_COLUMNS)
+        assert len(lines) - 1 == await self.housing_units_repository.count(borough='Queens')
+
+    @pytest.mark.asyncio
+    async def test_stream_export_rows(self, populate_housing_units, stub_housing_units) -> None:
+        batches: List[List[Row]] = [
+            batch async for batch in self.housing_units_exporter.stream_export_rows(batch_size=5)
+        ]
+
+        assert [len(batch) for batch in batches[:-1]] == [5] * (len(batches) - 1)
+        assert list(batches[0][0]._fields) == HousingUnitsRepository.EXPORT_COLUMNS
+        assert sorted(row.uuid for batch in batches for row in batch) == sorted(
+            str(housing_unit.uuid) for housing_unit in stub_housing_units
+        )
+
+    def test_export_csv(self, populate_housing_units, stub_housing_units) -> None:
+        csv_file: io.BytesIO = io.BytesIO()
+
+        self.housing_units_exporter.export_csv(csv_file, street_name='street name test 5', num_units_min=15)
+
+        lines: List[str] = csv_file.getvalue().decode().splitlines()
+        assert lines[0] == ','.join(HousingUnitsRepository.EXPORT_COLUMNS)
+        assert len(lines) == 2
+
+    def test_export_rows(self, populate_housing_units, stub_housing_units) -> None:
+        batches: List[List[Row]] = list(self.housing_units_exporter.export_rows(batch_size=5))
+
+        assert [len(batch) for batch in batches[:-1]] == [5] * (len(batches) - 1)
+        assert sum(len(batch) for batch in batches) == len(stub_housing_units)
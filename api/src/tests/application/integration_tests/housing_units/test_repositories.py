@@ -1,11 +1,16 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 
 import pytest
 import uuid
+from sqlalchemy import text
+from sqlalchemy.engine import Row
 from sqlalchemy.future import select
 
-from application.housing_units.models import HousingUnit
+from application.housing_units.bulk_loaders import HousingUnitsBulkLoader
+from application.housing_units.enums import HousingUnitSortKey, HousingUnitField
+from application.housing_units.errors import HousingUnitConflictError
+from application.housing_units.models import HousingUnit, HousingUnitCanonicalValue
 from application.housing_units.repositories import HousingUnitsRepository
 from application.infrastructure.database.database import DatabaseEngineWrapper
 
@@ -17,6 +22,9 @@ class TestHousingUnitsRepository:
         self.housing_units_repository = HousingUnitsRepository(
             db_engine=DatabaseEngineWrapper()
         )
+        self.housing_units_bulk_loader = HousingUnitsBulkLoader(
+            db_engine=DatabaseEngineWrapper()
+        )
 
     @pytest.mark.parametrize(
         'street_name, borough, postcode, construction_type, num_units_min, num_units_max, '
@@ -33,64 +41,64 @@ class TestHousingUnitsRepository:
                 None,  # num_units_max
                 [
                     HousingUnit(
-                        project_id='project id 12',
+                        project_id='project id 1',
                         street_name='street name test 1',
                         borough='Queens',
                         postcode=1,
                         reporting_construction_type='construction type test 1',
-                        project_name='project name 13',
+                        project_name='project name 1',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 13',
-                        extended_affordability_status='extended affordability status 13',
-                        prevailing_wage_status='prevailing wage status 13',
-                        extremely_low_income_units=10,
-                        very_low_income_units=6,
-                        low_income_units=9,
+                        community_board='community board 1',
+                        extended_affordability_status='extended affordability status 1',
+                        prevailing_wage_status='prevailing wage status 1',
+                        extremely_low_income_units=0,
+                        very_low_income_units=0,
+                        low_income_units=0,
                         moderate_income_units=0,
-                        middle_income_units=0,
+                        middle_income_units=2,
                         other_income_units=0,
-                        studio_units=13,
-                        one_br_units=7,
-                        two_br_units=5,
-                        three_br_units=0,
+                        studio_units=0,
+                        one_br_units=1,
+                        two_br_units=0,
+                        three_br_units=1,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
                         unknown_br_units=0,
-                        counted_rental_units=25,
-                        counted_homeownership_units=0,
-                        all_counted_units=25,
-                        total_units=25,
+                        counted_rental_units=1,
+                        counted_homeownership_units=1,
+                        all_counted_units=2,
+                        total_units=2,
                     ),
                     HousingUnit(
-                        project_id='project id 12',
+                        project_id='project id 6',
                         street_name='street name test 1',
                         borough='Queens',
                         postcode=1,
                         reporting_construction_type='construction type test 1',
-                        project_name='project name 12',
+                        project_name='project name 6',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 12',
-                        extended_affordability_status='extended affordability status 12',
-                        prevailing_wage_status='prevailing wage status 12',
-                        extremely_low_income_units=10,
+                        community_board='community board 6',
+                        extended_affordability_status='extended affordability status 6',
+                        prevailing_wage_status='prevailing wage status 6',
+                        extremely_low_income_units=5,
                         very_low_income_units=6,
-                        low_income_units=9,
+                        low_income_units=1,
                         moderate_income_units=0,
                         middle_income_units=0,
                         other_income_units=0,
-                        studio_units=13,
-                        one_br_units=7,
-                        two_br_units=5,
+                        studio_units=0,
+                        one_br_units=12,
+                        two_br_units=0,
                         three_br_units=0,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
                         unknown_br_units=0,
-                        counted_rental_units=25,
+                        counted_rental_units=12,
                         counted_homeownership_units=0,
-                        all_counted_units=25,
-                        total_units=25,
+                        all_counted_units=12,
+                        total_units=12,
                     ),
                     HousingUnit(
                         project_id='project id 11',
@@ -123,64 +131,64 @@ class TestHousingUnitsRepository:
                         total_units=16,
                     ),
                     HousingUnit(
-                        project_id='project id 6',
+                        project_id='project id 12',
                         street_name='street name test 1',
                         borough='Queens',
                         postcode=1,
                         reporting_construction_type='construction type test 1',
-                        project_name='project name 6',
+                        project_name='project name 12',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 6',
-                        extended_affordability_status='extended affordability status 6',
-                        prevailing_wage_status='prevailing wage status 6',
-                        extremely_low_income_units=5,
+                        community_board='community board 12',
+                        extended_affordability_status='extended affordability status 12',
+                        prevailing_wage_status='prevailing wage status 12',
+                        extremely_low_income_units=10,
                         very_low_income_units=6,
-                        low_income_units=1,
+                        low_income_units=9,
                         moderate_income_units=0,
                         middle_income_units=0,
                         other_income_units=0,
-                        studio_units=0,
-                        one_br_units=12,
-                        two_br_units=0,
+                        studio_units=13,
+                        one_br_units=7,
+                        two_br_units=5,
                         three_br_units=0,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
                         unknown_br_units=0,
-                        counted_rental_units=12,
+                        counted_rental_units=25,
                         counted_homeownership_units=0,
-                        all_counted_units=12,
-                        total_units=12,
+                        all_counted_units=25,
+                        total_units=25,
                     ),
                     HousingUnit(
-                        project_id='project id 1',
+                        project_id='project id 13',
                         street_name='street name test 1',
                         borough='Queens',
                         postcode=1,
                         reporting_construction_type='construction type test 1',
-                        project_name='project name 1',
+                        project_name='project name 13',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 1',
-                        extended_affordability_status='extended affordability status 1',
-                        prevailing_wage_status='prevailing wage status 1',
-                        extremely_low_income_units=0,
-                        very_low_income_units=0,
-                        low_income_units=0,
+                        community_board='community board 13',
+                        extended_affordability_status='extended affordability status 13',
+                        prevailing_wage_status='prevailing wage status 13',
+                        extremely_low_income_units=10,
+                        very_low_income_units=6,
+                        low_income_units=9,
                         moderate_income_units=0,
-                        middle_income_units=2,
+                        middle_income_units=0,
                         other_income_units=0,
-                        studio_units=0,
-                        one_br_units=1,
-                        two_br_units=0,
-                        three_br_units=1,
+                        studio_units=13,
+                        one_br_units=7,
+                        two_br_units=5,
+                        three_br_units=0,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
                         unknown_br_units=0,
-                        counted_rental_units=1,
-                        counted_homeownership_units=1,
-                        all_counted_units=2,
-                        total_units=2,
+                        counted_rental_units=25,
+                        counted_homeownership_units=0,
+                        all_counted_units=25,
+                        total_units=25,
                     ),
                 ]
             ),
@@ -194,64 +202,64 @@ class TestHousingUnitsRepository:
                 None,  # num_units_max
                 [
                     HousingUnit(
-                        project_id='project id 7',
+                        project_id='project id 2',
                         street_name='street name test 2',
                         borough='Brooklyn',
                         postcode=2,
                         reporting_construction_type='construction type test 2',
-                        project_name='project name 7',
+                        project_name='project name 2',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 7',
-                        extended_affordability_status='extended affordability status 7',
-                        prevailing_wage_status='prevailing wage status 7',
+                        community_board='community board 2',
+                        extended_affordability_status='extended affordability status 2',
+                        prevailing_wage_status='prevailing wage status 2',
                         extremely_low_income_units=0,
                         very_low_income_units=0,
-                        low_income_units=0,
-                        moderate_income_units=14,
+                        low_income_units=4,
+                        moderate_income_units=0,
                         middle_income_units=0,
                         other_income_units=0,
-                        studio_units=4,
+                        studio_units=0,
                         one_br_units=0,
-                        two_br_units=6,
-                        three_br_units=4,
+                        two_br_units=0,
+                        three_br_units=0,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
-                        unknown_br_units=0,
+                        unknown_br_units=4,
                         counted_rental_units=0,
-                        counted_homeownership_units=14,
-                        all_counted_units=14,
-                        total_units=14,
+                        counted_homeownership_units=4,
+                        all_counted_units=4,
+                        total_units=4,
                     ),
                     HousingUnit(
-                        project_id='project id 2',
+                        project_id='project id 7',
                         street_name='street name test 2',
                         borough='Brooklyn',
                         postcode=2,
                         reporting_construction_type='construction type test 2',
-                        project_name='project name 2',
+                        project_name='project name 7',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 2',
-                        extended_affordability_status='extended affordability status 2',
-                        prevailing_wage_status='prevailing wage status 2',
+                        community_board='community board 7',
+                        extended_affordability_status='extended affordability status 7',
+                        prevailing_wage_status='prevailing wage status 7',
                         extremely_low_income_units=0,
                         very_low_income_units=0,
-                        low_income_units=4,
-                        moderate_income_units=0,
+                        low_income_units=0,
+                        moderate_income_units=14,
                         middle_income_units=0,
                         other_income_units=0,
-                        studio_units=0,
+                        studio_units=4,
                         one_br_units=0,
-                        two_br_units=0,
-                        three_br_units=0,
+                        two_br_units=6,
+                        three_br_units=4,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
-                        unknown_br_units=4,
+                        unknown_br_units=0,
                         counted_rental_units=0,
-                        counted_homeownership_units=4,
-                        all_counted_units=4,
-                        total_units=4,
+                        counted_homeownership_units=14,
+                        all_counted_units=14,
+                        total_units=14,
                     ),
                 ]
             ),
@@ -264,6 +272,36 @@ class TestHousingUnitsRepository:
                 None,  # num_units_min
                 None,  # num_units_max
                 [
+                    HousingUnit(
+                        project_id='project id 3',
+                        street_name='street name test 3',
+                        borough='Staten Island',
+                        postcode=3,
+                        reporting_construction_type='construction type test 3',
+                        project_name='project name 3',
+                        project_start_date=datetime.fromtimestamp(1545730073),
+                        community_board='community board 3',
+                        extended_affordability_status='extended affordability status 3',
+                        prevailing_wage_status='prevailing wage status 3',
+                        extremely_low_income_units=0,
+                        very_low_income_units=0,
+                        low_income_units=0,
+                        moderate_income_units=0,
+                        middle_income_units=2,
+                        other_income_units=0,
+                        studio_units=0,
+                        one_br_units=0,
+                        two_br_units=2,
+                        three_br_units=0,
+                        four_br_units=0,
+                        five_br_units=0,
+                        six_br_units=0,
+                        unknown_br_units=0,
+                        counted_rental_units=2,
+                        counted_homeownership_units=0,
+                        all_counted_units=2,
+                        total_units=6,
+                    ),
                     HousingUnit(
                         project_id='project id 8',
                         street_name='street name test 3',
@@ -294,47 +332,47 @@ class TestHousingUnitsRepository:
                         all_counted_units=16,
                         total_units=16,
                     ),
+                ]
+            ),
+            # when_only_construction_type_is_provided
+            (
+                None,  # street_name
+                None,  # borough
+                None,  # postcode
+                'construction type test 4',  # construction_type
+                None,  # num_units_min
+                None,  # num_units_max
+                [
                     HousingUnit(
-                        project_id='project id 3',
-                        street_name='street name test 3',
-                        borough='Staten Island',
-                        postcode=3,
-                        reporting_construction_type='construction type test 3',
-                        project_name='project name 3',
+                        project_id='project id 4',
+                        street_name='street name test 4',
+                        borough='Manhattan',
+                        postcode=4,
+                        reporting_construction_type='construction type test 4',
+                        project_name='project name 4',
                         project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 3',
-                        extended_affordability_status='extended affordability status 3',
-                        prevailing_wage_status='prevailing wage status 3',
+                        community_board='community board 4',
+                        extended_affordability_status='extended affordability status 4',
+                        prevailing_wage_status='prevailing wage status 4',
                         extremely_low_income_units=0,
                         very_low_income_units=0,
                         low_income_units=0,
-                        moderate_income_units=0,
-                        middle_income_units=2,
+                        moderate_income_units=2,
+                        middle_income_units=6,
                         other_income_units=0,
                         studio_units=0,
-                        one_br_units=0,
-                        two_br_units=2,
+                        one_br_units=2,
+                        two_br_units=6,
                         three_br_units=0,
                         four_br_units=0,
                         five_br_units=0,
                         six_br_units=0,
                         unknown_br_units=0,
-                        counted_rental_units=2,
-                        counted_homeownership_units=0,
-                        all_counted_units=2,
-                        total_units=6,
+                        counted_rental_units=0,
+                        counted_homeownership_units=8,
+                        all_counted_units=8,
+                        total_units=8,
                     ),
-                ]
-            ),
-            # when_only_construction_type_is_provided
-            (
-                None,  # street_name
-                None,  # borough
-                None,  # postcode
-                'construction type test 4',  # construction_type
-                None,  # num_units_min
-                None,  # num_units_max
-                [
                     HousingUnit(
                         project_id='project id 9',
                         street_name='street name test 4',
@@ -365,36 +403,6 @@ class TestHousingUnitsRepository:
                         all_counted_units=18,
                         total_units=18,
                     ),
-                    HousingUnit(
-                        project_id='project id 4',
-                        street_name='street name test 4',
-                        borough='Manhattan',
-                        postcode=4,
-                        reporting_construction_type='construction type test 4',
-                        project_name='project name 4',
-                        project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 4',
-                        extended_affordability_status='extended affordability status 4',
-                        prevailing_wage_status='prevailing wage status 4',
-                        extremely_low_income_units=0,
-                        very_low_income_units=0,
-                        low_income_units=0,
-                        moderate_income_units=2,
-                        middle_income_units=6,
-                        other_income_units=0,
-                        studio_units=0,
-                        one_br_units=2,
-                        two_br_units=6,
-                        three_br_units=0,
-                        four_br_units=0,
-                        five_br_units=0,
-                        six_br_units=0,
-                        unknown_br_units=0,
-                        counted_rental_units=0,
-                        counted_homeownership_units=8,
-                        all_counted_units=8,
-                        total_units=8,
-                    ),
                 ]
             ),
             # when_only_num_units_max_is_provided
@@ -809,7 +817,7 @@ class TestHousingUnitsRepository:
                     ),
                     HousingUnit(
                         uuid=str(uuid.uuid4()),
-                        project_id='project id 12',
+                        project_id='project id 13',
                         street_name='street name test 1',
                         borough='Queens',
                         postcode=1,
@@ -940,37 +948,6 @@ class TestHousingUnitsRepository:
                         all_counted_units=14,
                         total_units=14,
                     ),
-                    HousingUnit(
-                        uuid=str(uuid.uuid4()),
-                        project_id='project id 11',
-                        street_name='street name test 1',
-                        borough='Queens',
-                        postcode=1,
-                        reporting_construction_type='construction type test 1',
-                        project_name='project name 11',
-                        project_start_date=datetime.fromtimestamp(1545730073),
-                        community_board='community board 11',
-                        extended_affordability_status='extended affordability status 11',
-                        prevailing_wage_status='prevailing wage status 11',
-                        extremely_low_income_units=2,
-                        very_low_income_units=9,
-                        low_income_units=4,
-                        moderate_income_units=13,
-                        middle_income_units=0,
-                        other_income_units=1,
-                        studio_units=1,
-                        one_br_units=6,
-                        two_br_units=9,
-                        three_br_units=0,
-                        four_br_units=0,
-                        five_br_units=0,
-                        six_br_units=0,
-                        unknown_br_units=0,
-                        counted_rental_units=16,
-                        counted_homeownership_units=0,
-                        all_counted_units=16,
-                        total_units=16,
-                    ),
                     HousingUnit(
                         uuid=str(uuid.uuid4()),
                         project_id='project id 8',
@@ -1002,17 +979,6 @@ class TestHousingUnitsRepository:
                         all_counted_units=16,
                         total_units=16,
                     ),
-                ]
-            ),
-            # when_combination_of_all_fields_are_provided
-            (
-                'street name test 1',  # street_name
-                'Queens',  # borough
-                1,  # postcode
-                'construction type test 1',  # construction_type
-                10,  # num_units_min
-                16,  # num_units_max
-                [
                     HousingUnit(
                         uuid=str(uuid.uuid4()),
                         project_id='project id 11',
@@ -1044,6 +1010,17 @@ class TestHousingUnitsRepository:
                         all_counted_units=16,
                         total_units=16,
                     ),
+                ]
+            ),
+            # when_combination_of_all_fields_are_provided
+            (
+                'street name test 1',  # street_name
+                'Queens',  # borough
+                1,  # postcode
+                'construction type test 1',  # construction_type
+                10,  # num_units_min
+                16,  # num_units_max
+                [
                     HousingUnit(
                         uuid=str(uuid.uuid4()),
                         project_id='project id 6',
@@ -1075,6 +1052,37 @@ class TestHousingUnitsRepository:
                         all_counted_units=12,
                         total_units=12,
                     ),
+                    HousingUnit(
+                        uuid=str(uuid.uuid4()),
+                        project_id='project id 11',
+                        street_name='street name test 1',
+                        borough='Queens',
+                        postcode=1,
+                        reporting_construction_type='construction type test 1',
+                        project_name='project name 11',
+                        project_start_date=datetime.fromtimestamp(1545730073),
+                        community_board='community board 11',
+                        extended_affordability_status='extended affordability status 11',
+                        prevailing_wage_status='prevailing wage status 11',
+                        extremely_low_income_units=2,
+                        very_low_income_units=9,
+                        low_income_units=4,
+                        moderate_income_units=13,
+                        middle_income_units=0,
+                        other_income_units=1,
+                        studio_units=1,
+                        one_br_units=6,
+                        two_br_units=9,
+                        three_br_units=0,
+                        four_br_units=0,
+                        five_br_units=0,
+                        six_br_units=0,
+                        unknown_br_units=0,
+                        counted_rental_units=16,
+                        counted_homeownership_units=0,
+                        all_counted_units=16,
+                        total_units=16,
+                    ),
                 ]
             ),
             # when_combination_of_all_fields_are_provided_and_nothing_is_found
@@ -1124,11 +1132,103 @@ class TestHousingUnitsRepository:
         for housing_unit_result, expected_housing_unit in zip(results, expected_results):
             assert housing_unit_result == expected_housing_unit
 
+    @pytest.mark.parametrize('sort_key', HousingUnitSortKey)
+    @pytest.mark.asyncio
+    async def test_filter_paginates_with_keyset(
+            self, populate_housing_units, stub_housing_units, sort_key: HousingUnitSortKey
+    ) -> None:
+        all_results: List[HousingUnit] = await self.housing_units_repository.filter(sort_key=sort_key)
+
+        paged_results: List[HousingUnit] = []
+        after: Optional[Tuple[Any, int]] = None
+        while True:
+            page: List[HousingUnit] = await self.housing_units_repository.filter(
+                sort_key=sort_key, after=after, limit=5
+            )
+            paged_results.extend(page)
+            if len(page) < 5:
+                break
+            after = (getattr(page[-1], sort_key.value), page[-1].id)
+
+        assert len(all_results) == len(stub_housing_units)
+        assert [housing_unit.id for housing_unit in paged_results] == [housing_unit.id for housing_unit in all_results]
+        assert [getattr(housing_unit, sort_key.value) for housing_unit in all_results] == sorted(
+            getattr(housing_unit, sort_key.value) for housing_unit in all_results
+        )
+
+    @pytest.mark.asyncio
+    async def test_filter_rows(self, populate_housing_units, stub_housing_units) -> None:
+        housing_units: List[HousingUnit] = await self.housing_units_repository.filter(
+            borough='queens', sort_key=HousingUnitSortKey.total_units, limit=4
+        )
+
+        rows: List[Row] = await self.housing_units_repository.filter_rows(
+            fields=[HousingUnitField.project_id, HousingUnitField.uuid],
+            borough='queens',
+            sort_key=HousingUnitSortKey.total_units,
+            limit=3,
+        )
+
+        # Only the selected fields are retrieved, along with the id and sort value of the HousingUnits.
+        assert [list(row._mapping) for row in rows] == [['id', 'sort_value', 'project_id', 'uuid']] * len(rows)
+        assert [tuple(row) for row in rows] == [
+            (housing_unit.id, housing_unit.total_units, housing_unit.project_id, housing_unit.uuid)
+            for housing_unit in housing_units[:3]
+        ]
+
+        all_fields_rows: List[Row] = await self.housing_units_repository.filter_rows(
+            borough='queens',
+            sort_key=HousingUnitSortKey.total_units,
+            after=(rows[0].sort_value, rows[0].id),
+            limit=3,
+        )
+        assert list(all_fields_rows[0]._mapping) == ['id', 'sort_value', *HousingUnitField.values()]
+        assert [row.id for row in all_fields_rows] == [housing_unit.id for housing_unit in housing_units[1:]]
+
+    @pytest.mark.asyncio
+    async def test_stream_rows(self, populate_housing_units, stub_housing_units) -> None:
+        rows: List[Row] = await self.housing_units_repository.filter_rows(
+            fields=[HousingUnitField.project_id], sort_key=HousingUnitSortKey.street_name
+        )
+
+        batches: List[List[Row]] = [
+            batch async for batch in self.housing_units_repository.stream_rows(
+                fields=[HousingUnitField.project_id], sort_key=HousingUnitSortKey.street_name, batch_size=5
+            )
+        ]
+
+        assert [len(batch) for batch in batches[:-1]] == [5] * (len(batches) - 1)
+        assert 0 < len(batches[-1]) <= 5
+        assert [tuple(row) for batch in batches for row in batch] == [tuple(row) for row in rows]
+        assert len(rows) == len(stub_housing_units)
+
+    @pytest.mark.asyncio
+    async def test_count(self, populate_housing_units, stub_housing_units) -> None:
+        assert await self.housing_units_repository.count() == len(stub_housing_units)
+        assert await self.housing_units_repository.count(street_name='street name test 5', num_units_min=15) == 1
+
+    @pytest.mark.asyncio
+    async def test_estimate_count(self, populate_housing_units, stub_housing_units) -> None:
+        # The table statistics are not collected yet, so the exact count is returned.
+        assert await self.housing_units_repository.estimate_count(borough='queens') == await (
+            self.housing_units_repository.count(borough='queens')
+        )
+
+        with self.housing_units_repository.db_engine.get_session() as session:
+            with session.begin():
+                session.execute(text('ANALYZE {0}'.format(HousingUnit.__tablename__)))
+
+        assert await self.housing_units_repository.estimate_count() == len(stub_housing_units)
+        estimated_count: int = await self.housing_units_repository.estimate_count(
+            street_name="street name test 5's", num_units_min=15
+        )
+        assert 0 <= estimated_count <= len(stub_housing_units)
+
     @pytest.mark.asyncio
     async def test_save(self, populate_housing_units, stub_housing_units) -> None:
         await self.housing_units_repository.save(
             HousingUnit(
-                project_id='project id 12',
+                project_id='project id 14',
                 street_name='street name test 1',
                 borough='Queens',
                 postcode=1,
@@ -1166,11 +1266,63 @@ class TestHousingUnitsRepository:
 
         assert len(after_save_total_housing_units) == len(stub_housing_units) + 1
 
+    @pytest.mark.asyncio
+    async def test_save_increments_the_version_of_the_updated_housing_unit(
+            self, populate_housing_units, stub_housing_units
+    ) -> None:
+        housing_unit: HousingUnit = await self.housing_units_repository.get_by_uuid(
+            uuid=str(stub_housing_units[0].uuid)
+        )
+        assert housing_unit.version == 1
+        created_at: datetime = housing_unit.updated_at
+
+        housing_unit.total_units = 250
+        saved_housing_unit: HousingUnit = await self.housing_units_repository.save(housing_unit)
+
+        # The saved HousingUnit is refreshed with the version columns set by the database.
+        assert saved_housing_unit.version == 2
+        assert saved_housing_unit.updated_at >= created_at
+        retrieved_housing_unit: HousingUnit = await self.housing_units_repository.get_by_uuid(
+            uuid=str(stub_housing_units[0].uuid)
+        )
+        assert retrieved_housing_unit.version == 2
+        assert retrieved_housing_unit.total_units == 250
+
+    @pytest.mark.asyncio
+    async def test_save_raise_error_when_project_id_and_building_id_already_exist(
+            self, populate_housing_units, stub_housing_units
+    ) -> None:
+        # The HousingUnits without a building_id conflict on their project_id too.
+        expected_error: HousingUnitConflictError = HousingUnitConflictError(
+            "A Housing Unit with the project_id project id 1 and the building_id None already exists."
+        )
+
+        with pytest.raises(HousingUnitConflictError) as ex:
+            await self.housing_units_repository.save(
+                HousingUnit(
+                    project_id=stub_housing_units[0].project_id,
+                    building_id=stub_housing_units[0].building_id,
+                    street_name='street name test 1',
+                    borough='Queens',
+                    postcode=1,
+                    reporting_construction_type='construction type test 1',
+                    project_name='project name 1',
+                    project_start_date=datetime.fromtimestamp(1545730073),
+                    community_board='community board 1',
+                    extended_affordability_status='extended affordability status 1',
+                    prevailing_wage_status='prevailing wage status 1',
+                    total_units=25,
+                )
+            )
+
+        assert ex.value.args == expected_error.args
+        assert ex.value.status_code == 409
+
     def test_bulk_save(self, populate_housing_units, stub_housing_units) -> None:
         self.housing_units_repository.bulk_save(
             [
                 HousingUnit(
-                    project_id='project id 12',
+                    project_id='project id 14',
                     street_name='street name test 1',
                     borough='Queens',
                     postcode=1,
@@ -1200,7 +1352,7 @@ class TestHousingUnitsRepository:
                     total_units=25,
                 ),
                 HousingUnit(
-                    project_id='project id 12',
+                    project_id='project id 15',
                     street_name='street name test 1',
                     borough='Queens',
                     postcode=1,
@@ -1239,6 +1391,133 @@ class TestHousingUnitsRepository:
 
         assert len(after_save_total_housing_units) == len(stub_housing_units) + 2
 
+    def test_refresh_canonical_values(self, populate_housing_units, stub_housing_units) -> None:
+        with self.housing_units_repository.db_engine.get_session() as session:
+            with session.begin():
+                session.execute(
+                    text("UPDATE housingunits SET borough = 'QUEENS' WHERE project_id = 'project id 11'")
+                )
+
+        self.housing_units_repository.refresh_canonical_values()
+
+        with self.housing_units_repository.db_engine.get_session() as session:
+            borough_counts: Dict[str, int] = dict(session.execute(
+                select(HousingUnitCanonicalValue.value, HousingUnitCanonicalValue.housing_units).where(
+                    HousingUnitCanonicalValue.column_name == 'borough'
+                )
+            ).all())
+            postcodes: List[str] = session.execute(
+                select(HousingUnitCanonicalValue.value).where(HousingUnitCanonicalValue.column_name == 'postcode')
+            ).scalars().all()
+
+        expected_borough_counts: Dict[str, int] = {
+            borough: sum(housing_unit.borough == borough for housing_unit in stub_housing_units)
+            for borough in {housing_unit.borough for housing_unit in stub_housing_units}
+        }
+        expected_borough_counts['Queens'] -= 1
+        expected_borough_counts['QUEENS'] = 1
+        assert borough_counts == expected_borough_counts
+        assert sorted(postcodes) == sorted({str(housing_unit.postcode) for housing_unit in stub_housing_units})
+
+    @pytest.mark.asyncio
+    async def test_filtering_by_the_values_collected_by_the_writes(
+            self, populate_housing_units, stub_housing_units
+    ) -> None:
+        assert await self.housing_units_repository.count(street_name='street name test 14') == 0
+
+        self.housing_units_bulk_loader.bulk_upsert([
+            dict(
+                project_id='project id 14',
+                building_id=14,
+                street_name='STREET NAME TEST 14',
+                borough='Queens',
+                postcode=14,
+                reporting_construction_type='construction type test 1',
+                project_name='project name 14',
+                project_start_date=datetime.fromtimestamp(1545730073),
+                community_board='community board 14',
+                extended_affordability_status='extended affordability status 14',
+                prevailing_wage_status='prevailing wage status 14',
+                total_units=14,
+            )
+        ])
+
+        # The new values are collected by the write, and the dictionaries of the worker are refreshed.
+        assert await self.housing_units_repository.count(street_name='street name test 14') == 1
+        assert await self.housing_units_repository.count(postcode=14, borough='QUEENS') == 1
+
+    @pytest.mark.asyncio
+    async def test_near_and_within(self, populate_housing_units) -> None:
+        # The HousingUnits 20, 21 and 22 are about 110m apart from each other along the meridian, and the populated
+        # HousingUnits have no location.
+        self.housing_units_bulk_loader.bulk_upsert([
+            dict(
+                project_id='project id {0}'.format(index),
+                building_id=index,
+                street_name='street name test {0}'.format(index),
+                borough='Brooklyn',
+                reporting_construction_type='construction type test 1',
+                project_name='project name {0}'.format(index),
+                project_start_date=datetime.fromtimestamp(1545730073),
+                community_board='community board {0}'.format(index),
+                extended_affordability_status='extended affordability status {0}'.format(index),
+                prevailing_wage_status='prevailing wage status {0}'.format(index),
+                latitude=40.68 + (index - 20) * 0.001,
+                longitude=-73.91,
+                total_units=index,
+            )
+            for index in (20, 21, 22)
+        ])
+
+        near_rows: List[Row] = await self.housing_units_repository.near(
+            lat=40.6801, lon=-73.91, radius_m=200, limit=10
+        )
+        within_rows: List[Row] = await self.housing_units_repository.within(
+            min_lon=-73.92, min_lat=40.6805, max_lon=-73.90, max_lat=40.683, limit=10
+        )
+        limited_rows: List[Row] = await self.housing_units_repository.near(
+            lat=40.6801, lon=-73.91, radius_m=1000, limit=1
+        )
+
+        assert [row.project_id for row in near_rows] == ['project id 20', 'project id 21']
+        assert near_rows[0].distance_m == pytest.approx(11.1, abs=0.1)
+        assert near_rows[1].distance_m == pytest.approx(100.2, abs=0.1)
+        assert [row.project_id for row in within_rows] == ['project id 22', 'project id 21']
+        assert [row.project_id for row in limited_rows] == ['project id 20']
+
+    @pytest.mark.asyncio
+    async def test_tile_cells(self, populate_housing_units) -> None:
+        self.housing_units_bulk_loader.bulk_upsert([
+            dict(
+                project_id='project id {0}'.format(index),
+                building_id=index,
+                street_name='street name test {0}'.format(index),
+                borough='Brooklyn',
+                reporting_construction_type='construction type test 1',
+                project_name='project name {0}'.format(index),
+                project_start_date=datetime.fromtimestamp(1545730073),
+                community_board='community board {0}'.format(index),
+                extended_affordability_status='extended affordability status {0}'.format(index),
+                prevailing_wage_status='prevailing wage status {0}'.format(index),
+                latitude=40.68 + (index - 20) * 0.001,
+                longitude=-73.91,
+                total_units=index,
+            )
+            for index in (20, 21, 22)
+        ])
+
+        world_rows: List[Row] = await self.housing_units_repository.tile_cells(z=0, x=0, y=0)
+        city_rows: List[Row] = await self.housing_units_repository.tile_cells(z=12, x=1207, y=1540)
+        other_rows: List[Row] = await self.housing_units_repository.tile_cells(z=12, x=1207, y=1541)
+
+        # The populated HousingUnits have no location, and are not in any tile.
+        assert [(row.cell_x, row.cell_y, row.count, row.total_units) for row in world_rows] == [(2, 3, 3, 63)]
+        assert world_rows[0].latitude == pytest.approx(40.681)
+        assert [(row.cell_x, row.cell_y, row.count, row.total_units) for row in city_rows] == [
+            (0, 3, 2, 43), (0, 4, 1, 20)
+        ]
+        assert other_rows == []
+
     @pytest.mark.asyncio
     async def test_delete(self, populate_housing_units, stub_housing_units) -> None:
         async with self.housing_units_repository.db_engine.get_async_session() as session:
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Type, Optional
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+from pandas import DataFrame
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+
+from application.socrata.client import SocrataClient
+
+
+class StubSocrataRequestHandler(BaseHTTPRequestHandler):
+    """
+    Stub of the data.cityofnewyork.us resource api, serving the records with the $limit/$offset paging.
+    """
+    records: List[Dict[str, Any]] = []
+    # The number of times that each page offset responds with an error status, before responding with the records.
+    failures: Dict[int, int] = {}
+    failure_status_code: int = 500
+    # The seconds that each page offset waits before responding.
+    delays: Dict[int, float] = {}
+    requested_offsets: List[int] = []
+    requested_queries: List[Dict[str, List[str]]] = []
+    in_flight: int = 0
+    max_in_flight: int = 0
+    lock: threading.Lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        query: Dict[str, List[str]] = parse_qs(urlparse(self.path).query)
+        offset: int = int(query['$offset'][0]) if '$offset' in query else 0
+        limit: int = int(query['$limit'][0])
+
+        with self.lock:
+            self.requested_offsets.append(offset)
+            self.requested_queries.append(query)
+            type(self).in_flight += 1
+            type(self).max_in_flight = max(self.max_in_flight, self.in_flight)
+            should_fail: bool = self.failures.get(offset, 0) > 0
+            if should_fail:
+                self.failures[offset] -= 1
+
+        time.sleep(self.delays.get(offset, 0.0))
+
+        with self.lock:
+            type(self).in_flight -= 1
+
+        if should_fail:
+            self.send_response(self.failure_status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({'message': 'Stub error.'}).encode('utf-8'))
+            return
+
+        body: bytes = json.dumps(self.records[offset:offset + limit]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class TestSocrataClient:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.handler: Type[StubSocrataRequestHandler] = type(
+            'TestStubSocrataRequestHandler',
+            (StubSocrataRequestHandler,),
+            {
+                'records': stub_socrata_records,
+                'failures': {},
+                'delays': {},
+                'requested_offsets': [],
+                'requested_queries': [],
+                'lock': threading.Lock(),
+            }
+        )
+        self.server: ThreadingHTTPServer = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        server_thread: threading.Thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+
+        yield
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _socrata_client(self, page_size: int, max_workers: int) -> SocrataClient:
+        return SocrataClient(
+            hbd_dataset_id='hg8x-zxpr',
+            domain='127.0.0.1:{0}'.format(self.server.server_address[1]),
+            page_size=page_size,
+            max_workers=max_workers,
+            retry_backoff_seconds=0.01,
+            session_adapter={'prefix': 'http://', 'adapter': HTTPAdapter()},
+        )
+
+    def test_housing_units_dataset_pages_are_yielded_in_order(self, stub_socrata_records) -> None:
+        # The first pages respond last, so the pages are downloaded out of order.
+        self.handler.delays.update({0: 0.3, 250: 0.2})
+
+        pages: List[DataFrame] = list(self._socrata_client(page_size=250, max_workers=3).housing_units_dataset_pages())
+
+        assert [len(page) for page in pages] == [250, 250, 250, 250, 200]
+        assert [
+            project_id for page in pages for project_id in page['project_id']
+        ] == [record['project_id'] for record in stub_socrata_records]
+        assert self.handler.max_in_flight <= 3
+
+    def test_housing_units_dataset_pages_retry_on_server_errors(self, stub_socrata_records) -> None:
+        self.handler.failures.update({250: 2})
+
+        pages: List[DataFrame] = list(self._socrata_client(page_size=250, max_workers=2).housing_units_dataset_pages())
+
+        assert sum(len(page) for page in pages) == len(stub_socrata_records)
+        assert self.handler.requested_offsets.count(250) == 3
+
+    def test_housing_units_dataset_pages_raise_error_on_client_errors(self) -> None:
+        self.handler.failures.update({0: 1})
+        self.handler.failure_status_code = 400
+
+        with pytest.raises(HTTPError):
+            list(self._socrata_client(page_size=250, max_workers=2).housing_units_dataset_pages())
+
+        assert self.handler.requested_offsets.count(0) == 1
+
+    def test_download_housing_units_dataset_is_not_truncated(self, stub_socrata_records) -> None:
+        dataset: DataFrame = self._socrata_client(page_size=100, max_workers=4).download_housing_units_dataset()
+
+        assert len(dataset) == len(stub_socrata_records)
+        assert list(dataset.columns) == [*SocrataClient.DTYPES, SocrataClient.UPDATED_AT_FIELD]
+        assert dataset['postcode'].isna().sum() == len(stub_socrata_records) / 2
+
+    @pytest.mark.parametrize(
+        'updated_since, expected_where, expected_order',
+        [
+            # Full download of the dataset.
+            (None, None, ':id'),
+            # Incremental download of the rows updated since the high-water mark.
+            ('2022-01-15T00:00:00.000Z', ":updated_at >= '2022-01-15T00:00:00.000Z'", ':updated_at, :id'),
+        ]
+    )
+    def test_housing_units_dataset_pages_request_the_rows_updated_since(
+            self,
+            updated_since: Optional[str],
+            expected_where: Optional[str],
+            expected_order: str,
+    ) -> None:
+        socrata_client: SocrataClient = self._socrata_client(page_size=500, max_workers=2)
+        list(socrata_client.housing_units_dataset_pages(updated_since=updated_since))
+
+        for query in self.handler.requested_queries:
+            assert query.get('$where', [None])[0] == expected_where
+            assert query['$order'][0] == expected_order
+            assert query['$$exclude_system_fields'][0] == 'false'
@@ -0,0 +1,40 @@
+from typing import Optional
+
+import pytest
+
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.socrata.repositories import IngestionStateRepository
+
+
+class TestIngestionStateRepository:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.ingestion_state_repository = IngestionStateRepository(
+            db_engine=DatabaseEngineWrapper()
+        )
+
+    def test_get_high_water_mark_when_dataset_is_not_ingested(self) -> None:
+        high_water_mark: Optional[str] = self.ingestion_state_repository.get_high_water_mark(dataset_id='hg8x-zxpr')
+
+        assert high_water_mark is None
+
+    def test_save_high_water_mark(self) -> None:
+        self.ingestion_state_repository.save_high_water_mark(
+            dataset_id='hg8x-zxpr', high_water_mark='2022-01-15T00:00:00.000Z'
+        )
+        self.ingestion_state_repository.save_high_water_mark(
+            dataset_id='hg8x-zxpr', high_water_mark='2022-01-28T00:00:00.000Z'
+        )
+        # An ingestion without rows keeps the saved high-water mark.
+        self.ingestion_state_repository.save_high_water_mark(dataset_id='hg8x-zxpr', high_water_mark=None)
+        self.ingestion_state_repository.save_high_water_mark(
+            dataset_id='other-dataset', high_water_mark='2022-01-01T00:00:00.000Z'
+        )
+
+        assert self.ingestion_state_repository.get_high_water_mark(
+            dataset_id='hg8x-zxpr'
+        ) == '2022-01-28T00:00:00.000Z'
+        assert self.ingestion_state_repository.get_high_water_mark(
+            dataset_id='other-dataset'
+        ) == '2022-01-01T00:00:00.000Z'
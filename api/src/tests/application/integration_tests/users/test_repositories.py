@@ -0,0 +1,35 @@
+from typing import Optional
+
+import pytest
+
+from application.infrastructure.database.database import DatabaseEngineWrapper
+from application.users.enums import Group
+from application.users.models import UserPrincipal
+from application.users.repositories import UserRepository
+
+
+class TestUserRepository:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.user_repository = UserRepository(db_engine=DatabaseEngineWrapper())
+
+    @pytest.mark.parametrize(
+        'email, expected_principal',
+        [
+            (
+                'customer_user@customer.com',
+                UserPrincipal(email='customer_user@customer.com', user_group=Group.customer)
+            ),
+            (
+                'admin_user@admin.com',
+                UserPrincipal(email='admin_user@admin.com', user_group=Group.admin)
+            ),
+            ('unknown_user@customer.com', None),
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_get_principal_by_email(
+            self, populate_users, email: str, expected_principal: Optional[UserPrincipal]
+    ) -> None:
+        assert await self.user_repository.get_principal_by_email(email) == expected_principal
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark of the authorization overhead per request of the protected endpoints, comparing the verification of
+the bearer JWT by decoding it on every request with the verification through the cache of the verified JWT bodies.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from unittest import mock
+
+import pytest
+from starlette.requests import Request
+
+from application.authentication.models import JwtBody
+from application.authentication.services import GetJWTService
+from application.authentication.utils import BearerJWTAuthorizationService
+from application.authentication.validators import JwtValidator
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.configurations.models import Configuration
+from application.users.enums import Group
+
+REQUESTS = 100000
+
+
+@pytest.mark.asyncio
+async def test_authorization_time_per_request(configuration: None) -> None:
+    jwt_token: str = GetJWTService(jwt_validator=JwtValidator(), config=Configuration.get()).apply(
+        jwt_body=JwtBody(user_id='customer_user@customer.com', group=Group.customer.value)
+    )
+    request: Request = Request(
+        scope={'type': 'http', 'headers': [(b'authorization', 'Bearer {0}'.format(jwt_token).encode())]}
+    )
+    bearer_jwt_authorization_service: BearerJWTAuthorizationService = BearerJWTAuthorizationService(
+        permission_groups=[Group.customer, Group.admin]
+    )
+
+    # Every request decodes the token, as the cache never holds it.
+    with mock.patch('application.authentication.utils.VERIFIED_JWTS_CACHE', TTLCache(max_size=0, ttl_seconds=None)):
+        started_at: float = time.process_time()
+        for _ in range(REQUESTS):
+            await bearer_jwt_authorization_service(request)
+        decoded_elapsed: float = time.process_time() - started_at
+
+    with mock.patch('application.authentication.utils.VERIFIED_JWTS_CACHE', TTLCache(max_size=10, ttl_seconds=None)):
+        started_at = time.process_time()
+        for _ in range(REQUESTS):
+            await bearer_jwt_authorization_service(request)
+        cached_elapsed: float = time.process_time() - started_at
+
+    print(
+        '\ndecoded: {0:.2f}us CPU, cached: {1:.2f}us CPU per request, {2:.1f}x faster'.format(
+            decoded_elapsed / REQUESTS * 1e6,
+            cached_elapsed / REQUESTS * 1e6,
+            decoded_elapsed / cached_elapsed,
+        )
+    )
+    assert cached_elapsed < decoded_elapsed
@@ -0,0 +1,82 @@
+from typing import List
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from application.authentication.models import JwtBody
+from application.authentication.services import GetJWTService
+from application.authentication.utils import BearerJWTAuthorizationService
+from application.authentication.validators import JwtValidator
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.configurations.models import Configuration
+from application.users.enums import Group
+
+
+class TestBearerJWTAuthorizationService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, configuration: None) -> None:
+        self.customer_jwt_token: str = GetJWTService(jwt_validator=JwtValidator(), config=Configuration.get()).apply(
+            jwt_body=JwtBody(user_id='customer_user@customer.com', group=Group.customer.value)
+        )
+        self.expires: float = BearerJWTAuthorizationService().decode_jwt(self.customer_jwt_token).expires
+        # The current time, shared by the token expiry checks and the cache clock.
+        self.now: List[float] = [self.expires - 10]
+
+        with mock.patch(
+                'application.authentication.utils.VERIFIED_JWTS_CACHE',
+                TTLCache(max_size=10, ttl_seconds=None, clock=lambda: self.now[0]),
+        ), mock.patch('application.authentication.utils.time.time', side_effect=lambda: self.now[0]):
+            yield
+
+    def test_verify_jwt_decodes_the_token_once_until_it_expires(self) -> None:
+        bearer_jwt_authorization_service: BearerJWTAuthorizationService = BearerJWTAuthorizationService(
+            permission_groups=[Group.customer, Group.admin]
+        )
+
+        with mock.patch.object(
+                bearer_jwt_authorization_service, 'decode_jwt', wraps=bearer_jwt_authorization_service.decode_jwt
+        ) as mock_decode_jwt:
+            first_jwt_body: JwtBody = bearer_jwt_authorization_service.verify_jwt(jwt_token=self.customer_jwt_token)
+            second_jwt_body: JwtBody = bearer_jwt_authorization_service.verify_jwt(jwt_token=self.customer_jwt_token)
+
+            assert first_jwt_body == JwtBody(
+                user_id='customer_user@customer.com', group=Group.customer.value, expires=self.expires
+            )
+            assert second_jwt_body is first_jwt_body
+            mock_decode_jwt.assert_called_once_with(self.customer_jwt_token)
+
+            # The expired token is evicted, and rejected by decoding it again.
+            self.now[0] = self.expires + 1
+            with pytest.raises(HTTPException) as ex:
+                bearer_jwt_authorization_service.verify_jwt(jwt_token=self.customer_jwt_token)
+
+            assert ex.value.detail == 'Invalid token.'
+            assert mock_decode_jwt.call_count == 2
+
+    def test_verify_jwt_checks_the_permission_groups_of_the_cached_tokens(self) -> None:
+        BearerJWTAuthorizationService(permission_groups=[Group.customer]).verify_jwt(
+            jwt_token=self.customer_jwt_token
+        )
+
+        with pytest.raises(HTTPException) as ex:
+            BearerJWTAuthorizationService(permission_groups=[Group.admin]).verify_jwt(
+                jwt_token=self.customer_jwt_token
+            )
+
+        assert ex.value.status_code == 403
+        assert ex.value.detail == "You can't access this resource."
+
+    @mock.patch('application.authentication.utils.VERIFIED_JWTS_CACHE')
+    def test_verify_jwt_does_not_cache_the_invalid_tokens(self, mock_verified_jwts_cache: MagicMock) -> None:
+        mock_verified_jwts_cache.get.return_value = None
+
+        with pytest.raises(HTTPException) as ex:
+            BearerJWTAuthorizationService(permission_groups=[Group.customer]).verify_jwt(
+                jwt_token=self.customer_jwt_token[:-2]
+            )
+
+        assert ex.value.detail == 'Invalid token.'
+        mock_verified_jwts_cache.set.assert_not_called()
@@ -0,0 +1,40 @@
+"""
+Micro-benchmark of the Socrata dataframe conversion to HousingUnit mappings, comparing the row by row
+HousingUnit.mapping_from_dict over every chunk with the vectorized housing_unit_mappings_from_dataframe over
+every downloaded page.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+from typing import List, Dict
+
+from pandas import DataFrame
+
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.socrata.client import SocrataClient
+
+BENCHMARK_ROWS = 50000
+
+
+def test_housing_unit_mappings_conversion_time(stub_socrata_records: List[Dict[str, str]]) -> None:
+    records: List[Dict[str, str]] = (
+        stub_socrata_records * (BENCHMARK_ROWS // len(stub_socrata_records) + 1)
+    )[:BENCHMARK_ROWS]
+    dataframe: DataFrame = SocrataClient.records_to_dataframe(records)
+
+    started_at: float = time.process_time()
+    for _chunk in SocrataClient.housing_unit_dataset_generator(dataframe):
+        [HousingUnit.mapping_from_dict(row) for row in _chunk.T.to_dict().values()]
+    row_by_row_elapsed: float = time.process_time() - started_at
+
+    started_at = time.process_time()
+    for pos in range(0, len(dataframe), SocrataClient.PAGE_SIZE):
+        housing_unit_mappings_from_dataframe(dataframe.iloc[pos:pos + SocrataClient.PAGE_SIZE])
+    vectorized_elapsed: float = time.process_time() - started_at
+
+    print(
+        '\nrow by row: {0:.2f}s CPU, vectorized: {1:.2f}s CPU, {2:.1f}x faster for {3} rows'.format(
+            row_by_row_elapsed, vectorized_elapsed, row_by_row_elapsed / vectorized_elapsed, BENCHMARK_ROWS
+        )
+    )
+    assert vectorized_elapsed < row_by_row_elapsed
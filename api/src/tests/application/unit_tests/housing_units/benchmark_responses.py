@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of the filtered HousingUnits JSON serialisation, comparing the response model validation and FastAPI
+JSON encoding of the filter responses with the filter_housing_units_content, which serialises the rows with orjson.
+The benchmarks are not collected with the rest of the tests, and run with the Makefile command make run-benchmarks.
+"""
+import time
+import uuid
+from collections import namedtuple
+from typing import List, Any
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic.fields import ModelField
+
+from application.housing_units.enums import HousingUnitField
+from application.rest_api.housing_units.responses import filter_housing_units_content
+from application.rest_api.housing_units.schemas import FilterHousingUnits
+
+# The rows of the filter_rows, selecting all the HousingUnit fields.
+HousingUnitRow = namedtuple('HousingUnitRow', ['id', 'sort_value', *HousingUnitField.values()])
+
+
+@pytest.mark.parametrize('benchmark_rows', [1000, 10000, 100000])
+@pytest.mark.asyncio
+async def test_filter_housing_units_serialisation_time(benchmark_rows: int) -> None:
+    rows: List[Any] = [
+        HousingUnitRow(
+            id=index,
+            sort_value=index,
+            uuid=uuid.uuid4(),
+            project_id=str(40000 + index),
+            street_name='3 AVENUE',
+            borough='Manhattan',
+            postcode=10035 if index % 2 else None,
+            reporting_construction_type='New Construction',
+            total_units=index % 400,
+        )
+        for index in range(benchmark_rows)
+    ]
+    filter_housing_units: FilterHousingUnits = FilterHousingUnits.construct(
+        housing_units=rows, total=benchmark_rows, next_cursor=None
+    )
+    response_field: ModelField = create_response_field(name='filter_housing_units', type_=FilterHousingUnits)
+
+    started_at: float = time.process_time()
+    response_model_body: bytes = JSONResponse(
+        content=await serialize_response(
+            field=response_field, response_content=filter_housing_units, exclude_unset=True
+        )
+    ).body
+    response_model_elapsed: float = time.process_time() - started_at
+
+    started_at = time.process_time()
+    orjson_body: bytes = filter_housing_units_content(filter_housing_units)
+    orjson_elapsed: float = time.process_time() - started_at
+
+    print(
+        '\nresponse model: {0:.3f}s CPU, orjson: {1:.3f}s CPU, {2:.1f}x faster for {3} rows'.format(
+            response_model_elapsed, orjson_elapsed, response_model_elapsed / orjson_elapsed, benchmark_rows
+        )
+    )
+    assert orjson_elapsed < response_model_elapsed
+    assert len(orjson_body) <= len(response_model_body)
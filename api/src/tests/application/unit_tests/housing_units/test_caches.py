@@ -0,0 +1,42 @@
+from typing import Optional
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.housing_units.caches import housing_unit_cache_key, invalidate_housing_units_caches
+
+
+@pytest.mark.parametrize(
+    'uuid, expected_key',
+    [
+        ('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3', '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+        ('3F6BF0E4-CE1D-44BF-9E88-E627F6F756F3', '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+        ('3f6bf0e4ce1d44bf9e88e627f6f756f3', '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+        ('not a uuid', None),
+    ]
+)
+def test_housing_unit_cache_key(uuid: str, expected_key: Optional[str]) -> None:
+    assert housing_unit_cache_key(uuid) == expected_key
+
+
+@pytest.mark.parametrize(
+    'uuid, expected_key',
+    [
+        ('3F6BF0E4-CE1D-44BF-9E88-E627F6F756F3', '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+        (None, None),
+        ('not a uuid', None),
+    ]
+)
+@mock.patch('application.housing_units.caches.HOUSING_UNITS_CACHE_INVALIDATIONS')
+@mock.patch('application.housing_units.caches.HOUSING_UNITS_CACHE_GENERATION')
+def test_invalidate_housing_units_caches(
+        mock_housing_units_cache_generation: MagicMock,
+        mock_housing_units_cache_invalidations: MagicMock,
+        uuid: Optional[str],
+        expected_key: Optional[str],
+) -> None:
+    invalidate_housing_units_caches(uuid=uuid)
+
+    mock_housing_units_cache_generation.bump.assert_called_once()
+    mock_housing_units_cache_invalidations.publish.assert_called_once_with(expected_key)
@@ -0,0 +1,59 @@
+from typing import Any
+
+import pytest
+
+from application.housing_units.cursors import encode_cursor, decode_cursor
+from application.housing_units.enums import HousingUnitSortKey
+from application.housing_units.errors import InvalidCursorError
+
+
+class TestCursors:
+
+    @pytest.mark.parametrize(
+        'sort_key, sort_value',
+        [
+            (HousingUnitSortKey.id, 12),
+            (HousingUnitSortKey.street_name, 'street name, test "14" ü'),
+            (HousingUnitSortKey.total_units, 0),
+        ]
+    )
+    def test_decode_cursor_returns_the_encoded_position(self, sort_key: HousingUnitSortKey, sort_value: Any) -> None:
+        cursor: str = encode_cursor(sort_key, sort_value, 12)
+
+        assert cursor.isascii() and '=' not in cursor
+        assert decode_cursor(cursor, sort_key) == (sort_value, 12)
+
+    @pytest.mark.parametrize(
+        'cursor, sort_key, expected_message',
+        [
+            # when_cursor_is_not_base64
+            ('not a cursor!', HousingUnitSortKey.id, "The provided cursor is not valid."),
+            # when_cursor_is_not_a_position
+            (
+                encode_cursor(HousingUnitSortKey.id, 1, 1)[:-4],
+                HousingUnitSortKey.id,
+                "The provided cursor is not valid.",
+            ),
+            # when_cursor_belongs_to_another_sort_key
+            (
+                encode_cursor(HousingUnitSortKey.borough, 'Bronx', 1),
+                HousingUnitSortKey.total_units,
+                "The provided cursor is not valid for sorting by total_units.",
+            ),
+            # when_cursor_sort_value_has_wrong_type
+            (
+                encode_cursor(HousingUnitSortKey.total_units, 'Bronx', 1),
+                HousingUnitSortKey.total_units,
+                "The provided cursor is not valid.",
+            ),
+        ]
+    )
+    def test_decode_cursor_raise_error_when_cursor_is_not_valid(
+            self, cursor: str, sort_key: HousingUnitSortKey, expected_message: str
+    ) -> None:
+        expected_error: InvalidCursorError = InvalidCursorError(expected_message)
+
+        with pytest.raises(InvalidCursorError) as ex:
+            decode_cursor(cursor, sort_key)
+
+        assert ex.value.args == expected_error.args
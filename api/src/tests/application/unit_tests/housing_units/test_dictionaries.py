@@ -0,0 +1,91 @@
+from typing import List, Tuple, Any, Optional
+
+import pytest
+
+from application.housing_units.dictionaries import StreetNamesDictionary, StreetNameSuggestion, \
+    HousingUnitDictionaries, normalise_value
+
+
+class TestStreetNamesDictionary:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        street_name_counts: List[Tuple[str, int]] = [
+            ('RALPH AVENUE', 12),
+            ('RANDALL AVENUE', 30),
+            ('Ralph  Avenue', 3),
+            ('RALEIGH PLACE', 12),
+            ('3 AVENUE', 40),
+            ('', 5),
+        ]
+        self.street_names: StreetNamesDictionary = StreetNamesDictionary(street_name_counts)
+
+    def test_normalise_value(self) -> None:
+        assert normalise_value('  Ralph \t AVENUE ') == 'ralph avenue'
+
+    def test_merges_the_spellings_of_the_same_street(self) -> None:
+        assert len(self.street_names) == 4
+        assert self.street_names.complete(prefix='ralph', limit=10) == [
+            StreetNameSuggestion(street_name='RALPH AVENUE', housing_units=15),
+        ]
+
+    def test_complete_ranks_by_the_housing_units_and_then_by_name(self) -> None:
+        assert self.street_names.complete(prefix=' Ra', limit=10) == [
+            StreetNameSuggestion(street_name='RANDALL AVENUE', housing_units=30),
+            StreetNameSuggestion(street_name='RALPH AVENUE', housing_units=15),
+            StreetNameSuggestion(street_name='RALEIGH PLACE', housing_units=12),
+        ]
+
+    @pytest.mark.parametrize(
+        'prefix, limit, expected_street_names',
+        [
+            ('ra', 1, ['RANDALL AVENUE']),
+            ('ralph avenue', 10, ['RALPH AVENUE']),
+            ('3', 10, ['3 AVENUE']),
+            ('rz', 10, []),
+            ('', 10, []),
+            ('   ', 10, []),
+        ]
+    )
+    def test_complete(self, prefix: str, limit: int, expected_street_names: List[str]) -> None:
+        assert [
+            suggestion.street_name for suggestion in self.street_names.complete(prefix=prefix, limit=limit)
+        ] == expected_street_names
+
+
+class TestHousingUnitDictionaries:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.dictionaries: HousingUnitDictionaries = HousingUnitDictionaries([
+            ('borough', 'Bronx', 120),
+            ('borough', 'BRONX', 2),
+            ('borough', 'Staten Island', 40),
+            ('postcode', '10001', 7),
+            ('street_name', 'RALPH AVENUE', 12),
+            ('street_name', 'Ralph Avenue', 3),
+        ])
+
+    @pytest.mark.parametrize(
+        'column_name, value, expected_values',
+        [
+            # Every stored spelling of the value is kept, so that the HousingUnits of each of them are matched.
+            ('borough', 'bronx', ('BRONX', 'Bronx')),
+            ('borough', 'BRONX', ('BRONX', 'Bronx')),
+            ('borough', ' staten   ISLAND ', ('Staten Island',)),
+            ('borough', 'Atlantis', None),
+            ('postcode', 10001, ('10001',)),
+            ('postcode', 10002, None),
+            ('street_name', 'ralph avenue', ('RALPH AVENUE', 'Ralph Avenue')),
+            ('reporting_construction_type', 'Preservation', ('Preservation',)),
+        ]
+    )
+    def test_canonical_values(
+            self, column_name: str, value: Any, expected_values: Optional[Tuple[str, ...]]
+    ) -> None:
+        assert self.dictionaries.canonical_values(column_name, value) == expected_values
+
+    def test_street_names(self) -> None:
+        assert self.dictionaries.street_names.complete(prefix='ra', limit=10) == [
+            StreetNameSuggestion(street_name='RALPH AVENUE', housing_units=15),
+        ]
@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+import pytest
+
+from application.housing_units.etags import housing_unit_etag, housing_unit_last_modified, \
+    housing_units_page_etag, is_not_modified
+from application.housing_units.models import HousingUnit
+
+
+def test_housing_unit_validators() -> None:
+    housing_unit: HousingUnit = HousingUnit(version=2, updated_at=datetime(2022, 1, 22, 10, 14, 37, 518203))
+
+    assert housing_unit_etag(housing_unit) == 'W/"2-20220122101437518203"'
+    assert housing_unit_last_modified(housing_unit) == 'Sat, 22 Jan 2022 10:14:37 GMT'
+
+    # Every write changes the ETag, even when the version is the same one of a deleted and created again HousingUnit.
+    assert housing_unit_etag(HousingUnit(version=3, updated_at=housing_unit.updated_at)) != 'W/"2-20220122101437518203"'
+    assert housing_unit_etag(HousingUnit(version=2, updated_at=datetime(2022, 1, 23))) != 'W/"2-20220122101437518203"'
+
+
+def test_housing_units_page_etag() -> None:
+    assert housing_units_page_etag((1, ('BRONX',), 'id', 100)) == housing_units_page_etag((1, ('BRONX',), 'id', 100))
+    assert housing_units_page_etag((1, ('BRONX',), 'id', 100)) != housing_units_page_etag((2, ('BRONX',), 'id', 100))
+    assert housing_units_page_etag((1, ('BRONX',), 'id', 100)).startswith('W/"')
+
+
+@pytest.mark.parametrize(
+    'if_none_match, if_modified_since, expected_not_modified',
+    [
+        # The ETags are compared weakly, within the list of the If-None-Match ETags.
+        ('W/"2-20220122101437518203"', None, True),
+        ('"2-20220122101437518203"', None, True),
+        ('W/"1-20220121000000000000", W/"2-20220122101437518203"', None, True),
+        ('*', None, True),
+        ('W/"1-20220121000000000000"', None, False),
+        # The If-Modified-Since is ignored when If-None-Match is provided.
+        ('W/"1-20220121000000000000"', 'Sat, 22 Jan 2022 10:14:37 GMT', False),
+        # The HTTP dates are compared with a precision of one second.
+        (None, 'Sat, 22 Jan 2022 10:14:37 GMT', True),
+        (None, 'Sun, 23 Jan 2022 00:00:00 GMT', True),
+        (None, 'Sat, 22 Jan 2022 10:14:36 GMT', False),
+        (None, 'not a date', False),
+        (None, None, False),
+    ]
+)
+def test_is_not_modified(
+        if_none_match: Optional[str],
+        if_modified_since: Optional[str],
+        expected_not_modified: bool,
+) -> None:
+    assert is_not_modified(
+        etag='W/"2-20220122101437518203"',
+        if_none_match=if_none_match,
+        last_modified=datetime(2022, 1, 22, 10, 14, 37, 518203),
+        if_modified_since=if_modified_since,
+    ) == expected_not_modified
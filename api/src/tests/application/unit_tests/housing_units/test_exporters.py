@@ -0,0 +1,69 @@
+import io
+from datetime import datetime
+from typing import List
+
+import pyarrow
+import pyarrow.parquet
+import pytest
+
+from application.housing_units.enums import ExportFormat
+from application.housing_units.exporters import EXPORT_SCHEMA, housing_units_record_batch, HousingUnitsExportWriter
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+def test_export_schema() -> None:
+    assert EXPORT_SCHEMA.names == HousingUnitsRepository.EXPORT_COLUMNS
+    assert EXPORT_SCHEMA.field('uuid').type == pyarrow.string()
+    assert EXPORT_SCHEMA.field('project_id').type == pyarrow.string()
+    assert EXPORT_SCHEMA.field('one_br_units').type == pyarrow.int64()
+    assert EXPORT_SCHEMA.field('latitude').type == pyarrow.float64()
+    assert EXPORT_SCHEMA.field('project_start_date').type == pyarrow.timestamp('us')
+
+
+def test_housing_units_record_batch() -> None:
+    values: dict = {
+        'uuid': 'e3b3326c-617a-4836-8fe0-3c17390f0bd4',
+        'project_id': '44218',
+        'one_br_units': 2,
+        'latitude': 40.71,
+        'project_start_date': datetime.fromtimestamp(1545730073),
+    }
+    rows: List[tuple] = [
+        tuple(values.get(field.name) for field in EXPORT_SCHEMA),
+        tuple(None for _ in EXPORT_SCHEMA),
+    ]
+
+    record_batch: pyarrow.RecordBatch = housing_units_record_batch(rows)
+
+    assert record_batch.num_rows == 2
+    assert record_batch.to_pylist()[0] == {field.name: values.get(field.name) for field in EXPORT_SCHEMA}
+    assert record_batch.to_pylist()[1] == {field.name: None for field in EXPORT_SCHEMA}
+    assert housing_units_record_batch([]).num_rows == 0
+
+
+@pytest.mark.parametrize('export_format', [ExportFormat.parquet, ExportFormat.arrow])
+def test_housing_units_export_writer(export_format: ExportFormat) -> None:
+    rows: List[tuple] = [
+        tuple(str(index) if field.name == 'project_id' else None for field in EXPORT_SCHEMA) for index in range(3)
+    ]
+    export_file: io.BytesIO = io.BytesIO()
+
+    with HousingUnitsExportWriter(export_file, export_format) as export_writer:
+        export_writer.write(rows[:2])
+        export_writer.write(rows[2:])
+
+    export_file.seek(0)
+    table: pyarrow.Table = pyarrow.parquet.read_table(export_file) if export_format == ExportFormat.parquet \
+        else pyarrow.ipc.open_file(export_file).read_all()
+    assert table.schema == EXPORT_SCHEMA
+    assert table.column('project_id').to_pylist() == ['0', '1', '2']
+
+
+def test_housing_units_export_writer_raise_error_when_format_is_not_columnar() -> None:
+    expected_error: InvalidArgumentError = InvalidArgumentError('The csv export format is not a columnar one.')
+
+    with pytest.raises(InvalidArgumentError) as ex:
+        HousingUnitsExportWriter(io.BytesIO(), ExportFormat.csv)
+
+    assert ex.value.args == expected_error.args
@@ -0,0 +1,44 @@
+from typing import List, Dict, Any
+
+import pytest
+from pandas import DataFrame
+
+from application.housing_units.mappers import housing_unit_mappings_from_dataframe, \
+    housing_unit_columns_from_dataframe
+from application.housing_units.models import HousingUnit
+from application.socrata.client import SocrataClient
+
+
+class TestHousingUnitMappers:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        self.dataframe: DataFrame = SocrataClient.records_to_dataframe(stub_socrata_records)
+
+    def test_housing_unit_mappings_from_dataframe_are_equal_to_the_row_mappings(self) -> None:
+        expected_mappings: List[Dict[str, Any]] = [
+            HousingUnit.mapping_from_dict(row) for row in self.dataframe.T.to_dict().values()
+        ]
+
+        mappings: List[Dict[str, Any]] = housing_unit_mappings_from_dataframe(self.dataframe)
+
+        assert mappings == expected_mappings
+
+    def test_housing_unit_mappings_from_dataframe_types(self) -> None:
+        mappings: List[Dict[str, Any]] = housing_unit_mappings_from_dataframe(self.dataframe.iloc[:2])
+
+        # The first record is a completed project with a postcode, while the second one has them empty.
+        assert mappings[0]['one_br_units'] == 1
+        assert '_1_br_units' not in mappings[0]
+        assert type(mappings[0]['bbl']) is int
+        assert type(mappings[0]['latitude']) is float
+        assert mappings[0]['project_completion_date'].isoformat() == '2022-01-31T00:00:00'
+        assert mappings[1]['postcode'] is None
+        assert mappings[1]['project_completion_date'] is None
+        assert mappings[1]['council_district'] == 2
+
+    def test_housing_unit_columns_from_dataframe_with_empty_dataframe(self) -> None:
+        columns: Dict[str, List[Any]] = housing_unit_columns_from_dataframe(SocrataClient.records_to_dataframe([]))
+
+        assert all(values == [] for values in columns.values())
+        assert housing_unit_mappings_from_dataframe(SocrataClient.records_to_dataframe([])) == []
@@ -0,0 +1,293 @@
+from typing import Any, Dict, Tuple
+from unittest import mock
+from unittest.mock import MagicMock, AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+
+from application.housing_units.dictionaries import HousingUnitDictionaries
+from application.housing_units.enums import HousingUnitSortKey, HousingUnitField
+from application.housing_units.errors import HousingUnitConflictError
+from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.infrastructure.cache.caches import TTLCache
+
+DICTIONARIES: HousingUnitDictionaries = HousingUnitDictionaries([
+    ('borough', 'Bronx', 5), ('borough', 'Queens', 3), ('postcode', '10001', 2), ('street_name', 'RALPH AVENUE', 4),
+    ('street_name', 'Ralph Avenue', 1),
+])
+
+
+def _sql(statement: Select) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestHousingUnitsRepositoryFilterKey:
+
+    def test_filter_key_normalises_the_values_to_their_canonical_values(self) -> None:
+        assert HousingUnitsRepository.filter_key(
+            street_name=' ralph  Avenue', borough='BRONX', postcode=10001, num_units_min=0, dictionaries=DICTIONARIES
+        ) == (
+            ('street_name', ('RALPH AVENUE', 'Ralph Avenue')),
+            ('borough', ('Bronx',)),
+            ('postcode', 10001),
+            ('num_units_min', 0),
+        )
+
+    def test_filter_key_has_no_value_for_the_values_of_no_housing_unit(self) -> None:
+        filter_key: Tuple[Tuple[str, Any], ...] = HousingUnitsRepository.filter_key(
+            borough='Atlantis', postcode=10002, dictionaries=DICTIONARIES
+        )
+
+        assert filter_key == (('borough', None), ('postcode', None))
+        assert not HousingUnitsRepository.is_satisfiable(filter_key)
+
+    def test_filter_key_keeps_the_values_of_the_columns_without_collected_values(self) -> None:
+        assert HousingUnitsRepository.filter_key(
+            construction_type='Preservation', dictionaries=DICTIONARIES
+        ) == (('construction_type', ('Preservation',)),)
+
+    def test_filter_key_case_folds_the_values_without_dictionaries(self) -> None:
+        assert HousingUnitsRepository.filter_key(borough='BRONX', postcode=10001) == HousingUnitsRepository.filter_key(
+            borough='bronx', postcode=10001
+        ) == (('borough', 'bronx'), ('postcode', 10001))
+
+
+class TestHousingUnitsRepositoryDictionaries:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.now: float = 0.0
+        self.mock_session = AsyncMock()
+        self.mock_session.execute.return_value.all = MagicMock(return_value=[('borough', 'Bronx', 5)])
+        self.mock_db_engine = MagicMock()
+        self.mock_db_engine.get_async_read_session.return_value.__aenter__.return_value = self.mock_session
+        self.housing_units_repository = HousingUnitsRepository(db_engine=self.mock_db_engine)
+
+        with mock.patch.object(
+                HousingUnitsRepository, 'DICTIONARIES', TTLCache(max_size=1, ttl_seconds=600.0, clock=lambda: self.now)
+        ), mock.patch(
+            'application.housing_units.repositories.HOUSING_UNITS_DICTIONARIES_INVALIDATIONS'
+        ) as mock_invalidations:
+            self.mock_invalidations: MagicMock = mock_invalidations
+            self.mock_invalidations.subscribed = True
+            self.mock_invalidations.sequence = 0
+            self.mock_invalidations.is_settled.side_effect = (
+                lambda sequence, lag_seconds: self.mock_invalidations.sequence == sequence
+            )
+            yield
+
+    @pytest.mark.asyncio
+    async def test_dictionaries_are_loaded_once(self) -> None:
+        dictionaries: HousingUnitDictionaries = await self.housing_units_repository.dictionaries()
+
+        assert await self.housing_units_repository.dictionaries() is dictionaries
+        assert dictionaries.canonical_values('borough', 'bronx') == ('Bronx',)
+        self.mock_session.execute.assert_called_once_with(HousingUnitsRepository.DICTIONARIES_STATEMENT)
+        self.mock_invalidations.subscribe.assert_called_with(HousingUnitsRepository.DICTIONARIES)
+
+    @pytest.mark.asyncio
+    async def test_dictionaries_are_kept_shortly_when_invalidations_are_not_subscribed(self) -> None:
+        self.mock_invalidations.subscribed = False
+
+        await self.housing_units_repository.dictionaries()
+        self.now = HousingUnitsRepository.UNSUBSCRIBED_DICTIONARIES_TTL_SECONDS - 1
+        await self.housing_units_repository.dictionaries()
+        self.now = HousingUnitsRepository.UNSUBSCRIBED_DICTIONARIES_TTL_SECONDS + 1
+        await self.housing_units_repository.dictionaries()
+
+        assert self.mock_session.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_dictionaries_are_not_cached_when_invalidated_while_loaded(self) -> None:
+        def all_rows() -> list:
+            self.mock_invalidations.sequence += 1
+            return [('borough', 'Bronx', 5)]
+
+        self.mock_session.execute.return_value.all.side_effect = all_rows
+
+        await self.housing_units_repository.dictionaries()
+
+        assert len(HousingUnitsRepository.DICTIONARIES) == 0
+
+    @pytest.mark.asyncio
+    async def test_filtering_by_the_values_of_no_housing_unit_does_not_query_the_database(self) -> None:
+        HousingUnitsRepository.DICTIONARIES.set(HousingUnitsRepository.DICTIONARIES_KEY, DICTIONARIES)
+
+        assert await self.housing_units_repository.filter(borough='Atlantis') == []
+        assert await self.housing_units_repository.filter_rows(borough='Bronx', postcode=10002) == []
+        assert await self.housing_units_repository.count(street_name='UNKNOWN STREET') == 0
+        assert await self.housing_units_repository.estimate_count(borough='Atlantis') == 0
+        assert [rows async for rows in self.housing_units_repository.stream_rows(borough='Atlantis')] == []
+        self.mock_db_engine.get_async_read_session.assert_not_called()
+
+    def test_export_statement_matches_nothing_for_the_values_of_no_housing_unit(self) -> None:
+        assert _sql(HousingUnitsRepository.export_statement(None)).endswith('WHERE false ORDER BY housingunits.id')
+
+
+class TestHousingUnitsRepositoryPreparedStatements:
+
+    def test_prepared_page_statement_is_reused_for_the_same_combination_of_filters(self) -> None:
+        statement, parameters = HousingUnitsRepository.prepared_page_statement(
+            HousingUnitsRepository.filter_key(borough='bronx', num_units_min=3, dictionaries=DICTIONARIES),
+            rows=True,
+            fields=[HousingUnitField.project_id],
+            sort_key=HousingUnitSortKey.total_units,
+            after=(5, 12),
+            limit=10,
+        )
+        other_statement, other_parameters = HousingUnitsRepository.prepared_page_statement(
+            HousingUnitsRepository.filter_key(borough='queens', num_units_min=0, dictionaries=DICTIONARIES),
+            rows=True,
+            fields=[HousingUnitField.project_id],
+            sort_key=HousingUnitSortKey.total_units,
+            after=(1, 2),
+            limit=20,
+        )
+
+        assert other_statement is statement
+        assert parameters == {
+            'borough': ('Bronx',), 'num_units_min': 3, 'after_sort_value': 5, 'after_id': 12, 'limit': 10
+        }
+        assert other_parameters == {
+            'borough': ('Queens',), 'num_units_min': 0, 'after_sort_value': 1, 'after_id': 2, 'limit': 20
+        }
+        # The filtering values are bound, instead of being part of the SQL.
+        assert 'Bronx' not in _sql(statement)
+
+    def test_prepared_page_statement_per_combination_of_filters(self) -> None:
+        statements: Dict[Tuple[Any, ...], Select] = {
+            filter_names: HousingUnitsRepository.prepared_page_statement(
+                HousingUnitsRepository.filter_key(**{filter_name: 1 for filter_name in filter_names})
+            )[0]
+            for filter_names in [(), ('postcode',), ('num_units_max',), ('postcode', 'num_units_max')]
+        }
+
+        assert len({id(statement) for statement in statements.values()}) == len(statements)
+        assert 'WHERE' not in _sql(statements[()])
+        assert 'housingunits.postcode = %(postcode)s AND housingunits.total_units <= %(num_units_max)s' in _sql(
+            statements[('postcode', 'num_units_max')]
+        )
+
+    def test_prepared_statements_match_every_stored_spelling_of_the_values(self) -> None:
+        filter_key: Tuple[Tuple[str, Any], ...] = HousingUnitsRepository.filter_key(
+            street_name='RALPH AVENUE', dictionaries=DICTIONARIES
+        )
+        statement, parameters = HousingUnitsRepository.prepared_count_statement(filter_key)
+
+        assert parameters == {'street_name': ('RALPH AVENUE', 'Ralph Avenue')}
+        assert 'housingunits.street_name IN (__[POSTCOMPILE_street_name])' in _sql(statement)
+        assert "housingunits.street_name IN ('RALPH AVENUE', 'Ralph Avenue')" in HousingUnitsRepository.literal_sql(
+            HousingUnitsRepository.export_statement(filter_key)
+        )
+
+    def test_prepared_count_statement_matches_nothing_for_the_values_of_no_housing_unit(self) -> None:
+        statement, parameters = HousingUnitsRepository.prepared_count_statement(
+            HousingUnitsRepository.filter_key(borough='unknown', postcode=10001, dictionaries=DICTIONARIES)
+        )
+
+        assert parameters == {'postcode': 10001}
+        assert _sql(statement).endswith('WHERE false')
+        assert HousingUnitsRepository.filters_bitmasks(
+            HousingUnitsRepository.filter_key(borough='unknown', postcode=10001, dictionaries=DICTIONARIES)
+        ) == (0b100, 0b10)
+
+
+class TestHousingUnitsRepositoryLocations:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_session = AsyncMock()
+        self.mock_session.execute.return_value.all = MagicMock(return_value=[])
+        self.mock_db_engine = MagicMock()
+        self.mock_db_engine.get_async_read_session.return_value.__aenter__.return_value = self.mock_session
+        self.housing_units_repository = HousingUnitsRepository(db_engine=self.mock_db_engine)
+
+    def test_great_circle_distance(self) -> None:
+        # A degree of latitude on the sphere of the earthdistance extension.
+        assert HousingUnitsRepository.great_circle_distance(40.0, -73.9, 41.0, -73.9) == pytest.approx(111319.3, 0.1)
+        assert HousingUnitsRepository.great_circle_distance(40.68, -73.91, 40.68, -73.91) == 0.0
+
+    def test_near_statement_is_ordered_by_the_location_index(self) -> None:
+        sql: str = _sql(HousingUnitsRepository.NEAR_STATEMENT)
+
+        assert 'earth_box(ll_to_earth(%(lat)s, %(lon)s), %(radius_m)s) @> ' \
+               'll_to_earth(housingunits.latitude, housingunits.longitude)' in sql
+        assert 'ORDER BY ll_to_earth(housingunits.latitude, housingunits.longitude) <-> ' \
+               'll_to_earth(%(lat)s, %(lon)s)' in sql
+
+    def test_tile_bounds(self) -> None:
+        assert HousingUnitsRepository.tile_bounds(z=0, x=0, y=0) == pytest.approx((-180, -85.0511288, 180, 85.0511288))
+        assert HousingUnitsRepository.tile_bounds(z=1, x=1, y=0) == pytest.approx((0, 0, 180, 85.0511288))
+        west, south, east, north = HousingUnitsRepository.tile_bounds(z=12, x=1206, y=1539)
+        assert west < -73.95 < east
+        assert south < 40.75 < north
+
+    @pytest.mark.asyncio
+    async def test_tile_cells_are_grouped_by_the_grid_of_the_tile(self) -> None:
+        await self.housing_units_repository.tile_cells(z=12, x=1206, y=1539)
+
+        statement, parameters = self.mock_session.execute.call_args.args
+        assert statement is HousingUnitsRepository.TILE_STATEMENT
+        assert parameters['cells'] == 4096 * HousingUnitsRepository.TILE_GRID_SIZE
+        assert parameters['first_cell_x'] == 1206 * HousingUnitsRepository.TILE_GRID_SIZE
+        assert parameters['first_cell_y'] == 1539 * HousingUnitsRepository.TILE_GRID_SIZE
+        assert (parameters['west'], parameters['south'], parameters['east'], parameters['north']) == (
+            HousingUnitsRepository.tile_bounds(z=12, x=1206, y=1539)
+        )
+        assert _sql(statement).endswith('GROUP BY cell_x, cell_y ORDER BY cell_y, cell_x')
+
+    @pytest.mark.asyncio
+    async def test_within_searches_the_circle_enclosing_the_bbox(self) -> None:
+        await self.housing_units_repository.within(min_lon=-74.0, min_lat=40.6, max_lon=-73.8, max_lat=40.8, limit=5)
+
+        statement, parameters = self.mock_session.execute.call_args.args
+        assert statement is HousingUnitsRepository.WITHIN_STATEMENT
+        assert parameters['lat'] == pytest.approx(40.7)
+        assert parameters['lon'] == pytest.approx(-73.9)
+        assert parameters['radius_m'] == max(
+            HousingUnitsRepository.great_circle_distance(40.7, -73.9, lat, lon)
+            for lat in (40.6, 40.8) for lon in (-74.0, -73.8)
+        )
+        assert parameters['limit'] == 5
+
+
+class TestHousingUnitsRepositoryStagingLoadLock:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_session = AsyncMock()
+        self.mock_session.begin = MagicMock()
+        self.mock_session.add = MagicMock()
+        # The staging load lock is held by an ingestion.
+        self.mock_session.execute.return_value.scalar = MagicMock(return_value=False)
+        self.mock_db_engine = MagicMock()
+        self.mock_db_engine.get_async_session.return_value.__aenter__.return_value = self.mock_session
+        self.housing_units_repository = HousingUnitsRepository(db_engine=self.mock_db_engine)
+        self.expected_error: HousingUnitConflictError = HousingUnitConflictError(
+            "The Housing Units are being reloaded by a data ingestion, retry once it is completed."
+        )
+
+    @pytest.mark.asyncio
+    async def test_save_raise_error_while_the_staging_table_is_loaded(self) -> None:
+        with pytest.raises(HousingUnitConflictError) as ex:
+            await self.housing_units_repository.save(HousingUnit(project_id='project id 1', borough='Bronx'))
+
+        assert ex.value.args == self.expected_error.args
+        self.mock_session.execute.assert_called_once_with(HousingUnitsRepository.STAGING_LOAD_WRITE_LOCK_STATEMENT)
+        self.mock_session.add.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_delete_raise_error_while_the_staging_table_is_loaded(self) -> None:
+        with pytest.raises(HousingUnitConflictError) as ex:
+            await self.housing_units_repository.delete(uuid='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3')
+
+        assert ex.value.args == self.expected_error.args
+        self.mock_session.execute.assert_called_once_with(HousingUnitsRepository.STAGING_LOAD_WRITE_LOCK_STATEMENT)
+
+    def test_write_lock_statement_takes_the_staging_load_lock_shared(self) -> None:
+        compiled: Any = HousingUnitsRepository.STAGING_LOAD_WRITE_LOCK_STATEMENT.compile(dialect=postgresql.dialect())
+
+        assert str(compiled).startswith('SELECT pg_try_advisory_xact_lock_shared(')
+        assert list(compiled.params.values()) == [HousingUnitsRepository.STAGING_LOAD_LOCK_KEY]
@@ -0,0 +1,118 @@
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Any, List, AsyncIterator
+
+import pytest
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, Response
+
+from application.housing_units.models import HousingUnit
+from application.rest_api.housing_units.responses import filter_housing_units_content, housing_unit_response, \
+    housing_units_ndjson_response, not_modified_response, validated_filter_housing_units_content
+from application.rest_api.housing_units.schemas import FilterHousingUnits, FullHousingUnitResponse
+
+# The filtered HousingUnit rows, holding the id and sort value of the HousingUnits along with the selected fields.
+StubHousingUnitRow = namedtuple('StubHousingUnitRow', ['id', 'sort_value', 'uuid', 'postcode', 'total_units'])
+
+
+def test_filter_housing_units_content_returns_the_selected_fields() -> None:
+    filter_housing_units: FilterHousingUnits = FilterHousingUnits.construct(
+        housing_units=[
+            StubHousingUnitRow(id=1, sort_value=1, uuid=uuid.uuid4(), postcode=None, total_units=5),
+            StubHousingUnitRow(id=2, sort_value=2, uuid=uuid.uuid4(), postcode=11201, total_units=4),
+        ],
+        total=10,
+        next_cursor='WyJpZCIsIDIsIDJd',
+    )
+
+    response_content: Dict[str, Any] = json.loads(filter_housing_units_content(filter_housing_units))
+
+    # The same content as the one of the response model, without the unset fields.
+    assert response_content == jsonable_encoder(
+        FilterHousingUnits(**filter_housing_units.dict(by_alias=True)), by_alias=True, exclude_unset=True
+    )
+    assert list(response_content['housing_units'][0]) == ['uuid', 'postcode', 'total_units']
+
+
+def test_filter_housing_units_content_returns_the_asyncpg_uuids_as_strings() -> None:
+    housing_unit_uuid: str = str(uuid.uuid4())
+    filter_housing_units: FilterHousingUnits = FilterHousingUnits.construct(
+        housing_units=[
+            StubHousingUnitRow(id=1, sort_value=1, uuid=AsyncpgUUID(housing_unit_uuid), postcode=None, total_units=5)
+        ],
+        total=1,
+        next_cursor=None,
+    )
+
+    response_content: Dict[str, Any] = json.loads(filter_housing_units_content(filter_housing_units))
+
+    assert response_content['housing_units'] == [{'uuid': housing_unit_uuid, 'postcode': None, 'total_units': 5}]
+    assert json.loads(validated_filter_housing_units_content(filter_housing_units)) == response_content
+
+
+def test_filter_housing_units_content_when_there_are_no_housing_units() -> None:
+    filter_housing_units: FilterHousingUnits = FilterHousingUnits.construct(
+        housing_units=[], total=0, next_cursor=None
+    )
+
+    assert json.loads(filter_housing_units_content(filter_housing_units)) == {
+        'housing_units': [], 'total': 0, 'next_cursor': None
+    }
+
+
+@pytest.mark.asyncio
+async def test_housing_units_ndjson_response_streams_a_line_per_housing_unit() -> None:
+    housing_unit_uuids: List[uuid.UUID] = [uuid.uuid4() for _ in range(3)]
+
+    async def batches() -> AsyncIterator[List[StubHousingUnitRow]]:
+        yield [
+            StubHousingUnitRow(id=1, sort_value=1, uuid=housing_unit_uuids[0], postcode=None, total_units=5),
+            StubHousingUnitRow(id=2, sort_value=2, uuid=housing_unit_uuids[1], postcode=11201, total_units=4),
+        ]
+        yield [StubHousingUnitRow(id=3, sort_value=3, uuid=housing_unit_uuids[2], postcode=1, total_units=3)]
+
+    response: StreamingResponse = housing_units_ndjson_response(batches())
+    chunks: List[bytes] = [chunk async for chunk in response.body_iterator]
+
+    assert response.media_type == 'application/x-ndjson'
+    # Every batch is sent as one chunk.
+    assert len(chunks) == 2
+    assert [json.loads(line) for line in b''.join(chunks).splitlines()] == [
+        {'uuid': str(housing_unit_uuids[0]), 'postcode': None, 'total_units': 5},
+        {'uuid': str(housing_unit_uuids[1]), 'postcode': 11201, 'total_units': 4},
+        {'uuid': str(housing_unit_uuids[2]), 'postcode': 1, 'total_units': 3},
+    ]
+
+
+def test_housing_unit_response() -> None:
+    housing_unit: HousingUnit = HousingUnit(
+        id=1,
+        uuid=uuid.uuid4(),
+        project_id='project id 1',
+        street_name='street name test 1',
+        borough='Queens',
+        postcode=1,
+        reporting_construction_type='construction type test 1',
+        total_units=2,
+        project_start_date=datetime.fromtimestamp(1545730073),
+        latitude=40.71,
+        one_br_units=1,
+    )
+
+    assert json.loads(housing_unit_response(housing_unit).body) == jsonable_encoder(
+        FullHousingUnitResponse.from_orm(housing_unit), by_alias=True
+    )
+
+
+def test_not_modified_response() -> None:
+    response: Response = not_modified_response(
+        etag='W/"2-20220122101437518203"', last_modified='Sat, 22 Jan 2022 10:14:37 GMT'
+    )
+
+    assert response.status_code == 304
+    assert response.body == b''
+    assert response.headers['ETag'] == 'W/"2-20220122101437518203"'
+    assert response.headers['Last-Modified'] == 'Sat, 22 Jan 2022 10:14:37 GMT'
@@ -1,20 +1,45 @@
-from typing import Optional
+import io
+import json
+import os
+from collections import namedtuple
+from typing import Optional, List
 from unittest import mock
 from unittest.mock import MagicMock, AsyncMock
 
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
 import pytest
 from celery.result import AsyncResult
-
+from fastapi import HTTPException
+
+from application.housing_units.cursors import encode_cursor, decode_cursor
+from application.housing_units.dictionaries import StreetNameSuggestion, HousingUnitDictionaries
+from application.housing_units.enums import HousingUnitSortKey, TotalMode, HousingUnitField, ExportFormat, \
+    IngestionMode, LoadStrategy
+from application.housing_units.etags import HousingUnitsPage, housing_units_page_etag
+from application.housing_units.exporters import EXPORT_SCHEMA, HousingUnitsExport
 from application.housing_units.models import HousingUnit
+from application.infrastructure.cache.caches import TTLCache, CacheStats
 from application.infrastructure.error.errors import InvalidArgumentError, HousingUnitBaseError
-from application.housing_units.errors import InvalidNumUnitsError
+from application.housing_units.errors import InvalidNumUnitsError, InvalidCursorError, InvalidFieldsError, \
+    InvalidSearchQueryError, InvalidLocationError, InvalidTileError
 from application.rest_api.housing_units.schemas import FilterHousingUnits, HousingUnitPostRequestBody
 from application.housing_units.services import FilterHousingUnitsService, HousingUnitsDataIngestionService, \
     RetrieveHousingUnitService, CreateHousingUnitService, UpdateHousingUnitService, HousingUnitFieldsSanityCheckService, \
-    DeleteHousingUnitService
+    DeleteHousingUnitService, StreamHousingUnitsService, ExportHousingUnitsService, \
+    RetrieveHousingUnitsExportService, CachedFilterHousingUnitsService, GetHousingUnitsCacheStatsService, \
+    SearchHousingUnitsService, AutocompleteStreetNamesService, NearHousingUnitsService, TileHousingUnitsService
 from application.rest_api.task_status.schemas import TaskStatus
 from application.task_status.services import GetTaskStatusReportService
 
+# The filtered HousingUnit rows, holding the id and sort value of the HousingUnits along with the selected fields.
+StubHousingUnitRow = namedtuple('StubHousingUnitRow', ['id', 'sort_value', 'street_name', 'total_units'])
+# The grid cell rows of the clustered HousingUnits of a map tile.
+StubTileCellRow = namedtuple(
+    'StubTileCellRow', ['cell_x', 'cell_y', 'count', 'total_units', 'latitude', 'longitude']
+)
+
 
 class TestHousingUnitsDataIngestionService:
 
@@ -37,6 +62,55 @@ class TestHousingUnitsDataIngestionService:
         assert ex.value.error_type == expected_error.error_type
         assert ex.value.message == expected_error.message
 
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_load_strategy_is_not_provided(self) -> None:
+        expected_error: InvalidArgumentError = InvalidArgumentError("The load strategy is not provided.")
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            await self.housing_units_data_ingestion_service.apply(
+                hbd_dataset_id='hbd-dataset-test',
+                load_strategy=None,
+            )
+
+        assert ex.value.args == expected_error.args
+        assert ex.value.error_type == expected_error.error_type
+        assert ex.value.message == expected_error.message
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_mode_is_not_provided(self) -> None:
+        expected_error: InvalidArgumentError = InvalidArgumentError("The ingestion mode is not provided.")
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            await self.housing_units_data_ingestion_service.apply(
+                hbd_dataset_id='hbd-dataset-test',
+                mode=None,
+            )
+
+        assert ex.value.args == expected_error.args
+        assert ex.value.error_type == expected_error.error_type
+        assert ex.value.message == expected_error.message
+
+    @mock.patch('application.housing_units.services.housing_unit_raw_data_ingestion_task')
+    @pytest.mark.asyncio
+    async def test_apply_does_not_reset_table_on_full_mode(
+            self, mock_housing_unit_raw_data_ingestion_task: MagicMock
+    ) -> None:
+        mock_housing_unit_raw_data_ingestion_task.delay.return_value = AsyncResult(
+            task_name='test',
+            id='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'
+        )
+
+        await self.housing_units_data_ingestion_service.apply(
+            hbd_dataset_id='hbd-dataset-test',
+            reset_table=False,
+            mode=IngestionMode.full,
+        )
+
+        # The whole dataset is upserted into the saved table by the task.
+        mock_housing_unit_raw_data_ingestion_task.delay.assert_called_once_with(
+            'hbd-dataset-test', False, LoadStrategy.core.value, IngestionMode.full.value
+        )
+
     @pytest.mark.parametrize(
         # Service input.
         'hbd_dataset_id, reset_table, '
@@ -80,11 +154,20 @@ class TestFilterHousingUnitsService:
     @pytest.fixture(autouse=True)
     def setup(self) -> None:
         self.mock_housing_units_repository = AsyncMock()
+        self.housing_units_totals_cache = TTLCache()
 
         self.filter_housing_units_service = FilterHousingUnitsService(
-            housing_units_repository=self.mock_housing_units_repository
+            housing_units_repository=self.mock_housing_units_repository,
+            housing_units_totals_cache=self.housing_units_totals_cache,
         )
 
+        with mock.patch(
+                'application.housing_units.services.HOUSING_UNITS_CACHE_GENERATION'
+        ) as mock_housing_units_cache_generation:
+            self.mock_housing_units_cache_generation: MagicMock = mock_housing_units_cache_generation
+            self.mock_housing_units_cache_generation.get.return_value = 1
+            yield
+
     @pytest.mark.asyncio
     async def test_apply_raise_error_when_num_max_units_is_smaller_than_num_min_units(self) -> None:
         expected_error: InvalidNumUnitsError = InvalidNumUnitsError(
@@ -161,7 +244,8 @@ class TestFilterHousingUnitsService:
             num_units_max: Optional[int],
             expected_response: Optional[FilterHousingUnits]
     ) -> None:
-        self.mock_housing_units_repository.filter.return_value = expected_response.housing_units
+        self.mock_housing_units_repository.filter_rows.return_value = expected_response.housing_units
+        self.mock_housing_units_repository.count.return_value = expected_response.total
         result = await self.filter_housing_units_service.apply(
             street_name=street_name,
             borough=borough,
@@ -171,16 +255,799 @@ class TestFilterHousingUnitsService:
             num_units_max=num_units_max
         )
 
-        self.mock_housing_units_repository.filter.assert_called_once_with(
+        self.mock_housing_units_repository.filter_rows.assert_called_once_with(
+            fields=None,
             street_name=street_name,
             borough=borough,
             postcode=postcode,
             construction_type=construction_type,
             num_units_min=num_units_min,
-            num_units_max=num_units_max
+            num_units_max=num_units_max,
+            sort_key=HousingUnitSortKey.id,
+            after=None,
+            limit=101,
+        )
+        self.mock_housing_units_repository.count.assert_called_once_with(
+            street_name=street_name,
+            borough=borough,
+            postcode=postcode,
+            construction_type=construction_type,
+            num_units_min=num_units_min,
+            num_units_max=num_units_max,
         )
 
-        assert result == expected_response
+        # The returned HousingUnits are validated by the response model of the response.
+        assert FilterHousingUnits(**result.dict(by_alias=True)) == expected_response
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_next_cursor_when_there_is_a_next_page(self) -> None:
+        housing_units: List[StubHousingUnitRow] = [
+            StubHousingUnitRow(id=index, sort_value=index, street_name='street name test {0}'.format(index),
+                               total_units=index)
+            for index in range(1, 4)
+        ]
+        self.mock_housing_units_repository.filter_rows.return_value = housing_units
+        self.mock_housing_units_repository.count.return_value = 10
+
+        result: FilterHousingUnits = await self.filter_housing_units_service.apply(
+            sort_key=HousingUnitSortKey.total_units,
+            limit=2,
+            cursor=encode_cursor(HousingUnitSortKey.total_units, 0, 7),
+        )
+
+        assert self.mock_housing_units_repository.filter_rows.call_args.kwargs['after'] == (0, 7)
+        assert self.mock_housing_units_repository.filter_rows.call_args.kwargs['limit'] == 3
+        assert [housing_unit.total_units for housing_unit in result.housing_units] == [1, 2]
+        assert result.total == 10
+        assert decode_cursor(result.next_cursor, HousingUnitSortKey.total_units) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_cursor_is_not_valid_for_the_sort_key(self) -> None:
+        expected_error: InvalidCursorError = InvalidCursorError(
+            "The provided cursor is not valid for sorting by street_name."
+        )
+
+        with pytest.raises(InvalidCursorError) as ex:
+            await self.filter_housing_units_service.apply(
+                sort_key=HousingUnitSortKey.street_name,
+                cursor=encode_cursor(HousingUnitSortKey.total_units, 0, 7),
+            )
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_repository.filter_rows.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_retrieves_only_the_provided_fields(self) -> None:
+        self.mock_housing_units_repository.filter_rows.return_value = [
+            StubHousingUnitRow(id=1, sort_value=1, street_name='street name test 1', total_units=1)
+        ]
+        self.mock_housing_units_repository.count.return_value = 1
+
+        result: FilterHousingUnits = await self.filter_housing_units_service.apply(
+            fields='total_units, street_name,total_units'
+        )
+
+        assert self.mock_housing_units_repository.filter_rows.call_args.kwargs['fields'] == [
+            HousingUnitField.total_units, HousingUnitField.street_name
+        ]
+        response: FilterHousingUnits = FilterHousingUnits(**result.dict(by_alias=True))
+        assert response.dict(by_alias=True, exclude_unset=True)['housing_units'] == [
+            {'street_name': 'street name test 1', 'total_units': 1}
+        ]
+
+    @pytest.mark.parametrize(
+        'fields, expected_error',
+        [
+            # when_fields_are_not_housing_unit_fields
+            (
+                    'total_units,id,bbl',
+                    InvalidFieldsError(
+                        "The provided fields id, bbl are not valid, the available fields are: uuid, project_id, "
+                        "street_name, borough, postcode, reporting_construction_type, total_units."
+                    )
+            ),
+            # when_fields_are_empty
+            (
+                    ' , ',
+                    InvalidFieldsError(
+                        "The provided fields are empty, the available fields are: uuid, project_id, "
+                        "street_name, borough, postcode, reporting_construction_type, total_units."
+                    )
+            ),
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_fields_are_not_valid(
+            self, fields: str, expected_error: InvalidFieldsError
+    ) -> None:
+        with pytest.raises(InvalidFieldsError) as ex:
+            await self.filter_housing_units_service.apply(fields=fields)
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_repository.filter_rows.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_caches_the_totals_per_normalised_filters_and_generation(self) -> None:
+        self.mock_housing_units_repository.filter_rows.return_value = []
+        self.mock_housing_units_repository.count.return_value = 10
+
+        first_result: FilterHousingUnits = await self.filter_housing_units_service.apply(borough='bronx')
+        # The same filtering, on the next page and with differently cased borough.
+        second_result: FilterHousingUnits = await self.filter_housing_units_service.apply(
+            borough='BRONX', cursor=encode_cursor(HousingUnitSortKey.id, 5, 5)
+        )
+        assert first_result.total == second_result.total == 10
+        self.mock_housing_units_repository.count.assert_called_once()
+
+        # A write bumps the generation, so the total is counted again.
+        self.mock_housing_units_cache_generation.get.return_value = 2
+        self.mock_housing_units_repository.count.return_value = 11
+        third_result: FilterHousingUnits = await self.filter_housing_units_service.apply(borough='Bronx')
+
+        assert third_result.total == 11
+        assert self.mock_housing_units_repository.count.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_cache_the_totals_when_generation_is_not_available(self) -> None:
+        self.mock_housing_units_cache_generation.get.return_value = None
+        self.mock_housing_units_repository.filter_rows.return_value = []
+        self.mock_housing_units_repository.count.return_value = 10
+
+        await self.filter_housing_units_service.apply(borough='bronx')
+        await self.filter_housing_units_service.apply(borough='bronx')
+
+        assert self.mock_housing_units_repository.count.call_count == 2
+        assert len(self.housing_units_totals_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_apply_estimates_the_total_on_estimated_total_mode(self) -> None:
+        self.mock_housing_units_repository.filter_rows.return_value = []
+        self.mock_housing_units_repository.estimate_count.return_value = 1000
+
+        result: FilterHousingUnits = await self.filter_housing_units_service.apply(
+            num_units_min=0, num_units_max=1000, total_mode=TotalMode.estimated
+        )
+
+        assert result.total == 1000
+        self.mock_housing_units_repository.count.assert_not_called()
+        self.mock_housing_units_repository.estimate_count.assert_called_once_with(
+            street_name=None,
+            borough=None,
+            postcode=None,
+            construction_type=None,
+            num_units_min=0,
+            num_units_max=1000,
+        )
+
+
+class TestCachedFilterHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_filter_housing_units_service = AsyncMock()
+        self.mock_filter_housing_units_service.apply.return_value = FilterHousingUnits.construct(
+            housing_units=[StubHousingUnitRow(id=7, sort_value=7, street_name='3 AVENUE', total_units=5)],
+            total=1,
+            next_cursor=None,
+        )
+        self.mock_housing_units_filter_cache = MagicMock()
+        self.mock_housing_units_filter_cache.get.return_value = None
+
+        self.cached_filter_housing_units_service = CachedFilterHousingUnitsService(
+            filter_housing_units_service=self.mock_filter_housing_units_service,
+            housing_units_filter_cache=self.mock_housing_units_filter_cache,
+        )
+
+        with mock.patch(
+                'application.housing_units.services.HOUSING_UNITS_CACHE_GENERATION'
+        ) as mock_housing_units_cache_generation:
+            self.mock_housing_units_cache_generation: MagicMock = mock_housing_units_cache_generation
+            self.mock_housing_units_cache_generation.get.return_value = 1
+            yield
+
+    @pytest.mark.asyncio
+    async def test_apply_filters_and_caches_the_serialised_page_on_cache_miss(self) -> None:
+        result: HousingUnitsPage = await self.cached_filter_housing_units_service.apply(
+            borough='BRONX', num_units_min=1, limit=10, fields='street_name, total_units'
+        )
+
+        assert json.loads(result.content) == {
+            'housing_units': [{'street_name': '3 AVENUE', 'total_units': 5}], 'total': 1, 'next_cursor': None
+        }
+        self.mock_filter_housing_units_service.apply.assert_called_once_with(
+            street_name=None,
+            borough='BRONX',
+            postcode=None,
+            construction_type=None,
+            num_units_min=1,
+            num_units_max=None,
+            sort_key=HousingUnitSortKey.id,
+            limit=10,
+            cursor=None,
+            total_mode=TotalMode.exact,
+            fields='street_name, total_units',
+        )
+        cache_key = self.mock_housing_units_filter_cache.get.call_args.args[0]
+        self.mock_housing_units_filter_cache.set.assert_called_once_with(cache_key, result.content)
+        assert result.etag == housing_units_page_etag(cache_key)
+
+    @pytest.mark.asyncio
+    @mock.patch('application.housing_units.services.Configuration')
+    async def test_apply_serialises_the_page_the_same_way_with_the_fast_json_responses(
+            self, mock_configuration: MagicMock
+    ) -> None:
+        mock_configuration.get.return_value.fast_json_responses = True
+        fast_result: HousingUnitsPage = await self.cached_filter_housing_units_service.apply(
+            fields='street_name, total_units'
+        )
+        mock_configuration.get.return_value.fast_json_responses = False
+        validated_result: HousingUnitsPage = await self.cached_filter_housing_units_service.apply(
+            fields='street_name, total_units'
+        )
+
+        assert json.loads(fast_result.content) == json.loads(validated_result.content) == {
+            'housing_units': [{'street_name': '3 AVENUE', 'total_units': 5}], 'total': 1, 'next_cursor': None
+        }
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_cached_page_per_normalised_parameters_and_generation(self) -> None:
+        self.mock_housing_units_filter_cache.get.return_value = b'{"cached": true}'
+
+        results: List[HousingUnitsPage] = [
+            await self.cached_filter_housing_units_service.apply(borough='bronx', fields='street_name,total_units'),
+            await self.cached_filter_housing_units_service.apply(borough='BRONX', fields='street_name, total_units'),
+        ]
+        self.mock_housing_units_cache_generation.get.return_value = 2
+        results.append(
+            await self.cached_filter_housing_units_service.apply(borough='bronx', fields='street_name,total_units')
+        )
+        results.append(
+            await self.cached_filter_housing_units_service.apply(borough='bronx', fields='total_units,street_name')
+        )
+
+        assert results[0].content == b'{"cached": true}'
+        self.mock_filter_housing_units_service.apply.assert_not_called()
+        cache_keys: list = [get_call.args[0] for get_call in self.mock_housing_units_filter_cache.get.call_args_list]
+        # The same filtering is cached under the same key and ETag, unless the generation or the returned fields
+        # change.
+        assert cache_keys[0] == cache_keys[1]
+        assert len({cache_keys[1], cache_keys[2], cache_keys[3]}) == 3
+        assert results[0].etag == results[1].etag
+        assert len({results[1].etag, results[2].etag, results[3].etag}) == 3
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_only_the_etag_when_the_page_is_not_modified(self) -> None:
+        etag: str = (await self.cached_filter_housing_units_service.apply(borough='bronx')).etag
+        self.mock_housing_units_filter_cache.reset_mock()
+        self.mock_filter_housing_units_service.apply.reset_mock()
+
+        result: HousingUnitsPage = await self.cached_filter_housing_units_service.apply(
+            borough='BRONX', if_none_match='W/"other", {0}'.format(etag)
+        )
+
+        assert result == HousingUnitsPage(etag=etag)
+        self.mock_housing_units_filter_cache.get.assert_not_called()
+        self.mock_filter_housing_units_service.apply.assert_not_called()
+
+        # The page is returned again once the HousingUnit table is written.
+        self.mock_housing_units_cache_generation.get.return_value = 2
+        result = await self.cached_filter_housing_units_service.apply(borough='BRONX', if_none_match=etag)
+
+        assert result.content is not None
+        assert result.etag != etag
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_use_the_cache_when_generation_is_not_available(self) -> None:
+        self.mock_housing_units_cache_generation.get.return_value = None
+
+        result: HousingUnitsPage = await self.cached_filter_housing_units_service.apply(if_none_match='*')
+
+        assert json.loads(result.content)['total'] == 1
+        assert result.etag is None
+        self.mock_filter_housing_units_service.apply.assert_called_once()
+        self.mock_housing_units_filter_cache.get.assert_not_called()
+        self.mock_housing_units_filter_cache.set.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_fields_are_not_valid(self) -> None:
+        expected_error: InvalidFieldsError = InvalidFieldsError(
+            "The provided fields bbl are not valid, the available fields are: uuid, project_id, street_name, "
+            "borough, postcode, reporting_construction_type, total_units."
+        )
+
+        with pytest.raises(InvalidFieldsError) as ex:
+            await self.cached_filter_housing_units_service.apply(fields='bbl')
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_filter_cache.get.assert_not_called()
+        self.mock_filter_housing_units_service.apply.assert_not_called()
+
+
+class TestStreamHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = MagicMock()
+
+        self.stream_housing_units_service = StreamHousingUnitsService(
+            housing_units_repository=self.mock_housing_units_repository
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply(self) -> None:
+        result = await self.stream_housing_units_service.apply(
+            borough='bronx',
+            num_units_min=1,
+            num_units_max=5,
+            sort_key=HousingUnitSortKey.total_units,
+            cursor=encode_cursor(HousingUnitSortKey.total_units, 0, 7),
+            fields='project_id,total_units',
+        )
+
+        assert result == self.mock_housing_units_repository.stream_rows.return_value
+        self.mock_housing_units_repository.stream_rows.assert_called_once_with(
+            fields=[HousingUnitField.project_id, HousingUnitField.total_units],
+            street_name=None,
+            borough='bronx',
+            postcode=None,
+            construction_type=None,
+            num_units_min=1,
+            num_units_max=5,
+            sort_key=HousingUnitSortKey.total_units,
+            after=(0, 7),
+        )
+
+    @pytest.mark.parametrize(
+        'num_units_min, num_units_max, fields, expected_error',
+        [
+            # when_num_max_units_is_smaller_than_num_min_units
+            (
+                    2,  # num_units_min
+                    1,  # num_units_max
+                    None,  # fields
+                    InvalidNumUnitsError(
+                        "The provided number of maximum units can't be smaller than the number of minimum units"
+                    )
+            ),
+            # when_fields_are_not_housing_unit_fields
+            (
+                    None,  # num_units_min
+                    None,  # num_units_max
+                    'bbl',  # fields
+                    InvalidFieldsError(
+                        "The provided fields bbl are not valid, the available fields are: uuid, project_id, "
+                        "street_name, borough, postcode, reporting_construction_type, total_units."
+                    )
+            ),
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_before_streaming(
+            self,
+            num_units_min: Optional[int],
+            num_units_max: Optional[int],
+            fields: Optional[str],
+            expected_error: HousingUnitBaseError,
+    ) -> None:
+        with pytest.raises(type(expected_error)) as ex:
+            await self.stream_housing_units_service.apply(
+                num_units_min=num_units_min, num_units_max=num_units_max, fields=fields
+            )
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_repository.stream_rows.assert_not_called()
+
+
+class TestSearchHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = AsyncMock()
+
+        self.search_housing_units_service = SearchHousingUnitsService(
+            housing_units_repository=self.mock_housing_units_repository
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply_searches_the_query_with_its_whitespace_collapsed(self) -> None:
+        result = await self.search_housing_units_service.apply(query='  ralph   avenue ', limit=5)
+
+        assert result == self.mock_housing_units_repository.search.return_value
+        self.mock_housing_units_repository.search.assert_called_once_with(query='ralph avenue', limit=5)
+
+    @pytest.mark.parametrize('query', [None, '', 'av', '  av  '])
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_query_is_too_short(self, query: Optional[str]) -> None:
+        with pytest.raises(InvalidSearchQueryError) as ex:
+            await self.search_housing_units_service.apply(query=query)
+
+        assert ex.value.args == InvalidSearchQueryError("The search query must have at least 3 characters.").args
+        self.mock_housing_units_repository.search.assert_not_called()
+
+
+class TestAutocompleteStreetNamesService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = AsyncMock()
+        self.mock_housing_units_repository.dictionaries.return_value = HousingUnitDictionaries([
+            ('street_name', 'RALPH AVENUE', 12), ('street_name', 'RANDALL AVENUE', 30), ('street_name', '3 AVENUE', 40),
+            ('borough', 'Brooklyn', 82),
+        ])
+
+        self.autocomplete_street_names_service = AutocompleteStreetNamesService(
+            housing_units_repository=self.mock_housing_units_repository,
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply(self) -> None:
+        result = await self.autocomplete_street_names_service.apply(prefix='ra', limit=10)
+
+        assert result == [
+            StreetNameSuggestion(street_name='RANDALL AVENUE', housing_units=30),
+            StreetNameSuggestion(street_name='RALPH AVENUE', housing_units=12),
+        ]
+        self.mock_housing_units_repository.dictionaries.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_apply_with_limit(self) -> None:
+        result = await self.autocomplete_street_names_service.apply(prefix='RA', limit=1)
+
+        assert result == [StreetNameSuggestion(street_name='RANDALL AVENUE', housing_units=30)]
+
+
+class TestNearHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = AsyncMock()
+
+        self.near_housing_units_service = NearHousingUnitsService(
+            housing_units_repository=self.mock_housing_units_repository
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply_with_point(self) -> None:
+        result = await self.near_housing_units_service.apply(lat=40.68, lon=-73.91, radius_m=500, limit=5)
+
+        assert result == self.mock_housing_units_repository.near.return_value
+        self.mock_housing_units_repository.near.assert_called_once_with(lat=40.68, lon=-73.91, radius_m=500, limit=5)
+        self.mock_housing_units_repository.within.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_with_bbox(self) -> None:
+        result = await self.near_housing_units_service.apply(bbox=' -73.95,40.6, -73.9,40.7 ', limit=5)
+
+        assert result == self.mock_housing_units_repository.within.return_value
+        self.mock_housing_units_repository.within.assert_called_once_with(
+            min_lon=-73.95, min_lat=40.6, max_lon=-73.9, max_lat=40.7, limit=5
+        )
+        self.mock_housing_units_repository.near.assert_not_called()
+
+    @pytest.mark.parametrize('lat, lon, radius_m', [(None, None, None), (40.68, -73.91, None), (40.68, None, 500)])
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_point_is_incomplete(
+            self, lat: Optional[float], lon: Optional[float], radius_m: Optional[float]
+    ) -> None:
+        with pytest.raises(InvalidLocationError) as ex:
+            await self.near_housing_units_service.apply(lat=lat, lon=lon, radius_m=radius_m)
+
+        assert ex.value.args == InvalidLocationError(
+            "Either the lat, lon and radius_m or the bbox must be provided."
+        ).args
+        self.mock_housing_units_repository.near.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_point_and_bbox_are_provided(self) -> None:
+        with pytest.raises(InvalidLocationError) as ex:
+            await self.near_housing_units_service.apply(lat=40.68, bbox='-73.95,40.6,-73.9,40.7')
+
+        assert ex.value.args == InvalidLocationError(
+            "Either the lat, lon and radius_m or the bbox must be provided, not both."
+        ).args
+        self.mock_housing_units_repository.within.assert_not_called()
+
+    @pytest.mark.parametrize('bbox', ['', '-73.95,40.6,-73.9', '-73.95,40.6,-73.9,40.7,1', 'a,40.6,-73.9,40.7'])
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_bbox_is_malformed(self, bbox: str) -> None:
+        with pytest.raises(InvalidLocationError) as ex:
+            await self.near_housing_units_service.apply(bbox=bbox)
+
+        assert ex.value.args == InvalidLocationError(
+            "The bbox must be the comma separated min_lon,min_lat,max_lon,max_lat."
+        ).args
+        self.mock_housing_units_repository.within.assert_not_called()
+
+    @pytest.mark.parametrize('bbox', ['-73.9,40.6,-73.95,40.7', '-73.95,40.7,-73.9,40.6', '-181,40.6,-73.9,40.7'])
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_bbox_is_out_of_range(self, bbox: str) -> None:
+        with pytest.raises(InvalidLocationError) as ex:
+            await self.near_housing_units_service.apply(bbox=bbox)
+
+        assert ex.value.args == InvalidLocationError(
+            "The bbox longitudes must be from -180 to 180 and its latitudes from -90 to 90, with every minimum "
+            "less than its maximum."
+        ).args
+        self.mock_housing_units_repository.within.assert_not_called()
+
+
+class TestTileHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = AsyncMock()
+        self.mock_housing_units_repository.tile_cells.return_value = [
+            StubTileCellRow(
+                cell_x=3, cell_y=5, count=42, total_units=1280, latitude=40.72410012, longitude=-73.96420049
+            ),
+        ]
+        self.mock_housing_units_tiles_cache = MagicMock()
+        self.mock_housing_units_tiles_cache.get.return_value = None
+
+        self.tile_housing_units_service = TileHousingUnitsService(
+            housing_units_repository=self.mock_housing_units_repository,
+            housing_units_tiles_cache=self.mock_housing_units_tiles_cache,
+        )
+
+        with mock.patch(
+                'application.housing_units.services.HOUSING_UNITS_CACHE_GENERATION'
+        ) as mock_housing_units_cache_generation:
+            self.mock_housing_units_cache_generation: MagicMock = mock_housing_units_cache_generation
+            self.mock_housing_units_cache_generation.get.return_value = 1
+            yield
+
+    @pytest.mark.asyncio
+    async def test_apply_clusters_and_caches_the_serialised_tile_on_cache_miss(self) -> None:
+        result: HousingUnitsPage = await self.tile_housing_units_service.apply(z=12, x=1206, y=1539)
+
+        assert json.loads(result.content) == {
+            'z': 12,
+            'x': 1206,
+            'y': 1539,
+            'cells': [
+                {'x': 3, 'y': 5, 'count': 42, 'total_units': 1280, 'latitude': 40.7241, 'longitude': -73.9642},
+            ],
+        }
+        self.mock_housing_units_repository.tile_cells.assert_called_once_with(z=12, x=1206, y=1539)
+        cache_key = self.mock_housing_units_tiles_cache.get.call_args.args[0]
+        self.mock_housing_units_tiles_cache.set.assert_called_once_with(cache_key, result.content)
+        assert result.etag == housing_units_page_etag(cache_key)
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_cached_tile_per_tile_and_generation(self) -> None:
+        self.mock_housing_units_tiles_cache.get.return_value = b'{"cached": true}'
+
+        results: List[HousingUnitsPage] = [
+            await self.tile_housing_units_service.apply(z=12, x=1206, y=1539),
+            await self.tile_housing_units_service.apply(z=12, x=1206, y=1540),
+        ]
+        self.mock_housing_units_cache_generation.get.return_value = 2
+        results.append(await self.tile_housing_units_service.apply(z=12, x=1206, y=1539))
+
+        assert results[0].content == b'{"cached": true}'
+        self.mock_housing_units_repository.tile_cells.assert_not_called()
+        # Every tile is cached under its own key and ETag, which change once the HousingUnit table is written.
+        cache_keys: list = [get_call.args[0] for get_call in self.mock_housing_units_tiles_cache.get.call_args_list]
+        assert len(set(cache_keys)) == 3
+        assert len({result.etag for result in results}) == 3
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_only_the_etag_when_the_tile_is_not_modified(self) -> None:
+        etag: str = (await self.tile_housing_units_service.apply(z=3, x=2, y=3)).etag
+        self.mock_housing_units_tiles_cache.reset_mock()
+        self.mock_housing_units_repository.tile_cells.reset_mock()
+
+        result: HousingUnitsPage = await self.tile_housing_units_service.apply(z=3, x=2, y=3, if_none_match=etag)
+
+        assert result == HousingUnitsPage(etag=etag)
+        self.mock_housing_units_tiles_cache.get.assert_not_called()
+        self.mock_housing_units_repository.tile_cells.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_use_the_cache_when_generation_is_not_available(self) -> None:
+        self.mock_housing_units_cache_generation.get.return_value = None
+
+        result: HousingUnitsPage = await self.tile_housing_units_service.apply(z=0, x=0, y=0, if_none_match='*')
+
+        assert result.content is not None
+        assert result.etag is None
+        self.mock_housing_units_tiles_cache.get.assert_not_called()
+        self.mock_housing_units_tiles_cache.set.assert_not_called()
+
+    @pytest.mark.parametrize(
+        'z, x, y, expected_error',
+        [
+            (23, 0, 0, InvalidTileError("The tile zoom must be from 0 to 22.")),
+            (-1, 0, 0, InvalidTileError("The tile zoom must be from 0 to 22.")),
+            (2, 4, 0, InvalidTileError("The tile x and y must be from 0 to 3 at zoom 2.")),
+            (2, 0, -1, InvalidTileError("The tile x and y must be from 0 to 3 at zoom 2.")),
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_tile_is_not_valid(
+            self, z: int, x: int, y: int, expected_error: InvalidTileError
+    ) -> None:
+        with pytest.raises(InvalidTileError) as ex:
+            await self.tile_housing_units_service.apply(z=z, x=x, y=y)
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_repository.tile_cells.assert_not_called()
+
+
+class TestExportHousingUnitsService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_housing_units_repository = MagicMock()
+        self.mock_housing_units_repository.estimate_count = AsyncMock(return_value=10)
+        self.mock_housing_units_exporter = MagicMock()
+        self.mock_get_task_status_report_service = MagicMock()
+
+        self.export_housing_units_service = ExportHousingUnitsService(
+            housing_units_repository=self.mock_housing_units_repository,
+            housing_units_exporter=self.mock_housing_units_exporter,
+            get_task_status_report_service=self.mock_get_task_status_report_service,
+        )
+
+    @pytest.mark.asyncio
+    async def test_apply_streams_the_csv_export(self) -> None:
+        result: HousingUnitsExport = await self.export_housing_units_service.apply(
+            export_format=ExportFormat.csv, borough='bronx', num_units_min=1, num_units_max=5
+        )
+
+        assert result == HousingUnitsExport(
+            export_format=ExportFormat.csv,
+            content=self.mock_housing_units_exporter.stream_export_csv.return_value,
+        )
+        self.mock_housing_units_exporter.stream_export_csv.assert_called_once_with(
+            street_name=None,
+            borough='bronx',
+            postcode=None,
+            construction_type=None,
+            num_units_min=1,
+            num_units_max=5,
+        )
+        self.mock_housing_units_exporter.stream_export_rows.assert_not_called()
+
+    @pytest.mark.parametrize('export_format', [ExportFormat.parquet, ExportFormat.arrow])
+    @pytest.mark.asyncio
+    async def test_apply_streams_the_columnar_export(self, export_format: ExportFormat) -> None:
+        rows: List[tuple] = [
+            tuple(str(index) if field.name == 'project_id' else None for field in EXPORT_SCHEMA) for index in range(3)
+        ]
+
+        async def batches():
+            yield rows[:2]
+            yield rows[2:]
+
+        self.mock_housing_units_exporter.stream_export_rows.return_value = batches()
+
+        result: HousingUnitsExport = await self.export_housing_units_service.apply(export_format=export_format)
+
+        assert result.task_status is None
+        content: List[bytes] = [chunk async for chunk in result.content]
+        assert len(content) == 1
+        export_file: io.BytesIO = io.BytesIO(content[0])
+        table: pyarrow.Table = pyarrow.parquet.read_table(export_file) if export_format == ExportFormat.parquet \
+            else pyarrow.ipc.open_file(export_file).read_all()
+        assert table.column('project_id').to_pylist() == ['0', '1', '2']
+        self.mock_housing_units_exporter.stream_export_csv.assert_not_called()
+
+    @mock.patch('application.housing_units.services.housing_units_export_task')
+    @pytest.mark.asyncio
+    async def test_apply_exports_with_the_export_task_when_estimated_rows_are_above_the_limit(
+            self,
+            mock_housing_units_export_task: MagicMock,
+    ) -> None:
+        self.mock_housing_units_repository.estimate_count.return_value = \
+            ExportHousingUnitsService.EXPORT_MAX_STREAMED_ROWS + 1
+        mock_housing_units_export_task.delay.return_value = AsyncResult(
+            task_name='test',
+            id='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'
+        )
+        task_status: TaskStatus = TaskStatus(
+            task_id='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3',
+            task_status='PENDING',
+            task_result=None
+        )
+        self.mock_get_task_status_report_service.apply.return_value = task_status
+
+        result: HousingUnitsExport = await self.export_housing_units_service.apply(
+            export_format=ExportFormat.parquet, borough='bronx'
+        )
+
+        assert result == HousingUnitsExport(export_format=ExportFormat.parquet, task_status=task_status)
+        mock_housing_units_export_task.delay.assert_called_once_with('parquet', None, 'bronx', None, None, None, None)
+        self.mock_get_task_status_report_service.apply.assert_called_once_with(
+            task_id='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'
+        )
+        self.mock_housing_units_exporter.stream_export_csv.assert_not_called()
+        self.mock_housing_units_exporter.stream_export_rows.assert_not_called()
+
+    @pytest.mark.parametrize(
+        'export_format, num_units_min, num_units_max, expected_error',
+        [
+            # when_export_format_is_not_provided
+            (
+                    None,  # export_format
+                    None,  # num_units_min
+                    None,  # num_units_max
+                    InvalidArgumentError("The export format is not provided.")
+            ),
+            # when_num_max_units_is_smaller_than_num_min_units
+            (
+                    ExportFormat.csv,  # export_format
+                    2,  # num_units_min
+                    1,  # num_units_max
+                    InvalidNumUnitsError(
+                        "The provided number of maximum units can't be smaller than the number of minimum units"
+                    )
+            ),
+        ]
+    )
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_before_exporting(
+            self,
+            export_format: Optional[ExportFormat],
+            num_units_min: Optional[int],
+            num_units_max: Optional[int],
+            expected_error: HousingUnitBaseError,
+    ) -> None:
+        with pytest.raises(type(expected_error)) as ex:
+            await self.export_housing_units_service.apply(
+                export_format=export_format, num_units_min=num_units_min, num_units_max=num_units_max
+            )
+
+        assert ex.value.args == expected_error.args
+        self.mock_housing_units_repository.estimate_count.assert_not_called()
+
+
+class TestRetrieveHousingUnitsExportService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path) -> None:
+        self.export_directory: str = str(tmp_path)
+        self.file_name: str = '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3.parquet'
+        (tmp_path / self.file_name).write_bytes(b'PAR1')
+
+        self.retrieve_housing_units_export_service = RetrieveHousingUnitsExportService()
+
+    def test_apply_raise_error_when_file_name_not_provided(self) -> None:
+        expected_error: InvalidArgumentError = InvalidArgumentError("The file name is not provided.")
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            self.retrieve_housing_units_export_service.apply(file_name=None)
+
+        assert ex.value.args == expected_error.args
+
+    @pytest.mark.parametrize(
+        'file_name',
+        [
+            # when_file_does_not_exist
+            '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3.csv',
+            # when_file_name_is_not_an_export_file_name
+            '../3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3.parquet',
+            # when_file_is_partially_exported
+            '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3.parquet.part',
+        ]
+    )
+    @mock.patch('application.housing_units.services.Configuration')
+    def test_apply_raise_not_found_error(self, mock_configuration: MagicMock, file_name: str) -> None:
+        mock_configuration.get.return_value.export_directory = self.export_directory
+
+        with pytest.raises(HTTPException) as ex:
+            self.retrieve_housing_units_export_service.apply(file_name=file_name)
+
+        assert ex.value.status_code == 404
+        assert ex.value.detail == "Housing Units export not found."
+
+    @mock.patch('application.housing_units.services.Configuration')
+    def test_apply(self, mock_configuration: MagicMock) -> None:
+        mock_configuration.get.return_value.export_directory = self.export_directory
+
+        result: str = self.retrieve_housing_units_export_service.apply(file_name=self.file_name)
+
+        assert result == os.path.join(self.export_directory, self.file_name)
 
 
 class TestRetrieveHousingUnitService:
@@ -188,11 +1055,24 @@ class TestRetrieveHousingUnitService:
     @pytest.fixture(autouse=True)
     def setup(self) -> None:
         self.mock_housing_units_repository = AsyncMock()
+        self.housing_units_cache = TTLCache()
 
         self.retrieve_housing_unit_service = RetrieveHousingUnitService(
-            housing_units_repository=self.mock_housing_units_repository
+            housing_units_repository=self.mock_housing_units_repository,
+            housing_units_cache=self.housing_units_cache,
         )
 
+        with mock.patch(
+                'application.housing_units.services.HOUSING_UNITS_CACHE_INVALIDATIONS'
+        ) as mock_housing_units_cache_invalidations:
+            self.mock_housing_units_cache_invalidations: MagicMock = mock_housing_units_cache_invalidations
+            self.mock_housing_units_cache_invalidations.subscribed = True
+            self.mock_housing_units_cache_invalidations.sequence = 0
+            self.mock_housing_units_cache_invalidations.is_settled.side_effect = (
+                lambda sequence, lag_seconds: self.mock_housing_units_cache_invalidations.sequence == sequence
+            )
+            yield
+
     @pytest.mark.asyncio
     async def test_apply_raise_error_when_uuid_not_provided(self) -> None:
         expected_error: InvalidArgumentError = InvalidArgumentError("The uuid is not provided.")
@@ -211,8 +1091,71 @@ class TestRetrieveHousingUnitService:
         result = await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid)
 
         self.mock_housing_units_repository.get_by_uuid.assert_called_once_with(uuid=stub_housing_units[0].uuid)
+        self.mock_housing_units_cache_invalidations.subscribe.assert_called_once_with(self.housing_units_cache)
+
+        assert result == stub_housing_units[0]
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_cached_housing_unit(self, stub_housing_units) -> None:
+        self.mock_housing_units_repository.get_by_uuid.return_value = stub_housing_units[0]
+
+        first_result = await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid)
+        # The different spellings of the same uuid are cached under the same key.
+        result = await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid.upper())
+
+        assert first_result == result == stub_housing_units[0]
+        self.mock_housing_units_repository.get_by_uuid.assert_called_once_with(uuid=stub_housing_units[0].uuid)
+        assert self.housing_units_cache.stats == CacheStats(hits=1, misses=1, size=1)
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_use_the_cache_when_invalidations_are_not_subscribed(
+            self,
+            stub_housing_units,
+    ) -> None:
+        self.mock_housing_units_cache_invalidations.subscribed = False
+        self.mock_housing_units_repository.get_by_uuid.return_value = stub_housing_units[0]
+
+        await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid)
+        await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid)
+
+        assert self.mock_housing_units_repository.get_by_uuid.call_count == 2
+        assert self.housing_units_cache.stats == CacheStats()
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_cache_the_housing_unit_when_invalidated_while_read(self, stub_housing_units) -> None:
+        async def get_by_uuid(uuid: str) -> HousingUnit:
+            self.mock_housing_units_cache_invalidations.sequence += 1
+            return stub_housing_units[0]
+
+        self.mock_housing_units_repository.get_by_uuid.side_effect = get_by_uuid
+
+        result = await self.retrieve_housing_unit_service.apply(uuid=stub_housing_units[0].uuid)
 
         assert result == stub_housing_units[0]
+        assert len(self.housing_units_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_not_found_error(self) -> None:
+        self.mock_housing_units_repository.get_by_uuid.return_value = None
+
+        with pytest.raises(HTTPException) as ex:
+            await self.retrieve_housing_unit_service.apply(uuid='3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3')
+
+        assert ex.value.status_code == 404
+        assert len(self.housing_units_cache) == 0
+
+
+class TestGetHousingUnitsCacheStatsService:
+
+    def test_apply(self) -> None:
+        housing_units_cache: TTLCache = TTLCache()
+        housing_units_cache.set('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3', 'housing unit')
+        housing_units_cache.get('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3')
+        housing_units_cache.get('e3b3326c-617a-4836-8fe0-3c17390f0bd4')
+
+        result: CacheStats = GetHousingUnitsCacheStatsService(housing_units_cache=housing_units_cache).apply()
+
+        assert result == CacheStats(hits=1, misses=1, size=1)
 
 
 class TestCreateHousingUnitService:
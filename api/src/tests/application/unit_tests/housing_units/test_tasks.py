@@ -0,0 +1,107 @@
+import io
+import os
+from typing import List, Dict, Any, BinaryIO
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pyarrow
+import pyarrow.parquet
+import pytest
+
+from application.housing_units.enums import ExportFormat
+from application.housing_units.exporters import EXPORT_SCHEMA
+from application.housing_units.tasks import housing_units_export_task
+
+
+class TestHousingUnitsExportTask:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path) -> None:
+        self.export_directory: str = str(tmp_path / 'exports')
+        self.rows: List[tuple] = [
+            tuple(
+                '40{0:03d}'.format(index) if field.name == 'project_id' else None
+                for field in EXPORT_SCHEMA
+            )
+            for index in range(5)
+        ]
+
+    @mock.patch.object(housing_units_export_task, 'update_state')
+    @mock.patch('application.housing_units.tasks.Configuration')
+    @mock.patch('application.housing_units.tasks.HousingUnitsExporter')
+    def test_apply_exports_csv_with_copy(
+            self,
+            mock_housing_units_exporter: MagicMock,
+            mock_configuration: MagicMock,
+            mock_update_state: MagicMock,
+    ) -> None:
+        mock_configuration.get.return_value.export_directory = self.export_directory
+
+        def export_csv(csv_file: BinaryIO, **filters: Any) -> None:
+            csv_file.write(b'uuid,project_id\n,40001\n')
+
+        mock_housing_units_exporter.return_value.export_csv.side_effect = export_csv
+
+        result: Dict[str, str] = housing_units_export_task(
+            export_format=ExportFormat.csv.value, borough='bronx', num_units_min=1
+        )
+
+        assert result['file_name'].endswith('.csv')
+        assert result['download_url'] == '/housing-units/exports/{0}'.format(result['file_name'])
+        assert os.listdir(self.export_directory) == [result['file_name']]
+        with open(os.path.join(self.export_directory, result['file_name']), 'rb') as export_file:
+            assert export_file.read() == b'uuid,project_id\n,40001\n'
+        assert mock_housing_units_exporter.return_value.export_csv.call_args.kwargs == {
+            'street_name': None,
+            'borough': 'bronx',
+            'postcode': None,
+            'construction_type': None,
+            'num_units_min': 1,
+            'num_units_max': None,
+        }
+        mock_housing_units_exporter.return_value.export_rows.assert_not_called()
+
+    @pytest.mark.parametrize('export_format', [ExportFormat.parquet, ExportFormat.arrow])
+    @mock.patch.object(housing_units_export_task, 'update_state')
+    @mock.patch('application.housing_units.tasks.Configuration')
+    @mock.patch('application.housing_units.tasks.HousingUnitsExporter')
+    def test_apply_exports_columnar_formats_batch_by_batch(
+            self,
+            mock_housing_units_exporter: MagicMock,
+            mock_configuration: MagicMock,
+            mock_update_state: MagicMock,
+            export_format: ExportFormat,
+    ) -> None:
+        mock_configuration.get.return_value.export_directory = self.export_directory
+        mock_housing_units_exporter.return_value.export_rows.return_value = iter([self.rows[:3], self.rows[3:]])
+
+        result: Dict[str, str] = housing_units_export_task(export_format=export_format.value)
+
+        with open(os.path.join(self.export_directory, result['file_name']), 'rb') as export_file:
+            export_content: io.BytesIO = io.BytesIO(export_file.read())
+        table: pyarrow.Table = pyarrow.parquet.read_table(export_content) if export_format == ExportFormat.parquet \
+            else pyarrow.ipc.open_file(export_content).read_all()
+
+        assert table.schema == EXPORT_SCHEMA
+        assert table.column('project_id').to_pylist() == ['40000', '40001', '40002', '40003', '40004']
+        assert mock_update_state.call_args_list == [
+            mock.call(state='PROGRESS', meta={'exported': 3}),
+            mock.call(state='PROGRESS', meta={'exported': 5}),
+        ]
+
+    @mock.patch.object(housing_units_export_task, 'update_state')
+    @mock.patch('application.housing_units.tasks.Configuration')
+    @mock.patch('application.housing_units.tasks.HousingUnitsExporter')
+    def test_apply_removes_the_partial_file_when_export_fails(
+            self,
+            mock_housing_units_exporter: MagicMock,
+            mock_configuration: MagicMock,
+            mock_update_state: MagicMock,
+    ) -> None:
+        mock_configuration.get.return_value.export_directory = self.export_directory
+        mock_housing_units_exporter.return_value.export_csv.side_effect = ConnectionError('Test error.')
+
+        with pytest.raises(ConnectionError):
+            housing_units_export_task(export_format=ExportFormat.csv.value)
+
+        assert os.listdir(self.export_directory) == []
@@ -0,0 +1,124 @@
+from typing import List
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from redis import ConnectionError
+
+from application.infrastructure.cache.caches import TTLCache, CacheStats, RedisCache
+
+
+class StubClock:
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.clock: StubClock = StubClock()
+        self.cache: TTLCache = TTLCache(max_size=2, ttl_seconds=10.0, clock=self.clock)
+
+    def test_get_returns_the_cached_values(self) -> None:
+        self.cache.set('key 1', 1)
+        self.cache.set('key 2', None)
+
+        assert self.cache.get('key 1') == 1
+        assert self.cache.get('key 2', default='default') is None
+        assert self.cache.get('key 3', default='default') == 'default'
+        assert self.cache.stats == CacheStats(hits=2, misses=1, evictions=0, expirations=0, size=2)
+
+    def test_set_evicts_the_least_recently_used_entry(self) -> None:
+        self.cache.set('key 1', 1)
+        self.cache.set('key 2', 2)
+        # The key 1 is used, so the key 2 becomes the least recently used one.
+        self.cache.get('key 1')
+        self.cache.set('key 3', 3)
+
+        cached_values: List[int] = [self.cache.get(key) for key in ('key 1', 'key 2', 'key 3')]
+
+        assert cached_values == [1, None, 3]
+        assert self.cache.stats.evictions == 1
+        assert len(self.cache) == 2
+
+    def test_get_expires_the_entries_older_than_their_ttl(self) -> None:
+        self.cache.set('key 1', 1)
+        self.cache.set('key 2', 2, ttl_seconds=20.0)
+
+        self.clock.now = 10.0
+
+        assert self.cache.get('key 1') is None
+        assert self.cache.get('key 2') == 2
+        assert self.cache.stats == CacheStats(hits=1, misses=1, evictions=0, expirations=1, size=1)
+
+    def test_set_without_ttl_never_expires(self) -> None:
+        self.cache.set('key 1', 1, ttl_seconds=None)
+
+        self.clock.now = 1000000.0
+
+        assert self.cache.get('key 1') == 1
+
+    def test_delete_and_clear(self) -> None:
+        self.cache.set('key 1', 1)
+        self.cache.set('key 2', 2)
+
+        self.cache.delete('key 1')
+        self.cache.delete('key 3')
+        assert self.cache.get('key 1') is None
+        assert self.cache.get('key 2') == 2
+
+        self.cache.clear()
+        assert self.cache.get('key 2') is None
+        assert len(self.cache) == 0
+
+
+class TestRedisCache:
+
+    @mock.patch('application.infrastructure.cache.caches.RedisClientWrapper')
+    def test_get_and_set(self, mock_redis_client_wrapper: MagicMock) -> None:
+        mock_redis_client: MagicMock = mock_redis_client_wrapper.get_client.return_value
+        mock_redis_client.get.return_value = b'{"total": 1}'
+        cache: RedisCache = RedisCache(name='housing_units_filter', ttl_seconds=30, max_value_bytes=16)
+
+        assert cache.set((1, (('borough', 'Bronx'),)), b'{"total": 1}') is True
+        assert cache.get((1, (('borough', 'Bronx'),))) == b'{"total": 1}'
+
+        # The keys are hashed, and the entries expire after the time to live.
+        redis_key: str = mock_redis_client.set.call_args.args[0]
+        assert redis_key.startswith('housing_units_api:cache:housing_units_filter:')
+        assert len(redis_key.rsplit(':', 1)[1]) == 64
+        assert mock_redis_client.set.call_args.kwargs == {'ex': 30}
+        mock_redis_client.get.assert_called_once_with(redis_key)
+
+        # The same key is always hashed to the same Redis key, and different keys to different ones.
+        cache.set((1, (('borough', 'Bronx'),)), b'{}')
+        cache.set((2, (('borough', 'Bronx'),)), b'{}')
+        assert [set_call.args[0] for set_call in mock_redis_client.set.call_args_list][1:] == [
+            redis_key, mock.ANY
+        ]
+        assert mock_redis_client.set.call_args.args[0] != redis_key
+
+    @mock.patch('application.infrastructure.cache.caches.RedisClientWrapper')
+    def test_set_does_not_cache_the_values_larger_than_the_max_value_size(
+            self,
+            mock_redis_client_wrapper: MagicMock,
+    ) -> None:
+        cache: RedisCache = RedisCache(name='housing_units_filter', max_value_bytes=4)
+
+        assert cache.set('key', b'12345') is False
+        mock_redis_client_wrapper.get_client.return_value.set.assert_not_called()
+
+    @mock.patch('application.infrastructure.cache.caches.RedisClientWrapper')
+    def test_get_and_set_when_redis_is_unreachable(self, mock_redis_client_wrapper: MagicMock) -> None:
+        mock_redis_client: MagicMock = mock_redis_client_wrapper.get_client.return_value
+        mock_redis_client.get.side_effect = ConnectionError('Test error.')
+        mock_redis_client.set.side_effect = ConnectionError('Test error.')
+        cache: RedisCache = RedisCache(name='housing_units_filter')
+
+        assert cache.get('key') is None
+        assert cache.set('key', b'value') is False
@@ -0,0 +1,39 @@
+from unittest import mock
+from unittest.mock import MagicMock
+
+from redis import ConnectionError
+
+from application.infrastructure.cache.generations import CacheGeneration
+
+
+class TestCacheGeneration:
+
+    @mock.patch('application.infrastructure.cache.generations.time.time', return_value=1642846477.518)
+    @mock.patch('application.infrastructure.cache.generations.RedisClientWrapper')
+    def test_get_and_bump(self, mock_redis_client_wrapper: MagicMock, mock_time: MagicMock) -> None:
+        mock_redis_client: MagicMock = mock_redis_client_wrapper.get_client.return_value
+        mock_redis_client.get.side_effect = [None, b'1642846477518', b'1642846477519']
+        mock_redis_client.incr.return_value = 1642846477519
+        cache_generation: CacheGeneration = CacheGeneration(name='housingunits')
+
+        assert cache_generation.get() == 1642846477518
+        assert cache_generation.bump() == 1642846477519
+        assert cache_generation.get() == 1642846477519
+        mock_redis_client.incr.assert_called_once_with('housing_units_api:cache_generation:housingunits')
+
+        # The missing generation is seeded with the current time, without overwriting the one set concurrently.
+        assert mock_redis_client.set.call_args_list == [
+            mock.call('housing_units_api:cache_generation:housingunits', 1642846477518, nx=True),
+            mock.call('housing_units_api:cache_generation:housingunits', 1642846477518, nx=True),
+        ]
+
+    @mock.patch('application.infrastructure.cache.generations.RedisClientWrapper')
+    def test_get_and_bump_return_none_when_redis_is_unreachable(self, mock_redis_client_wrapper: MagicMock) -> None:
+        mock_redis_client: MagicMock = mock_redis_client_wrapper.get_client.return_value
+        mock_redis_client.get.side_effect = ConnectionError('Test error.')
+        mock_redis_client.set.side_effect = ConnectionError('Test error.')
+        mock_redis_client.incr.side_effect = ConnectionError('Test error.')
+        cache_generation: CacheGeneration = CacheGeneration(name='housingunits')
+
+        assert cache_generation.get() is None
+        assert cache_generation.bump() is None
@@ -0,0 +1,130 @@
+from typing import List, Optional, Dict, Any
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from redis import ConnectionError
+
+from application.infrastructure.cache.caches import TTLCache
+from application.infrastructure.cache.invalidations import CacheInvalidations
+
+
+class StopListening(Exception):
+    pass
+
+
+class TestCacheInvalidations:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.cache: TTLCache = TTLCache()
+        self.cache.set('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3', 'housing unit 1')
+        self.cache.set('e3b3326c-617a-4836-8fe0-3c17390f0bd4', 'housing unit 2')
+        self.cache_invalidations: CacheInvalidations = CacheInvalidations(name='housingunits')
+
+        with mock.patch('application.infrastructure.cache.invalidations.threading.Thread') as mock_thread:
+            self.mock_thread: MagicMock = mock_thread
+            self.cache_invalidations.subscribe(self.cache)
+            yield
+
+    def test_subscribe_starts_the_listener_once_per_process(self) -> None:
+        self.cache_invalidations.subscribe(self.cache)
+        self.cache_invalidations.subscribe(TTLCache())
+
+        self.mock_thread.assert_called_once_with(
+            target=self.cache_invalidations._listen,
+            name='housing_units_api:cache_invalidations:housingunits',
+            daemon=True,
+        )
+        self.mock_thread.return_value.start.assert_called_once()
+
+        # The forked worker processes start their own listener.
+        with mock.patch('application.infrastructure.cache.invalidations.os.getpid', return_value=-1):
+            self.cache_invalidations.subscribe(self.cache)
+        assert self.mock_thread.return_value.start.call_count == 2
+
+    def test_invalidate(self) -> None:
+        self.cache_invalidations.invalidate('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3')
+
+        assert self.cache.get('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3') is None
+        assert self.cache.get('e3b3326c-617a-4836-8fe0-3c17390f0bd4') == 'housing unit 2'
+        assert self.cache_invalidations.sequence == 1
+
+        self.cache_invalidations.invalidate()
+
+        assert len(self.cache) == 0
+        assert self.cache_invalidations.sequence == 2
+
+    def test_is_settled(self) -> None:
+        with mock.patch('application.infrastructure.cache.invalidations.time.monotonic', return_value=100.0):
+            self.cache_invalidations.invalidate()
+
+        sequence: int = self.cache_invalidations.sequence
+        with mock.patch('application.infrastructure.cache.invalidations.time.monotonic', return_value=100.5):
+            # The rows read within the replica lag of the latest invalidation are not cached.
+            assert not self.cache_invalidations.is_settled(sequence, lag_seconds=1.0)
+        with mock.patch('application.infrastructure.cache.invalidations.time.monotonic', return_value=101.0):
+            assert self.cache_invalidations.is_settled(sequence, lag_seconds=1.0)
+            assert not self.cache_invalidations.is_settled(sequence - 1, lag_seconds=1.0)
+
+    @pytest.mark.parametrize(
+        'key, expected_message',
+        [
+            ('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3', '3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+            (None, '*'),
+        ]
+    )
+    @mock.patch('application.infrastructure.cache.invalidations.RedisClientWrapper')
+    def test_publish_invalidates_the_publishing_worker_caches_first(
+            self,
+            mock_redis_client_wrapper: MagicMock,
+            key: Optional[str],
+            expected_message: str,
+    ) -> None:
+        mock_redis_client_wrapper.get_client.return_value.publish.side_effect = ConnectionError('Test error.')
+
+        self.cache_invalidations.publish(key)
+
+        assert self.cache.get('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3') is None
+        mock_redis_client_wrapper.get_client.return_value.publish.assert_called_once_with(
+            'housing_units_api:cache_invalidations:housingunits', expected_message
+        )
+
+    @mock.patch('application.infrastructure.cache.invalidations.time.sleep', side_effect=StopListening)
+    @mock.patch('application.infrastructure.cache.invalidations.Redis')
+    def test_listen_applies_the_published_invalidations(
+            self,
+            mock_redis: MagicMock,
+            mock_sleep: MagicMock,
+    ) -> None:
+        mock_pubsub: MagicMock = mock_redis.from_url.return_value.pubsub.return_value
+        messages: List[Optional[Dict[str, Any]]] = [
+            None,
+            {'type': 'message', 'data': b'3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'},
+        ]
+        subscribed_states: List[bool] = []
+
+        def get_message(timeout: float) -> Optional[Dict[str, Any]]:
+            subscribed_states.append(self.cache_invalidations.subscribed)
+            if messages:
+                return messages.pop(0)
+            raise ConnectionError('Test error.')
+
+        mock_pubsub.get_message.side_effect = get_message
+
+        # The caches are cleared on subscription, as the invalidations published before it are unknown.
+        with mock.patch.object(self.cache_invalidations, 'invalidate', wraps=self.cache_invalidations.invalidate) as \
+                mock_invalidate:
+            with pytest.raises(StopListening):
+                self.cache_invalidations._listen()
+
+        mock_pubsub.subscribe.assert_called_once_with('housing_units_api:cache_invalidations:housingunits')
+        assert subscribed_states == [True, True, True]
+        assert mock_invalidate.call_args_list == [
+            mock.call(),
+            mock.call('3f6bf0e4-ce1d-44bf-9e88-e627f6f756f3'),
+            mock.call(),
+        ]
+        # The subscription is lost, so the caches are cleared and not used until it is established again.
+        assert not self.cache_invalidations.subscribed
+        assert len(self.cache) == 0
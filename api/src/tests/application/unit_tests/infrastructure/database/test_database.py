@@ -0,0 +1,70 @@
+import contextvars
+from typing import Any, Iterator, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from application.infrastructure.database.database import DatabaseEngineWrapper, _READ_YOUR_WRITES
+
+
+def _async_db_engine(checked_out: int) -> Any:
+    async_db_engine: Any = MagicMock()
+    async_db_engine.async_engine.sync_engine.pool.checkedout.return_value = checked_out
+    return async_db_engine
+
+
+@pytest.fixture
+def db_engines() -> Iterator[List[Any]]:
+    primary: Any = _async_db_engine(checked_out=0)
+    replicas: List[Any] = [_async_db_engine(checked_out=2), _async_db_engine(checked_out=1)]
+    # The invalidations of the test fixtures read from the primary in the context of the tests.
+    read_your_writes_token: contextvars.Token = _READ_YOUR_WRITES.set(False)
+    with patch.object(DatabaseEngineWrapper, 'ASYNC_DB_ENGINE', primary), \
+            patch.object(DatabaseEngineWrapper, 'ASYNC_REPLICA_DB_ENGINES', replicas), \
+            patch.object(DatabaseEngineWrapper, '_PRIMARY_READS_UNTIL', 0.0):
+        yield [primary] + replicas
+    _READ_YOUR_WRITES.reset(read_your_writes_token)
+
+
+class TestDatabaseEngineWrapper:
+
+    def test_get_async_read_engine_without_replicas(self, db_engines: List[Any]) -> None:
+        DatabaseEngineWrapper.ASYNC_REPLICA_DB_ENGINES = []
+
+        assert DatabaseEngineWrapper.get_async_read_engine() is db_engines[0]
+
+    def test_get_async_read_engine_least_connections(self, db_engines: List[Any]) -> None:
+        primary, busy_replica, idle_replica = db_engines
+
+        assert DatabaseEngineWrapper.get_async_read_engine() is idle_replica
+        assert DatabaseEngineWrapper.get_async_read_engine() is idle_replica
+
+        # The replicas with equal loads are rotated.
+        busy_replica.async_engine.sync_engine.pool.checkedout.return_value = 1
+        assert {
+            DatabaseEngineWrapper.get_async_read_engine(), DatabaseEngineWrapper.get_async_read_engine()
+        } == {busy_replica, idle_replica}
+
+    def test_read_from_primary(self, db_engines: List[Any]) -> None:
+        primary, busy_replica, idle_replica = db_engines
+
+        def request_with_write() -> None:
+            DatabaseEngineWrapper.read_from_primary()
+            assert DatabaseEngineWrapper.get_async_read_engine() is primary
+
+        with patch('application.infrastructure.database.database.time.monotonic', return_value=100.0):
+            contextvars.copy_context().run(request_with_write)
+
+            # The reads of the other requests of the worker are sent to the primary for the replica lag too.
+            assert DatabaseEngineWrapper.get_async_read_engine() is primary
+
+        with patch('application.infrastructure.database.database.time.monotonic', return_value=1000.0):
+            assert DatabaseEngineWrapper.get_async_read_engine() is idle_replica
+
+            # The request that wrote keeps reading from the primary after the replica lag.
+            def request_after_write() -> None:
+                DatabaseEngineWrapper.read_from_primary()
+                with patch('application.infrastructure.database.database.time.monotonic', return_value=5000.0):
+                    assert DatabaseEngineWrapper.get_async_read_engine() is primary
+
+            contextvars.copy_context().run(request_after_write)
@@ -0,0 +1,104 @@
+from typing import List
+
+from application.infrastructure.database.index_advisor import (
+    parse_query_log, query_shape, recommended_index, merge_indexes, is_covered, query_plan, IndexDefinition,
+    QueryShape, QueryPlan
+)
+
+QUERY_LOG: List[str] = [
+    "2022-01-24 10:00:00.000 UTC [68] LOG:  duration: 0.021 ms  parse __asyncpg_stmt_1__: SELECT housingunits.id\n",
+    "2022-01-24 10:00:00.001 UTC [68] LOG:  duration: 0.014 ms  bind __asyncpg_stmt_1__: SELECT housingunits.id\n",
+    "2022-01-24 10:00:00.001 UTC [68] DETAIL:  parameters: $1 = 'Brooklyn', $2 = '99'\n",
+    "2022-01-24 10:00:00.002 UTC [68] LOG:  duration: 1.520 ms  execute __asyncpg_stmt_1__: SELECT housingunits.id, "
+    "housingunits.project_id \n",
+    "\tFROM housingunits \n",
+    "\tWHERE housingunits.borough = $1::VARCHAR AND housingunits.total_units >= $2::INTEGER "
+    "ORDER BY housingunits.id \n",
+    "\t LIMIT $3::INTEGER\n",
+    "2022-01-24 10:00:00.002 UTC [68] DETAIL:  parameters: $1 = 'Bronx', $2 = '5', $3 = '20'\n",
+    "2022-01-24 10:00:00.003 UTC [68] LOG:  duration: 0.120 ms  statement: SELECT count(*) FROM housingunits\n",
+    "2022-01-24 10:00:00.004 UTC [68] LOG:  checkpoint starting: time\n",
+]
+
+
+class TestIndexAdvisor:
+
+    def test_parse_query_log_inlines_the_parameters_of_the_executed_statements(self) -> None:
+        assert parse_query_log(QUERY_LOG) == [
+            "SELECT housingunits.id, housingunits.project_id FROM housingunits WHERE housingunits.borough = "
+            "'Bronx'::VARCHAR AND housingunits.total_units >= '5'::INTEGER ORDER BY housingunits.id "
+            "LIMIT '20'::INTEGER",
+            "SELECT count(*) FROM housingunits",
+        ]
+
+    def test_query_shape(self) -> None:
+        shape: QueryShape = query_shape(parse_query_log(QUERY_LOG)[0], 'housingunits')
+
+        assert shape == QueryShape(
+            sql="SELECT housingunits.id, housingunits.project_id FROM housingunits WHERE housingunits.borough = "
+                "?::VARCHAR AND housingunits.total_units >= ?::INTEGER ORDER BY housingunits.id LIMIT ?::INTEGER",
+            equality_columns=['borough'],
+            range_columns=['total_units'],
+            sort_columns=['id'],
+            selected_columns=['id', 'project_id'],
+        )
+        # The queries that differ only by their values have the same shape.
+        assert query_shape(shape.sql.replace('?', "'Queens'", 1), 'housingunits').sql == shape.sql
+
+    def test_recommended_index_is_keyed_by_equality_sort_and_range_columns(self) -> None:
+        shape: QueryShape = query_shape(parse_query_log(QUERY_LOG)[0], 'housingunits')
+
+        assert recommended_index(shape, 'housingunits') == IndexDefinition(
+            name='ix_housingunits_borough_id_total_units',
+            columns=['borough', 'id', 'total_units'],
+            include=['project_id'],
+        )
+        # The covering indexes are not recommended for the queries selecting many columns.
+        assert recommended_index(shape, 'housingunits', max_include_columns=0).include == []
+        assert recommended_index(query_shape(parse_query_log(QUERY_LOG)[1], 'housingunits'), 'housingunits') is None
+
+    def test_merge_indexes_and_is_covered(self) -> None:
+        merged_indexes: List[IndexDefinition] = merge_indexes([
+            IndexDefinition(name='ix_a', columns=['borough'], include=['postcode']),
+            IndexDefinition(name='ix_b', columns=['borough', 'total_units'], include=['project_id']),
+            IndexDefinition(name='ix_c', columns=['postcode']),
+        ])
+
+        assert merged_indexes == [
+            IndexDefinition(name='ix_b', columns=['borough', 'total_units'], include=['project_id', 'postcode']),
+            IndexDefinition(name='ix_c', columns=['postcode']),
+        ]
+        assert merged_indexes[0].create_sql('housingunits') == (
+            'CREATE INDEX CONCURRENTLY ix_b ON housingunits (borough, total_units) INCLUDE (project_id, postcode)'
+        )
+        assert is_covered(IndexDefinition(name='ix', columns=['postcode']), merged_indexes)
+        assert not is_covered(IndexDefinition(name='ix', columns=['total_units']), merged_indexes)
+        assert not is_covered(IndexDefinition(name='ix', columns=['postcode'], include=['borough']), merged_indexes)
+
+    def test_query_plan(self) -> None:
+        plan: QueryPlan = query_plan([{
+            'Plan': {
+                'Node Type': 'Limit',
+                'Actual Rows': 20,
+                'Shared Hit Blocks': 30,
+                'Shared Read Blocks': 12,
+                'Plans': [{
+                    'Node Type': 'Bitmap Heap Scan',
+                    'Rows Removed by Filter': 15,
+                    'Plans': [{
+                        'Node Type': 'BitmapAnd',
+                        'Plans': [
+                            {'Node Type': 'Bitmap Index Scan', 'Index Name': 'ix_housingunits_borough'},
+                            {'Node Type': 'Bitmap Index Scan', 'Index Name': 'ix_housingunits_total_units'},
+                        ]
+                    }]
+                }]
+            },
+            'Execution Time': 3.5,
+        }])
+
+        assert plan.execution_ms == 3.5
+        assert plan.buffers == 42
+        assert sorted(plan.index_names) == ['ix_housingunits_borough', 'ix_housingunits_total_units']
+        assert plan.rows_removed_by_filter == 15
+        assert plan.inefficient
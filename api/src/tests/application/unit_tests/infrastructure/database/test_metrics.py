@@ -0,0 +1,36 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import exc
+
+from application.infrastructure.database.metrics import MeasuredQueuePool, PoolStats
+
+
+class TestMeasuredQueuePool:
+
+    def test_stats(self) -> None:
+        pool: MeasuredQueuePool = MeasuredQueuePool(creator=MagicMock, pool_size=1, max_overflow=1, timeout=0.01)
+        assert pool.stats == PoolStats(capacity=2)
+
+        first_connection: Any = pool.connect()
+        second_connection: Any = pool.connect()
+
+        # The connections beyond the pool_size and max_overflow time out.
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+
+        stats: PoolStats = pool.stats
+        assert stats.checkouts == 2
+        assert stats.checkout_timeouts == 1
+        assert stats.checked_out == 2
+        assert stats.saturation == 1.0
+        # The timed out checkout waited for the pool timeout.
+        assert stats.max_checkout_wait_seconds >= 0.01
+        assert stats.checkout_wait_seconds >= stats.max_checkout_wait_seconds
+
+        first_connection.close()
+        second_connection.close()
+
+        assert pool.stats.checked_out == 0
+        assert pool.stats.saturation == 0.0
@@ -0,0 +1,338 @@
+from typing import List, Dict, Any, Optional
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from pandas import DataFrame
+
+from application.housing_units.enums import LoadStrategy, IngestionMode
+from application.housing_units.models import HousingUnit
+from application.socrata.client import SocrataClient
+from application.socrata.errors import SocrataDatasetDownloadError
+from application.socrata.tasks import housing_unit_raw_data_ingestion_task
+
+
+class TestHousingUnitRawDataIngestionTask:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_socrata_records: List[Dict[str, str]]) -> None:
+        # The records are updated in reverse order, so the highest :updated_at value is the one of the first record.
+        stub_socrata_records = [
+            dict(record, **{':updated_at': '2022-01-{0:02d}T00:00:00.000Z'.format(28 - index // 100)})
+            for index, record in enumerate(stub_socrata_records)
+        ]
+        self.pages: List[DataFrame] = [
+            SocrataClient.records_to_dataframe(stub_socrata_records[:1000]),
+            SocrataClient.records_to_dataframe(stub_socrata_records[1000:]),
+        ]
+
+    @mock.patch('application.socrata.tasks.drop_replaced_housing_units_table_task')
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_flushes_every_chunk_once(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            mock_drop_replaced_housing_units_table_task: MagicMock,
+    ) -> None:
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = iter(self.pages)
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+
+        result: str = housing_unit_raw_data_ingestion_task(hbd_dataset_id='hg8x-zxpr', reset_table=True)
+
+        assert result == 'Number of HousingUnits inserted: 1200.'
+        # The full mode loads the staging table, instead of resetting the HousingUnit table.
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.swap_staging_table.assert_called_once_with()
+
+        # Each chunk is flushed on its own, without re-submitting the rows of the previous chunks.
+        bulk_insert_calls = mock_housing_units_bulk_loader.return_value.bulk_insert.call_args_list
+        assert [len(bulk_insert_call.args[0]) for bulk_insert_call in bulk_insert_calls] == [500, 500, 200]
+        assert bulk_insert_calls[2].args[0][0]['project_id'] == '41001'
+
+        assert mock_update_state.call_args_list == [
+            mock.call(state='PROGRESS', meta={'inserted': 500, 'chunks': 1}),
+            mock.call(state='PROGRESS', meta={'inserted': 1000, 'chunks': 2}),
+            mock.call(state='PROGRESS', meta={'inserted': 1200, 'chunks': 3}),
+        ]
+
+        # The whole dataset is downloaded, and the high-water mark is saved after all the rows are loaded.
+        mock_socrata_client.return_value.housing_units_dataset_pages.assert_called_once_with(updated_since=None)
+        mock_ingestion_state_repository.return_value.get_high_water_mark.assert_not_called()
+        mock_ingestion_state_repository.return_value.save_high_water_mark.assert_called_once_with(
+            dataset_id='hg8x-zxpr', high_water_mark='2022-01-28T00:00:00.000Z'
+        )
+        # The canonical values are collected once, after the whole ingestion.
+        mock_housing_units_repository.return_value.refresh_canonical_values.assert_called_once_with()
+
+    @pytest.mark.parametrize(
+        'load_strategy, expected_loader',
+        [
+            (LoadStrategy.core.value, 'bulk_insert'),
+            (LoadStrategy.copy.value, 'bulk_copy'),
+        ]
+    )
+    @mock.patch('application.socrata.tasks.drop_replaced_housing_units_table_task')
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_loads_housing_unit_mappings_with_the_load_strategy(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            mock_drop_replaced_housing_units_table_task: MagicMock,
+            load_strategy: str,
+            expected_loader: str,
+    ) -> None:
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = iter(self.pages)
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+
+        result: str = housing_unit_raw_data_ingestion_task(
+            hbd_dataset_id='hg8x-zxpr', reset_table=True, load_strategy=load_strategy
+        )
+
+        assert result == 'Number of HousingUnits inserted: 1200.'
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_repository.return_value.bulk_save.assert_not_called()
+
+        loader_calls = getattr(mock_housing_units_bulk_loader.return_value, expected_loader).call_args_list
+        assert [len(loader_call.args[0]) for loader_call in loader_calls] == [500, 500, 200]
+        housing_unit_mapping: Dict[str, Any] = loader_calls[0].args[0][0]
+        assert not isinstance(housing_unit_mapping, HousingUnit)
+        assert housing_unit_mapping['project_id'] == '40001'
+        assert housing_unit_mapping['one_br_units'] == 1
+        assert housing_unit_mapping['postcode'] == 11201
+
+    @mock.patch('application.socrata.tasks.drop_replaced_housing_units_table_task')
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_drops_the_staging_table_when_the_load_fails_after_the_first_page(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            mock_drop_replaced_housing_units_table_task: MagicMock,
+    ) -> None:
+        def failing_pages():
+            yield self.pages[0]
+            raise ConnectionError('Test error.')
+
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = failing_pages()
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+
+        with pytest.raises(SocrataDatasetDownloadError):
+            housing_unit_raw_data_ingestion_task(hbd_dataset_id='hg8x-zxpr', reset_table=True)
+
+        # The HousingUnit table is kept as it was, along with the high-water mark of the dataset.
+        mock_housing_units_bulk_loader.return_value.create_staging_table.assert_called_once_with()
+        mock_housing_units_bulk_loader.return_value.drop_staging_table.assert_called_once_with()
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.swap_staging_table.assert_not_called()
+        mock_drop_replaced_housing_units_table_task.delay.assert_not_called()
+        mock_ingestion_state_repository.return_value.save_high_water_mark.assert_not_called()
+        mock_housing_units_repository.return_value.refresh_canonical_values.assert_not_called()
+
+    @mock.patch('application.socrata.tasks.drop_replaced_housing_units_table_task')
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_upserts_the_whole_dataset_when_table_is_not_reset_on_full_mode(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            mock_drop_replaced_housing_units_table_task: MagicMock,
+    ) -> None:
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = iter(self.pages)
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+
+        result: str = housing_unit_raw_data_ingestion_task(hbd_dataset_id='hg8x-zxpr', reset_table=False)
+
+        assert result == 'Number of HousingUnits inserted: 1200.'
+        # The whole dataset is downloaded, and upserted into the saved table instead of the staging table.
+        mock_ingestion_state_repository.return_value.get_high_water_mark.assert_not_called()
+        mock_socrata_client.return_value.housing_units_dataset_pages.assert_called_once_with(updated_since=None)
+        bulk_upsert_calls = mock_housing_units_bulk_loader.return_value.bulk_upsert.call_args_list
+        assert [len(bulk_upsert_call.args[0]) for bulk_upsert_call in bulk_upsert_calls] == [500, 500, 200]
+        mock_housing_units_bulk_loader.return_value.staging_load_lock.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.create_staging_table.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.bulk_insert.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.swap_staging_table.assert_not_called()
+        mock_drop_replaced_housing_units_table_task.delay.assert_not_called()
+        mock_ingestion_state_repository.return_value.save_high_water_mark.assert_called_once_with(
+            dataset_id='hg8x-zxpr', high_water_mark='2022-01-28T00:00:00.000Z'
+        )
+
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_does_not_reset_table_when_download_fails(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+    ) -> None:
+        def failing_pages():
+            raise ConnectionError('Test error.')
+            yield
+
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = failing_pages()
+        expected_error: SocrataDatasetDownloadError = SocrataDatasetDownloadError(
+            "Failed to download the dataset id hg8x-zxpr from Socrata api with the following error: Test error."
+        )
+
+        with pytest.raises(SocrataDatasetDownloadError) as ex:
+            housing_unit_raw_data_ingestion_task(hbd_dataset_id='hg8x-zxpr', reset_table=True)
+
+        assert ex.value.args == expected_error.args
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_repository.return_value.bulk_save.assert_not_called()
+        mock_update_state.assert_not_called()
+        mock_ingestion_state_repository.return_value.save_high_water_mark.assert_not_called()
+
+    @pytest.mark.parametrize(
+        'high_water_mark',
+        [
+            # Incremental ingestion after a previous ingestion of the dataset.
+            '2022-01-15T00:00:00.000Z',
+            # First incremental ingestion of the dataset.
+            None,
+        ]
+    )
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_upserts_the_rows_updated_since_the_high_water_mark_on_incremental_mode(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            high_water_mark: Optional[str],
+    ) -> None:
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = iter(self.pages)
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+        mock_ingestion_state_repository.return_value.get_high_water_mark.return_value = high_water_mark
+
+        result: str = housing_unit_raw_data_ingestion_task(
+            hbd_dataset_id='hg8x-zxpr',
+            reset_table=True,
+            load_strategy=LoadStrategy.copy.value,
+            mode=IngestionMode.incremental.value,
+        )
+
+        assert result == 'Number of HousingUnits inserted: 1200.'
+        mock_ingestion_state_repository.return_value.get_high_water_mark.assert_called_once_with(
+            dataset_id='hg8x-zxpr'
+        )
+        mock_socrata_client.return_value.housing_units_dataset_pages.assert_called_once_with(
+            updated_since=high_water_mark
+        )
+
+        # The table is never reset on incremental mode, and the rows are upserted regardless of the load strategy.
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_bulk_loader.return_value.bulk_copy.assert_not_called()
+        bulk_upsert_calls = mock_housing_units_bulk_loader.return_value.bulk_upsert.call_args_list
+        assert [len(bulk_upsert_call.args[0]) for bulk_upsert_call in bulk_upsert_calls] == [500, 500, 200]
+
+        mock_ingestion_state_repository.return_value.save_high_water_mark.assert_called_once_with(
+            dataset_id='hg8x-zxpr', high_water_mark='2022-01-28T00:00:00.000Z'
+        )
+
+    @pytest.mark.parametrize(
+        'load_strategy, expected_loader',
+        [
+            (LoadStrategy.core.value, 'bulk_insert'),
+            (LoadStrategy.copy.value, 'bulk_copy'),
+        ]
+    )
+    @mock.patch('application.socrata.tasks.drop_replaced_housing_units_table_task')
+    @mock.patch.object(housing_unit_raw_data_ingestion_task, 'update_state')
+    @mock.patch('application.socrata.tasks.IngestionStateRepository')
+    @mock.patch('application.socrata.tasks.HousingUnitsBulkLoader')
+    @mock.patch('application.socrata.tasks.HousingUnitsRepository')
+    @mock.patch('application.socrata.tasks.SocrataClient')
+    def test_apply_loads_the_staging_table_and_swaps_it_on_full_mode(
+            self,
+            mock_socrata_client: MagicMock,
+            mock_housing_units_repository: MagicMock,
+            mock_housing_units_bulk_loader: MagicMock,
+            mock_ingestion_state_repository: MagicMock,
+            mock_update_state: MagicMock,
+            mock_drop_replaced_housing_units_table_task: MagicMock,
+            load_strategy: str,
+            expected_loader: str,
+    ) -> None:
+        mock_socrata_client.return_value.housing_units_dataset_pages.return_value = iter(self.pages)
+        mock_socrata_client.return_value.CHUNK_SIZE = SocrataClient.CHUNK_SIZE
+        mock_socrata_client.return_value.UPDATED_AT_FIELD = SocrataClient.UPDATED_AT_FIELD
+        mock_housing_units_bulk_loader.return_value.swap_staging_table.return_value = 'housingunits_old_0a1b2c3d'
+        call_order: MagicMock = MagicMock()
+        for method_name in (
+                'staging_load_lock',
+                'create_staging_table',
+                expected_loader,
+                'build_staging_table_indexes',
+                'swap_staging_table',
+        ):
+            call_order.attach_mock(getattr(mock_housing_units_bulk_loader.return_value, method_name), method_name)
+
+        result: str = housing_unit_raw_data_ingestion_task(
+            hbd_dataset_id='hg8x-zxpr',
+            reset_table=True,
+            load_strategy=load_strategy,
+            mode=IngestionMode.full.value,
+        )
+
+        assert result == 'Number of HousingUnits inserted: 1200.'
+        mock_housing_units_repository.return_value.truncate_table.assert_not_called()
+        mock_housing_units_repository.return_value.bulk_save.assert_not_called()
+
+        # The indexes are built once all the rows are loaded into the staging table, and before the swap, and the
+        # API writes are blocked by the staging load lock from the creation of the staging table until the swap.
+        assert [method_call[0] for method_call in call_order.mock_calls] == [
+            'staging_load_lock',
+            'staging_load_lock().__enter__',
+            'create_staging_table',
+            expected_loader,
+            expected_loader,
+            expected_loader,
+            'build_staging_table_indexes',
+            'swap_staging_table',
+            'staging_load_lock().__exit__',
+        ]
+        loader_calls = getattr(mock_housing_units_bulk_loader.return_value, expected_loader).call_args_list
+        assert all(loader_call.kwargs == {'staging': True} for loader_call in loader_calls)
+        mock_drop_replaced_housing_units_table_task.delay.assert_called_once_with('housingunits_old_0a1b2c3d')
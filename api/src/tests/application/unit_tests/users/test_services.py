@@ -0,0 +1,159 @@
+from typing import List
+from unittest import mock
+from unittest.mock import MagicMock, AsyncMock
+
+import pytest
+
+from application.authentication.errors import AuthenticationError
+from application.authentication.services import GetJWTService
+from application.authentication.validators import JwtValidator
+from application.infrastructure.cache.caches import TTLCache, CacheStats
+from application.infrastructure.configurations.models import Configuration
+from application.rest_api.authentication.schemas import AuthenticateJwtResponse
+from application.users.enums import Group
+from application.users.models import User, UserPrincipal
+from application.users.services import LoginUserService, GetActiveUsersService
+
+
+class TestLoginUserService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, configuration: None) -> None:
+        self.mock_user_repository = AsyncMock()
+        self.mock_user_repository.get_principal_by_email.return_value = UserPrincipal(
+            email='customer_user@customer.com', user_group=Group.customer
+        )
+        self.users_cache = TTLCache()
+        self.login_tokens_cache = TTLCache(ttl_seconds=None)
+
+        self.login_user_service = LoginUserService(
+            user_repository=self.mock_user_repository,
+            get_jwt_service=GetJWTService(jwt_validator=JwtValidator(), config=Configuration.get()),
+            users_cache=self.users_cache,
+            login_tokens_cache=self.login_tokens_cache,
+        )
+
+        with mock.patch(
+                'application.users.services.USERS_CACHE_INVALIDATIONS'
+        ) as mock_users_cache_invalidations:
+            self.mock_users_cache_invalidations: MagicMock = mock_users_cache_invalidations
+            self.mock_users_cache_invalidations.subscribed = True
+            self.mock_users_cache_invalidations.sequence = 0
+            self.mock_users_cache_invalidations.is_settled.side_effect = (
+                lambda sequence, lag_seconds: self.mock_users_cache_invalidations.sequence == sequence
+            )
+            yield
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_issued_token_to_the_repeated_logins(self) -> None:
+        first_result: AuthenticateJwtResponse = await self.login_user_service.apply(
+            email='customer_user@customer.com', password='123456'
+        )
+        result: AuthenticateJwtResponse = await self.login_user_service.apply(
+            email='customer_user@customer.com', password='123456'
+        )
+
+        assert result == first_result
+        self.mock_user_repository.get_principal_by_email.assert_called_once_with('customer_user@customer.com')
+        assert self.login_tokens_cache.stats == CacheStats(hits=1, misses=1, size=1)
+        assert self.mock_users_cache_invalidations.subscribe.call_args_list == [
+            mock.call(self.users_cache), mock.call(self.login_tokens_cache),
+            mock.call(self.users_cache), mock.call(self.login_tokens_cache),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_apply_issues_a_new_token_from_the_cached_principal_for_other_passwords(self) -> None:
+        first_result: AuthenticateJwtResponse = await self.login_user_service.apply(
+            email='customer_user@customer.com', password='123456'
+        )
+        with mock.patch('application.authentication.services.time.time', return_value=1642846477.0):
+            result: AuthenticateJwtResponse = await self.login_user_service.apply(
+                email='customer_user@customer.com', password='654321'
+            )
+
+        assert result != first_result
+        self.mock_user_repository.get_principal_by_email.assert_called_once_with('customer_user@customer.com')
+        assert self.users_cache.stats == CacheStats(hits=1, misses=1, size=1)
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_use_the_caches_when_invalidations_are_not_subscribed(self) -> None:
+        self.mock_users_cache_invalidations.subscribed = False
+
+        await self.login_user_service.apply(email='customer_user@customer.com', password='123456')
+        await self.login_user_service.apply(email='customer_user@customer.com', password='123456')
+
+        assert self.mock_user_repository.get_principal_by_email.call_count == 2
+        assert len(self.users_cache) == len(self.login_tokens_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_cache_the_user_invalidated_while_it_is_read(self) -> None:
+        async def get_principal_by_email(email: str) -> UserPrincipal:
+            self.mock_users_cache_invalidations.sequence += 1
+            return UserPrincipal(email=email, user_group=Group.customer)
+
+        self.mock_user_repository.get_principal_by_email.side_effect = get_principal_by_email
+
+        await self.login_user_service.apply(email='customer_user@customer.com', password='123456')
+
+        assert len(self.users_cache) == len(self.login_tokens_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_apply_raise_error_when_user_does_not_exist(self) -> None:
+        self.mock_user_repository.get_principal_by_email.return_value = None
+        expected_error: AuthenticationError = AuthenticationError("The user does not exist.")
+
+        with pytest.raises(AuthenticationError) as ex:
+            await self.login_user_service.apply(email='deactivated_user@customer.com', password='123456')
+
+        assert ex.value.args == expected_error.args
+        assert len(self.users_cache) == len(self.login_tokens_cache) == 0
+
+
+class TestGetActiveUsersService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, stub_users: List[User]) -> None:
+        self.mock_user_repository = AsyncMock()
+        self.mock_user_repository.get_active_users.return_value = stub_users
+        self.active_users_cache = TTLCache(max_size=1)
+
+        self.get_active_users_service = GetActiveUsersService(
+            user_repository=self.mock_user_repository,
+            active_users_cache=self.active_users_cache,
+        )
+
+        with mock.patch(
+                'application.users.services.USERS_CACHE_INVALIDATIONS'
+        ) as mock_users_cache_invalidations:
+            self.mock_users_cache_invalidations: MagicMock = mock_users_cache_invalidations
+            self.mock_users_cache_invalidations.subscribed = True
+            self.mock_users_cache_invalidations.sequence = 0
+            self.mock_users_cache_invalidations.is_settled.side_effect = (
+                lambda sequence, lag_seconds: self.mock_users_cache_invalidations.sequence == sequence
+            )
+            yield
+
+    @pytest.mark.asyncio
+    async def test_apply_returns_the_cached_active_users(self, stub_users: List[User]) -> None:
+        first_result = await self.get_active_users_service.apply()
+        result = await self.get_active_users_service.apply()
+
+        assert first_result == result == stub_users
+        self.mock_user_repository.get_active_users.assert_called_once()
+        self.mock_users_cache_invalidations.subscribe.assert_called_with(self.active_users_cache)
+
+        # The invalidated active users are read again.
+        self.active_users_cache.clear()
+        await self.get_active_users_service.apply()
+
+        assert self.mock_user_repository.get_active_users.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_apply_does_not_use_the_cache_when_invalidations_are_not_subscribed(self) -> None:
+        self.mock_users_cache_invalidations.subscribed = False
+
+        await self.get_active_users_service.apply()
+        await self.get_active_users_service.apply()
+
+        assert self.mock_user_repository.get_active_users.call_count == 2
+        assert len(self.active_users_cache) == 0
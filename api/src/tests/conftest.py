@@ -16,11 +16,15 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import database_exists, create_database, drop_database
 
+from application.housing_units.caches import invalidate_housing_units_caches, refresh_housing_units_dictionaries
 from application.housing_units.models import HousingUnit
+from application.housing_units.repositories import HousingUnitsRepository
+from application.socrata.models import IngestionState  # noqa: F401, registers the table to the metadata.
 from application.infrastructure.configurations.models import Configuration
 from application.infrastructure.database.database import DatabaseEngineWrapper
 from application.infrastructure.database.models import HousingUnitsDBBaseModel
 from application.rest_api.housing_units.schemas import HousingUnitPostRequestBody
+from application.users.caches import invalidate_users_caches
 from application.users.enums import Group
 from application.users.models import User
 
@@ -56,6 +60,10 @@ def db_manager(configuration: None) -> None:
 
     drop_database(engine.url)
     engine.dispose()
+    # The HousingUnits, their values and the Users cached from the dropped database are not returned by the next tests.
+    invalidate_housing_units_caches()
+    refresh_housing_units_dictionaries()
+    invalidate_users_caches()
 
 
 @pytest.fixture
@@ -458,7 +466,7 @@ def stub_housing_units() -> List[HousingUnit]:
         ),
         HousingUnit(
             uuid=str(uuid.uuid4()),
-            project_id='project id 12',
+            project_id='project id 13',
             street_name='street name test 1',
             borough='Queens',
             postcode=1,
@@ -510,6 +518,10 @@ def populate_housing_units(db_manager, stub_housing_units) -> None:
     with Session() as session:
         with session.begin():
             session.add_all(stub_housing_units)
+    # The HousingUnits are written outside of the HousingUnitsRepository, so their values are collected and the caches
+    # are invalidated here.
+    HousingUnitsRepository(db_engine=DatabaseEngineWrapper()).refresh_canonical_values()
+    invalidate_housing_units_caches()
 
     yield
 
@@ -534,6 +546,7 @@ def populate_users(db_manager, stub_users) -> None:
     with Session() as session:
         with session.begin():
             session.add_all(stub_users)
+    invalidate_users_caches()
 
     yield
 
@@ -674,3 +687,62 @@ def housing_unit_repository_input(full_housing_unit_request_body) -> HousingUnit
         all_counted_units=housing_unit_body.all_counted_units,
         total_units=housing_unit_body.total_units,
     )
+
+
+@pytest.fixture
+def stub_socrata_records() -> List[Dict[str, str]]:
+    """
+    Returns a list of records in the format returned from the Socrata api for the Housing Units dataset.
+    Socrata returns every value as a string, and omits the fields that are empty.
+    """
+    records: List[Dict[str, str]] = []
+    for index in range(1, 1201):
+        record: Dict[str, str] = {
+            'project_id': str(40000 + index),
+            'project_name': 'PROJECT NAME {0}'.format(index),
+            'project_start_date': '2021-06-30T00:00:00.000',
+            'building_id': str(900000 + index),
+            'house_number': str(index),
+            'street_name': 'STREET NAME {0}'.format(index % 10),
+            'borough': ['Queens', 'Brooklyn', 'Staten Island', 'Manhattan', 'Bronx'][index % 5],
+            'community_board': 'BK-{0:02d}'.format(index % 18),
+            'council_district': str(index % 51),
+            'census_tract': str(index),
+            'neighborhood_tabulation_area': 'BK{0:02d}'.format(index % 99),
+            'latitude': '40.68{0:04d}'.format(index),
+            'longitude': '-73.91{0:04d}'.format(index),
+            'latitude_internal': '40.68{0:04d}'.format(index),
+            'longitude_internal': '-73.91{0:04d}'.format(index),
+            'reporting_construction_type': 'New Construction' if index % 2 else 'Preservation',
+            'extended_affordability_status': 'No',
+            'prevailing_wage_status': 'Non Prevailing Wage',
+            'extremely_low_income_units': '0',
+            'very_low_income_units': '0',
+            'low_income_units': '0',
+            'moderate_income_units': str(index % 20),
+            'middle_income_units': '0',
+            'other_income_units': '0',
+            'studio_units': '0',
+            '_1_br_units': str(index % 20),
+            '_2_br_units': '0',
+            '_3_br_units': '0',
+            '_4_br_units': '0',
+            '_5_br_units': '0',
+            '_6_br_units': '0',
+            'unknown_br_units': '0',
+            'counted_rental_units': str(index % 20),
+            'counted_homeownership_units': '0',
+            'all_counted_units': str(index % 20),
+            'total_units': str(index % 20),
+        }
+        # Every other record is a completed project with a postcode, as the rest ones have them empty.
+        if index % 2:
+            record['project_completion_date'] = '2022-01-31T00:00:00.000'
+            record['building_completion_date'] = '2022-01-31T00:00:00.000'
+            record['postcode'] = str(11200 + index % 40)
+            record['bbl'] = str(3000000000 + index)
+            record['bin'] = str(3000000 + index)
+
+        records.append(record)
+
+    return records